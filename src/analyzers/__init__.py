@@ -4,11 +4,60 @@
 AI分析とデータ取得機能を提供します。
 """
 
-from .ai_analyzer import analyze_with_claude, analyze_with_gemini
-from .data_fetcher import fetch_stock_data
+from .ai_analyzer import (
+    analyze_with_claude,
+    analyze_with_claude_async,
+    analyze_with_gemini,
+    analyze_with_gemini_async,
+    triage_with_claude,
+    triage_with_claude_async,
+    triage_with_gemini,
+    triage_with_gemini_async,
+)
+from .batch_analyzer import (
+    analyze_batch_with_claude,
+    analyze_batch_with_gemini,
+    clamp_batch_size,
+)
+from .batch_api import analyze_with_batch_api
+from .data_fetcher import (
+    fetch_news_async,
+    fetch_news_bulk,
+    fetch_quotes,
+    fetch_stock_data,
+    fetch_stock_data_async,
+)
+from .providers import (
+    AnalysisProvider,
+    get_provider,
+    get_provider_chain,
+    register_provider,
+    run_with_failover,
+    run_with_failover_async,
+)
 
 __all__ = [
+    "AnalysisProvider",
+    "analyze_batch_with_claude",
+    "analyze_batch_with_gemini",
+    "analyze_with_batch_api",
     "analyze_with_claude",
+    "analyze_with_claude_async",
     "analyze_with_gemini",
+    "analyze_with_gemini_async",
+    "clamp_batch_size",
+    "fetch_news_async",
+    "fetch_news_bulk",
+    "fetch_quotes",
     "fetch_stock_data",
+    "fetch_stock_data_async",
+    "get_provider",
+    "get_provider_chain",
+    "register_provider",
+    "run_with_failover",
+    "run_with_failover_async",
+    "triage_with_claude",
+    "triage_with_claude_async",
+    "triage_with_gemini",
+    "triage_with_gemini_async",
 ]
@@ -4,12 +4,58 @@ AI分析モジュール
 Claude SonnetまたはGemini APIを使用して株価・ニュースデータを分析します。
 """
 
-import anthropic
-import requests
-
-from config import CLAUDE_API_KEY, GEMINI_API_KEY
+import asyncio
+import contextvars
+import functools
+import time
+from contextlib import contextmanager
+
+from config import (
+    CLAUDE_API_KEY,
+    GEMINI_API_KEY,
+    STRUCTURED_OUTPUT,
+    TRIAGE_CLAUDE_MODEL,
+    TRIAGE_GEMINI_MODEL,
+    TRIAGE_MAX_TOKENS,
+)
 from loaders.preference_loader import generate_preference_prompt
 from loaders.stock_loader import calculate_tax, get_currency_for_symbol
+from reports.structured_analysis import (
+    analysis_json_schema,
+    gemini_response_schema,
+    parse_structured_response,
+    render_structured_analysis,
+)
+from runs.metrics import timed
+
+from .analysis_cache import (
+    FAILURE_PREFIX,
+    failure_report,
+    load_cached_analysis,
+    store_cached_analysis,
+)
+from .http_client import get_anthropic_client, get_async_anthropic_client, get_session
+from .prompt_cache import GEMINI_API_BASE, get_gemini_context_cache
+from .rate_limiter import estimate_tokens, get_rate_limiter
+from .retry import (
+    RetryExhaustedError,
+    call_anthropic_with_retry,
+    call_anthropic_with_retry_async,
+    request_with_retry,
+)
+from .usage_tracker import record_usage
+
+# 使用するモデル
+CLAUDE_MODEL = "claude-3-sonnet-latest"
+GEMINI_MODEL = "gemini-2.5-flash"
+
+# 実行中の分析のAPI往復時間を受け取るRoundTripObserver（計測しない場合はNone）
+_round_trip_observer = contextvars.ContextVar("round_trip_observer", default=None)
+
+# システムプロンプト（分析者としての役割）
+SYSTEM_PROMPT = (
+    "あなたは株式分析の専門家です。データに基づいて客観的な分析と売買判断を提供してください。"
+)
 
 # AI分析の観点（通常保有銘柄用）
 ANALYSIS_VIEWPOINTS_REGULAR = """以下の観点から分析してください（結論を最初に記載してください）：
@@ -46,7 +92,30 @@ ANALYSIS_VIEWPOINTS_SHORT = """以下の観点から分析してください（
 上記の投資家の志向性を考慮して、具体的な売買アクションを提案してください。
 空売りポジションについては、買戻しタイミングや追加空売りの検討を含めて判断してください。"""
 
+# 構造化出力モードで分析観点の後に追加する指示
+STRUCTURED_OUTPUT_INSTRUCTION = """回答は指定されたJSON形式で返してください。
+judgmentには売買判断、limit_priceには推奨する指値価格（推奨しない場合はnull）、reasonには売買判断の理由を1文で、
+markdown_bodyには観点3〜5（株価とニュースの要約、トレンドと見通し、リスク要因とチャンス要因）をマークダウン形式で記載してください。"""
+
+# 構造化出力モードでClaudeに呼び出させるツール名
+STRUCTURED_TOOL_NAME = "submit_analysis"
+
+# トリアージモードで分析観点の代わりに使う指示（通常保有銘柄用）
+TRIAGE_INSTRUCTION_REGULAR = """売買判断とその理由のみを、以下の2行の形式で回答してください（それ以外は記載しないでください）：
+売買判断: （買い/買い増し/売り/ホールド/様子見 のいずれか1つの単語）
+理由: （売買判断の理由を1文で）
+
+上記の投資家の志向性を考慮して判断してください。"""
+
+# トリアージモードで分析観点の代わりに使う指示（空売りポジション用）
+TRIAGE_INSTRUCTION_SHORT = """空売りポジションに対する売買判断とその理由のみを、以下の2行の形式で回答してください（それ以外は記載しないでください）：
+売買判断: （買戻し/追加売り/維持/様子見 のいずれか1つの単語）
+理由: （売買判断の理由を1文で）
+
+上記の投資家の志向性を考慮して判断してください。"""
+
 
+@timed("analyze_with_claude")
 def analyze_with_claude(data, preference_prompt=None):
     """
     Claude Sonnet APIを用いて株価・ニュースデータを分析し、要約・トレンド抽出・リスク/チャンスの指摘と売買判断を返す。
@@ -56,104 +125,618 @@ def analyze_with_claude(data, preference_prompt=None):
         preference_prompt: 投資志向性プロンプト（省略時は毎回生成）
     """
     if not CLAUDE_API_KEY or CLAUDE_API_KEY.strip() == "":
-        error_msg = (
-            "Claude APIエラー: APIキーが未設定です。環境変数CLAUDE_API_KEYを確認してください。"
-        )
-        print(error_msg)
-        return f"## 分析失敗\n\n**エラー内容:** {error_msg}"
-    client = anthropic.Anthropic(api_key=CLAUDE_API_KEY)
-    currency = get_currency_for_symbol(data["symbol"], data.get("currency"))
+        return claude_api_key_error()
+    return _request_claude(_build_claude_request(data, preference_prompt), data["symbol"])
 
-    # 保有状況に基づいたプロンプトの生成
-    holding_status = _generate_holding_status(data, currency)
 
-    # 投資志向性プロンプトの生成（渡されていない場合のみ）
-    if preference_prompt is None:
-        preference_prompt = generate_preference_prompt()
+@timed("analyze_with_claude")
+async def analyze_with_claude_async(data, preference_prompt=None):
+    """
+    analyze_with_claudeの非同期版。AsyncAnthropicクライアントで分析を行う。
 
-    # 空売りポジションかどうかを判定
-    quantity = data.get("quantity")
-    is_short_position = quantity is not None and quantity < 0
-    analysis_viewpoints = (
-        ANALYSIS_VIEWPOINTS_SHORT if is_short_position else ANALYSIS_VIEWPOINTS_REGULAR
-    )
+    Args:
+        data: 株価データと保有情報を含む辞書
+        preference_prompt: 投資志向性プロンプト（省略時は毎回生成）
+    """
+    if not CLAUDE_API_KEY or CLAUDE_API_KEY.strip() == "":
+        return claude_api_key_error()
+    request = _build_claude_request(data, preference_prompt)
+    return await _request_claude_async(request, data["symbol"])
 
-    prompt = f"""
-{data['symbol']}の分析をお願いします。
 
-現在の株価: {data['price']}{currency}
-{holding_status}
+@timed("triage_with_claude")
+def triage_with_claude(data, preference_prompt=None):
+    """
+    Claude APIに売買判断と理由のみを短い応答で問い合わせる（トリアージモード）。
 
-最近のニュース:
-{chr(10).join(f"- {news}" for news in data['news'])}
+    Args:
+        data: 株価データと保有情報を含む辞書
+        preference_prompt: 投資志向性プロンプト（省略時は毎回生成）
 
-{preference_prompt}
+    Returns:
+        str: 「売買判断: ○○」「理由: ○○」の2行（失敗時はエラーレポート）
+    """
+    if not CLAUDE_API_KEY or CLAUDE_API_KEY.strip() == "":
+        return claude_api_key_error()
+    return _request_claude(_build_claude_triage_request(data, preference_prompt), data["symbol"])
 
-{analysis_viewpoints}
-"""
+
+@timed("triage_with_claude")
+async def triage_with_claude_async(data, preference_prompt=None):
+    """
+    triage_with_claudeの非同期版。
+
+    Args:
+        data: 株価データと保有情報を含む辞書
+        preference_prompt: 投資志向性プロンプト（省略時は毎回生成）
+    """
+    if not CLAUDE_API_KEY or CLAUDE_API_KEY.strip() == "":
+        return claude_api_key_error()
+    request = _build_claude_triage_request(data, preference_prompt)
+    return await _request_claude_async(request, data["symbol"])
+
+
+def _request_claude(request, symbol):
+    """
+    Claude APIにリクエストを送信し、分析結果を返す（分析キャッシュ・レート制限・リトライを適用する）。
+
+    Args:
+        request: messages.createのキーワード引数の辞書
+        symbol: 銘柄コード
+
+    Returns:
+        str: 分析結果（失敗時はエラーレポート）
+    """
+    client = get_anthropic_client(CLAUDE_API_KEY)
+    cached = _load_cached("claude", request["model"], request, symbol)
+    if cached is not None:
+        return cached
+    tokens = estimate_claude_tokens(request)
+    get_rate_limiter("claude").acquire(tokens, symbol)
 
     try:
-        message = client.messages.create(
-            model="claude-3-sonnet-latest",
-            max_tokens=1500,
-            temperature=0.5,
-            system="あなたは株式分析の専門家です。データに基づいて客観的な分析と売買判断を提供してください。",
-            messages=[{"role": "user", "content": [{"type": "text", "text": prompt}]}],
+        message = call_anthropic_with_retry(
+            _timed_round_trip(functools.partial(client.messages.create, **request)), symbol, tokens
         )
-        return message.content[0].text
     except Exception as e:
-        error_msg = f"Claude API呼び出し失敗: {str(e)}"
-        print(error_msg)
-        return f"## 分析失敗\n\n**エラー内容:** {error_msg}\n\n**エラータイプ:** {type(e).__name__}"
+        return claude_call_error(e)
+    record_claude_usage(message)
+    analysis = _claude_analysis_text(message)
+    store_cached_analysis("claude", request["model"], request, analysis)
+    return analysis
+
+
+async def _request_claude_async(request, symbol):
+    """_request_claudeの非同期版。AsyncAnthropicクライアントで送信する。"""
+    client = get_async_anthropic_client(CLAUDE_API_KEY)
+    cached = _load_cached("claude", request["model"], request, symbol)
+    if cached is not None:
+        return cached
+    tokens = estimate_claude_tokens(request)
+    await get_rate_limiter("claude").acquire_async(tokens, symbol)
 
+    try:
+        message = await call_anthropic_with_retry_async(
+            _timed_round_trip_async(functools.partial(client.messages.create, **request)),
+            symbol,
+            tokens,
+        )
+    except Exception as e:
+        return claude_call_error(e)
+    record_claude_usage(message)
+    analysis = _claude_analysis_text(message)
+    store_cached_analysis("claude", request["model"], request, analysis)
+    return analysis
 
-def analyze_with_gemini(data, preference_prompt=None):
+
+def build_prompt_parts(data, preference_prompt=None, structured=False, triage=False):
     """
-    Gemini APIを用いて株価・ニュースデータを分析し、要約・トレンド抽出・リスク/チャンスの指摘と売買判断を返す。
+    分析プロンプトを、全銘柄で共通の先頭部分と銘柄ごとの部分に分けて組み立てる。
+
+    共通部分（投資志向性・分析観点）を先頭に置くことで、
+    プロバイダー側のプロンプトキャッシュが2回目以降のリクエストで有効になる。
 
     Args:
         data: 株価データと保有情報を含む辞書
         preference_prompt: 投資志向性プロンプト（省略時は毎回生成）
+        structured: 構造化出力（JSON）の指示を共通部分に含める場合True
+        triage: 分析観点の代わりにトリアージ（売買判断と理由のみ）の指示を使う場合True
+
+    Returns:
+        (共通部分, 銘柄ごとの部分) のタプル
     """
-    if not GEMINI_API_KEY or GEMINI_API_KEY.strip() == "":
-        error_msg = (
-            "Gemini APIエラー: APIキーが未設定です。環境変数GEMINI_API_KEYを確認してください。"
-        )
-        print(error_msg)
-        return f"## 分析失敗\n\n**エラー内容:** {error_msg}"
-    url = f"https://generativelanguage.googleapis.com/v1/models/gemini-2.5-flash:generateContent?key={GEMINI_API_KEY}"
     currency = get_currency_for_symbol(data["symbol"], data.get("currency"))
 
     # 保有状況に基づいたプロンプトの生成
-    holding_status = _generate_holding_status(data, currency)
+    holding_status = generate_holding_status(data, currency)
 
     # 投資志向性プロンプトの生成（渡されていない場合のみ）
     if preference_prompt is None:
         preference_prompt = generate_preference_prompt()
 
     # 空売りポジションかどうかを判定
-    quantity = data.get("quantity")
-    is_short_position = quantity is not None and quantity < 0
-    analysis_viewpoints = (
-        ANALYSIS_VIEWPOINTS_SHORT if is_short_position else ANALYSIS_VIEWPOINTS_REGULAR
-    )
+    if triage:
+        analysis_viewpoints = (
+            TRIAGE_INSTRUCTION_SHORT if _is_short_position(data) else TRIAGE_INSTRUCTION_REGULAR
+        )
+    else:
+        analysis_viewpoints = (
+            ANALYSIS_VIEWPOINTS_SHORT if _is_short_position(data) else ANALYSIS_VIEWPOINTS_REGULAR
+        )
 
-    prompt = (
-        "あなたは株式分析の専門家です。データに基づいて客観的な分析と売買判断を提供してください。\n\n"
+    static_prefix = f"{preference_prompt}\n\n{analysis_viewpoints}"
+    if structured:
+        static_prefix += f"\n\n{STRUCTURED_OUTPUT_INSTRUCTION}"
+    stock_prompt = (
         f"{data['symbol']}の分析をお願いします。\n\n"
         f"現在の株価: {data['price']}{currency}\n"
         f"{holding_status}\n\n"
         f"最近のニュース:\n"
-        f"{chr(10).join(f'- {news}' for news in data['news'])}\n\n"
-        f"{preference_prompt}\n\n"
-        f"{analysis_viewpoints}"
+        f"{chr(10).join(f'- {news}' for news in data['news'])}"
+    )
+    return static_prefix, stock_prompt
+
+
+def _build_claude_request(data, preference_prompt=None):
+    """
+    Claude APIのmessages.createに渡すリクエスト引数を組み立てる。
+
+    Args:
+        data: 株価データと保有情報を含む辞書
+        preference_prompt: 投資志向性プロンプト（省略時は毎回生成）
+
+    Returns:
+        messages.createのキーワード引数の辞書
+    """
+    static_prefix, stock_prompt = build_prompt_parts(data, preference_prompt, STRUCTURED_OUTPUT)
+    request = build_claude_request(static_prefix, stock_prompt, max_tokens=1500)
+    if STRUCTURED_OUTPUT:
+        # ツール呼び出しを強制し、ツールの入力として構造化した分析結果を受け取る
+        request["tools"] = [
+            {
+                "name": STRUCTURED_TOOL_NAME,
+                "description": "株式分析の結果（売買判断・指値・理由・本文）を提出する",
+                "input_schema": analysis_json_schema(_is_short_position(data)),
+            }
+        ]
+        request["tool_choice"] = {"type": "tool", "name": STRUCTURED_TOOL_NAME}
+    return request
+
+
+def _build_claude_triage_request(data, preference_prompt=None):
+    """
+    トリアージモードのClaude APIのリクエスト引数を組み立てる（最大出力トークン数を抑え、モデルを切り替え可能）。
+
+    Args:
+        data: 株価データと保有情報を含む辞書
+        preference_prompt: 投資志向性プロンプト（省略時は毎回生成）
+
+    Returns:
+        messages.createのキーワード引数の辞書
+    """
+    static_prefix, stock_prompt = build_prompt_parts(data, preference_prompt, triage=True)
+    request = build_claude_request(static_prefix, stock_prompt, max_tokens=TRIAGE_MAX_TOKENS)
+    request["model"] = TRIAGE_CLAUDE_MODEL or CLAUDE_MODEL
+    return request
+
+
+def _is_short_position(data):
+    """空売りポジション（保有数が負）かどうか"""
+    quantity = data.get("quantity")
+    return quantity is not None and quantity < 0
+
+
+def _claude_analysis_text(message):
+    """
+    Claude APIの応答から分析結果のテキストを取り出す。
+
+    構造化出力モードではツール入力（構造化した分析結果）をレポート用のマークダウンに変換する。
+    """
+    if STRUCTURED_OUTPUT:
+        for block in message.content:
+            if getattr(block, "type", None) == "tool_use":
+                return _structured_analysis(block.input)
+    return message.content[0].text
+
+
+def _structured_analysis(response):
+    """
+    構造化出力の応答をレポート用のマークダウンに変換する。
+
+    形式が不正な場合は応答をそのまま返し、目次・レポート簡略化では従来の正規表現による抽出を行う。
+    """
+    fields = parse_structured_response(response)
+    if fields is None:
+        print("警告: 構造化出力の形式が不正なため、応答をそのまま使用します")
+        return response if isinstance(response, str) else str(response)
+    return render_structured_analysis(fields)
+
+
+def build_claude_request(static_prefix, prompt, max_tokens):
+    """
+    共通部分をキャッシュ対象（cache_control）としたClaude APIのリクエスト引数を組み立てる。
+
+    Args:
+        static_prefix: 全リクエストで共通のプロンプト
+        prompt: リクエストごとに異なるプロンプト
+        max_tokens: 最大出力トークン数
+
+    Returns:
+        messages.createのキーワード引数の辞書
+    """
+    return {
+        "model": CLAUDE_MODEL,
+        "max_tokens": max_tokens,
+        "temperature": 0.5,
+        "system": [
+            {"type": "text", "text": SYSTEM_PROMPT},
+            {"type": "text", "text": static_prefix, "cache_control": {"type": "ephemeral"}},
+        ],
+        "messages": [{"role": "user", "content": [{"type": "text", "text": prompt}]}],
+    }
+
+
+class RoundTripObserver:
+    """
+    API呼び出しの往復時間を集める（分析プロバイダーのレイテンシ計測用）。
+
+    分析キャッシュのヒット・レート制限の待機・リトライの待機は含めず、
+    成功した送信1回ごとの往復時間のみを記録する。
+
+    Args:
+        on_start: 最初の送信の開始時（送信せずに終了した場合は終了時）に1回だけ呼び出す関数
+    """
+
+    def __init__(self, on_start=None):
+        self.samples = []
+        self._on_start = on_start
+
+    def notify_start(self):
+        """送信の開始を通知する（2回目以降は何もしない）"""
+        callback, self._on_start = self._on_start, None
+        if callback:
+            callback()
+
+    def record(self, seconds):
+        """送信1回分の往復時間を記録する"""
+        self.samples.append(seconds)
+
+
+@contextmanager
+def observe_round_trips(observer):
+    """
+    withブロック内の分析のAPI往復時間をobserverに記録する。
+
+    Args:
+        observer: RoundTripObserver
+
+    Returns:
+        RoundTripObserver: 渡したobserver
+    """
+    token = _round_trip_observer.set(observer)
+    try:
+        yield observer
+    finally:
+        _round_trip_observer.reset(token)
+
+
+def _timed_round_trip(send):
+    """送信関数をラップし、成功した送信の往復時間を実行中のRoundTripObserverに記録する"""
+
+    def timed_send():
+        observer = _round_trip_observer.get()
+        if observer is None:
+            return send()
+        observer.notify_start()
+        start = time.perf_counter()
+        response = send()
+        observer.record(time.perf_counter() - start)
+        return response
+
+    return timed_send
+
+
+def _timed_round_trip_async(send):
+    """_timed_round_tripの非同期版（sendはawaitableを返す関数）"""
+
+    async def timed_send():
+        observer = _round_trip_observer.get()
+        if observer is None:
+            return await send()
+        observer.notify_start()
+        start = time.perf_counter()
+        response = await send()
+        observer.record(time.perf_counter() - start)
+        return response
+
+    return timed_send
+
+
+def _load_cached(provider, model, request, symbol):
+    """キャッシュ済みの分析結果を取得する（ヒット時はメッセージを表示）"""
+    cached = load_cached_analysis(provider, model, request)
+    if cached is not None:
+        print(f"分析キャッシュを利用: {symbol}")
+    return cached
+
+
+def estimate_claude_tokens(request):
+    """Claude APIリクエストの入力トークン数を概算する。"""
+    texts = [block["text"] for block in request["system"]]
+    for message in request["messages"]:
+        texts.extend(block["text"] for block in message["content"])
+    return sum(estimate_tokens(text) for text in texts)
+
+
+def record_claude_usage(message):
+    """Claude APIの応答に含まれるトークン使用量を記録する。"""
+    usage = getattr(message, "usage", None)
+    record_usage(
+        "claude",
+        input_tokens=_int_attr(usage, "input_tokens"),
+        output_tokens=_int_attr(usage, "output_tokens"),
+        cached_tokens=_int_attr(usage, "cache_read_input_tokens"),
+        cache_write_tokens=_int_attr(usage, "cache_creation_input_tokens"),
+    )
+
+
+def _int_attr(obj, name):
+    """属性が整数の場合はその値を、それ以外は0を返す。"""
+    value = getattr(obj, name, None)
+    return value if isinstance(value, int) else 0
+
+
+def claude_api_key_error():
+    """Claude APIキー未設定時のエラーレポートを返す。"""
+    error_msg = "Claude APIエラー: APIキーが未設定です。環境変数CLAUDE_API_KEYを確認してください。"
+    print(error_msg)
+    return failure_report(error_msg)
+
+
+def claude_call_error(e):
+    """Claude API呼び出し失敗時のエラーレポートを返す。"""
+    error_msg = f"Claude API呼び出し失敗: {str(e)}"
+    print(error_msg)
+    return f"## 分析失敗\n\n**エラー内容:** {error_msg}\n\n**エラータイプ:** {type(e).__name__}"
+
+
+@timed("analyze_with_gemini")
+def analyze_with_gemini(data, preference_prompt=None):
+    """
+    Gemini APIを用いて株価・ニュースデータを分析し、要約・トレンド抽出・リスク/チャンスの指摘と売買判断を返す。
+
+    Args:
+        data: 株価データと保有情報を含む辞書
+        preference_prompt: 投資志向性プロンプト（省略時は毎回生成）
+    """
+    if not GEMINI_API_KEY or GEMINI_API_KEY.strip() == "":
+        return gemini_api_key_error()
+    static_prefix, stock_prompt = build_prompt_parts(data, preference_prompt, STRUCTURED_OUTPUT)
+    return _request_gemini(
+        static_prefix,
+        stock_prompt,
+        data["symbol"],
+        GEMINI_MODEL,
+        _gemini_generation_config(data),
+        _gemini_analysis_text,
+    )
+
+
+@timed("analyze_with_gemini")
+async def analyze_with_gemini_async(data, preference_prompt=None):
+    """
+    analyze_with_geminiの非同期版。
+
+    レート制限の待機はイベントループ上で行い、Gemini APIの呼び出しは
+    requestsの共有セッションを使うためスレッドに委譲する。
+
+    Args:
+        data: 株価データと保有情報を含む辞書
+        preference_prompt: 投資志向性プロンプト（省略時は毎回生成）
+    """
+    if not GEMINI_API_KEY or GEMINI_API_KEY.strip() == "":
+        return gemini_api_key_error()
+    static_prefix, stock_prompt = build_prompt_parts(data, preference_prompt, STRUCTURED_OUTPUT)
+    return await _request_gemini_async(
+        static_prefix,
+        stock_prompt,
+        data["symbol"],
+        GEMINI_MODEL,
+        _gemini_generation_config(data),
+        _gemini_analysis_text,
+    )
+
+
+@timed("triage_with_gemini")
+def triage_with_gemini(data, preference_prompt=None):
+    """
+    Gemini APIに売買判断と理由のみを短い応答で問い合わせる（トリアージモード）。
+
+    Args:
+        data: 株価データと保有情報を含む辞書
+        preference_prompt: 投資志向性プロンプト（省略時は毎回生成）
+
+    Returns:
+        str: 「売買判断: ○○」「理由: ○○」の2行（失敗時はエラーレポート）
+    """
+    if not GEMINI_API_KEY or GEMINI_API_KEY.strip() == "":
+        return gemini_api_key_error()
+    static_prefix, stock_prompt = build_prompt_parts(data, preference_prompt, triage=True)
+    return _request_gemini(
+        static_prefix,
+        stock_prompt,
+        data["symbol"],
+        TRIAGE_GEMINI_MODEL or GEMINI_MODEL,
+        _gemini_triage_generation_config(),
+    )
+
+
+@timed("triage_with_gemini")
+async def triage_with_gemini_async(data, preference_prompt=None):
+    """
+    triage_with_geminiの非同期版。
+
+    Args:
+        data: 株価データと保有情報を含む辞書
+        preference_prompt: 投資志向性プロンプト（省略時は毎回生成）
+    """
+    if not GEMINI_API_KEY or GEMINI_API_KEY.strip() == "":
+        return gemini_api_key_error()
+    static_prefix, stock_prompt = build_prompt_parts(data, preference_prompt, triage=True)
+    return await _request_gemini_async(
+        static_prefix,
+        stock_prompt,
+        data["symbol"],
+        TRIAGE_GEMINI_MODEL or GEMINI_MODEL,
+        _gemini_triage_generation_config(),
+    )
+
+
+def _request_gemini(static_prefix, prompt, symbol, model, generation_config=None, postprocess=None):
+    """
+    Gemini APIにリクエストを送信し、応答のテキストを返す（分析キャッシュ・レート制限・リトライを適用する）。
+
+    Args:
+        static_prefix: 全リクエストで共通のプロンプト
+        prompt: 銘柄ごとのプロンプト
+        symbol: 銘柄コード
+        model: モデル名
+        generation_config: generationConfigの設定（省略可）
+        postprocess: 応答のテキストを分析結果に変換する関数（キャッシュには変換後の結果を保存する）
+
+    Returns:
+        str: 分析結果（失敗時はエラーレポート）
+    """
+    cache_request = gemini_cache_request(static_prefix, prompt)
+    cached = _load_cached("gemini", model, cache_request, symbol)
+    if cached is not None:
+        return cached
+    url, payload = build_gemini_request(static_prefix, prompt, generation_config, model)
+    tokens = estimate_gemini_tokens(static_prefix, prompt)
+    get_rate_limiter("gemini").acquire(tokens, symbol)
+    analysis = call_gemini(url, payload, symbol, tokens)
+    if postprocess:
+        analysis = postprocess(analysis)
+    store_cached_analysis("gemini", model, cache_request, analysis)
+    return analysis
+
+
+async def _request_gemini_async(
+    static_prefix, prompt, symbol, model, generation_config=None, postprocess=None
+):
+    """_request_geminiの非同期版。レート制限はイベントループ上で待機し、送信はスレッドに委譲する。"""
+    cache_request = gemini_cache_request(static_prefix, prompt)
+    cached = _load_cached("gemini", model, cache_request, symbol)
+    if cached is not None:
+        return cached
+    url, payload = await asyncio.to_thread(
+        build_gemini_request, static_prefix, prompt, generation_config, model
+    )
+    tokens = estimate_gemini_tokens(static_prefix, prompt)
+    await get_rate_limiter("gemini").acquire_async(tokens, symbol)
+    analysis = await asyncio.to_thread(call_gemini, url, payload, symbol, tokens)
+    if postprocess:
+        analysis = postprocess(analysis)
+    store_cached_analysis("gemini", model, cache_request, analysis)
+    return analysis
+
+
+def build_gemini_request(static_prefix, prompt, generation_config=None, model=GEMINI_MODEL):
+    """
+    Gemini APIのgenerateContentに送信するURLとペイロードを組み立てる。
+
+    共通部分のcachedContentsを利用できる場合はキャッシュを参照し、
+    銘柄ごとの部分のみを送信する。利用できない場合は共通部分を先頭に置いた
+    プロンプト全体を送信する。
+
+    Args:
+        static_prefix: 全リクエストで共通のプロンプト
+        prompt: リクエストごとに異なるプロンプト
+        generation_config: generationConfigの設定（省略可）
+        model: モデル名
+
+    Returns:
+        (URL, ペイロード辞書) のタプル
+    """
+    context_cache = get_gemini_context_cache()
+    cache_name = (
+        context_cache.get_or_create(model, SYSTEM_PROMPT, static_prefix) if context_cache else None
     )
+
+    if cache_name:
+        url = f"{GEMINI_API_BASE}/v1beta/models/{model}:generateContent?key={GEMINI_API_KEY}"
+        payload = {
+            "cachedContent": cache_name,
+            "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+        }
+    else:
+        url = f"{GEMINI_API_BASE}/v1/models/{model}:generateContent?key={GEMINI_API_KEY}"
+        payload = {
+            "contents": [{"parts": [{"text": f"{SYSTEM_PROMPT}\n\n{static_prefix}\n\n{prompt}"}]}]
+        }
+    if generation_config:
+        payload["generationConfig"] = generation_config
+    return url, payload
+
+
+def _gemini_generation_config(data):
+    """構造化出力モードのgenerationConfig（JSONで応答させるresponseSchema、無効時はNone）"""
+    if not STRUCTURED_OUTPUT:
+        return None
+    return {
+        "responseMimeType": "application/json",
+        "responseSchema": gemini_response_schema(_is_short_position(data)),
+    }
+
+
+def _gemini_triage_generation_config():
+    """トリアージモードのgenerationConfig（最大出力トークン数を抑え、思考トークンを使わない）"""
+    return {"maxOutputTokens": TRIAGE_MAX_TOKENS, "thinkingConfig": {"thinkingBudget": 0}}
+
+
+def _gemini_analysis_text(response_text):
+    """構造化出力モードではGeminiのJSON応答をレポート用のマークダウンに変換する（失敗時はそのまま）"""
+    if not STRUCTURED_OUTPUT or response_text.startswith(FAILURE_PREFIX):
+        return response_text
+    return _structured_analysis(response_text)
+
+
+def gemini_cache_request(static_prefix, prompt):
+    """分析キャッシュのキーに使うGeminiリクエストの内容（キャッシュ名に依存しない形）"""
+    return {"system": SYSTEM_PROMPT, "prefix": static_prefix, "prompt": prompt}
+
+
+def call_gemini(url, payload, label=None, tokens=0):
+    """
+    Gemini APIを呼び出し、分析結果のテキスト（失敗時はエラーレポート）を返す。
+
+    429・5xx・通信エラーは共通のリトライ方針でリトライし（リトライごとにレートリミッターの枠を消費する）、
+    上限回数または期限に達した場合はエラーレポートを返す。
+
+    Args:
+        url: generateContentのURL
+        payload: リクエストペイロード
+        label: リトライの待機メッセージに表示する識別子（銘柄コードなど）
+        tokens: 1リクエストで消費する見込みのトークン数
+
+    Returns:
+        str: 分析結果（マークダウン形式）
+    """
     headers = {"Content-Type": "application/json"}
-    payload = {"contents": [{"parts": [{"text": prompt}]}]}
+    send = _timed_round_trip(
+        functools.partial(get_session(url).post, url, headers=headers, json=payload, timeout=60)
+    )
     try:
-        resp = requests.post(url, headers=headers, json=payload, timeout=60)
+        try:
+            resp = request_with_retry(send, label, "gemini", tokens)
+        except RetryExhaustedError as e:
+            if e.last_error.response is None:
+                raise
+            print(f"Gemini API: {e}")
+            resp = e.last_error.response
         if resp.status_code == 200:
             result = resp.json()
+            record_gemini_usage(result)
             return result["candidates"][0]["content"]["parts"][0]["text"]
         else:
             error_msg = f"Gemini APIエラー: HTTPステータス {resp.status_code}"
@@ -166,7 +749,33 @@ def analyze_with_gemini(data, preference_prompt=None):
         return f"## 分析失敗\n\n**エラー内容:** {error_msg}\n\n**エラータイプ:** {type(e).__name__}"
 
 
-def _generate_holding_status(data, currency):
+def record_gemini_usage(result):
+    """Gemini APIの応答に含まれるトークン使用量を記録する。"""
+    metadata = result.get("usageMetadata") if isinstance(result, dict) else None
+    if not isinstance(metadata, dict):
+        metadata = {}
+    cached_tokens = metadata.get("cachedContentTokenCount", 0)
+    record_usage(
+        "gemini",
+        input_tokens=metadata.get("promptTokenCount", 0) - cached_tokens,
+        output_tokens=metadata.get("candidatesTokenCount", 0),
+        cached_tokens=cached_tokens,
+    )
+
+
+def estimate_gemini_tokens(static_prefix, prompt):
+    """Gemini APIリクエストの入力トークン数を概算する。"""
+    return estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(static_prefix) + estimate_tokens(prompt)
+
+
+def gemini_api_key_error():
+    """Gemini APIキー未設定時のエラーレポートを返す。"""
+    error_msg = "Gemini APIエラー: APIキーが未設定です。環境変数GEMINI_API_KEYを確認してください。"
+    print(error_msg)
+    return failure_report(error_msg)
+
+
+def generate_holding_status(data, currency):
     """
     保有状況に基づいたプロンプトの文字列を生成する。
 
@@ -0,0 +1,263 @@
+"""
+AI分析キャッシュモジュール
+
+描画済みのプロンプト・プロバイダー・モデルのハッシュをキーとして、
+AI分析結果をディスクにキャッシュします。入力が前回と同一であれば
+ネットワークにアクセスせずに保存済みのマークダウンを返します。
+
+キャッシュはTTLを過ぎると無効になり、合計サイズが上限を超えた場合は
+最終利用日時の古いものから削除されます。合計サイズは最初の保存時にディレクトリを走査して求め、
+以降は保存・削除のたびに更新するため、上限を超えるまでは保存ごとの走査を行いません。
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from threading import Lock
+
+from config import (
+    ANALYSIS_CACHE_DIR,
+    ANALYSIS_CACHE_ENABLED,
+    ANALYSIS_CACHE_MAX_MB,
+    ANALYSIS_CACHE_TTL_HOURS,
+    resolve_project_path,
+)
+
+# 分析失敗時のレポートはキャッシュしない
+FAILURE_PREFIX = "## 分析失敗"
+
+# 合計サイズが上限を超えた場合に、上限に対してこの割合まで削除する（上限付近での走査の繰り返しを防ぐ）
+EVICTION_TARGET_RATIO = 0.9
+
+
+class AnalysisCache:
+    """
+    ディスク上のAI分析キャッシュ。
+
+    Args:
+        directory: キャッシュファイルを保存するディレクトリ
+        ttl_seconds: キャッシュの有効期間（秒）
+        max_bytes: キャッシュの合計サイズの上限（バイト）
+        clock: 現在時刻（UNIX時間）を返す関数（テスト用）
+    """
+
+    def __init__(self, directory, ttl_seconds, max_bytes, clock=time.time):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = Lock()
+        # 合計サイズ（バイト）。最初の保存時に走査するまではNone
+        self._total_bytes = None
+
+    @staticmethod
+    def make_key(provider, model, request):
+        """
+        プロバイダー・モデル・リクエスト内容からキャッシュキー（SHA-256）を生成する。
+
+        Args:
+            provider: プロバイダー名（'claude' または 'gemini'）
+            model: モデル名
+            request: 描画済みプロンプトを含むリクエスト内容（JSONシリアライズ可能な値）
+
+        Returns:
+            str: 16進数のハッシュ文字列
+        """
+        canonical = json.dumps(
+            {"provider": provider, "model": model, "request": request},
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        キャッシュされた分析結果を取得する。
+
+        Args:
+            key: キャッシュキー
+
+        Returns:
+            str: 分析結果（存在しない・期限切れの場合はNone）
+        """
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if self._clock() - entry.get("created_at", 0) > self.ttl_seconds:
+            with self._lock:
+                self._discard(path)
+            return None
+
+        # 最終利用日時を更新（サイズ超過時の削除順序に使用）
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry.get("analysis")
+
+    def set(self, key, analysis, metadata=None):
+        """
+        分析結果をキャッシュに保存する（一時ファイルへの書き込み後に置き換え）。
+
+        Args:
+            key: キャッシュキー
+            analysis: 分析結果（マークダウン形式）
+            metadata: 付加情報（プロバイダー名など）
+        """
+        entry = {"created_at": self._clock(), "analysis": analysis}
+        if metadata:
+            entry.update(metadata)
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        # 一時ファイル名はスレッド・プロセスごとに一意にする
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=self.directory, suffix=".tmp", delete=False
+        ) as f:
+            tmp_path = f.name
+            json.dump(entry, f, ensure_ascii=False)
+
+        with self._lock:
+            replaced_size = self._size(path)
+            os.replace(tmp_path, path)
+            if self._total_bytes is None:
+                self._evict()
+            else:
+                self._total_bytes += self._size(path) - replaced_size
+                if self._total_bytes > self.max_bytes:
+                    self._evict()
+
+    def _evict(self):
+        """
+        ディレクトリを走査して期限切れのエントリを削除し、合計サイズを求め直す
+        （上限を超える場合は上限のEVICTION_TARGET_RATIOまで古い順に削除する）。ロックを保持して呼び出す。
+        """
+        entries = []
+        now = self._clock()
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.ttl_seconds:
+                self._remove(path)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            target = self.max_bytes * EVICTION_TARGET_RATIO
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                self._remove(path)
+                total -= size
+        self._total_bytes = total
+
+    def _discard(self, path):
+        """エントリを削除し、合計サイズから差し引く。ロックを保持して呼び出す。"""
+        size = self._size(path)
+        self._remove(path)
+        if self._total_bytes is not None:
+            self._total_bytes = max(self._total_bytes - size, 0)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    @staticmethod
+    def _size(path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+_cache = None
+_cache_lock = Lock()
+
+
+def get_analysis_cache():
+    """
+    設定に基づく共有キャッシュを取得する。
+
+    Returns:
+        AnalysisCache: キャッシュ（ANALYSIS_CACHE_ENABLEDが無効の場合はNone）
+    """
+    global _cache
+    if not ANALYSIS_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnalysisCache(
+                resolve_project_path(ANALYSIS_CACHE_DIR),
+                ANALYSIS_CACHE_TTL_HOURS * 3600,
+                ANALYSIS_CACHE_MAX_MB * 1024 * 1024,
+            )
+        return _cache
+
+
+def load_cached_analysis(provider, model, request):
+    """
+    リクエストに対応するキャッシュ済みの分析結果を取得する。
+
+    Args:
+        provider: プロバイダー名
+        model: モデル名
+        request: 描画済みプロンプトを含むリクエスト内容
+
+    Returns:
+        str: 分析結果（キャッシュ無効・未登録の場合はNone）
+    """
+    cache = get_analysis_cache()
+    if cache is None:
+        return None
+    return cache.get(cache.make_key(provider, model, request))
+
+
+def store_cached_analysis(provider, model, request, analysis):
+    """
+    分析結果をキャッシュに保存する（失敗レポートは保存しない）。
+
+    Args:
+        provider: プロバイダー名
+        model: モデル名
+        request: 描画済みプロンプトを含むリクエスト内容
+        analysis: 分析結果（マークダウン形式）
+    """
+    cache = get_analysis_cache()
+    if cache is None or not analysis or analysis.startswith(FAILURE_PREFIX):
+        return
+    try:
+        cache.set(
+            cache.make_key(provider, model, request),
+            analysis,
+            {"provider": provider, "model": model},
+        )
+    except OSError as e:
+        print(f"分析キャッシュの保存に失敗しました: {e}")
+
+
+def failure_report(error_msg):
+    """分析失敗のレポートを生成する（FAILURE_PREFIXで始まるためキャッシュされない）"""
+    return f"{FAILURE_PREFIX}\n\n**エラー内容:** {error_msg}"
+
+
+def fail_all(symbols, error_report):
+    """全銘柄に同じエラーレポートを割り当てる"""
+    return {symbol: error_report for symbol in symbols}
@@ -0,0 +1,166 @@
+"""
+分析状態管理モジュール
+
+銘柄ごとに前回AI分析した時点の株価・ニュース・分析結果を記録し、
+株価が閾値以上動いたか新しいニュースがある銘柄のみ再分析するための判定を提供します。
+"""
+
+import datetime
+import json
+import os
+from threading import Lock
+
+from config import (
+    ANALYSIS_STATE_PATH,
+    CHANGE_DRIVEN_ANALYSIS,
+    PRICE_CHANGE_THRESHOLD_PCT,
+    resolve_project_path,
+)
+
+from .analysis_cache import FAILURE_PREFIX
+
+
+class AnalysisStateStore:
+    """
+    銘柄ごとの前回分析状態をJSONファイルに保存するストア。
+
+    Args:
+        path: 状態ファイルのパス
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = Lock()
+        self._records = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                records = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"警告: 分析状態ファイルを読み込めませんでした: {e}")
+            return {}
+        return records if isinstance(records, dict) else {}
+
+    def get(self, symbol):
+        """銘柄の前回分析状態を取得する（未記録の場合はNone）"""
+        with self._lock:
+            return self._records.get(symbol)
+
+    def find_carry_over(self, data, threshold_pct):
+        """
+        前回の分析結果を再利用できるか判定する。
+
+        株価の変動率が閾値以下で、前回にないニュースが含まれていない場合に再利用できる。
+
+        Args:
+            data: fetch_stock_dataで取得したデータ
+            threshold_pct: 再分析する株価変動率の閾値（%）
+
+        Returns:
+            dict: 再利用できる場合は前回の分析状態（price, news, analysis, analyzed_at）、
+                  再分析が必要な場合はNone
+        """
+        previous = self.get(data["symbol"])
+        if not previous or not previous.get("analysis"):
+            return None
+
+        price = data.get("price")
+        previous_price = previous.get("price")
+        if not price or not previous_price:
+            return None
+        change_pct = abs(price - previous_price) / previous_price * 100
+        if change_pct > threshold_pct:
+            return None
+
+        previous_news = set(previous.get("news") or [])
+        if any(news not in previous_news for news in data.get("news") or []):
+            return None
+
+        return previous
+
+    def record(self, data, analysis):
+        """
+        AI分析した時点の株価・ニュース・分析結果を記録する（失敗した分析は記録しない）。
+
+        Args:
+            data: fetch_stock_dataで取得したデータ
+            analysis: AI分析結果（マークダウン形式）
+        """
+        if not analysis or analysis.startswith(FAILURE_PREFIX):
+            return
+        with self._lock:
+            self._records[data["symbol"]] = {
+                "price": data.get("price"),
+                "news": list(data.get("news") or []),
+                "analysis": analysis,
+                "analyzed_at": datetime.date.today().isoformat(),
+            }
+
+    def save(self):
+        """状態をファイルに保存する（一時ファイルへの書き込み後に置き換え）"""
+        with self._lock:
+            records = dict(self._records)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+_store = None
+_store_lock = Lock()
+
+
+def get_analysis_state_store():
+    """
+    設定に基づく共有の分析状態ストアを取得する。
+
+    Returns:
+        AnalysisStateStore: ストア（CHANGE_DRIVEN_ANALYSISが無効の場合はNone）
+    """
+    global _store
+    if not CHANGE_DRIVEN_ANALYSIS:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = AnalysisStateStore(resolve_project_path(ANALYSIS_STATE_PATH))
+        return _store
+
+
+def find_carry_over(data):
+    """
+    変化検知モードで前回の分析結果を再利用できる場合にその状態を返す。
+
+    Args:
+        data: fetch_stock_dataで取得したデータ
+
+    Returns:
+        dict: 再利用する前回の分析状態（モード無効・再分析が必要な場合はNone）
+    """
+    store = get_analysis_state_store()
+    if store is None:
+        return None
+    return store.find_carry_over(data, PRICE_CHANGE_THRESHOLD_PCT)
+
+
+def record_analysis(data, analysis):
+    """変化検知モードが有効な場合に今回の分析状態を記録する"""
+    store = get_analysis_state_store()
+    if store is not None:
+        store.record(data, analysis)
+
+
+def save_analysis_state():
+    """変化検知モードが有効な場合に分析状態をファイルへ保存する"""
+    store = get_analysis_state_store()
+    if store is None:
+        return
+    try:
+        store.save()
+    except OSError as e:
+        print(f"分析状態の保存に失敗しました: {e}")
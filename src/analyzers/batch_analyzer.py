@@ -0,0 +1,262 @@
+"""
+複数銘柄一括分析モジュール
+
+同じ分類の複数銘柄を1回のAI APIリクエストにまとめて分析します。
+投資志向性プロンプトや分析観点などの共通部分を1回だけ送信し、
+銘柄ごとの結果をJSON配列で受け取って銘柄単位のマークダウンに分割します。
+応答に含まれなかった銘柄は1銘柄ずつの分析でやり直します。
+"""
+
+import functools
+import json
+import re
+
+from config import CLAUDE_API_KEY, GEMINI_API_KEY
+from loaders.preference_loader import generate_preference_prompt
+from loaders.stock_loader import get_currency_for_symbol
+from runs.metrics import timed
+
+from .ai_analyzer import (
+    ANALYSIS_VIEWPOINTS_REGULAR,
+    ANALYSIS_VIEWPOINTS_SHORT,
+    CLAUDE_MODEL,
+    GEMINI_MODEL,
+    analyze_with_claude,
+    analyze_with_gemini,
+    build_claude_request,
+    build_gemini_request,
+    call_gemini,
+    claude_api_key_error,
+    claude_call_error,
+    estimate_claude_tokens,
+    estimate_gemini_tokens,
+    gemini_api_key_error,
+    gemini_cache_request,
+    generate_holding_status,
+    record_claude_usage,
+)
+from .analysis_cache import (
+    FAILURE_PREFIX,
+    fail_all,
+    load_cached_analysis,
+    store_cached_analysis,
+)
+from .http_client import get_anthropic_client
+from .rate_limiter import get_rate_limiter
+from .retry import call_anthropic_with_retry
+
+# 1銘柄あたりの最大出力トークン数と、1リクエストあたりの上限
+BATCH_MAX_TOKENS_PER_STOCK = 1500
+CLAUDE_MAX_OUTPUT_TOKENS = 8192
+# 全銘柄分の出力が上限に収まる1リクエストあたりの最大銘柄数
+MAX_BATCH_SIZE = CLAUDE_MAX_OUTPUT_TOKENS // BATCH_MAX_TOKENS_PER_STOCK
+
+# 一括分析の応答をJSONで受け取るgenerationConfig
+GEMINI_BATCH_GENERATION_CONFIG = {"responseMimeType": "application/json"}
+
+# 出力形式の指示（銘柄コードをキーとしたJSON配列）
+BATCH_OUTPUT_INSTRUCTION = """回答は以下の形式のJSON配列のみで出力してください（前後に説明文を付けないこと）。
+[{"symbol": "銘柄コード", "analysis": "その銘柄の分析結果（マークダウン形式）"}, ...]
+- 以下のすべての銘柄について、1銘柄につき1要素を出力してください。
+- analysisには上記の観点に沿った1銘柄分のレポートを記載し、売買判断は「売買判断: ○○」の形式で明示してください。"""
+
+
+@timed("analyze_batch_with_claude")
+def analyze_batch_with_claude(data_list, preference_prompt=None):
+    """
+    Claude APIで複数銘柄をまとめて分析する。
+
+    Args:
+        data_list: 株価データと保有情報を含む辞書のリスト（同じ分類の銘柄）
+        preference_prompt: 投資志向性プロンプト（省略時は毎回生成）
+
+    Returns:
+        銘柄コードをキー、分析結果（マークダウン形式）を値とする辞書
+    """
+    symbols = [data["symbol"] for data in data_list]
+    if not CLAUDE_API_KEY or CLAUDE_API_KEY.strip() == "":
+        return fail_all(symbols, claude_api_key_error())
+
+    static_prefix, prompt = _build_batch_prompt(data_list, preference_prompt)
+    request = build_claude_request(
+        static_prefix,
+        prompt,
+        max_tokens=min(BATCH_MAX_TOKENS_PER_STOCK * len(data_list), CLAUDE_MAX_OUTPUT_TOKENS),
+    )
+    cached = _load_cached_batch("claude", CLAUDE_MODEL, request, symbols)
+    if cached is not None:
+        return _analyze_missing(cached, data_list, analyze_with_claude, preference_prompt)
+
+    label = ",".join(symbols)
+    tokens = estimate_claude_tokens(request)
+    get_rate_limiter("claude").acquire(tokens, label)
+    client = get_anthropic_client(CLAUDE_API_KEY)
+    try:
+        message = call_anthropic_with_retry(
+            functools.partial(client.messages.create, **request), label, tokens
+        )
+    except Exception as e:
+        return fail_all(symbols, claude_call_error(e))
+    record_claude_usage(message)
+
+    results = _split_and_store("claude", CLAUDE_MODEL, request, message.content[0].text, symbols)
+    return _analyze_missing(results, data_list, analyze_with_claude, preference_prompt)
+
+
+@timed("analyze_batch_with_gemini")
+def analyze_batch_with_gemini(data_list, preference_prompt=None):
+    """
+    Gemini APIで複数銘柄をまとめて分析する。
+
+    Args:
+        data_list: 株価データと保有情報を含む辞書のリスト（同じ分類の銘柄）
+        preference_prompt: 投資志向性プロンプト（省略時は毎回生成）
+
+    Returns:
+        銘柄コードをキー、分析結果（マークダウン形式）を値とする辞書
+    """
+    symbols = [data["symbol"] for data in data_list]
+    if not GEMINI_API_KEY or GEMINI_API_KEY.strip() == "":
+        return fail_all(symbols, gemini_api_key_error())
+
+    static_prefix, prompt = _build_batch_prompt(data_list, preference_prompt)
+    cache_request = gemini_cache_request(static_prefix, prompt)
+    cached = _load_cached_batch("gemini", GEMINI_MODEL, cache_request, symbols)
+    if cached is not None:
+        return _analyze_missing(cached, data_list, analyze_with_gemini, preference_prompt)
+
+    url, payload = build_gemini_request(static_prefix, prompt, GEMINI_BATCH_GENERATION_CONFIG)
+    label = ",".join(symbols)
+    tokens = estimate_gemini_tokens(static_prefix, prompt)
+    get_rate_limiter("gemini").acquire(tokens, label)
+    response_text = call_gemini(url, payload, label, tokens)
+    if response_text.startswith(FAILURE_PREFIX):
+        return fail_all(symbols, response_text)
+
+    results = _split_and_store("gemini", GEMINI_MODEL, cache_request, response_text, symbols)
+    return _analyze_missing(results, data_list, analyze_with_gemini, preference_prompt)
+
+
+def clamp_batch_size(batch_size):
+    """
+    1リクエストにまとめる銘柄数を、全銘柄分の出力が最大出力トークン数に収まる件数までに制限する。
+
+    Args:
+        batch_size: 設定された1リクエストあたりの銘柄数
+
+    Returns:
+        int: 実際に1リクエストにまとめる銘柄数
+    """
+    if batch_size > MAX_BATCH_SIZE:
+        print(
+            f"警告: 一括分析の銘柄数{batch_size}は出力トークン数の上限を超えるため、"
+            f"{MAX_BATCH_SIZE}銘柄ずつに制限します"
+        )
+        return MAX_BATCH_SIZE
+    return batch_size
+
+
+def parse_batch_response(response_text, symbols):
+    """
+    一括分析のJSON配列応答を銘柄ごとの分析結果に分割する。
+
+    Args:
+        response_text: AIの応答テキスト（JSON配列、コードブロックで囲まれていても可）
+        symbols: 分析を依頼した銘柄コードのリスト
+
+    Returns:
+        銘柄コードをキー、分析結果を値とする辞書（応答に含まれない銘柄は含まない）
+    """
+    items = _load_json_array(response_text)
+    requested = {symbol.upper(): symbol for symbol in symbols}
+    results = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        symbol = str(item.get("symbol", "")).strip()
+        analysis = item.get("analysis")
+        if symbol.upper() in requested and isinstance(analysis, str) and analysis.strip():
+            results[requested[symbol.upper()]] = analysis.strip()
+    return results
+
+
+def _build_batch_prompt(data_list, preference_prompt=None):
+    """
+    複数銘柄の分析を依頼するプロンプトを組み立てる（共通部分は1回のみ含める）。
+
+    Args:
+        data_list: 株価データと保有情報を含む辞書のリスト
+        preference_prompt: 投資志向性プロンプト（省略時は毎回生成）
+
+    Returns:
+        (共通部分, 銘柄ごとの部分) のタプル
+    """
+    # 投資志向性プロンプトの生成（渡されていない場合のみ）
+    if preference_prompt is None:
+        preference_prompt = generate_preference_prompt()
+
+    # 同じ分類の銘柄をまとめるため、1銘柄でも空売りポジションなら空売り用の観点を使用
+    is_short_position = any(
+        data.get("quantity") is not None and data["quantity"] < 0 for data in data_list
+    )
+    analysis_viewpoints = (
+        ANALYSIS_VIEWPOINTS_SHORT if is_short_position else ANALYSIS_VIEWPOINTS_REGULAR
+    )
+
+    sections = []
+    for data in data_list:
+        currency = get_currency_for_symbol(data["symbol"], data.get("currency"))
+        holding_status = generate_holding_status(data, currency)
+        news_lines = chr(10).join(f"- {news}" for news in data["news"])
+        sections.append(
+            f"### 銘柄: {data['symbol']}\n"
+            f"現在の株価: {data['price']}{currency}\n"
+            f"{holding_status}\n\n"
+            f"最近のニュース:\n{news_lines}"
+        )
+
+    static_prefix = f"{preference_prompt}\n\n{analysis_viewpoints}\n\n{BATCH_OUTPUT_INSTRUCTION}"
+    stock_prompt = f"以下の{len(data_list)}銘柄の分析をお願いします。\n\n" + "\n\n".join(sections)
+    return static_prefix, stock_prompt
+
+
+def _load_json_array(response_text):
+    """応答テキストからJSON配列を取り出す（失敗時は空リスト）"""
+    if not response_text:
+        return []
+    text = re.sub(r"^```(?:json)?\s*|\s*```$", "", response_text.strip())
+    start = text.find("[")
+    end = text.rfind("]")
+    if start == -1 or end <= start:
+        return []
+    try:
+        items = json.loads(text[start : end + 1])
+    except ValueError:
+        return []
+    return items if isinstance(items, list) else []
+
+
+def _split_and_store(provider, model, request, response_text, symbols):
+    """応答を銘柄ごとに分割し、全銘柄の結果が揃った場合のみキャッシュする"""
+    results = parse_batch_response(response_text, symbols)
+    if len(results) == len(symbols):
+        store_cached_analysis(provider, model, request, response_text)
+    return results
+
+
+def _analyze_missing(results, data_list, analyze_single, preference_prompt):
+    """一括分析の応答に含まれなかった銘柄を1銘柄ずつ分析し直す"""
+    for data in data_list:
+        if data["symbol"] not in results:
+            print(f"一括分析の応答に{data['symbol']}の分析結果がないため、個別に分析します")
+            results[data["symbol"]] = analyze_single(data, preference_prompt)
+    return results
+
+
+def _load_cached_batch(provider, model, request, symbols):
+    """キャッシュ済みの一括分析結果を取得する"""
+    cached = load_cached_analysis(provider, model, request)
+    if cached is None:
+        return None
+    print(f"分析キャッシュを利用: {', '.join(symbols)}")
+    return parse_batch_response(cached, symbols)
@@ -0,0 +1,373 @@
+"""
+バッチAPI分析モジュール
+
+全銘柄の分析リクエストをプロバイダーのバッチAPI（Anthropic Message Batches /
+Gemini Batch Mode）に1つのジョブとして送信し、完了までポーリングして結果を受け取ります。
+対話的な応答速度が不要な定期実行向けで、リクエストごとのレート制限を受けず、
+トークン単価も通常のAPIより安くなります。
+
+オフラインでの検証用に、ジョブを即座に処理するローカル代替（LocalBatchBackend）を用意しています。
+"""
+
+import time
+from abc import ABC, abstractmethod
+
+from config import (
+    BATCH_BACKEND,
+    BATCH_POLL_INTERVAL_SECONDS,
+    BATCH_TIMEOUT_MINUTES,
+    CLAUDE_API_KEY,
+    GEMINI_API_KEY,
+    USE_CLAUDE,
+)
+from runs.metrics import timed
+
+from .ai_analyzer import (
+    CLAUDE_MODEL,
+    GEMINI_MODEL,
+    SYSTEM_PROMPT,
+    build_claude_request,
+    build_prompt_parts,
+    gemini_cache_request,
+    record_claude_usage,
+    record_gemini_usage,
+)
+from .analysis_cache import (
+    fail_all,
+    failure_report,
+    load_cached_analysis,
+    store_cached_analysis,
+)
+from .http_client import get_anthropic_client, get_session
+from .prompt_cache import GEMINI_API_BASE
+
+# 1銘柄あたりの最大出力トークン数（通常の分析と同じ）
+BATCH_API_MAX_TOKENS = 1500
+
+
+class BatchBackend(ABC):
+    """
+    バッチAPIの送信先の共通インターフェース。
+
+    requestsは {カスタムID: (共通プロンプト, 銘柄ごとのプロンプト)} の辞書で、
+    結果は {カスタムID: 分析結果（失敗時はエラーレポート）} の辞書で返す。
+    submit・poll・fetch_resultsを実装していないサブクラスは生成時にTypeErrorとなる。
+    """
+
+    provider = None
+    model = None
+
+    @abstractmethod
+    def submit(self, requests):
+        """リクエストをまとめて送信し、ジョブIDを返す"""
+
+    @abstractmethod
+    def poll(self, job_id):
+        """ジョブが終了していればTrueを返す"""
+
+    @abstractmethod
+    def fetch_results(self, job_id):
+        """終了したジョブの結果を取得する"""
+
+    def cancel(self, job_id):
+        """ジョブを取り消す"""
+
+    def cache_request(self, static_prefix, prompt):
+        """
+        分析キャッシュのキーに使うリクエスト内容を返す（キャッシュしない場合はNone）。
+
+        通常の分析と同じキーを使い、バッチAPIと通常の分析で結果を共有する。
+        """
+        return None
+
+
+class AnthropicBatchBackend(BatchBackend):
+    """Anthropic Message Batches APIへの送信"""
+
+    provider = "claude"
+    model = CLAUDE_MODEL
+
+    def __init__(self, api_key=CLAUDE_API_KEY):
+        if not api_key or api_key.strip() == "":
+            raise ValueError(
+                "Claude APIキーが未設定です。環境変数CLAUDE_API_KEYを確認してください。"
+            )
+        self.client = get_anthropic_client(api_key)
+
+    def submit(self, requests):
+        batch = self.client.messages.batches.create(
+            requests=[
+                {"custom_id": custom_id, "params": self.cache_request(static_prefix, prompt)}
+                for custom_id, (static_prefix, prompt) in requests.items()
+            ]
+        )
+        return batch.id
+
+    def poll(self, job_id):
+        return self.client.messages.batches.retrieve(job_id).processing_status == "ended"
+
+    def fetch_results(self, job_id):
+        results = {}
+        for entry in self.client.messages.batches.results(job_id):
+            if entry.result.type == "succeeded":
+                record_claude_usage(entry.result.message)
+                results[entry.custom_id] = entry.result.message.content[0].text
+            else:
+                results[entry.custom_id] = failure_report(
+                    f"Claudeバッチ処理の結果が {entry.result.type} でした"
+                )
+        return results
+
+    def cancel(self, job_id):
+        self.client.messages.batches.cancel(job_id)
+
+    def cache_request(self, static_prefix, prompt):
+        return build_claude_request(static_prefix, prompt, max_tokens=BATCH_API_MAX_TOKENS)
+
+
+class GeminiBatchBackend(BatchBackend):
+    """Gemini Batch Mode（batchGenerateContent、インラインリクエスト）への送信"""
+
+    provider = "gemini"
+    model = GEMINI_MODEL
+
+    # 終了を表すジョブの状態
+    TERMINAL_STATES = (
+        "BATCH_STATE_SUCCEEDED",
+        "BATCH_STATE_FAILED",
+        "BATCH_STATE_CANCELLED",
+        "BATCH_STATE_EXPIRED",
+    )
+
+    def __init__(self, api_key=GEMINI_API_KEY):
+        if not api_key or api_key.strip() == "":
+            raise ValueError(
+                "Gemini APIキーが未設定です。環境変数GEMINI_API_KEYを確認してください。"
+            )
+        self.api_key = api_key
+        self._operations = {}
+        self._keys = {}
+
+    def submit(self, requests):
+        url = f"{GEMINI_API_BASE}/v1beta/models/{GEMINI_MODEL}:batchGenerateContent?key={self.api_key}"
+        inline_requests = [
+            {
+                "request": {
+                    "contents": [
+                        {"parts": [{"text": f"{SYSTEM_PROMPT}\n\n{static_prefix}\n\n{prompt}"}]}
+                    ]
+                },
+                "metadata": {"key": custom_id},
+            }
+            for custom_id, (static_prefix, prompt) in requests.items()
+        ]
+        payload = {
+            "batch": {
+                "display_name": "stock-report",
+                "input_config": {"requests": {"requests": inline_requests}},
+            }
+        }
+        resp = get_session(url).post(url, json=payload, timeout=120)
+        resp.raise_for_status()
+        operation = resp.json()
+        self._operations[operation["name"]] = operation
+        self._keys[operation["name"]] = list(requests)
+        return operation["name"]
+
+    def poll(self, job_id):
+        url = f"{GEMINI_API_BASE}/v1beta/{job_id}?key={self.api_key}"
+        resp = get_session(url).get(url, timeout=60)
+        resp.raise_for_status()
+        operation = resp.json()
+        self._operations[job_id] = operation
+        state = operation.get("metadata", {}).get("state")
+        return bool(operation.get("done")) or state in self.TERMINAL_STATES
+
+    def fetch_results(self, job_id):
+        operation = self._operations.get(job_id, {})
+        keys = self._keys.get(job_id, [])
+        responses = (
+            operation.get("response", {}).get("inlinedResponses", {}).get("inlinedResponses", [])
+        )
+        results = {}
+        for index, item in enumerate(responses):
+            # metadataが返されない場合は送信順で対応付ける
+            custom_id = item.get("metadata", {}).get("key")
+            if custom_id is None and index < len(keys):
+                custom_id = keys[index]
+            try:
+                response = item["response"]
+                record_gemini_usage(response)
+                results[custom_id] = response["candidates"][0]["content"]["parts"][0]["text"]
+            except (KeyError, IndexError, TypeError):
+                results[custom_id] = failure_report(
+                    f"Geminiバッチ処理の結果を取得できませんでした: {str(item.get('error', ''))[:500]}"
+                )
+        return results
+
+    def cancel(self, job_id):
+        url = f"{GEMINI_API_BASE}/v1beta/{job_id}:cancel?key={self.api_key}"
+        get_session(url).post(url, timeout=60)
+
+    def cache_request(self, static_prefix, prompt):
+        return gemini_cache_request(static_prefix, prompt)
+
+
+class LocalBatchBackend(BatchBackend):
+    """
+    バッチAPIのローカル代替（オフライン検証用）。
+
+    送信時にresponderで全リクエストを処理し、指定回数のポーリング後に完了とする。
+    分析キャッシュには保存しない。
+
+    Args:
+        responder: (共通プロンプト, 銘柄ごとのプロンプト) を受け取り分析結果を返す関数
+            （省略時は固定の「様子見」レポートを返す）
+        polls_until_done: 完了までに必要なポーリング回数
+    """
+
+    provider = "local"
+    model = "local"
+
+    def __init__(self, responder=None, polls_until_done=0):
+        self.responder = responder or _local_response
+        self.polls_until_done = polls_until_done
+        self._jobs = {}
+
+    def submit(self, requests):
+        job_id = f"local-batch-{len(self._jobs) + 1}"
+        self._jobs[job_id] = {
+            "remaining_polls": self.polls_until_done,
+            "results": {
+                custom_id: self.responder(static_prefix, prompt)
+                for custom_id, (static_prefix, prompt) in requests.items()
+            },
+        }
+        return job_id
+
+    def poll(self, job_id):
+        job = self._jobs[job_id]
+        if job["remaining_polls"] > 0:
+            job["remaining_polls"] -= 1
+            return False
+        return True
+
+    def fetch_results(self, job_id):
+        return dict(self._jobs[job_id]["results"])
+
+    def cancel(self, job_id):
+        self._jobs.pop(job_id, None)
+
+
+def get_batch_backend():
+    """
+    設定に応じたバッチAPIの送信先を返す。
+
+    Returns:
+        BatchBackend: BATCH_BACKEND=localの場合はローカル代替、
+            それ以外は--claude指定時にAnthropic、未指定時にGemini
+    """
+    if BATCH_BACKEND == "local":
+        return LocalBatchBackend()
+    if USE_CLAUDE:
+        return AnthropicBatchBackend()
+    return GeminiBatchBackend()
+
+
+@timed("analyze_with_batch_api")
+def analyze_with_batch_api(
+    data_list, preference_prompt, backend=None, poll_interval=None, timeout_seconds=None
+):
+    """
+    全銘柄の分析をバッチAPIの1ジョブとして送信し、完了を待って結果を返す。
+
+    分析キャッシュにヒットした銘柄はジョブに含めない。
+
+    Args:
+        data_list: 株価データと保有情報を含む辞書のリスト
+        preference_prompt: 投資志向性プロンプト
+        backend: バッチAPIの送信先（省略時はget_batch_backend()）
+        poll_interval: ポーリング間隔（秒、省略時はBATCH_POLL_INTERVAL_SECONDS）
+        timeout_seconds: 完了を待つ最大時間（秒、省略時はBATCH_TIMEOUT_MINUTES）
+
+    Returns:
+        銘柄コードをキー、分析結果（失敗時はエラーレポート）を値とする辞書
+    """
+    if poll_interval is None:
+        poll_interval = BATCH_POLL_INTERVAL_SECONDS
+    if timeout_seconds is None:
+        timeout_seconds = BATCH_TIMEOUT_MINUTES * 60
+
+    symbols = [data["symbol"] for data in data_list]
+    try:
+        backend = backend or get_batch_backend()
+    except Exception as e:
+        return fail_all(symbols, failure_report(f"バッチAPIの初期化に失敗しました: {e}"))
+
+    results = {}
+    pending = {}
+    for index, data in enumerate(data_list):
+        static_prefix, prompt = build_prompt_parts(data, preference_prompt)
+        cache_request = backend.cache_request(static_prefix, prompt)
+        if cache_request is not None:
+            cached = load_cached_analysis(backend.provider, backend.model, cache_request)
+            if cached is not None:
+                print(f"分析キャッシュを利用: {data['symbol']}")
+                results[data["symbol"]] = cached
+                continue
+        # カスタムIDには英数字・ハイフンのみ使えるため、銘柄コードではなく連番を使う
+        pending[f"stock-{index}"] = (data["symbol"], static_prefix, prompt, cache_request)
+
+    if not pending:
+        return results
+
+    requests = {
+        custom_id: (static_prefix, prompt)
+        for custom_id, (_, static_prefix, prompt, _) in pending.items()
+    }
+    pending_symbols = [symbol for symbol, _, _, _ in pending.values()]
+    try:
+        job_id = backend.submit(requests)
+        print(f"バッチジョブを送信しました: {job_id}（{len(requests)}銘柄）")
+        outputs = _wait_for_results(backend, job_id, poll_interval, timeout_seconds)
+    except Exception as e:
+        error_report = failure_report(f"バッチAPIの処理に失敗しました: {e}")
+        print(error_report)
+        results.update(fail_all(pending_symbols, error_report))
+        return results
+
+    for custom_id, (symbol, _, _, cache_request) in pending.items():
+        analysis = outputs.get(custom_id)
+        if analysis is None:
+            analysis = failure_report(
+                f"バッチ処理の結果に{symbol}の分析結果が含まれていませんでした"
+            )
+        elif cache_request is not None:
+            store_cached_analysis(backend.provider, backend.model, cache_request, analysis)
+        results[symbol] = analysis
+    return results
+
+
+def _wait_for_results(backend, job_id, poll_interval, timeout_seconds):
+    """ジョブの完了をポーリングで待ち、結果を返す（タイムアウト時はジョブを取り消す）"""
+    deadline = time.monotonic() + timeout_seconds
+    while not backend.poll(job_id):
+        if time.monotonic() >= deadline:
+            backend.cancel(job_id)
+            raise TimeoutError(
+                f"バッチジョブが{timeout_seconds / 60:.0f}分以内に完了しませんでした"
+            )
+        print(f"バッチジョブの完了を待機中: {job_id}")
+        time.sleep(poll_interval)
+    print(f"バッチジョブが完了しました: {job_id}")
+    return backend.fetch_results(job_id)
+
+
+def _local_response(static_prefix, prompt):
+    """ローカル代替の固定レポート"""
+    symbol = prompt.split("の分析をお願いします。", 1)[0]
+    return (
+        f"## {symbol} の分析（ローカル代替）\n\n"
+        "売買判断: 様子見\n\n"
+        "バッチAPIのローカル代替で生成したレポートです。"
+    )
@@ -2,40 +2,179 @@
 データ収集モジュール
 
 株価データ（Yahoo Finance API）とニュースデータ（defeatbeta-api）を取得します。
+
+非同期版（*_async）はイベントループをブロックしないよう、同期版の処理を
+ASYNC_FETCH_CONCURRENCYと同じ数のスレッドを持つ専用のスレッドプールに委譲して実行します
+（asyncioの既定のスレッドプールはCPU数で上限が決まり、同時実行数の設定より小さくなる場合があるため）。
 """
 
-import requests
+import asyncio
+import contextvars
+import datetime
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from config import ASYNC_FETCH_CONCURRENCY, DEFEATBETA_AVAILABLE, YAHOO_API_KEY, YAHOO_QUOTE_URL
+from runs.metrics import timed
 
-from config import DEFEATBETA_AVAILABLE, YAHOO_API_KEY
+from .http_client import get_session
+from .news_store import get_news_store
+from .quote_cache import get_quote_cache
+from .retry import request_with_retry
 
 if DEFEATBETA_AVAILABLE:
+    from defeatbeta_api.client.duckdb_client import get_duckdb_client
+    from defeatbeta_api.client.hugging_face_client import HuggingFaceClient
     from defeatbeta_api.data.ticker import Ticker
+    from defeatbeta_api.utils.const import stock_news
+
+_fetch_executor = None
+_fetch_executor_lock = Lock()
+
+
+# Yahoo Finance APIのquoteエンドポイントが1リクエストで受け付ける最大銘柄数
+YAHOO_QUOTE_BATCH_SIZE = 10
+
+
+@timed("fetch_quotes")
+def fetch_quotes(symbols):
+    """
+    複数銘柄の株価情報をまとめて取得する。
+
+    quoteエンドポイントはカンマ区切りで複数銘柄を受け付けるため、
+    銘柄リストをYAHOO_QUOTE_BATCH_SIZEごとに分割してリクエストする。
+    株価キャッシュが有効な場合は、前回取得以降に上場取引所の立会がなかった銘柄は
+    リクエストせず保存済みのquote情報を返す。
+
+    Args:
+        symbols: 銘柄コードのリスト
+
+    Returns:
+        銘柄コードをキー、quote情報（辞書）を値とする辞書（取得失敗した銘柄は含まない）
+    """
+    # 重複を除去しつつ順序を維持
+    unique_symbols = list(dict.fromkeys(symbols))
+
+    cache = get_quote_cache()
+    if cache is None:
+        return _request_quotes(unique_symbols)
 
+    # 前回取得以降に市場が開いていない銘柄は保存済みの株価を使用する
+    quotes = cache.lookup(unique_symbols)
+    if quotes:
+        print(f"株価キャッシュを利用: {len(quotes)}銘柄（前回取得以降に取引なし）")
+    fetched = _request_quotes([symbol for symbol in unique_symbols if symbol not in quotes])
+    if fetched:
+        cache.update(fetched)
+        try:
+            cache.save()
+        except OSError as e:
+            print(f"株価キャッシュの保存に失敗しました: {e}")
+    quotes.update(fetched)
+    return quotes
 
-def fetch_stock_data(symbol, stock_info=None):
+
+def _request_quotes(unique_symbols):
+    """
+    Yahoo Finance APIからquote情報を取得する（YAHOO_QUOTE_BATCH_SIZEごとに分割）。
+
+    429・5xx・通信エラーは共通のリトライ方針でリトライし、打ち切った分割の銘柄は結果に含めない。
+    """
+    if not unique_symbols:
+        return {}
+    headers = {"x-api-key": YAHOO_API_KEY}
+    session = get_session(YAHOO_QUOTE_URL)
+    quotes = {}
+
+    for start in range(0, len(unique_symbols), YAHOO_QUOTE_BATCH_SIZE):
+        chunk = unique_symbols[start : start + YAHOO_QUOTE_BATCH_SIZE]
+        params = {"symbols": ",".join(chunk)}
+        try:
+            send = functools.partial(
+                session.get, YAHOO_QUOTE_URL, headers=headers, params=params, timeout=10
+            )
+            response = request_with_retry(send, label=params["symbols"])
+            if response.status_code != 200:
+                print(f"株価取得失敗: HTTPステータス {response.status_code} ({', '.join(chunk)})")
+                continue
+            results = response.json().get("quoteResponse", {}).get("result") or []
+        except Exception as e:
+            print(f"株価取得失敗: {e}")
+            continue
+
+        # レスポンスの銘柄コードは大文字で返るため、要求時の表記に対応付ける
+        requested = {symbol.upper(): symbol for symbol in chunk}
+        for quote in results:
+            returned_symbol = quote.get("symbol")
+            if not returned_symbol:
+                continue
+            quotes[requested.get(returned_symbol.upper(), returned_symbol)] = quote
+
+    return quotes
+
+
+@timed("fetch_stock_data")
+def fetch_stock_data(symbol, stock_info=None, quotes=None, news_map=None):
     """
     株価とニュースデータを取得する。
 
     Args:
         symbol: 銘柄コード
         stock_info: 銘柄情報（保有数、取得単価など）
+        quotes: fetch_quotesで事前取得したquote情報の辞書（省略時はこの銘柄のみ取得）
+        news_map: fetch_news_bulkで事前取得したニュースの辞書（省略時はこの銘柄のみ取得）
 
     Returns:
         株価、ニュース、保有情報を含む辞書
     """
-    # Yahoo Finance API例（RapidAPI経由）
-    url = "https://yfapi.net/v6/finance/quote"
-    headers = {"x-api-key": YAHOO_API_KEY}
-    params = {"symbols": symbol}
-    price = None
-    try:
-        response = requests.get(url, headers=headers, params=params, timeout=10)
-        if response.status_code == 200:
-            result = response.json()
-            price = result["quoteResponse"]["result"][0]["regularMarketPrice"]
-    except Exception as e:
-        print(f"株価取得失敗: {e}")
-    news = fetch_news(symbol)
+    if quotes is None:
+        quotes = fetch_quotes([symbol])
+    if news_map is not None and symbol in news_map:
+        news = news_map[symbol]
+    else:
+        news = fetch_news(symbol)
+    return _build_stock_data(symbol, quotes, news, stock_info)
+
+
+@timed("fetch_stock_data")
+async def fetch_stock_data_async(symbol, stock_info=None, quotes=None, news_map=None):
+    """
+    fetch_stock_dataの非同期版（取得処理はデータ取得用のスレッドプールで実行する）。
+
+    Args:
+        symbol: 銘柄コード
+        stock_info: 銘柄情報（保有数、取得単価など）
+        quotes: fetch_quotesで事前取得したquote情報の辞書（省略時はこの銘柄のみ取得）
+        news_map: fetch_news_bulkで事前取得したニュースの辞書（省略時はこの銘柄のみ取得）
+
+    Returns:
+        株価、ニュース、保有情報を含む辞書
+    """
+    if quotes is None:
+        quotes = await _run_in_fetch_executor(fetch_quotes, [symbol])
+    if news_map is not None and symbol in news_map:
+        news = news_map[symbol]
+    else:
+        news = await fetch_news_async(symbol)
+    return _build_stock_data(symbol, quotes, news, stock_info)
+
+
+def _build_stock_data(symbol, quotes, news, stock_info=None):
+    """
+    quote情報とニュースから分析用のデータ辞書を組み立てる。
+
+    Args:
+        symbol: 銘柄コード
+        quotes: quote情報の辞書
+        news: ニュースの文字列リスト
+        stock_info: 銘柄情報（保有数、取得単価など）
+
+    Returns:
+        株価、ニュース、保有情報を含む辞書
+    """
+    quote = quotes.get(symbol) or {}
+    price = quote.get("regularMarketPrice")
 
     data = {"symbol": symbol, "price": price, "news": news}
 
@@ -49,6 +188,7 @@ def fetch_stock_data(symbol, stock_info=None):
     return data
 
 
+@timed("fetch_news")
 def fetch_news(symbol):
     """
     defeatbeta-apiを使用して銘柄に関連するニュースを取得する。
@@ -89,3 +229,193 @@ def fetch_news(symbol):
         # エラー時はダミーデータを返す
         print(f"ニュース取得エラー ({symbol}): {e}")
         return [f"{symbol}関連ニュースの取得に失敗しました"]
+
+
+@timed("fetch_news_bulk")
+def fetch_news_bulk(symbols, limit=5):
+    """
+    defeatbeta-apiのニュースデータセットから複数銘柄のニュースを1回のクエリでまとめて取得する。
+
+    銘柄ごとにTickerを作成してデータセットを読み込む代わりに、全銘柄を対象とした
+    1回のクエリで取得し、銘柄ごとの上位limit件の抽出と文字列の整形を列単位で行う。
+    抽出順はfetch_newsと同じ（report_dateの昇順の先頭limit件）。
+    ニュースストアが有効な場合は、銘柄ごとの最新日付以降のニュースのみを取得してストアに追記し、
+    ストアから最新のlimit件を整形して返す（追記したニュースがプロンプトに反映されるようにする）。
+
+    Args:
+        symbols: 銘柄コードのリスト
+        limit: 1銘柄あたりの最大件数
+
+    Returns:
+        銘柄コードをキー、ニュースの文字列リストを値とする辞書
+        （ニュースがない銘柄・取得失敗時はfetch_newsと同じ代替メッセージ）
+    """
+    unique_symbols = list(dict.fromkeys(symbols))
+    if not unique_symbols:
+        return {}
+    if not DEFEATBETA_AVAILABLE:
+        # defeatbeta-apiが利用できない場合はダミーデータを返す
+        return {
+            symbol: [f"{symbol}関連ニュースが取得できません（defeatbeta-apiが必要です）"]
+            for symbol in unique_symbols
+        }
+
+    store = get_news_store()
+    try:
+        if store is not None:
+            formatted = _refresh_and_read_store(store, unique_symbols, limit)
+        else:
+            formatted = format_news_table(_query_news(unique_symbols), limit)
+    except Exception as e:
+        # エラー時はダミーデータを返す
+        print(f"ニュース一括取得エラー: {e}")
+        return {symbol: [f"{symbol}関連ニュースの取得に失敗しました"] for symbol in unique_symbols}
+
+    # データセットの銘柄コードは大文字のため、要求時の表記に対応付ける
+    news_map = {}
+    for symbol in unique_symbols:
+        news = formatted.get(symbol.upper())
+        if not news:
+            print(f"情報: {symbol}のニュースが見つかりませんでした。")
+            news = [f"{symbol}関連のニュースは現在ありません。"]
+        news_map[symbol] = news
+    return news_map
+
+
+def format_news_table(news_list, limit=5):
+    """
+    ニュースのDataFrameから銘柄ごとの上位limit件を抽出し、表示用の文字列に整形する。
+
+    Args:
+        news_list: symbol, title, publisher, report_date列を持つDataFrame（report_dateの昇順）
+        limit: 1銘柄あたりの最大件数
+
+    Returns:
+        銘柄コードをキー、ニュースの文字列リストを値とする辞書
+    """
+    if news_list.empty:
+        return {}
+    top = news_list.groupby("symbol", sort=False).head(limit)
+    formatted = (
+        "["
+        + top["report_date"].fillna("不明").astype(str)
+        + "] "
+        + top["publisher"].fillna("不明").astype(str)
+        + ": "
+        + top["title"].fillna("タイトルなし").astype(str)
+    )
+    return formatted.groupby(top["symbol"], sort=False).agg(list).to_dict()
+
+
+def _refresh_and_read_store(store, symbols, limit):
+    """
+    ニュースストアに新しいニュースを追記し、ストアから銘柄ごとのニュースを整形して返す。
+
+    取得元へのクエリが失敗した場合は警告を表示し、蓄積済みのニュースを返す
+    （蓄積済みのニュースもない場合は例外を送出する）。
+    """
+    latest_dates = store.latest_dates(symbols)
+    try:
+        news_list = _query_news(symbols, since=latest_dates)
+        added = store.append(
+            news_list[["symbol", "uuid", "report_date", "publisher", "title"]].itertuples(
+                index=False, name=None
+            )
+        )
+        print(f"ニュースストアを更新しました: {added}件追加")
+    except Exception as e:
+        if not latest_dates:
+            raise
+        print(f"警告: ニュースの更新に失敗したため、蓄積済みのニュースを使用します: {e}")
+    return store.top_news(symbols, limit)
+
+
+def _query_news(symbols, since=None):
+    """
+    ニュースデータセットから指定銘柄のニュースを1回のクエリで取得する。
+
+    Args:
+        symbols: 銘柄コードのリスト
+        since: {銘柄コード（大文字）: report_date} の辞書。指定した銘柄はその日付以降のみ取得する
+
+    Returns:
+        DataFrame: symbol, uuid, title, publisher, report_date列（銘柄・report_dateの昇順）
+    """
+    since = since or {}
+    conditions = []
+    new_symbols = []
+    for symbol in symbols:
+        upper_symbol = symbol.upper()
+        if upper_symbol in since:
+            # 同日の未取得ニュースを取りこぼさないよう、最新日付も含めて取得する（重複はストアで除外）
+            # 文字列としての比較は表記（時刻の有無など）で結果が変わるため、日付型で比較する
+            conditions.append(
+                f"(symbol = {_sql_literal(upper_symbol)} "
+                f"AND report_date >= {_sql_date(since[upper_symbol])})"
+            )
+        else:
+            new_symbols.append(_sql_literal(upper_symbol))
+    if new_symbols:
+        conditions.append(f"symbol IN ({', '.join(new_symbols)})")
+
+    url = HuggingFaceClient().get_url_path(stock_news)
+    sql = (
+        f"SELECT symbol, uuid, title, publisher, report_date FROM '{url}' "
+        f"WHERE {' OR '.join(conditions)} ORDER BY symbol, report_date ASC"
+    )
+    return get_duckdb_client().query(sql)
+
+
+def _sql_literal(value):
+    """SQLの文字列リテラルに変換する（単一引用符はSQLのエスケープ規則に従って二重化する）"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _sql_date(value):
+    """
+    report_date（'2024-01-02' や '2024-01-02 00:00:00' の形式）をSQLのDATE型の値に変換する。
+
+    Raises:
+        ValueError: 日付として解釈できない場合
+    """
+    date = datetime.date.fromisoformat(str(value)[:10])
+    return f"CAST('{date.isoformat()}' AS DATE)"
+
+
+@timed("fetch_news")
+async def fetch_news_async(symbol):
+    """
+    fetch_newsの非同期版。
+
+    defeatbeta-apiは同期APIのみ提供しているため、データ取得用のスレッドプールに委譲して実行する。
+
+    Args:
+        symbol: 銘柄コード（例: 'TSLA', '7203.T'）
+
+    Returns:
+        ニュースの文字列リスト（最大5件）
+    """
+    return await _run_in_fetch_executor(fetch_news, symbol)
+
+
+def get_fetch_executor():
+    """
+    非同期版のデータ取得で使用する共有スレッドプールを取得する。
+
+    Returns:
+        ThreadPoolExecutor: ASYNC_FETCH_CONCURRENCYと同じ数のスレッドを持つスレッドプール
+    """
+    global _fetch_executor
+    with _fetch_executor_lock:
+        if _fetch_executor is None:
+            _fetch_executor = ThreadPoolExecutor(
+                max_workers=ASYNC_FETCH_CONCURRENCY, thread_name_prefix="fetch"
+            )
+        return _fetch_executor
+
+
+async def _run_in_fetch_executor(func, *args):
+    """同期関数をデータ取得用のスレッドプールで実行する（asyncio.to_threadと同様にコンテキストを引き継ぐ）"""
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, func, *args)
+    return await loop.run_in_executor(get_fetch_executor(), call)
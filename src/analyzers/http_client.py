@@ -0,0 +1,99 @@
+"""
+HTTP通信管理モジュール
+
+外部APIとの通信に使用するコネクションをプロセス全体で共有します。
+ホストごとにkeep-alive対応の requests.Session を1つだけ生成し、
+Anthropicクライアントも1つをキャッシュして再利用することで、
+銘柄ごとのTCP/TLSハンドシェイクを削減します。
+Anthropic SDK自体のリトライは無効にし、retryモジュールの共通のリトライ方針を使用します。
+"""
+
+from threading import Lock
+from urllib.parse import urlparse
+
+import anthropic
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import MAX_WORKERS
+
+# コネクションプールのサイズ（並列ワーカー数に合わせる）
+HTTP_POOL_SIZE = MAX_WORKERS
+
+_sessions = {}
+_anthropic_clients = {}
+_async_anthropic_clients = {}
+_lock = Lock()
+
+
+def get_session(url):
+    """
+    URLのホストに対応する共有セッションを取得する。
+
+    Args:
+        url: リクエスト先のURL
+
+    Returns:
+        requests.Session: ホスト単位で共有されるセッション
+    """
+    host = urlparse(url).netloc
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[host] = session
+        return session
+
+
+def get_anthropic_client(api_key):
+    """
+    APIキーに対応する共有Anthropicクライアントを取得する。
+
+    Args:
+        api_key: Claude APIキー
+
+    Returns:
+        anthropic.Anthropic: キャッシュされたクライアント
+    """
+    with _lock:
+        client = _anthropic_clients.get(api_key)
+        if client is None:
+            client = anthropic.Anthropic(api_key=api_key, max_retries=0)
+            _anthropic_clients[api_key] = client
+        return client
+
+
+def get_async_anthropic_client(api_key):
+    """
+    APIキーに対応する共有AsyncAnthropicクライアントを取得する（非同期モード用）。
+
+    Args:
+        api_key: Claude APIキー
+
+    Returns:
+        anthropic.AsyncAnthropic: キャッシュされたクライアント
+    """
+    with _lock:
+        client = _async_anthropic_clients.get(api_key)
+        if client is None:
+            client = anthropic.AsyncAnthropic(api_key=api_key, max_retries=0)
+            _async_anthropic_clients[api_key] = client
+        return client
+
+
+def close_all():
+    """
+    共有しているセッションとクライアントをすべて閉じてキャッシュを破棄する。
+    """
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        for client in _anthropic_clients.values():
+            client.close()
+        _sessions.clear()
+        _anthropic_clients.clear()
+        # 非同期クライアントはイベントループ終了時に破棄されるため参照のみ解放する
+        _async_anthropic_clients.clear()
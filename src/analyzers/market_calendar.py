@@ -0,0 +1,199 @@
+"""
+取引所カレンダーモジュール
+
+東京証券取引所と米国市場の立会時間・休場日から、ある期間に取引が行われたかを判定します。
+株価キャッシュが「前回取得以降に市場が開いていない銘柄」を判定するために使用します。
+
+休場日は規則から算出します（臨時休場や短縮取引は考慮しません）。
+判定を誤って取引日を休場日とすると古い株価を使ってしまうため、
+不明な場合は常に「取引があった」側に倒します。
+"""
+
+import datetime
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+# 取引所ごとのタイムゾーンと立会時間（東証の昼休みは考慮しない）
+MARKET_SESSIONS = {
+    "TSE": {
+        "timezone": ZoneInfo("Asia/Tokyo"),
+        "open": datetime.time(9, 0),
+        "close": datetime.time(15, 30),
+    },
+    "US": {
+        "timezone": ZoneInfo("America/New_York"),
+        "open": datetime.time(9, 30),
+        "close": datetime.time(16, 0),
+    },
+}
+
+# 大引け後に終値が確定して配信されるまでの猶予（この時間までは取引中とみなす）
+QUOTE_SETTLE_MINUTES = 30
+
+# この日数を超える期間は判定せず、取引があったものとみなす
+MAX_LOOKBACK_DAYS = 14
+
+
+def traded_between(exchange, start, end):
+    """
+    start以降、end以前に取引所の立会があったか判定する。
+
+    Args:
+        exchange: 取引所（"TSE" または "US"、それ以外は常にTrue）
+        start: 期間の開始（タイムゾーン付きdatetime）
+        end: 期間の終了（タイムゾーン付きdatetime）
+
+    Returns:
+        bool: 期間内に立会（大引け後の猶予を含む）があった場合はTrue
+    """
+    session = MARKET_SESSIONS.get(exchange)
+    if session is None:
+        return True
+    if end <= start:
+        return False
+
+    tz = session["timezone"]
+    first_day = start.astimezone(tz).date()
+    last_day = end.astimezone(tz).date()
+    if (last_day - first_day).days > MAX_LOOKBACK_DAYS:
+        return True
+
+    settle = datetime.timedelta(minutes=QUOTE_SETTLE_MINUTES)
+    day = first_day
+    while day <= last_day:
+        if is_trading_day(exchange, day):
+            session_open = datetime.datetime.combine(day, session["open"], tz)
+            session_close = datetime.datetime.combine(day, session["close"], tz) + settle
+            if session_open < end and session_close > start:
+                return True
+        day += datetime.timedelta(days=1)
+    return False
+
+
+def is_trading_day(exchange, day):
+    """
+    取引所の営業日か判定する。
+
+    Args:
+        exchange: 取引所（"TSE" または "US"）
+        day: 日付（取引所の現地日付）
+
+    Returns:
+        bool: 土日・休場日以外の場合はTrue
+    """
+    if day.weekday() >= 5:
+        return False
+    if exchange == "TSE":
+        return day not in _tse_holidays(day.year)
+    if exchange == "US":
+        return day not in _us_holidays(day.year)
+    return True
+
+
+def _nth_weekday(year, month, weekday, n):
+    """指定月の第n曜日（n=-1で最終）の日付を返す"""
+    if n > 0:
+        first = datetime.date(year, month, 1)
+        offset = (weekday - first.weekday()) % 7
+        return first + datetime.timedelta(days=offset + 7 * (n - 1))
+    next_month = datetime.date(year + month // 12, month % 12 + 1, 1)
+    last = next_month - datetime.timedelta(days=1)
+    return last - datetime.timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year):
+    """復活祭の日付（グレゴリオ暦、Anonymous Gregorian algorithm）"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7  # noqa: E741
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return datetime.date(year, month, day + 1)
+
+
+@lru_cache(maxsize=None)
+def _us_holidays(year):
+    """ニューヨーク証券取引所の休場日"""
+
+    def observed(day):
+        # 土曜日の祝日は前日、日曜日の祝日は翌日に振り替える
+        if day.weekday() == 5:
+            return day - datetime.timedelta(days=1)
+        if day.weekday() == 6:
+            return day + datetime.timedelta(days=1)
+        return day
+
+    holidays = {
+        _nth_weekday(year, 1, 0, 3),  # キング牧師記念日
+        _nth_weekday(year, 2, 0, 3),  # 大統領の日
+        _easter(year) - datetime.timedelta(days=2),  # 聖金曜日
+        _nth_weekday(year, 5, 0, -1),  # 戦没将兵追悼記念日
+        observed(datetime.date(year, 7, 4)),  # 独立記念日
+        _nth_weekday(year, 9, 0, 1),  # 労働者の日
+        _nth_weekday(year, 11, 3, 4),  # 感謝祭
+        observed(datetime.date(year, 12, 25)),  # クリスマス
+    }
+    # 元日が土曜日の場合は前年12月31日に振り替えない
+    new_year = datetime.date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays.add(observed(new_year))
+    if year >= 2022:
+        holidays.add(observed(datetime.date(year, 6, 19)))  # ジューンティーンス
+    return frozenset(holidays)
+
+
+@lru_cache(maxsize=None)
+def _tse_holidays(year):
+    """東京証券取引所の休場日（国民の祝日・振替休日・年末年始）"""
+    elapsed = year - 1980
+    spring_equinox = int(20.8431 + 0.242194 * elapsed - elapsed // 4)
+    autumn_equinox = int(23.2488 + 0.242194 * elapsed - elapsed // 4)
+
+    national = {
+        datetime.date(year, 1, 1),  # 元日
+        _nth_weekday(year, 1, 0, 2),  # 成人の日
+        datetime.date(year, 2, 11),  # 建国記念の日
+        datetime.date(year, 2, 23),  # 天皇誕生日
+        datetime.date(year, 3, spring_equinox),  # 春分の日
+        datetime.date(year, 4, 29),  # 昭和の日
+        datetime.date(year, 5, 3),  # 憲法記念日
+        datetime.date(year, 5, 4),  # みどりの日
+        datetime.date(year, 5, 5),  # こどもの日
+        _nth_weekday(year, 7, 0, 3),  # 海の日
+        datetime.date(year, 8, 11),  # 山の日
+        _nth_weekday(year, 9, 0, 3),  # 敬老の日
+        datetime.date(year, 9, autumn_equinox),  # 秋分の日
+        _nth_weekday(year, 10, 0, 2),  # スポーツの日
+        datetime.date(year, 11, 3),  # 文化の日
+        datetime.date(year, 11, 23),  # 勤労感謝の日
+    }
+
+    holidays = set(national)
+    one_day = datetime.timedelta(days=1)
+    for day in sorted(national):
+        # 振替休日: 日曜日の祝日の後の最初の平日（祝日でない日）
+        if day.weekday() == 6:
+            substitute = day + one_day
+            while substitute in holidays:
+                substitute += one_day
+            holidays.add(substitute)
+    for day in sorted(national):
+        # 国民の休日: 前後を祝日に挟まれた平日
+        between = day + one_day
+        if between not in holidays and between + one_day in national:
+            holidays.add(between)
+
+    # 年末年始の休業日
+    holidays.update(
+        {
+            datetime.date(year, 1, 2),
+            datetime.date(year, 1, 3),
+            datetime.date(year, 12, 31),
+        }
+    )
+    return frozenset(holidays)
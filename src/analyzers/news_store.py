@@ -0,0 +1,164 @@
+"""
+ニュースストアモジュール
+
+defeatbeta-apiから取得したニュースをSQLiteファイルに蓄積し、
+次回以降の実行では銘柄ごとの最新日付以降のニュースのみを取得して追記します。
+プロンプト用のニュース一覧はストアから生成するため、取得元が遅い・失敗した場合でも
+蓄積済みのニュースで分析を続けられます。
+"""
+
+import os
+import sqlite3
+from contextlib import contextmanager
+from threading import Lock
+
+from config import NEWS_STORE_ENABLED, NEWS_STORE_PATH, resolve_project_path
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS news (
+    symbol TEXT NOT NULL,
+    uuid TEXT NOT NULL,
+    report_date TEXT,
+    publisher TEXT,
+    title TEXT,
+    PRIMARY KEY (symbol, uuid)
+);
+CREATE INDEX IF NOT EXISTS news_symbol_date ON news (symbol, report_date);
+"""
+
+
+class NewsStore:
+    """
+    銘柄コードとreport_dateで検索できるSQLiteのニュースストア。
+
+    銘柄コードは取得元と同じく大文字で保存する。
+
+    Args:
+        path: SQLiteファイルのパス
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """接続を開き、処理が成功した場合はコミットして閉じる"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def latest_dates(self, symbols):
+        """
+        銘柄ごとに保存済みニュースの最新のreport_dateを取得する。
+
+        Args:
+            symbols: 銘柄コードのリスト
+
+        Returns:
+            dict: {銘柄コード（大文字）: 最新のreport_date}（未保存の銘柄は含まない）
+        """
+        upper_symbols = [symbol.upper() for symbol in symbols]
+        if not upper_symbols:
+            return {}
+        placeholders = ", ".join("?" * len(upper_symbols))
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT symbol, MAX(report_date) FROM news "
+                f"WHERE symbol IN ({placeholders}) GROUP BY symbol",
+                upper_symbols,
+            ).fetchall()
+        return {symbol: latest for symbol, latest in rows if latest is not None}
+
+    def append(self, rows):
+        """
+        ニュースを追記する（保存済みのニュースは無視する）。
+
+        Args:
+            rows: (symbol, uuid, report_date, publisher, title) のイテラブル
+
+        Returns:
+            int: 新たに保存した件数
+        """
+        with self._lock, self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO news (symbol, uuid, report_date, publisher, title) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    (str(symbol).upper(), str(uuid), _to_text(report_date), publisher, title)
+                    for symbol, uuid, report_date, publisher, title in rows
+                ),
+            )
+            return conn.total_changes - before
+
+    def top_news(self, symbols, limit=5):
+        """
+        銘柄ごとに上位limit件のニュースをプロンプト用の文字列に整形して取得する。
+
+        report_dateが新しい順にlimit件を選び、古い順（時系列順）に並べて返す。
+        差分取得で追加されたニュースがプロンプト・変化検知に反映されるよう、最新のニュースを優先する。
+
+        Args:
+            symbols: 銘柄コードのリスト
+            limit: 1銘柄あたりの最大件数
+
+        Returns:
+            dict: {銘柄コード（大文字）: ニュースの文字列リスト}（保存済みのニュースがない銘柄は含まない）
+        """
+        upper_symbols = [symbol.upper() for symbol in symbols]
+        if not upper_symbols:
+            return {}
+        placeholders = ", ".join("?" * len(upper_symbols))
+        sql = f"""
+            SELECT symbol,
+                   '[' || COALESCE(report_date, '不明') || '] '
+                       || COALESCE(publisher, '不明') || ': '
+                       || COALESCE(title, 'タイトルなし')
+            FROM (
+                SELECT *, ROW_NUMBER() OVER (
+                    PARTITION BY symbol ORDER BY report_date DESC, rowid DESC
+                ) AS news_rank
+                FROM news WHERE symbol IN ({placeholders})
+            )
+            WHERE news_rank <= ?
+            ORDER BY symbol, news_rank DESC
+        """
+        news_map = {}
+        with self._lock, self._connect() as conn:
+            for symbol, news in conn.execute(sql, [*upper_symbols, limit]):
+                news_map.setdefault(symbol, []).append(news)
+        return news_map
+
+
+def _to_text(value):
+    """report_dateを文字列として保存する（取得元のstr()表記と同じ形式にする）"""
+    return None if value is None else str(value)
+
+
+_store = None
+_store_lock = Lock()
+
+
+def get_news_store():
+    """
+    設定に基づく共有のニュースストアを取得する。
+
+    Returns:
+        NewsStore: ストア（NEWS_STORE_ENABLEDが無効の場合はNone）
+    """
+    global _store
+    if not NEWS_STORE_ENABLED:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = NewsStore(resolve_project_path(NEWS_STORE_PATH))
+        return _store
@@ -0,0 +1,139 @@
+"""
+プロンプトキャッシュモジュール
+
+実行中のすべての分析リクエストで共通となるプロンプトの先頭部分
+（システムプロンプト・投資志向性・分析観点）を、Gemini APIの
+cachedContentsリソースとして登録して再利用します。
+
+キャッシュの作成に失敗した場合や、共通部分がキャッシュの最小トークン数に
+満たない場合は、通常どおりプロンプト全体を送信します（Geminiの暗黙的キャッシュは
+共通部分を先頭に置くことで引き続き有効になります）。
+"""
+
+import hashlib
+from concurrent.futures import Future
+from threading import Lock
+
+from config import (
+    GEMINI_API_BASE,
+    GEMINI_API_KEY,
+    GEMINI_CONTEXT_CACHE,
+    GEMINI_CONTEXT_CACHE_TTL_SECONDS,
+)
+
+from .http_client import get_session
+from .rate_limiter import estimate_tokens
+
+# Geminiの明示的キャッシュに必要な最小トークン数
+GEMINI_CONTEXT_CACHE_MIN_TOKENS = 1024
+
+
+class GeminiContextCache:
+    """
+    共通プロンプトごとにGeminiのcachedContentsを1つだけ作成して共有する。
+
+    作成のHTTPリクエストはロックの外で行い、同じ共通プロンプトの作成中に呼び出された場合は
+    その完了を待つ（異なる共通プロンプトの作成や、作成済みのキャッシュの参照は待たせない）。
+
+    Args:
+        api_key: Gemini APIキー
+        ttl_seconds: キャッシュの有効期間（秒）
+    """
+
+    def __init__(self, api_key, ttl_seconds):
+        self.api_key = api_key
+        self.ttl_seconds = ttl_seconds
+        self._futures = {}
+        self._lock = Lock()
+
+    def get_or_create(self, model, system_instruction, static_text):
+        """
+        共通プロンプトに対応するキャッシュ名を取得する（未作成の場合は作成する）。
+
+        Args:
+            model: モデル名（例: 'gemini-2.5-flash'）
+            system_instruction: システムプロンプト
+            static_text: 全リクエストで共通のプロンプト
+
+        Returns:
+            str: cachedContentsのリソース名（作成できない場合はNone）
+        """
+        if (
+            estimate_tokens(system_instruction) + estimate_tokens(static_text)
+            < GEMINI_CONTEXT_CACHE_MIN_TOKENS
+        ):
+            return None
+
+        key = hashlib.sha256(f"{model}\n{system_instruction}\n{static_text}".encode()).hexdigest()
+        with self._lock:
+            future = self._futures.get(key)
+            creating = future is None
+            if creating:
+                future = Future()
+                self._futures[key] = future
+        if creating:
+            # 失敗時もNoneを記録し、同じ実行内で作成を繰り返さない
+            future.set_result(self._create(model, system_instruction, static_text))
+        return future.result()
+
+    def _create(self, model, system_instruction, static_text):
+        url = f"{GEMINI_API_BASE}/v1beta/cachedContents?key={self.api_key}"
+        payload = {
+            "model": f"models/{model}",
+            "systemInstruction": {"parts": [{"text": system_instruction}]},
+            "contents": [{"role": "user", "parts": [{"text": static_text}]}],
+            "ttl": f"{self.ttl_seconds}s",
+        }
+        try:
+            resp = get_session(url).post(url, json=payload, timeout=30)
+            if resp.status_code == 200:
+                name = resp.json().get("name")
+                print(f"Geminiプロンプトキャッシュを作成しました: {name}")
+                return name
+            print(
+                f"Geminiプロンプトキャッシュの作成に失敗しました: HTTPステータス {resp.status_code}"
+            )
+        except Exception as e:
+            print(f"Geminiプロンプトキャッシュの作成に失敗しました: {e}")
+        return None
+
+    def release_all(self):
+        """作成したキャッシュを削除する（有効期限を待たずに保存コストを止める）"""
+        with self._lock:
+            futures = list(self._futures.values())
+            self._futures.clear()
+        for name in (future.result() for future in futures):
+            if not name:
+                continue
+            url = f"{GEMINI_API_BASE}/v1beta/{name}?key={self.api_key}"
+            try:
+                get_session(url).delete(url, timeout=30)
+            except Exception as e:
+                print(f"Geminiプロンプトキャッシュの削除に失敗しました: {e}")
+
+
+_context_cache = None
+_context_cache_lock = Lock()
+
+
+def get_gemini_context_cache():
+    """
+    共有のGeminiコンテキストキャッシュを取得する。
+
+    Returns:
+        GeminiContextCache: キャッシュ（GEMINI_CONTEXT_CACHEが無効の場合はNone）
+    """
+    global _context_cache
+    if not GEMINI_CONTEXT_CACHE or not GEMINI_API_KEY:
+        return None
+    with _context_cache_lock:
+        if _context_cache is None:
+            _context_cache = GeminiContextCache(GEMINI_API_KEY, GEMINI_CONTEXT_CACHE_TTL_SECONDS)
+        return _context_cache
+
+
+def release_gemini_context_caches():
+    """実行終了時に作成したGeminiのキャッシュを削除する"""
+    cache = _context_cache
+    if cache is not None:
+        cache.release_all()
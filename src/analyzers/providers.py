@@ -0,0 +1,414 @@
+"""
+分析プロバイダーモジュール
+
+AI分析のバックエンド（Claude・Gemini）を共通のインターフェースで扱います。
+プロバイダーはレジストリに登録し、名前で取得します。レート制限はプロバイダーごとに
+rate_limiterモジュールのレートリミッターを共有します。
+
+選択したプロバイダーで分析に失敗した銘柄は、APIキーが設定されている他のプロバイダーで
+順に再分析します（フェイルオーバー）。ヘッジを有効にすると、APIへの送信開始から
+プロバイダーのp90レイテンシを超えた時点で次のプロバイダーにも同じ分析を依頼し、先に成功した結果を使います。
+実行時間を左右する応答の遅い銘柄（テールレイテンシ）を短縮するためのものです。
+"""
+
+import asyncio
+import contextvars
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from config import (
+    ANALYSIS_FAILOVER,
+    ANALYSIS_HEDGE,
+    ANALYSIS_HEDGE_MIN_SAMPLES,
+    CLAUDE_API_KEY,
+    GEMINI_API_KEY,
+    PIPELINE_ANALYZE_WORKERS,
+)
+
+from . import ai_analyzer
+from .analysis_cache import FAILURE_PREFIX
+from .rate_limiter import get_rate_limiter
+
+# 分析の種類（詳細な分析・トリアージ）
+ANALYZE = "analyze"
+TRIAGE = "triage"
+
+# レイテンシのサンプルとして保持する直近の成功件数
+LATENCY_WINDOW = 200
+
+# ヘッジの判定に使うレイテンシの百分位
+HEDGE_PERCENTILE = 90
+
+
+class AnalysisProvider:
+    """
+    AI分析のプロバイダー。
+
+    サブクラスはname・api_keyと、分析の種類ごとの同期・非同期の分析関数名を定義する。
+    分析関数はai_analyzerモジュールから呼び出し時に参照する。
+    """
+
+    name = None
+    functions = {}
+
+    def __init__(self):
+        self._latencies = {}
+        self._lock = threading.Lock()
+
+    @property
+    def api_key(self):
+        return None
+
+    @property
+    def rate_limiter(self):
+        """プロバイダーで共有するレートリミッター"""
+        return get_rate_limiter(self.name)
+
+    def is_configured(self):
+        """APIキーが設定されているか"""
+        return bool(self.api_key and self.api_key.strip())
+
+    def call(self, kind, data, preference_prompt=None, on_start=None):
+        """
+        銘柄データを分析する。
+
+        成功した場合はAPIの往復時間をレイテンシのサンプルとして記録する
+        （分析キャッシュのヒット・レート制限やリトライの待機は含めない）。
+
+        Args:
+            kind: 分析の種類（ANALYZE または TRIAGE）
+            data: 株価データと保有情報を含む辞書
+            preference_prompt: 投資志向性プロンプト
+            on_start: APIへの送信の開始時（送信せずに終了した場合は終了時）に呼び出す関数
+
+        Returns:
+            str: 分析結果（失敗時は「## 分析失敗」で始まるレポート）
+        """
+        func = getattr(ai_analyzer, self.functions[kind][0])
+        observer = ai_analyzer.RoundTripObserver(on_start)
+        try:
+            with ai_analyzer.observe_round_trips(observer):
+                result = func(data, preference_prompt)
+        finally:
+            observer.notify_start()
+        self._record(kind, result, observer)
+        return result
+
+    async def call_async(self, kind, data, preference_prompt=None, on_start=None):
+        """callの非同期版"""
+        func = getattr(ai_analyzer, self.functions[kind][1])
+        observer = ai_analyzer.RoundTripObserver(on_start)
+        try:
+            with ai_analyzer.observe_round_trips(observer):
+                result = await func(data, preference_prompt)
+        finally:
+            observer.notify_start()
+        self._record(kind, result, observer)
+        return result
+
+    def record_latency(self, kind, seconds):
+        """
+        成功した分析の所要時間を記録する。
+
+        Args:
+            kind: 分析の種類
+            seconds: 所要時間（秒）
+        """
+        with self._lock:
+            samples = self._latencies.get(kind)
+            if samples is None:
+                samples = self._latencies[kind] = deque(maxlen=LATENCY_WINDOW)
+            samples.append(float(seconds))
+
+    def hedge_delay(self, kind):
+        """
+        ヘッジリクエストを送るまでの待機時間（直近の成功した分析のp90レイテンシ）を返す。
+
+        Args:
+            kind: 分析の種類
+
+        Returns:
+            float | None: 待機時間（秒）。サンプルが不足している場合はNone
+        """
+        with self._lock:
+            samples = sorted(self._latencies.get(kind, ()))
+        if not samples or len(samples) < ANALYSIS_HEDGE_MIN_SAMPLES:
+            return None
+        rank = max(1, -(-len(samples) * HEDGE_PERCENTILE // 100))
+        return samples[rank - 1]
+
+    def _record(self, kind, result, observer):
+        # 分析キャッシュのヒットなど送信しなかった場合はサンプルにしない
+        if observer.samples and not is_failure(result):
+            self.record_latency(kind, observer.samples[-1])
+
+
+class ClaudeProvider(AnalysisProvider):
+    """Claude APIによる分析"""
+
+    name = "claude"
+    functions = {
+        ANALYZE: ("analyze_with_claude", "analyze_with_claude_async"),
+        TRIAGE: ("triage_with_claude", "triage_with_claude_async"),
+    }
+
+    @property
+    def api_key(self):
+        return CLAUDE_API_KEY
+
+
+class GeminiProvider(AnalysisProvider):
+    """Gemini APIによる分析"""
+
+    name = "gemini"
+    functions = {
+        ANALYZE: ("analyze_with_gemini", "analyze_with_gemini_async"),
+        TRIAGE: ("triage_with_gemini", "triage_with_gemini_async"),
+    }
+
+    @property
+    def api_key(self):
+        return GEMINI_API_KEY
+
+
+# 登録済みのプロバイダーのクラス（登録順がフェイルオーバーの順序になる）
+_registry = {}
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def register_provider(provider_class):
+    """
+    プロバイダーのクラスを登録する（クラスデコレーターとしても使用できる）。
+
+    Args:
+        provider_class: AnalysisProviderのサブクラス
+
+    Returns:
+        登録したクラス
+    """
+    with _providers_lock:
+        _registry[provider_class.name] = provider_class
+        _providers.pop(provider_class.name, None)
+    return provider_class
+
+
+register_provider(GeminiProvider)
+register_provider(ClaudeProvider)
+
+
+def get_provider(name):
+    """
+    登録済みのプロバイダーを取得する（レイテンシのサンプルを共有するためプロセス全体で1つ）。
+
+    Args:
+        name: プロバイダー名（'gemini' または 'claude'）
+
+    Returns:
+        AnalysisProvider: プロバイダー
+
+    Raises:
+        ValueError: 登録されていないプロバイダー名の場合
+    """
+    with _providers_lock:
+        provider = _providers.get(name)
+        if provider is None:
+            provider_class = _registry.get(name)
+            if provider_class is None:
+                raise ValueError(f"未登録の分析プロバイダー: {name}")
+            provider = _providers[name] = provider_class()
+        return provider
+
+
+def get_provider_chain(use_claude):
+    """
+    分析に使うプロバイダーを試行順に並べる。
+
+    選択したプロバイダーを先頭とし、フェイルオーバーが有効な場合は
+    APIキーが設定されている他のプロバイダーを登録順に続ける。
+
+    Args:
+        use_claude: Claudeを選択している場合True
+
+    Returns:
+        list[AnalysisProvider]: プロバイダーのリスト
+    """
+    primary = get_provider("claude" if use_claude else "gemini")
+    chain = [primary]
+    if ANALYSIS_FAILOVER:
+        chain.extend(
+            get_provider(name)
+            for name in list(_registry)
+            if name != primary.name and get_provider(name).is_configured()
+        )
+    return chain
+
+
+def is_failure(result):
+    """分析結果が失敗のレポートか"""
+    return not result or result.startswith(FAILURE_PREFIX)
+
+
+def run_with_failover(providers, kind, data, preference_prompt=None):
+    """
+    プロバイダーを順に試し、最初に成功した分析結果を返す。
+
+    ヘッジが有効で、試行中のプロバイダーのp90レイテンシが分かっている場合は、
+    その時間を超えた時点で次のプロバイダーにも依頼し、先に成功した結果を使う。
+
+    Args:
+        providers: 試行順に並べたプロバイダーのリスト
+        kind: 分析の種類（ANALYZE または TRIAGE）
+        data: 株価データと保有情報を含む辞書
+        preference_prompt: 投資志向性プロンプト
+
+    Returns:
+        str: 分析結果（すべて失敗した場合は最後の失敗レポート）
+    """
+    result = None
+    index = 0
+    while index < len(providers):
+        provider = providers[index]
+        backup, delay = _hedge_plan(providers, index, kind)
+        if delay is None:
+            result = provider.call(kind, data, preference_prompt)
+            hedged = False
+        else:
+            result, hedged = _run_hedged(provider, backup, kind, data, preference_prompt, delay)
+        if not is_failure(result):
+            return result
+        index += 2 if hedged else 1
+        _print_failover(providers, index, data["symbol"])
+    return result
+
+
+async def run_with_failover_async(providers, kind, data, preference_prompt=None):
+    """run_with_failoverの非同期版（ヘッジで遅れた方のリクエストはキャンセルする）"""
+    result = None
+    index = 0
+    while index < len(providers):
+        provider = providers[index]
+        backup, delay = _hedge_plan(providers, index, kind)
+        if delay is None:
+            result = await provider.call_async(kind, data, preference_prompt)
+            hedged = False
+        else:
+            result, hedged = await _run_hedged_async(
+                provider, backup, kind, data, preference_prompt, delay
+            )
+        if not is_failure(result):
+            return result
+        index += 2 if hedged else 1
+        _print_failover(providers, index, data["symbol"])
+    return result
+
+
+def _hedge_plan(providers, index, kind):
+    """ヘッジ先のプロバイダーと、ヘッジするまでの待機時間（ヘッジしない場合はNone）を返す"""
+    if not ANALYSIS_HEDGE or index + 1 >= len(providers):
+        return None, None
+    return providers[index + 1], providers[index].hedge_delay(kind)
+
+
+def _print_failover(providers, index, symbol):
+    if index < len(providers):
+        print(f"分析に失敗したため{providers[index].name}で再分析: {symbol}")
+
+
+def _print_hedge(provider, backup, delay, symbol):
+    print(
+        f"{provider.name}の応答がp90レイテンシ（{delay:.1f}秒）を超えたため"
+        f"{backup.name}にも分析を依頼: {symbol}"
+    )
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_hedge_executor():
+    """
+    ヘッジ時に分析を並行して実行する共有のスレッドプールを取得する。
+
+    分析ワーカーごとに、元のリクエストとヘッジリクエストの2つを同時に実行できるサイズとする。
+
+    Returns:
+        ThreadPoolExecutor: プロセス全体で共有されるスレッドプール
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(2, PIPELINE_ANALYZE_WORKERS * 2),
+                thread_name_prefix="hedge",
+            )
+        return _executor
+
+
+def _run_hedged(provider, backup, kind, data, preference_prompt, delay):
+    """
+    APIへの送信開始からp90レイテンシまで待っても応答がない場合に、次のプロバイダーにも同じ分析を依頼する。
+
+    スレッドプールの空き待ち・分析キャッシュの参照・レート制限の待機は、ヘッジまでの待機時間に含めない。
+
+    Returns:
+        (分析結果, ヘッジリクエストを送ったか) のタプル。
+        同期版では遅れた方のリクエストは中断できないため、完了まで実行して結果を破棄する
+    """
+    executor = get_hedge_executor()
+    started = threading.Event()
+    # 銘柄ごとのリトライの期限を引き継ぐため、呼び出し元のコンテキストで実行する
+    primary = executor.submit(
+        contextvars.copy_context().run, provider.call, kind, data, preference_prompt, started.set
+    )
+    started.wait()
+    done, _ = wait([primary], timeout=delay)
+    if done:
+        return primary.result(), False
+
+    _print_hedge(provider, backup, delay, data["symbol"])
+    pending = {
+        primary,
+        executor.submit(contextvars.copy_context().run, backup.call, kind, data, preference_prompt),
+    }
+    result = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            result = future.result()
+            if not is_failure(result):
+                return result, True
+    return result, True
+
+
+async def _run_hedged_async(provider, backup, kind, data, preference_prompt, delay):
+    """_run_hedgedの非同期版"""
+    loop = asyncio.get_running_loop()
+    started = asyncio.Event()
+
+    def on_start():
+        # Geminiの送信はスレッドで行われるため、イベントループ経由で通知する
+        loop.call_soon_threadsafe(started.set)
+
+    primary = asyncio.ensure_future(provider.call_async(kind, data, preference_prompt, on_start))
+    pending = {primary}
+    try:
+        await started.wait()
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if done:
+            return primary.result(), False
+
+        _print_hedge(provider, backup, delay, data["symbol"])
+        pending.add(asyncio.ensure_future(backup.call_async(kind, data, preference_prompt)))
+        result = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                result = task.result()
+                if not is_failure(result):
+                    return result, True
+        return result, True
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,117 @@
+"""
+株価キャッシュモジュール
+
+銘柄ごとに前回取得したquote情報と取得時刻をJSONファイルに保存し、
+前回取得以降に上場取引所の立会がなかった銘柄（東証の大引け後、米国市場の休場日など）は
+Yahoo Finance APIを呼ばずに保存済みのquote情報を使用します。
+"""
+
+import datetime
+import json
+import os
+from threading import Lock
+
+from config import QUOTE_CACHE_ENABLED, QUOTE_CACHE_PATH, resolve_project_path
+from loaders.stock_loader import get_exchange_for_symbol
+
+from .market_calendar import traded_between
+
+
+def _utcnow():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class QuoteCache:
+    """
+    取引所の立会時間を考慮した株価キャッシュ。
+
+    Args:
+        path: キャッシュファイルのパス
+        clock: 現在時刻（タイムゾーン付きdatetime）を返す関数（テスト用）
+    """
+
+    def __init__(self, path, clock=_utcnow):
+        self.path = path
+        self.clock = clock
+        self._lock = Lock()
+        self._records = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                records = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"警告: 株価キャッシュを読み込めませんでした: {e}")
+            return {}
+        return records if isinstance(records, dict) else {}
+
+    def lookup(self, symbols):
+        """
+        前回取得以降に取引がなく、保存済みのquote情報をそのまま使える銘柄を返す。
+
+        Args:
+            symbols: 銘柄コードのリスト
+
+        Returns:
+            銘柄コードをキー、保存済みのquote情報を値とする辞書
+        """
+        now = self.clock()
+        quotes = {}
+        with self._lock:
+            for symbol in symbols:
+                record = self._records.get(symbol)
+                if not record:
+                    continue
+                try:
+                    fetched_at = datetime.datetime.fromisoformat(record["fetched_at"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                if not traded_between(get_exchange_for_symbol(symbol), fetched_at, now):
+                    quotes[symbol] = record["quote"]
+        return quotes
+
+    def update(self, quotes):
+        """
+        取得したquote情報を現在時刻とともに記録する。
+
+        Args:
+            quotes: 銘柄コードをキー、quote情報を値とする辞書
+        """
+        fetched_at = self.clock().isoformat()
+        with self._lock:
+            for symbol, quote in quotes.items():
+                self._records[symbol] = {"quote": quote, "fetched_at": fetched_at}
+
+    def save(self):
+        """キャッシュをファイルに保存する（一時ファイルへの書き込み後に置き換え）"""
+        with self._lock:
+            records = dict(self._records)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+_cache = None
+_cache_lock = Lock()
+
+
+def get_quote_cache():
+    """
+    設定に基づく共有の株価キャッシュを取得する。
+
+    Returns:
+        QuoteCache: キャッシュ（QUOTE_CACHE_ENABLEDが無効の場合はNone）
+    """
+    global _cache
+    if not QUOTE_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = QuoteCache(resolve_project_path(QUOTE_CACHE_PATH))
+        return _cache
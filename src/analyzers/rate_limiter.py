@@ -0,0 +1,181 @@
+"""
+レート制限モジュール
+
+AI APIのレート制限（RPM: 1分あたりのリクエスト数、TPM: 1分あたりのトークン数）を
+直近60秒間の予約を記録するスライディングウィンドウ方式で管理します。上限までは待機なしで
+連続実行でき、それ以降は最も古い予約が60秒の枠から外れるまで待機するため、
+どの60秒間でも上限を超えることはありません。
+
+待機時間の予約のみをロック内で行い、実際の待機はロックの外で行うため、
+待機中のスレッドが他のスレッドの予約を妨げることはありません。
+"""
+
+import asyncio
+import time
+from collections import deque
+from threading import Lock
+
+from config import CLAUDE_RPM, CLAUDE_TPM, GEMINI_RPM, GEMINI_TPM
+from runs.metrics import RATE_LIMIT_STAGE, record_duration
+
+# プロバイダーごとのレート制限設定（None の場合は制限なし）
+PROVIDER_LIMITS = {
+    "gemini": {"requests_per_minute": GEMINI_RPM, "tokens_per_minute": GEMINI_TPM},
+    "claude": {"requests_per_minute": CLAUDE_RPM, "tokens_per_minute": CLAUDE_TPM},
+}
+
+# 上限を適用する期間（秒）
+WINDOW_SECONDS = 60.0
+
+
+class _SlidingWindow:
+    """
+    直近60秒間の予約（実行開始時刻と量）を記録し、どの60秒間でも上限を超えないようにする枠。
+
+    上限までは待機なしで連続実行でき、それ以降は最も古い予約が60秒の枠から外れるまで待つ。
+    予約は実行開始時刻の順に記録されるため、枠から外れた予約は先頭から取り除ける。
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.entries = deque()
+        self.total = 0
+
+    def earliest(self, amount, now):
+        """予約分を上限内で実行できる最も早い時刻を返す"""
+        amount = min(amount, self.capacity)
+        start = max(now, self.entries[-1][0]) if self.entries else now
+        total = self.total
+        for reserved_at, reserved in self.entries:
+            if total + amount <= self.capacity:
+                break
+            total -= reserved
+            start = max(start, reserved_at + WINDOW_SECONDS)
+        return start
+
+    def commit(self, amount, start):
+        """実行開始時刻に予約を記録し、以降の予約に影響しない古い予約を取り除く"""
+        amount = min(amount, self.capacity)
+        self.entries.append((start, amount))
+        self.total += amount
+        while self.entries and self.entries[0][0] <= start - WINDOW_SECONDS:
+            self.total -= self.entries.popleft()[1]
+
+
+class RateLimiter:
+    """
+    RPMとTPMの2つの60秒の枠でAPI呼び出しを制限するレートリミッター。
+
+    Args:
+        requests_per_minute: 1分あたりの最大リクエスト数（Noneの場合は制限なし）
+        tokens_per_minute: 1分あたりの最大トークン数（Noneの場合は制限なし）
+        clock: 現在時刻（秒）を返す関数（テスト用）
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, clock=time.monotonic):
+        self._clock = clock
+        self._lock = Lock()
+        self._request_window = _SlidingWindow(requests_per_minute) if requests_per_minute else None
+        self._token_window = _SlidingWindow(tokens_per_minute) if tokens_per_minute else None
+
+    def reserve(self, tokens=0):
+        """
+        1リクエスト分（とトークン数分）の枠を予約し、実行まで待つべき秒数を返す。
+
+        Args:
+            tokens: このリクエストで消費する見込みのトークン数
+
+        Returns:
+            float: 待機秒数（0の場合は即時実行可能）
+        """
+        with self._lock:
+            now = self._clock()
+            # 両方の枠で実行可能な時刻に揃えて予約する（遅い時刻ほど枠内の予約は減るため両方を満たす）
+            reservations = []
+            if self._request_window:
+                reservations.append((self._request_window, 1))
+            if self._token_window and tokens:
+                reservations.append((self._token_window, tokens))
+            start = max((w.earliest(amount, now) for w, amount in reservations), default=now)
+            for window, amount in reservations:
+                window.commit(amount, start)
+            return start - now
+
+    def acquire(self, tokens=0, label=None):
+        """
+        実行可能になるまでスレッドをブロックする。
+
+        Args:
+            tokens: このリクエストで消費する見込みのトークン数
+            label: 待機メッセージに表示する識別子（銘柄コードなど）
+
+        Returns:
+            float: 待機した秒数
+        """
+        wait = self.reserve(tokens)
+        record_duration(RATE_LIMIT_STAGE, wait, label)
+        if wait > 0:
+            _print_wait(wait, label)
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens=0, label=None):
+        """
+        実行可能になるまで待機する（イベントループはブロックしない）。
+
+        Args:
+            tokens: このリクエストで消費する見込みのトークン数
+            label: 待機メッセージに表示する識別子（銘柄コードなど）
+
+        Returns:
+            float: 待機した秒数
+        """
+        wait = self.reserve(tokens)
+        record_duration(RATE_LIMIT_STAGE, wait, label)
+        if wait > 0:
+            _print_wait(wait, label)
+            await asyncio.sleep(wait)
+        return wait
+
+
+def _print_wait(wait, label):
+    """待機メッセージを表示する"""
+    suffix = f" ({label})" if label else ""
+    print(f"レート制限: {wait:.1f}秒待機中...{suffix}")
+
+
+_limiters = {}
+_limiters_lock = Lock()
+
+
+def get_rate_limiter(provider):
+    """
+    プロバイダー（'gemini' または 'claude'）で共有するレートリミッターを取得する。
+
+    Args:
+        provider: プロバイダー名
+
+    Returns:
+        RateLimiter: プロセス全体で共有されるレートリミッター
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            limiter = RateLimiter(**PROVIDER_LIMITS.get(provider, {}))
+            _limiters[provider] = limiter
+        return limiter
+
+
+def estimate_tokens(text):
+    """
+    プロンプトのトークン数を概算する。
+
+    日本語は1文字あたり1トークン前後になるため、文字数を上限寄りの概算値として用いる。
+
+    Args:
+        text: プロンプト文字列
+
+    Returns:
+        int: 概算トークン数
+    """
+    return len(text) if text else 0
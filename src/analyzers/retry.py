@@ -0,0 +1,389 @@
+"""
+リトライモジュール
+
+外部API（Yahoo Finance・Gemini・Claude）の一時的な失敗（429・5xx・通信エラー）を
+共通の方針でリトライします。応答にRetry-Afterがある場合はその秒数以上待機し、
+ない場合は上限付きの指数バックオフにジッターを加えた秒数だけ待機します。
+AI APIのリトライはレートリミッターの枠を消費してから再送するため、
+リトライを含めて実行全体のレート制限を超えることはありません。
+期限（RETRY_DEADLINE_SECONDS）を超える待機が必要になった場合は、その時点で打ち切ります。
+期限は銘柄ごとに1つで、トリアージ・詳細な分析・フェイルオーバー・ヘッジの各呼び出しで共有します
+（銘柄の分析の外で呼び出された場合は、最初の試行から数えます）。
+"""
+
+import asyncio
+import contextvars
+import datetime
+import email.utils
+import random
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+import anthropic
+import requests
+
+from config import (
+    RETRY_BASE_DELAY_SECONDS,
+    RETRY_DEADLINE_SECONDS,
+    RETRY_MAX_ATTEMPTS,
+    RETRY_MAX_DELAY_SECONDS,
+)
+from runs.metrics import RETRY_STAGE, record_duration
+
+from .rate_limiter import get_rate_limiter
+
+# リトライ対象のHTTPステータス（529はClaude APIの過負荷）
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504, 529})
+
+# 銘柄ごとのリトライの期限（RetryPolicyの時計での時刻。未設定の場合はNone）
+_deadline_at = contextvars.ContextVar("retry_deadline_at", default=None)
+
+
+class RetryableError(Exception):
+    """
+    リトライで回復する見込みのある失敗。
+
+    Args:
+        message: エラー内容
+        retry_after: サーバーが指定した待機秒数（Retry-Afterがない場合はNone）
+        response: 失敗したHTTP応答（リトライを打ち切った場合に応答内容を表示するため）
+    """
+
+    def __init__(self, message, retry_after=None, response=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.response = response
+
+
+class RetryExhaustedError(Exception):
+    """
+    リトライの上限回数または期限に達して打ち切ったことを表す例外。
+
+    Args:
+        message: エラー内容
+        last_error: 最後の試行のRetryableError
+    """
+
+    def __init__(self, message, last_error):
+        super().__init__(message)
+        self.last_error = last_error
+
+
+def parse_retry_after(value, now=None):
+    """
+    Retry-Afterヘッダーの値を待機秒数に変換する（秒数とHTTP日付の両方に対応）。
+
+    Args:
+        value: ヘッダーの値
+        now: 現在時刻（HTTP日付の場合の基準、テスト用）
+
+    Returns:
+        float: 待機秒数（値がない・解釈できない場合はNone）
+    """
+    if not isinstance(value, str) or not value.strip():
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    return max(0.0, (when - now).total_seconds())
+
+
+class RetryPolicy:
+    """
+    上限付き指数バックオフ + ジッターでリトライする方針。
+
+    Args:
+        max_attempts: 最大試行回数（1の場合はリトライしない）
+        base_delay: 1回目のリトライの待機上限（秒）。以降は失敗ごとに2倍になる
+        max_delay: バックオフの待機上限（秒）
+        deadline: 銘柄ごと（銘柄の分析の外では最初の試行から）の期限（秒、Noneの場合は期限なし）
+        clock: 現在時刻（秒）を返す関数（テスト用）
+        sleep: 待機する関数（テスト用）
+        rng: ジッターに使う乱数生成器（テスト用）
+    """
+
+    def __init__(
+        self,
+        max_attempts=4,
+        base_delay=1.0,
+        max_delay=30.0,
+        deadline=None,
+        clock=time.monotonic,
+        sleep=time.sleep,
+        rng=None,
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self._clock = clock
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+        self._rng_lock = Lock()
+
+    def backoff(self, attempt, retry_after=None):
+        """
+        attempt回目の失敗後に待機する秒数を返す。
+
+        待機秒数は0〜min(max_delay, base_delay * 2^(attempt-1))の一様乱数とし（フルジッター）、
+        同時に失敗したリクエストの再送が同じ時刻に集中しないようにする。
+        Retry-Afterがある場合はその秒数を下限とする。
+
+        Args:
+            attempt: 失敗した試行の回数（1始まり）
+            retry_after: サーバーが指定した待機秒数
+
+        Returns:
+            float: 待機秒数
+        """
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        with self._rng_lock:
+            delay = self._rng.uniform(0, ceiling)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    @contextmanager
+    def deadline_scope(self):
+        """
+        withブロック内のリトライに共通の期限を設定する（銘柄ごとの期限に使用する）。
+
+        既に期限が設定されている場合は、その期限をそのまま使う。
+        """
+        if self.deadline is None or _deadline_at.get() is not None:
+            yield
+            return
+        token = _deadline_at.set(self._clock() + self.deadline)
+        try:
+            yield
+        finally:
+            _deadline_at.reset(token)
+
+    def _deadline_from(self, started):
+        """適用する期限の時刻を返す（銘柄ごとの期限を優先する）"""
+        scoped = _deadline_at.get()
+        if scoped is not None or self.deadline is None:
+            return scoped
+        return started + self.deadline
+
+    def _next_delay(self, attempt, error, deadline_at, label):
+        """次の試行までの待機秒数を返す（打ち切る場合はRetryExhaustedErrorを送出する）"""
+        if attempt >= self.max_attempts:
+            raise RetryExhaustedError(
+                f"{attempt}回試行しても成功しませんでした: {error}", error
+            ) from error
+        delay = self.backoff(attempt, error.retry_after)
+        self._check_deadline(deadline_at, error, delay)
+        suffix = f" ({label})" if label else ""
+        print(f"リトライ: {error}、{delay:.1f}秒後に再試行します（{attempt}回目）{suffix}")
+        record_duration(RETRY_STAGE, delay, label)
+        return delay
+
+    def _check_deadline(self, deadline_at, error, delay=0.0):
+        """delay秒後に期限を過ぎる場合はRetryExhaustedErrorを送出する"""
+        if deadline_at is not None and self._clock() + delay > deadline_at:
+            raise RetryExhaustedError(
+                f"リトライの期限（{self.deadline:g}秒）に達したため打ち切りました: {error}", error
+            ) from error
+
+    def call(self, func, label=None, provider=None, tokens=0):
+        """
+        funcを呼び出し、RetryableErrorで失敗した場合はリトライする。
+
+        Args:
+            func: 引数なしで呼び出す関数（リトライ対象の失敗はRetryableErrorとして送出する）
+            label: 待機メッセージ・メトリクスに使う識別子（銘柄コードなど）
+            provider: AIプロバイダー名（指定時はリトライごとにレートリミッターの枠を消費する）
+            tokens: 1リクエストで消費する見込みのトークン数
+
+        Returns:
+            funcの戻り値
+
+        Raises:
+            RetryExhaustedError: 上限回数または期限に達した場合
+        """
+        deadline_at = self._deadline_from(self._clock())
+        attempt = 1
+        while True:
+            try:
+                return func()
+            except RetryableError as e:
+                error = e
+                delay = self._next_delay(attempt, error, deadline_at, label)
+            self._sleep(delay)
+            if provider:
+                get_rate_limiter(provider).acquire(tokens, label)
+                # レートリミッターの待機で期限を過ぎた場合は再送しない
+                self._check_deadline(deadline_at, error)
+            attempt += 1
+
+    async def call_async(self, func, label=None, provider=None, tokens=0):
+        """
+        callの非同期版（待機中もイベントループはブロックしない）。
+
+        Args:
+            func: 引数なしで呼び出すとawaitableを返す関数
+            label: 待機メッセージ・メトリクスに使う識別子（銘柄コードなど）
+            provider: AIプロバイダー名（指定時はリトライごとにレートリミッターの枠を消費する）
+            tokens: 1リクエストで消費する見込みのトークン数
+
+        Returns:
+            funcの戻り値（await後）
+
+        Raises:
+            RetryExhaustedError: 上限回数または期限に達した場合
+        """
+        deadline_at = self._deadline_from(self._clock())
+        attempt = 1
+        while True:
+            try:
+                return await func()
+            except RetryableError as e:
+                error = e
+                delay = self._next_delay(attempt, error, deadline_at, label)
+            await asyncio.sleep(delay)
+            if provider:
+                await get_rate_limiter(provider).acquire_async(tokens, label)
+                self._check_deadline(deadline_at, error)
+            attempt += 1
+
+
+_policy = None
+_policy_lock = Lock()
+
+
+def get_retry_policy():
+    """
+    設定に基づく共有のリトライ方針を取得する。
+
+    Returns:
+        RetryPolicy: プロセス全体で共有されるリトライ方針
+    """
+    global _policy
+    with _policy_lock:
+        if _policy is None:
+            _policy = RetryPolicy(
+                max_attempts=RETRY_MAX_ATTEMPTS,
+                base_delay=RETRY_BASE_DELAY_SECONDS,
+                max_delay=RETRY_MAX_DELAY_SECONDS,
+                deadline=RETRY_DEADLINE_SECONDS,
+            )
+        return _policy
+
+
+def symbol_deadline():
+    """
+    銘柄ごとのリトライの期限を設定するコンテキストマネージャーを返す。
+
+    withブロック内の複数のAPI呼び出し（トリアージ・詳細な分析・フェイルオーバー・ヘッジ）は、
+    ブロックに入った時点から数えた1つの期限（RETRY_DEADLINE_SECONDS）を共有する。
+    """
+    return get_retry_policy().deadline_scope()
+
+
+def request_with_retry(send, label=None, provider=None, tokens=0):
+    """
+    requestsのリクエストを送信し、リトライ対象のHTTPステータス・通信エラーの場合はリトライする。
+
+    Args:
+        send: 引数なしで呼び出すとrequests.Responseを返す関数
+        label: 待機メッセージ・メトリクスに使う識別子（銘柄コードなど）
+        provider: AIプロバイダー名（指定時はリトライごとにレートリミッターの枠を消費する）
+        tokens: 1リクエストで消費する見込みのトークン数
+
+    Returns:
+        requests.Response: 応答（リトライ対象外のエラー応答はそのまま返す）
+
+    Raises:
+        RetryExhaustedError: 上限回数または期限に達した場合
+    """
+
+    def attempt():
+        try:
+            response = send()
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise RetryableError(f"通信エラー: {e}") from e
+        if response.status_code in RETRYABLE_STATUS_CODES:
+            raise RetryableError(
+                f"HTTPステータス {response.status_code}",
+                parse_retry_after(response.headers.get("Retry-After")),
+                response,
+            )
+        return response
+
+    return get_retry_policy().call(attempt, label, provider, tokens)
+
+
+def _as_retryable(error):
+    """Anthropic SDKの例外のうちリトライ対象のものをRetryableErrorに変換する（対象外はNone）"""
+    if isinstance(error, anthropic.APIConnectionError):
+        return RetryableError(f"通信エラー: {error}")
+    if isinstance(error, anthropic.APIStatusError) and error.status_code in RETRYABLE_STATUS_CODES:
+        return RetryableError(
+            f"HTTPステータス {error.status_code}",
+            parse_retry_after(error.response.headers.get("retry-after")),
+        )
+    return None
+
+
+def call_anthropic_with_retry(create, label=None, tokens=0):
+    """
+    Anthropic SDKのAPI呼び出しを、リトライ対象の失敗の場合はリトライする。
+
+    Args:
+        create: 引数なしで呼び出すとAPIの応答を返す関数
+        label: 待機メッセージ・メトリクスに使う識別子（銘柄コードなど）
+        tokens: 1リクエストで消費する見込みのトークン数
+
+    Returns:
+        APIの応答
+
+    Raises:
+        RetryExhaustedError: 上限回数または期限に達した場合
+        anthropic.APIError: リトライ対象外の失敗
+    """
+
+    def attempt():
+        try:
+            return create()
+        except anthropic.APIError as e:
+            retryable = _as_retryable(e)
+            if retryable is None:
+                raise
+            raise retryable from e
+
+    return get_retry_policy().call(attempt, label, "claude", tokens)
+
+
+async def call_anthropic_with_retry_async(create, label=None, tokens=0):
+    """
+    call_anthropic_with_retryの非同期版。
+
+    Args:
+        create: 引数なしで呼び出すとAPIの応答のawaitableを返す関数
+        label: 待機メッセージ・メトリクスに使う識別子（銘柄コードなど）
+        tokens: 1リクエストで消費する見込みのトークン数
+
+    Returns:
+        APIの応答
+    """
+
+    async def attempt():
+        try:
+            return await create()
+        except anthropic.APIError as e:
+            retryable = _as_retryable(e)
+            if retryable is None:
+                raise
+            raise retryable from e
+
+    return await get_retry_policy().call_async(attempt, label, "claude", tokens)
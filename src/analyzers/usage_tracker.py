@@ -0,0 +1,69 @@
+"""
+トークン使用量集計モジュール
+
+AI APIの応答に含まれるトークン使用量を実行全体で集計し、
+プロンプトキャッシュのヒット状況を確認できるようにします。
+"""
+
+from threading import Lock
+
+_USAGE_FIELDS = ("requests", "input_tokens", "cached_tokens", "cache_write_tokens", "output_tokens")
+
+_usage = {}
+_lock = Lock()
+
+
+def record_usage(provider, input_tokens=0, output_tokens=0, cached_tokens=0, cache_write_tokens=0):
+    """
+    1リクエスト分のトークン使用量を記録する。
+
+    Args:
+        provider: プロバイダー名（'claude' または 'gemini'）
+        input_tokens: 入力トークン数（キャッシュ分を除く）
+        output_tokens: 出力トークン数
+        cached_tokens: キャッシュから読み込まれた入力トークン数
+        cache_write_tokens: キャッシュに書き込まれた入力トークン数
+    """
+    with _lock:
+        totals = _usage.setdefault(provider, dict.fromkeys(_USAGE_FIELDS, 0))
+        totals["requests"] += 1
+        totals["input_tokens"] += input_tokens
+        totals["output_tokens"] += output_tokens
+        totals["cached_tokens"] += cached_tokens
+        totals["cache_write_tokens"] += cache_write_tokens
+
+
+def get_usage_summary():
+    """
+    プロバイダーごとのトークン使用量の集計を取得する。
+
+    Returns:
+        dict: {プロバイダー名: {'requests': ..., 'input_tokens': ..., 'cached_tokens': ..., ...}}
+    """
+    with _lock:
+        return {provider: dict(totals) for provider, totals in _usage.items()}
+
+
+def format_usage_summary():
+    """
+    トークン使用量の集計を表示用の文字列に整形する。
+
+    Returns:
+        str: プロバイダーごとの使用量（記録がない場合は空文字列）
+    """
+    lines = []
+    for provider, totals in get_usage_summary().items():
+        total_input = totals["input_tokens"] + totals["cached_tokens"]
+        hit_rate = totals["cached_tokens"] / total_input * 100 if total_input else 0.0
+        lines.append(
+            f"{provider}: {totals['requests']}リクエスト, "
+            f"入力 {total_input:,}トークン（キャッシュヒット {totals['cached_tokens']:,}、"
+            f"{hit_rate:.1f}%）, 出力 {totals['output_tokens']:,}トークン"
+        )
+    return "\n".join(lines)
+
+
+def reset_usage():
+    """集計をリセットする"""
+    with _lock:
+        _usage.clear()
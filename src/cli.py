@@ -0,0 +1,158 @@
+"""
+コマンドライン引数モジュール
+
+main.pyの実行オプション（AIプロバイダー、実行モード、対象銘柄の絞り込み、並列数、
+レート制限、ドライラン等）を定義・解析します。
+"""
+
+import argparse
+
+# --categoryで指定できる分類（loaders.categorize_stocksの分類と同じ）
+CATEGORY_CHOICES = ("holding", "short_selling", "considering_buy", "considering_short_sell")
+
+# --rpmで指定できるプロバイダー
+RPM_PROVIDERS = ("gemini", "claude")
+
+
+def _positive_int(value):
+    """1以上の整数として解析する"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"整数を指定してください: {value}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"1以上を指定してください: {value}")
+    return number
+
+
+def _symbol_list(value):
+    """カンマ区切りの銘柄コードを解析する"""
+    return [symbol.strip() for symbol in value.split(",") if symbol.strip()]
+
+
+def _rpm(value):
+    """「N」または「プロバイダー=N」形式のRPMを (プロバイダーまたはNone, N) として解析する"""
+    provider, separator, number = value.rpartition("=")
+    if separator and provider not in RPM_PROVIDERS:
+        raise argparse.ArgumentTypeError(
+            f"プロバイダーは {', '.join(RPM_PROVIDERS)} のいずれかを指定してください: {value}"
+        )
+    return (provider or None), _positive_int(number)
+
+
+def build_parser(add_help=True):
+    """
+    コマンドライン引数のパーサーを作成する。
+
+    Args:
+        add_help: -h/--helpオプションを追加するか
+
+    Returns:
+        argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        prog="python src/main.py",
+        description="株式日次レポートを生成し、分類別にメールで配信します。",
+        allow_abbrev=False,
+        add_help=add_help,
+    )
+    parser.add_argument("--claude", action="store_true", help="Claudeで分析する（省略時はGemini）")
+
+    mode = parser.add_argument_group("実行モード")
+    mode.add_argument(
+        "--async",
+        dest="async_mode",
+        action="store_true",
+        help="asyncioでデータ取得・分析を行う",
+    )
+    mode.add_argument(
+        "--batch", action="store_true", help="プロバイダーのバッチAPIでまとめて分析する"
+    )
+    mode.add_argument("--resume", metavar="RUN_ID", help="中断した実行を再開する")
+
+    target = parser.add_argument_group("対象銘柄の絞り込み")
+    target.add_argument(
+        "--symbols",
+        metavar="SYMBOL",
+        nargs="+",
+        type=_symbol_list,
+        action="extend",
+        help="分析する銘柄コード（スペースまたはカンマ区切り、例: 7203 AAPL,MSFT）",
+    )
+    target.add_argument(
+        "--category",
+        metavar="CATEGORY",
+        nargs="+",
+        choices=CATEGORY_CHOICES,
+        action="extend",
+        help=f"分析する分類（{', '.join(CATEGORY_CHOICES)}）",
+    )
+
+    tuning = parser.add_argument_group("並列数・レート制限")
+    tuning.add_argument(
+        "--workers",
+        metavar="N",
+        type=_positive_int,
+        help="データ取得・AI分析の並列ワーカー数（省略時は10）",
+    )
+    tuning.add_argument(
+        "--rpm",
+        metavar="[PROVIDER=]N",
+        type=_rpm,
+        action="append",
+        help="1分あたりのAI APIリクエスト数（例: 15、gemini=15、claude=40。繰り返し指定可）",
+    )
+
+    output = parser.add_argument_group("出力")
+    output.add_argument("--dry-run", action="store_true", help="メールを送信しない")
+    output.add_argument(
+        "--no-llm", action="store_true", help="データ取得のみ行い、AI分析とメール送信を行わない"
+    )
+
+    diagnostics = parser.add_argument_group("診断")
+    diagnostics.add_argument(
+        "--profile",
+        action="store_true",
+        help="実行全体をcProfile・tracemallocで計測し、結果を実行ディレクトリに出力する",
+    )
+    return parser
+
+
+def parse_cli_args(argv=None, strict=True):
+    """
+    コマンドライン引数を解析する。
+
+    Args:
+        argv: 引数のリスト（省略時はsys.argv[1:]）
+        strict: Falseの場合は未知の引数を無視し、-h/--helpも解釈しない
+            （main.py以外から設定モジュールを読み込む場合用）
+
+    Returns:
+        argparse.Namespace: 解析結果（symbolsは銘柄コードのリスト、rpmは (プロバイダー, N) のリスト）
+    """
+    parser = build_parser(add_help=strict)
+    if strict:
+        args = parser.parse_args(argv)
+    else:
+        args, _ = parser.parse_known_args(argv)
+    if args.symbols:
+        args.symbols = [symbol for symbols in args.symbols for symbol in symbols]
+    return args
+
+
+def rpm_for_provider(args, provider):
+    """
+    --rpmで指定されたプロバイダーのRPMを取得する。
+
+    プロバイダーを省略した指定は、使用するプロバイダー（--claude指定時はClaude、
+    それ以外はGemini）に適用する。
+
+    Returns:
+        int: RPM（指定がない場合はNone）
+    """
+    selected = "claude" if args.claude else "gemini"
+    rpm = None
+    for target, value in args.rpm or []:
+        if (target or selected) == provider:
+            rpm = value
+    return rpm
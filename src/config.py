@@ -9,23 +9,175 @@ import sys
 
 from dotenv import load_dotenv
 
+from cli import parse_cli_args, rpm_for_provider
+
 # 環境変数をロード
 load_dotenv()
 
+# プロジェクトルート（このファイルは src/ にあるため1階層上）
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def resolve_project_path(path):
+    """相対パスの場合はプロジェクトルートからの絶対パスに変換する"""
+    if os.path.isabs(path):
+        return path
+    return os.path.join(PROJECT_ROOT, path)
+
+
 # APIキー
 CLAUDE_API_KEY = os.getenv("CLAUDE_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 YAHOO_API_KEY = os.getenv("YAHOO_API_KEY")
 
+# API接続先（負荷試験などでローカルの代替サーバーに向ける場合に変更する。
+# ClaudeはAnthropic SDKの環境変数ANTHROPIC_BASE_URLで変更できる）
+YAHOO_QUOTE_URL = os.getenv("YAHOO_QUOTE_URL", "https://yfapi.net/v6/finance/quote")
+GEMINI_API_BASE = os.getenv("GEMINI_API_BASE", "https://generativelanguage.googleapis.com")
+
 # メール設定
 MAIL_TO = os.getenv("MAIL_TO")
 
+# コマンドライン引数（main.py以外から読み込まれた場合も動作するよう未知の引数は無視する）
+CLI_ARGS = parse_cli_args(sys.argv[1:], strict=False)
+
 # 実行オプション判定（デフォルトGemini、--claude指定時のみClaude）
-USE_CLAUDE = "--claude" in sys.argv
+USE_CLAUDE = CLI_ARGS.claude
+
+# 非同期実行モード（--async指定時はasyncioでデータ取得・分析を行う）
+USE_ASYNC = CLI_ARGS.async_mode
+
+# 中断した実行の再開（--resume <実行ID>）
+RESUME_RUN_ID = CLI_ARGS.resume
+
+# 対象銘柄・分類の絞り込み（--symbols / --category、未指定の場合はNoneで全銘柄）
+TARGET_SYMBOLS = CLI_ARGS.symbols
+TARGET_CATEGORIES = CLI_ARGS.category
+
+# ドライラン（--dry-run指定時はメールを送信しない）
+DRY_RUN = CLI_ARGS.dry_run
+
+# データ取得のみ（--no-llm指定時はAI分析・メール送信を行わない）
+NO_LLM = CLI_ARGS.no_llm
+
+# 実行ごとの途中結果（チェックポイント）の保存先と保持する実行数
+RUNS_DIR = os.getenv("RUNS_DIR", ".cache/runs")
+RUNS_KEEP = int(os.getenv("RUNS_KEEP", "5"))
+
+# プロファイル（--profileまたはSTOCK_REPORT_PROFILE指定時は実行全体をcProfile・tracemallocで計測する）
+PROFILE_ENABLED = CLI_ARGS.profile or os.getenv("STOCK_REPORT_PROFILE", "false").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", "40"))
+# 実行ディレクトリを作成せずに終了した場合（--no-llmなど）の出力先
+PROFILE_DIR = os.getenv("PROFILE_DIR", ".cache/profiles")
+
+# 実行レポート（ステージごとの所要時間）をメール末尾にも表示する
+RUN_REPORT_MAIL_FOOTER = os.getenv("RUN_REPORT_MAIL_FOOTER", "false").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+
+# 非同期実行モードでのステージごとの同時実行数（--workers指定時は環境変数より優先する）
+ASYNC_FETCH_CONCURRENCY = CLI_ARGS.workers or int(os.getenv("ASYNC_FETCH_CONCURRENCY", "20"))
+ASYNC_ANALYZE_CONCURRENCY = CLI_ARGS.workers or int(os.getenv("ASYNC_ANALYZE_CONCURRENCY", "10"))
+
+# 銘柄処理の並列ワーカー数（HTTPコネクションプールのサイズにも使用、--workersで変更可）
+MAX_WORKERS = CLI_ARGS.workers or 10
+
+# パイプライン実行のステージごとのワーカー数と、ステージ間キューの上限
+# （--workers指定時は環境変数より優先する）
+PIPELINE_FETCH_WORKERS = CLI_ARGS.workers or int(
+    os.getenv("PIPELINE_FETCH_WORKERS", str(MAX_WORKERS))
+)
+PIPELINE_ANALYZE_WORKERS = CLI_ARGS.workers or int(
+    os.getenv("PIPELINE_ANALYZE_WORKERS", str(MAX_WORKERS))
+)
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "100"))
+
+# AI APIのレート制限（RPM: 1分あたりのリクエスト数、TPM: 1分あたりの入力トークン数）
+# RPMは--rpmで指定した場合は環境変数より優先する
+GEMINI_RPM = rpm_for_provider(CLI_ARGS, "gemini") or int(os.getenv("GEMINI_RPM", "10"))
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", "250000"))
+CLAUDE_RPM = rpm_for_provider(CLI_ARGS, "claude") or int(os.getenv("CLAUDE_RPM", "50"))
+CLAUDE_TPM = int(os.getenv("CLAUDE_TPM", "30000"))
+
+# 429・5xx・通信エラー時のリトライ（Retry-Afterを優先し、なければ上限付き指数バックオフ + ジッター）
+# 銘柄の分析開始からRETRY_DEADLINE_SECONDSを超える待機が必要になった時点で打ち切る
+# （トリアージ・詳細な分析・フェイルオーバー・ヘッジで共有。銘柄の分析の外では1リクエストごと）
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "4"))
+RETRY_BASE_DELAY_SECONDS = float(os.getenv("RETRY_BASE_DELAY_SECONDS", "1"))
+RETRY_MAX_DELAY_SECONDS = float(os.getenv("RETRY_MAX_DELAY_SECONDS", "30"))
+RETRY_DEADLINE_SECONDS = float(os.getenv("RETRY_DEADLINE_SECONDS", "120"))
+
+# AI分析キャッシュ（同一入力の再分析を省略する）
+ANALYSIS_CACHE_ENABLED = os.getenv("ANALYSIS_CACHE_ENABLED", "false").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+ANALYSIS_CACHE_DIR = os.getenv("ANALYSIS_CACHE_DIR", ".cache/analysis")
+ANALYSIS_CACHE_TTL_HOURS = float(os.getenv("ANALYSIS_CACHE_TTL_HOURS", "24"))
+ANALYSIS_CACHE_MAX_MB = float(os.getenv("ANALYSIS_CACHE_MAX_MB", "50"))
+
+# 変化検知モード（株価変動が閾値以下かつ新しいニュースがない銘柄は前回の分析を再利用する）
+CHANGE_DRIVEN_ANALYSIS = os.getenv("CHANGE_DRIVEN_ANALYSIS", "false").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+PRICE_CHANGE_THRESHOLD_PCT = float(os.getenv("PRICE_CHANGE_THRESHOLD_PCT", "3.0"))
+ANALYSIS_STATE_PATH = os.getenv("ANALYSIS_STATE_PATH", ".cache/analysis_state.json")
+
+# 一括分析モード（同じ分類の銘柄をこの件数ずつ1リクエストにまとめる。1以下で無効）
+ANALYSIS_BATCH_SIZE = int(os.getenv("ANALYSIS_BATCH_SIZE", "1"))
+
+# 株価キャッシュ（前回取得以降に市場が開いていない銘柄は保存済みの株価を使う）
+QUOTE_CACHE_ENABLED = os.getenv("QUOTE_CACHE_ENABLED", "false").lower() in ("true", "1", "yes")
+QUOTE_CACHE_PATH = os.getenv("QUOTE_CACHE_PATH", ".cache/quotes.json")
+
+# ニュースストア（取得したニュースをSQLiteに蓄積し、新しいニュースのみ取得する）
+NEWS_STORE_ENABLED = os.getenv("NEWS_STORE_ENABLED", "false").lower() in ("true", "1", "yes")
+NEWS_STORE_PATH = os.getenv("NEWS_STORE_PATH", ".cache/news.sqlite3")
+
+# バッチAPIモード（--batch指定時は全銘柄をプロバイダーのバッチAPIにまとめて送信する）
+USE_BATCH_API = CLI_ARGS.batch
+# バッチAPIの送信先（api: プロバイダーのバッチAPI、local: オフライン検証用のローカル代替）
+BATCH_BACKEND = os.getenv("BATCH_BACKEND", "api").lower()
+BATCH_POLL_INTERVAL_SECONDS = float(os.getenv("BATCH_POLL_INTERVAL_SECONDS", "60"))
+BATCH_TIMEOUT_MINUTES = float(os.getenv("BATCH_TIMEOUT_MINUTES", "300"))
+
+# Geminiのプロンプトキャッシュ（共通プロンプトをcachedContentsとして再利用する）
+GEMINI_CONTEXT_CACHE = os.getenv("GEMINI_CONTEXT_CACHE", "false").lower() in ("true", "1", "yes")
+GEMINI_CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL_SECONDS", "900"))
+
+# 構造化出力モード（売買判断・指値・理由・本文をGeminiのresponseSchema / Claudeのツール呼び出しで
+# JSONとして受け取り、目次・レポート簡略化で正規表現による抽出を省略する。一括分析・バッチAPIは対象外）
+STRUCTURED_OUTPUT = os.getenv("STRUCTURED_OUTPUT", "false").lower() in ("true", "1", "yes")
 
 # レポート簡略化オプション（デフォルト: true）
 SIMPLIFY_HOLD_REPORTS = os.getenv("SIMPLIFY_HOLD_REPORTS", "true").lower() in ("true", "1", "yes")
 
+# トリアージモード（売買判断と理由のみを短い応答で先に問い合わせ、ホールド・維持・様子見の銘柄は
+# 詳細な分析を省略して簡略化レポートにする。SIMPLIFY_HOLD_REPORTS有効時のみ。一括分析・バッチAPIは対象外）
+TRIAGE_MODE = os.getenv("TRIAGE_MODE", "false").lower() in ("true", "1", "yes")
+TRIAGE_MAX_TOKENS = int(os.getenv("TRIAGE_MAX_TOKENS", "200"))
+# トリアージに使うモデル（未設定時は詳細な分析と同じモデル）
+TRIAGE_CLAUDE_MODEL = os.getenv("TRIAGE_CLAUDE_MODEL", "")
+TRIAGE_GEMINI_MODEL = os.getenv("TRIAGE_GEMINI_MODEL", "")
+
+# プロバイダーのフェイルオーバー（選択したプロバイダーで分析に失敗した銘柄を、
+# APIキーが設定されている他のプロバイダーで再分析する。一括分析・バッチAPIは対象外）
+ANALYSIS_FAILOVER = os.getenv("ANALYSIS_FAILOVER", "false").lower() in ("true", "1", "yes")
+# ヘッジリクエスト（応答がプロバイダーのp90レイテンシを超えた銘柄について、
+# 次のプロバイダーにも同じ分析を依頼し、先に成功した結果を使う。ANALYSIS_FAILOVER有効時のみ）
+ANALYSIS_HEDGE = os.getenv("ANALYSIS_HEDGE", "false").lower() in ("true", "1", "yes")
+# p90の算出に必要な最小のサンプル数（それまではヘッジしない）
+ANALYSIS_HEDGE_MIN_SAMPLES = int(os.getenv("ANALYSIS_HEDGE_MIN_SAMPLES", "10"))
+
 # defeatbeta-apiの可用性チェック
 try:
     from defeatbeta_api.data.ticker import Ticker
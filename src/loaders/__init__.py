@@ -9,13 +9,17 @@ from .stock_loader import (
     calculate_tax,
     categorize_stocks,
     get_currency_for_symbol,
+    get_exchange_for_symbol,
     load_stock_symbols,
+    normalize_symbol,
 )
 
 __all__ = [
     "load_stock_symbols",
+    "normalize_symbol",
     "categorize_stocks",
     "get_currency_for_symbol",
+    "get_exchange_for_symbol",
     "calculate_tax",
     "load_investment_preferences",
     "generate_preference_prompt",
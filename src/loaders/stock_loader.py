@@ -134,6 +134,31 @@ def get_currency_for_symbol(symbol, explicit_currency=None):
     return "ドル"
 
 
+def get_exchange_for_symbol(symbol):
+    """
+    銘柄シンボルから上場取引所を判定する。
+
+    Args:
+        symbol: 銘柄コード
+
+    Returns:
+        取引所（"TSE": 東京証券取引所、"US": 米国市場）。判定できない場合はNone
+
+    get_currency_for_symbolと同じく、.T・.JPサフィックスまたは4桁数字の場合は東京証券取引所、
+    サフィックスのない銘柄は米国市場とする（.L、.HKなど他市場のサフィックスは判定しない）。
+    """
+    symbol_str = str(symbol)
+
+    if symbol_str.endswith(".T") or symbol_str.endswith(".JP"):
+        return "TSE"
+    if symbol_str.isdigit() and len(symbol_str) == 4:
+        return "TSE"
+    if "." not in symbol_str:
+        return "US"
+
+    return None
+
+
 def categorize_stock(stock_info):
     """
     銘柄を保有状況に基づいて分類する。
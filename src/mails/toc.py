@@ -5,95 +5,25 @@ AI分析結果から売買判断を抽出し、銘柄一覧の目次をHTML形
 """
 
 import html
-import re
+
+from reports.analysis_parser import parse_analysis
 
 
 def extract_judgment_from_analysis(analysis_text):
     """
     AI分析結果から売買判断を抽出する
 
-    AIプロンプトで構造化された出力を要求しているため、シンプルなパターンマッチで対応。
-    フォールバックとして複雑なパターンも保持。
+    構造化出力モードの分析結果は先頭行に埋め込まれた売買判断をそのまま返す。
+    それ以外はAIプロンプトで要求している「売買判断: 買い」形式を優先し、
+    フォールバックとして複雑な形式にも対応する（解析はreports.analysis_parserで1回だけ行う）。
 
     Args:
-        analysis_text: AI分析結果のテキスト（マークダウン形式）
+        analysis_text: AI分析結果のテキスト（マークダウン形式）、またはParsedAnalysis
 
     Returns:
         str: 抽出された売買判断（見つからない場合は「-」）
     """
-    if not analysis_text:
-        return "-"
-
-    # 基本パターン: AIに要求している「売買判断: 買い」形式を最優先
-    # [：:\s] は全角コロン（：）、半角コロン（:）、空白文字をマッチ
-    simple_patterns = [
-        r"(?:売買判断|判断)[：:\s]+([^\n。、\.,、（(を]+)",  # 「売買判断: 買い」（区切り文字まで）
-        r"(?:judgment|action)[：:\s]+([^\n\s。、\.,]+)",  # 英語版
-    ]
-
-    for pattern in simple_patterns:
-        match = re.search(pattern, analysis_text, re.IGNORECASE)
-        if match:
-            judgment = match.group(1).strip()
-            # マークダウン記号を削除
-            judgment = re.sub(r"[*#]", "", judgment).strip()
-
-            if judgment and len(judgment) <= 10:  # 短い判断のみ受け入れ
-                return judgment
-
-    # フォールバック: 複雑なパターン（AIが指示に従わなかった場合）
-    fallback_patterns = [
-        r"(?:推奨|アクション)[：:\s]+([^\n]+)",
-        r"##?\s*(?:売買判断|判断)[：:\s]+([^\n]+)",
-        r"\*\*(?:売買判断|判断|推奨|アクション)\*\*[：:\s]+([^\n]+)",
-    ]
-
-    for pattern in fallback_patterns:
-        match = re.search(pattern, analysis_text, re.IGNORECASE)
-        if match:
-            judgment = match.group(1).strip()
-            # クリーンアップ処理
-            judgment = re.sub(r"[*#]", "", judgment).strip()
-            judgment = re.sub(r"^[：:\s]+", "", judgment)
-            judgment = re.sub(r"^(売買判断|判断|推奨|アクション)[：:\s]*", "", judgment)
-            judgment = re.split(r"[。、\.,]", judgment)[0].strip()
-            # 動詞・助詞を除去
-            judgment = re.split(r"[をがはに](推奨|提供|維持|継続)", judgment)[0].strip()
-            judgment = re.split(r"が(良い|おすすめ|望ましい)", judgment)[0].strip()
-            judgment = re.split(r"[（(]", judgment)[0].strip()
-
-            if judgment and len(judgment) > 0:
-                return judgment[:30]
-
-    # 最終フォールバック: キーワードを含む行を探す
-    lines = analysis_text.split("\n")
-    for line in lines:
-        line_lower = line.lower()
-        # 通常の売買判断キーワードと空売り専用キーワードの両方をサポート
-        if any(
-            kw in line_lower
-            for kw in [
-                "買い",
-                "buy",
-                "売り",
-                "sell",
-                "ホールド",
-                "hold",
-                "様子見",
-                "買戻し",
-                "追加売り",
-                "維持",
-            ]
-        ):
-            clean_line = re.sub(r"[*#:\-]", "", line).strip()
-            if 5 < len(clean_line) <= 30:
-                clean_line = re.split(r"[をがはに](推奨|提供|維持|継続)", clean_line)[0].strip()
-                clean_line = re.split(r"が(良い|おすすめ|望ましい)", clean_line)[0].strip()
-                clean_line = re.split(r"[（(。、]", clean_line)[0].strip()
-                if len(clean_line) <= 10:
-                    return clean_line
-
-    return "-"
+    return parse_analysis(analysis_text).judgment or "-"
 
 
 def generate_toc(stock_reports_info):
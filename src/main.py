@@ -10,170 +10,746 @@ Github Actions上で定期実行可能。APIキーや設定値はSecrets/環境
 3. AI分析（ai_analyzer）
 4. レポート生成（report_generator）
 5. メール配信（mail_utils）
+
+2〜4は上限付きキューでつないだステージごとのワーカースレッドで実行し、
+分析ステージがレート制限で待機している間も取得ステージは先の銘柄の取得を進める。
+--async 指定時はステージごとのスレッドの代わりにasyncioで2〜3を実行し、
+ステージごとの同時実行数をセマフォで制御する。
+--batch 指定時は3をプロバイダーのバッチAPIの1ジョブとして実行し、完了を待ってから4〜5を行う。
+各銘柄の途中結果は完了時に実行ディレクトリへ保存し、--resume <実行ID> で中断した実行を再開できる。
+--symbols / --category で対象銘柄を絞り込み、--dry-run でメール送信を、--no-llm で3〜5を省略できる
+（オプションの一覧は python src/main.py --help を参照）。
 """
 
+import asyncio
+import cProfile
 import datetime
-import re
+import os
+import queue
 import sys
-import time
+import threading
 import tomllib
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
+
+from cli import parse_cli_args
+
+# --profile指定時はSDKなどのモジュールのインポートも計測するため、以降のインポートより前に計測を開始する
+# （設定モジュールの読み込み前のため、コマンドライン引数と環境変数を直接参照する。
+# スクリプトとして実行した場合のみ）
+IMPORT_PROFILE = None
+if __name__ == "__main__" and (
+    parse_cli_args(sys.argv[1:], strict=False).profile
+    or os.getenv("STOCK_REPORT_PROFILE", "false").lower() in ("true", "1", "yes")
+):
+    IMPORT_PROFILE = cProfile.Profile()
+    IMPORT_PROFILE.enable()
 
-from analyzers import analyze_with_claude, analyze_with_gemini, fetch_stock_data
-from config import MAIL_TO, SIMPLIFY_HOLD_REPORTS, USE_CLAUDE
+# isort: split
+from analyzers import (
+    analyze_batch_with_claude,
+    analyze_batch_with_gemini,
+    analyze_with_batch_api,
+    clamp_batch_size,
+    fetch_news_bulk,
+    fetch_quotes,
+    fetch_stock_data,
+    fetch_stock_data_async,
+    get_provider_chain,
+    run_with_failover,
+    run_with_failover_async,
+)
+from analyzers.analysis_cache import FAILURE_PREFIX
+from analyzers.analysis_state import find_carry_over, record_analysis, save_analysis_state
+from analyzers.prompt_cache import release_gemini_context_caches
+from analyzers.providers import ANALYZE, TRIAGE
+from analyzers.retry import symbol_deadline
+from analyzers.usage_tracker import format_usage_summary
+from config import (
+    ANALYSIS_BATCH_SIZE,
+    ASYNC_ANALYZE_CONCURRENCY,
+    ASYNC_FETCH_CONCURRENCY,
+    DRY_RUN,
+    MAIL_TO,
+    MAX_WORKERS,
+    NO_LLM,
+    PIPELINE_ANALYZE_WORKERS,
+    PIPELINE_FETCH_WORKERS,
+    PIPELINE_QUEUE_SIZE,
+    PROFILE_DIR,
+    PROFILE_ENABLED,
+    PROFILE_TOP_N,
+    RESUME_RUN_ID,
+    RUN_REPORT_MAIL_FOOTER,
+    SIMPLIFY_HOLD_REPORTS,
+    TARGET_CATEGORIES,
+    TARGET_SYMBOLS,
+    TRIAGE_MODE,
+    USE_ASYNC,
+    USE_BATCH_API,
+    USE_CLAUDE,
+    resolve_project_path,
+)
 from loaders import (
     categorize_stocks,
     generate_preference_prompt,
     get_currency_for_symbol,
     load_stock_symbols,
+    normalize_symbol,
 )
 from mails import generate_single_category_mail_body, get_smtp_config, send_report_via_mail
 from mails.formatter import markdown_to_html
 from mails.toc import extract_judgment_from_analysis, generate_toc
-from reports import detect_hold_judgment, simplify_hold_report
+from reports import detect_hold_judgment, parse_analysis, simplify_hold_report
+from runs import (
+    get_current_run,
+    load_completed_stock,
+    mark_mail_sent,
+    record_completed_stock,
+    start_run,
+)
+from runs.metrics import (
+    build_run_report,
+    format_run_report,
+    format_run_report_footer,
+    measure,
+    write_run_report,
+)
+from runs.profiler import RunProfiler
 
-# Gemini API レート制限対策（10 RPM = 6秒/リクエスト）
-API_RATE_LIMIT_DELAY = 6.5  # 余裕を持たせて6.5秒
-rate_limit_lock = Lock()
-last_api_call_time = 0
+if IMPORT_PROFILE is not None:
+    IMPORT_PROFILE.disable()
 
-if __name__ == "__main__":
-    try:
-        # 対象銘柄リスト（data/stocks.tomlから読み込み）
-        stocks = load_stock_symbols()
-        print(f"分析対象銘柄: {[s['symbol'] for s in stocks]}")
-    except (FileNotFoundError, ValueError, tomllib.TOMLDecodeError) as e:
-        print(f"\n{str(e)}")
-        print("\n処理を終了します。")
-        sys.exit(1)
-    except Exception as e:
-        print(f"\n予期しないエラーが発生しました: {e}")
-        print("\n処理を終了します。")
-        sys.exit(1)
+# パイプラインのステージ終了を通知する番兵
+STAGE_DONE = object()
 
-    # 銘柄を分類
-    categorized = categorize_stocks(stocks)
+# レンダリングステージのワーカー数（レポート生成は軽い処理のため1スレッドで十分）
+PIPELINE_RENDER_WORKERS = 1
 
-    # 投資志向性プロンプトを1回だけ生成（全銘柄で共通利用）
-    preference_prompt = generate_preference_prompt()
+# カテゴリー名の定義（メール送信順）
+CATEGORY_NAMES = {
+    "holding": "保有銘柄",
+    "short_selling": "空売り銘柄",
+    "considering_buy": "購入検討中の銘柄",
+    "considering_short_sell": "空売り検討中の銘柄",
+}
 
-    # 分類別のレポート
-    categorized_reports = {
-        "holding": [],
-        "short_selling": [],
-        "considering_buy": [],
-        "considering_short_sell": [],
-    }
-
-    # 分類別の銘柄情報（目次用）
-    categorized_stock_info = {
-        "holding": [],
-        "short_selling": [],
-        "considering_buy": [],
-        "considering_short_sell": [],
-    }
-
-    def process_single_stock(category, stock_info):
-        """単一の銘柄を処理する関数（並列処理用）"""
-        global last_api_call_time
-        try:
-            symbol = stock_info["symbol"]
-            company_name = stock_info.get("name", symbol)
-            data = fetch_stock_data(symbol, stock_info)
-
-            # API呼び出し前にレート制限を適用（Geminiのみ）
-            if not USE_CLAUDE:
-                with rate_limit_lock:
-                    current_time = time.time()
-                    time_since_last_call = current_time - last_api_call_time
-                    if time_since_last_call < API_RATE_LIMIT_DELAY:
-                        sleep_time = API_RATE_LIMIT_DELAY - time_since_last_call
-                        print(f"レート制限: {sleep_time:.1f}秒待機中... ({symbol})")
-                        time.sleep(sleep_time)
-                    last_api_call_time = time.time()
-
-            if USE_CLAUDE:
-                analysis = analyze_with_claude(data, preference_prompt)
-            else:
-                analysis = analyze_with_gemini(data, preference_prompt)
 
-            # 通貨情報を取得
-            currency = get_currency_for_symbol(symbol, stock_info.get("currency"))
-            data["currency"] = currency
+def build_stock_report(category, stock_info, data, analysis, carried_over=None):
+    """
+    分析結果から目次用の銘柄情報とメール本文用のHTMLを生成する。
 
-            # 売買判断を抽出
-            judgment = extract_judgment_from_analysis(analysis)
+    Args:
+        category: 銘柄の分類
+        stock_info: 銘柄情報の辞書
+        data: fetch_stock_dataで取得したデータ
+        analysis: AI分析結果（マークダウン形式）
+        carried_over: 前回の分析を再利用した場合はその分析状態（変化検知モード）
 
-            # 目次用の銘柄情報
-            stock_info_data = {"symbol": symbol, "name": company_name, "judgment": judgment}
+    Returns:
+        (分類, レポートHTML, 目次用の銘柄情報) のタプル
+    """
+    symbol = stock_info["symbol"]
+    company_name = stock_info.get("name", symbol)
 
-            # メール本文用のHTML生成（簡略化を適用）
-            if SIMPLIFY_HOLD_REPORTS and detect_hold_judgment(analysis):
-                # ホールド判断の場合は簡略化
-                simplified_analysis = simplify_hold_report(
-                    symbol, company_name, analysis, data["price"], currency
-                )
-                analysis_html = markdown_to_html(simplified_analysis)
-            else:
-                analysis_html = markdown_to_html(analysis)
+    # 通貨情報を取得
+    currency = get_currency_for_symbol(symbol, stock_info.get("currency"))
+    data["currency"] = currency
+
+    # 分析結果を1回だけ解析し、売買判断の抽出とレポート簡略化で共有する
+    parsed = parse_analysis(analysis)
+    judgment = extract_judgment_from_analysis(parsed)
+
+    # 目次用の銘柄情報（分析失敗の銘柄は再開時のメール送信判定のため印を付ける）
+    stock_info_data = {"symbol": symbol, "name": company_name, "judgment": judgment}
+    if analysis.startswith(FAILURE_PREFIX):
+        stock_info_data["analysis_failed"] = True
+
+    # メール本文用のHTML生成（簡略化を適用）
+    if SIMPLIFY_HOLD_REPORTS and detect_hold_judgment(parsed):
+        # ホールド判断の場合は簡略化
+        simplified_analysis = simplify_hold_report(
+            symbol, company_name, parsed, data["price"], currency
+        )
+        with measure("markdown_to_html", symbol):
+            analysis_html = markdown_to_html(simplified_analysis)
+    else:
+        # 構造化出力モードの先頭行（売買判断などを埋め込んだコメント）はメール本文に含めない
+        with measure("markdown_to_html", symbol):
+            analysis_html = markdown_to_html(parsed.body)
+
+    # 前回の分析を再利用した場合はその旨を明記
+    if carried_over:
+        analysis_html = (
+            f'<p style="color: #666; font-size: 13px;">※ 株価・ニュースに大きな変化がないため、'
+            f"前回（{carried_over.get('analyzed_at', '不明')}、株価 {carried_over.get('price')}{currency}）"
+            f"の分析を継続表示しています。</p>\n{analysis_html}"
+        )
 
-            print(f"レポート生成完了: {symbol} (分類: {category})")
+    print(f"レポート生成完了: {symbol} (分類: {category})")
 
-            # メール本文で企業名と銘柄コードを1つの見出しとして使用
-            report_html = f"""<h1 style="margin-top: 30px; padding-bottom: 10px; border-bottom: 2px solid #ddd;">{company_name}（{symbol}）</h1>
+    # メール本文で企業名と銘柄コードを1つの見出しとして使用
+    report_html = f"""<h1 style="margin-top: 30px; padding-bottom: 10px; border-bottom: 2px solid #ddd;">{company_name}（{symbol}）</h1>
 <div style="margin-top: 15px; padding-left: 20px; border-left: 3px solid #007bff;">
 {analysis_html}
 </div>"""
 
-            return category, report_html, stock_info_data
-        except Exception as e:
-            print(f"エラー: {stock_info['symbol']}の処理中に問題が発生しました: {e}")
-            return None
-
-    # 並列処理で各銘柄を処理（最大10スレッド）
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        # 全銘柄の処理タスクを作成
-        futures = []
-        for category, stock_list in categorized.items():
-            for stock_info in stock_list:
-                future = executor.submit(process_single_stock, category, stock_info)
-                futures.append(future)
-
-        # 処理結果を収集
-        for future in as_completed(futures):
-            result = future.result()
+    result = (category, report_html, stock_info_data)
+
+    # 中断時に再開できるよう、完了した銘柄の途中結果を保存
+    record_completed_stock(category, stock_info, data, analysis, result)
+    return result
+
+
+def analyze_stock(data, preference_prompt):
+    """
+    銘柄データをAI分析する。変化検知モードでは変化のない銘柄の前回分析を再利用する。
+
+    Returns:
+        (分析結果, 再利用した前回の分析状態またはNone) のタプル
+    """
+    previous = find_carry_over(data)
+    if previous:
+        print(f"前回の分析を再利用: {data['symbol']}")
+        return previous["analysis"], previous
+
+    # リトライの期限は銘柄ごとに1つとし、トリアージ・詳細な分析・フェイルオーバーで共有する
+    with symbol_deadline():
+        # トリアージモードでは、ホールド判断の銘柄は短い応答（売買判断と理由）のみで済ませる
+        providers = get_provider_chain(USE_CLAUDE)
+        if TRIAGE_MODE and SIMPLIFY_HOLD_REPORTS:
+            triage = run_with_failover(providers, TRIAGE, data, preference_prompt)
+            if hold_triage(data["symbol"], triage):
+                record_analysis(data, triage)
+                return triage, None
+
+        # レート制限は各プロバイダーの分析関数内で適用される
+        analysis = run_with_failover(providers, ANALYZE, data, preference_prompt)
+    record_analysis(data, analysis)
+    return analysis, None
+
+
+async def analyze_stock_async(data, preference_prompt):
+    """analyze_stockの非同期版"""
+    previous = find_carry_over(data)
+    if previous:
+        print(f"前回の分析を再利用: {data['symbol']}")
+        return previous["analysis"], previous
+
+    with symbol_deadline():
+        providers = get_provider_chain(USE_CLAUDE)
+        if TRIAGE_MODE and SIMPLIFY_HOLD_REPORTS:
+            triage = await run_with_failover_async(providers, TRIAGE, data, preference_prompt)
+            if hold_triage(data["symbol"], triage):
+                record_analysis(data, triage)
+                return triage, None
+
+        # レート制限は各プロバイダーの分析関数内で待機する（イベントループは止めない）
+        analysis = await run_with_failover_async(providers, ANALYZE, data, preference_prompt)
+    record_analysis(data, analysis)
+    return analysis, None
+
+
+def hold_triage(symbol, triage):
+    """
+    トリアージの結果をそのままレポートに使えるか（ホールド・維持・様子見の判断か）を判定する。
+
+    ホールド判断のレポートは簡略化されるため詳細な分析は不要となる。
+    それ以外の判断、または問い合わせに失敗した場合は詳細な分析を行う。
+
+    Args:
+        symbol: 銘柄コード
+        triage: トリアージの結果（「売買判断: ○○」「理由: ○○」）
+
+    Returns:
+        bool: 詳細な分析を省略できる場合True
+    """
+    if triage.startswith(FAILURE_PREFIX):
+        print(f"トリアージ失敗のため詳細な分析を実行: {symbol}")
+        return False
+    parsed = parse_analysis(triage)
+    if not parsed.is_hold:
+        print(f"トリアージ: {symbol} の売買判断は{parsed.judgment or '不明'}のため詳細な分析を実行")
+        return False
+    print(f"トリアージ: {symbol} の売買判断は{parsed.judgment}のため詳細な分析を省略")
+    return True
+
+
+async def process_single_stock_async(
+    category,
+    stock_info,
+    quotes,
+    preference_prompt,
+    fetch_semaphore,
+    analyze_semaphore,
+    news_map=None,
+):
+    """単一の銘柄を処理する関数（非同期実行用）"""
+    try:
+        symbol = stock_info["symbol"]
+        async with fetch_semaphore:
+            data = await fetch_stock_data_async(symbol, stock_info, quotes, news_map)
+
+        async with analyze_semaphore:
+            analysis, carried_over = await analyze_stock_async(data, preference_prompt)
+
+        return build_stock_report(category, stock_info, data, analysis, carried_over)
+    except Exception as e:
+        print(f"エラー: {stock_info['symbol']}の処理中に問題が発生しました: {e}")
+        return None
+
+
+def fetch_stage(category, stock_info, quotes, news_map=None):
+    """
+    取得ステージ: 銘柄の株価・ニュースを取得する。
+
+    Returns:
+        (分類, 銘柄情報, データ) のタプル（失敗時はNone）
+    """
+    try:
+        data = fetch_stock_data(stock_info["symbol"], stock_info, quotes, news_map)
+        return category, stock_info, data
+    except Exception as e:
+        print(f"エラー: {stock_info['symbol']}のデータ取得中に問題が発生しました: {e}")
+        return None
+
+
+def analyze_stage(item, preference_prompt):
+    """
+    分析ステージ: 取得したデータをAI分析する（レート制限の待機はこのステージのみで発生する）。
+
+    Args:
+        item: (分類, 銘柄情報, データ) のタプル
+        preference_prompt: 投資志向性プロンプト
+
+    Returns:
+        (分類, 銘柄情報, データ, 分析結果, 再利用した前回の分析状態) のタプル（失敗時はNone）
+    """
+    category, stock_info, data = item
+    try:
+        analysis, carried_over = analyze_stock(data, preference_prompt)
+    except Exception as e:
+        print(f"エラー: {stock_info['symbol']}の分析中に問題が発生しました: {e}")
+        return None
+    return category, stock_info, data, analysis, carried_over
+
+
+def render_stage(item):
+    """
+    レンダリングステージ: 分析結果からレポートを生成する。
+
+    Args:
+        item: analyze_stageの戻り値
+
+    Returns:
+        build_stock_reportの結果（失敗時はNone）
+    """
+    category, stock_info, data, analysis, carried_over = item
+    try:
+        return build_stock_report(category, stock_info, data, analysis, carried_over)
+    except Exception as e:
+        print(f"エラー: {stock_info['symbol']}のレポート生成中に問題が発生しました: {e}")
+        return None
+
+
+def start_stage(name, workers, handler, inbox, outbox, results):
+    """
+    ステージのワーカースレッドを起動する。
+
+    各ワーカーはinboxから取り出した要素をhandlerで処理し、結果をoutboxに渡す
+    （outboxがNoneの最終ステージと、handlerがNoneを返した失敗時はresultsに追加する）。
+    STAGE_DONEを受け取ったワーカーは終了する。
+
+    Returns:
+        起動したスレッドのリスト
+    """
+
+    def worker():
+        while True:
+            item = inbox.get()
+            if item is STAGE_DONE:
+                return
+            try:
+                result = handler(item)
+            except Exception as e:
+                print(f"エラー: {name}ステージの処理中に問題が発生しました: {e}")
+                result = None
+            if result is None or outbox is None:
+                results.append(result)
+            else:
+                outbox.put(result)
+
+    threads = [
+        threading.Thread(target=worker, name=f"{name}-{index}", daemon=True)
+        for index in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def close_stage(threads, outbox, downstream_workers):
+    """ステージの全ワーカーの終了を待ち、次のステージのワーカー数だけ終了通知を送る"""
+    for thread in threads:
+        thread.join()
+    for _ in range(downstream_workers):
+        outbox.put(STAGE_DONE)
+
+
+def run_pipeline(categorized, quotes, preference_prompt, news_map=None):
+    """
+    取得・分析・レンダリングの各ステージを上限付きキューでつないで全銘柄を処理する。
+
+    ステージごとに独立したワーカー数で動作するため、分析ステージがレート制限で
+    待機している間も取得ステージは先の銘柄の取得を進められる。
+    キューの上限により、銘柄数が多い場合もメモリ上に保持するデータ量は一定に保たれる。
+
+    Returns:
+        build_stock_reportの結果リスト（失敗した銘柄はNone）
+    """
+    fetch_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    analyze_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    render_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    results = []
+
+    fetch_threads = start_stage(
+        "fetch",
+        PIPELINE_FETCH_WORKERS,
+        lambda task: fetch_stage(*task, news_map),
+        fetch_queue,
+        analyze_queue,
+        results,
+    )
+    analyze_threads = start_stage(
+        "analyze",
+        PIPELINE_ANALYZE_WORKERS,
+        lambda item: analyze_stage(item, preference_prompt),
+        analyze_queue,
+        render_queue,
+        results,
+    )
+    render_threads = start_stage(
+        "render", PIPELINE_RENDER_WORKERS, render_stage, render_queue, None, results
+    )
+
+    # 読み込んだ銘柄を取得ステージに投入する（キューが一杯の場合は空くまで待つ）
+    for category, stock_list in categorized.items():
+        for stock_info in stock_list:
+            fetch_queue.put((category, stock_info, quotes))
+    for _ in range(PIPELINE_FETCH_WORKERS):
+        fetch_queue.put(STAGE_DONE)
+
+    close_stage(fetch_threads, analyze_queue, PIPELINE_ANALYZE_WORKERS)
+    close_stage(analyze_threads, render_queue, PIPELINE_RENDER_WORKERS)
+    for thread in render_threads:
+        thread.join()
+    return results
+
+
+async def run_async(categorized, quotes, preference_prompt, news_map=None):
+    """
+    asyncioで全銘柄を処理する。同時実行数はステージごとのセマフォで制御する。
+
+    Returns:
+        process_single_stock_asyncの結果リスト（失敗した銘柄はNone）
+    """
+    fetch_semaphore = asyncio.Semaphore(ASYNC_FETCH_CONCURRENCY)
+    analyze_semaphore = asyncio.Semaphore(ASYNC_ANALYZE_CONCURRENCY)
+
+    tasks = [
+        process_single_stock_async(
+            category,
+            stock_info,
+            quotes,
+            preference_prompt,
+            fetch_semaphore,
+            analyze_semaphore,
+            news_map,
+        )
+        for category, stock_list in categorized.items()
+        for stock_info in stock_list
+    ]
+    return await asyncio.gather(*tasks)
+
+
+def analyze_batch(data_list, preference_prompt):
+    """
+    複数銘柄をまとめてAI分析する。
+
+    Returns:
+        銘柄コードをキー、分析結果を値とする辞書（失敗時は空の辞書）
+    """
+    try:
+        if USE_CLAUDE:
+            return analyze_batch_with_claude(data_list, preference_prompt)
+        return analyze_batch_with_gemini(data_list, preference_prompt)
+    except Exception as e:
+        symbols = ", ".join(data["symbol"] for data in data_list)
+        print(f"エラー: 一括分析（{symbols}）の処理中に問題が発生しました: {e}")
+        return {}
+
+
+def fetch_all_for_analysis(executor, categorized, quotes, news_map=None):
+    """
+    全銘柄のデータを並列取得し、変化検知モードで再利用できる銘柄はレポートを生成する。
+
+    Returns:
+        (生成済みのレポートのリスト, 分析が必要な (分類, 銘柄情報, データ) のリスト) のタプル
+    """
+    fetched = executor.map(
+        lambda task: fetch_stage(*task),
+        [
+            (category, stock_info, quotes, news_map)
+            for category, stock_list in categorized.items()
+            for stock_info in stock_list
+        ],
+    )
+
+    results = []
+    pending = []
+    for item in fetched:
+        if item is None:
+            results.append(None)
+            continue
+        category, stock_info, data = item
+        previous = find_carry_over(data)
+        if previous:
+            print(f"前回の分析を再利用: {data['symbol']}")
+            results.append(
+                build_stock_report(category, stock_info, data, previous["analysis"], previous)
+            )
+        else:
+            pending.append(item)
+    return results, pending
+
+
+def build_analyzed_report(category, stock_info, data, analysis):
+    """分析結果を記録してレポートを生成する（分析結果がない場合はNone）"""
+    if analysis is None:
+        return None
+    record_analysis(data, analysis)
+    return build_stock_report(category, stock_info, data, analysis)
+
+
+def run_batched(categorized, quotes, preference_prompt, batch_size, news_map=None):
+    """
+    同じ分類の銘柄をbatch_size件ずつ1リクエストにまとめて分析する
+    （出力トークン数の上限に収まる件数までに制限する）。
+
+    Returns:
+        build_stock_reportの結果リスト（失敗した銘柄はNone）
+    """
+    batch_size = clamp_batch_size(batch_size)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results, pending = fetch_all_for_analysis(executor, categorized, quotes, news_map)
+
+        # 分類ごとにまとめる
+        by_category = {}
+        for category, stock_info, data in pending:
+            by_category.setdefault(category, []).append((stock_info, data))
+
+        batches = [
+            (category, items[start : start + batch_size])
+            for category, items in by_category.items()
+            for start in range(0, len(items), batch_size)
+        ]
+        analyses = executor.map(
+            lambda batch: analyze_batch([data for _, data in batch[1]], preference_prompt),
+            batches,
+        )
+
+        for (category, batch), batch_analyses in zip(batches, analyses):
+            for stock_info, data in batch:
+                analysis = batch_analyses.get(data["symbol"])
+                results.append(build_analyzed_report(category, stock_info, data, analysis))
+    return results
+
+
+def run_batch_api(categorized, quotes, preference_prompt, backend=None, news_map=None):
+    """
+    全銘柄の分析をプロバイダーのバッチAPIの1ジョブとして送信し、完了後にレポートを生成する。
+
+    Args:
+        backend: バッチAPIの送信先（省略時は設定に応じて選択）
+
+    Returns:
+        build_stock_reportの結果リスト（失敗した銘柄はNone）
+    """
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results, pending = fetch_all_for_analysis(executor, categorized, quotes, news_map)
+
+    if pending:
+        analyses = analyze_with_batch_api(
+            [data for _, _, data in pending], preference_prompt, backend=backend
+        )
+        for category, stock_info, data in pending:
+            analysis = analyses.get(data["symbol"])
+            results.append(build_analyzed_report(category, stock_info, data, analysis))
+    return results
+
+
+def filter_stocks(categorized, symbols=None, categories=None):
+    """
+    分類済みの銘柄を銘柄コード・分類で絞り込む。
+
+    Args:
+        categorized: 分類別の銘柄リスト
+        symbols: 対象の銘柄コードのリスト（4桁の数字は日本株として扱い、大文字・小文字は区別しない。Noneで全銘柄）
+        categories: 対象の分類のリスト（Noneで全分類）
+
+    Returns:
+        (絞り込んだ分類別の銘柄リスト, 銘柄リストに存在しない銘柄コードのリスト) のタプル
+    """
+    wanted = None
+    if symbols is not None:
+        wanted = {str(normalize_symbol(symbol)).upper(): symbol for symbol in symbols}
+    found = set()
+    filtered = {}
+    for category, stock_list in categorized.items():
+        filtered[category] = []
+        if categories is not None and category not in categories:
+            continue
+        for stock_info in stock_list:
+            key = stock_info["symbol"].upper()
+            if wanted is None or key in wanted:
+                found.add(key)
+                filtered[category].append(stock_info)
+    unknown = [symbol for key, symbol in (wanted or {}).items() if key not in found]
+    return filtered, unknown
+
+
+def run_fetch_only(categorized, quotes, news_map=None):
+    """
+    AI分析を行わずに全銘柄のデータを取得し、取得結果の概要を表示する（--no-llm）。
+
+    Returns:
+        取得した (分類, 銘柄情報, データ) のリスト（失敗した銘柄はNone）
+    """
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        items = list(
+            executor.map(
+                lambda task: fetch_stage(*task),
+                [
+                    (category, stock_info, quotes, news_map)
+                    for category, stock_list in categorized.items()
+                    for stock_info in stock_list
+                ],
+            )
+        )
+    for item in items:
+        if item:
+            category, _, data = item
+            price = data["price"] if data["price"] is not None else "取得失敗"
+            print(
+                f"{data['symbol']} [{CATEGORY_NAMES[category]}] "
+                f"株価: {price} / ニュース: {len(data['news'])}件"
+            )
+    fetched = len([item for item in items if item])
+    print(f"データ取得完了: {fetched}/{len(items)}銘柄（--no-llmのためAI分析・メール送信を省略）")
+    return items
+
+
+def split_completed(categorized):
+    """
+    チェックポイントに保存済みの銘柄を分類済みの銘柄から取り除く。
+
+    Returns:
+        (保存済みの銘柄のレポートのリスト, 未完了の銘柄の分類別リスト) のタプル
+    """
+    completed = []
+    remaining = {}
+    for category, stock_list in categorized.items():
+        remaining[category] = []
+        for stock_info in stock_list:
+            result = load_completed_stock(stock_info["symbol"])
             if result:
-                category, report_html, stock_info_data = result
-                categorized_reports[category].append(report_html)
-                categorized_stock_info[category].append(stock_info_data)
+                completed.append(result)
+            else:
+                remaining[category].append(stock_info)
+    return completed, remaining
+
+
+def save_run_report(run):
+    """
+    実行レポート（ステージごとの所要時間）を表示し、実行ディレクトリにJSONとして保存する。
+
+    Args:
+        run: 実行ディレクトリ（RunCheckpoint）
+    """
+    report = build_run_report()
+    print(f"実行レポート:\n{format_run_report(report)}")
+    path = os.path.join(run.path, "run_report.json")
+    write_run_report(path, report)
+    print(f"実行レポートを保存しました: {path}")
+
 
-    # 分類別に個別のメールを送信
+def find_incomplete_reports(results, target_count):
+    """
+    レポートが揃っていない銘柄数と、分析に失敗した銘柄を数える。
+
+    Args:
+        results: 処理結果のリスト（失敗時はNone）
+        target_count: 対象の銘柄数
+
+    Returns:
+        (未完了の銘柄数, 分析に失敗した銘柄コードのリスト) のタプル
+    """
+    failed_symbols = [
+        result[2]["symbol"] for result in results if result and result[2].get("analysis_failed")
+    ]
+    completed = len([result for result in results if result]) - len(failed_symbols)
+    return target_count - completed, failed_symbols
+
+
+def collect_reports(results):
+    """
+    処理結果を分類別のレポートと目次用の銘柄情報に振り分ける。
+
+    Returns:
+        (分類別のレポート, 分類別の銘柄情報) のタプル
+    """
+    categorized_reports = {category: [] for category in CATEGORY_NAMES}
+    categorized_stock_info = {category: [] for category in CATEGORY_NAMES}
+    for result in results:
+        if result:
+            category, report_html, stock_info_data = result
+            categorized_reports[category].append(report_html)
+            categorized_stock_info[category].append(stock_info_data)
+    return categorized_reports, categorized_stock_info
+
+
+def send_category_mails(categorized_reports, categorized_stock_info):
+    """分類別に個別のメールを送信する"""
     smtp_conf = get_smtp_config()
-    if MAIL_TO and all(smtp_conf.values()):
-        today = datetime.date.today().isoformat()
-
-        # カテゴリー名の定義
-        category_names = {
-            "holding": "保有銘柄",
-            "short_selling": "空売り銘柄",
-            "considering_buy": "購入検討中の銘柄",
-            "considering_short_sell": "空売り検討中の銘柄",
-        }
-
-        # 各カテゴリーごとに個別のメールを送信
-        for category in ["holding", "short_selling", "considering_buy", "considering_short_sell"]:
-            reports = categorized_reports.get(category, [])
-            stock_info_list = categorized_stock_info.get(category, [])
-            if reports:  # 銘柄が存在する場合のみメール送信
-                category_name = category_names[category]
-                subject = f"株式日次レポート - {category_name} ({today})"
-
-                # 目次を生成
-                toc_html = generate_toc(stock_info_list)
-
-                # メール本文を生成（目次を含む）
-                body = generate_single_category_mail_body(subject, reports, toc_html)
+    if not DRY_RUN and not (MAIL_TO and all(smtp_conf.values())):
+        return
+
+    today = datetime.date.today().isoformat()
+
+    # 各カテゴリーごとに個別のメールを送信
+    for category, category_name in CATEGORY_NAMES.items():
+        reports = categorized_reports.get(category, [])
+        stock_info_list = categorized_stock_info.get(category, [])
+        run = get_current_run()
+        if run is not None and run.mail_sent(category):
+            print(f"メール送信済みのため省略: {category_name}")
+            continue
+        if reports:  # 銘柄が存在する場合のみメール送信
+            subject = f"株式日次レポート - {category_name} ({today})"
+            if DRY_RUN:
+                print(f"ドライランのためメール送信を省略: {subject}（{len(reports)}銘柄）")
+                continue
+
+            # 目次を生成
+            toc_html = generate_toc(stock_info_list)
+
+            # メール本文を生成（目次を含む）
+            body = generate_single_category_mail_body(subject, reports, toc_html)
+            if RUN_REPORT_MAIL_FOOTER:
+                # 送信時点までの実行レポートを末尾に付ける
+                body = body.replace(
+                    "</body>", f"{format_run_report_footer(build_run_report())}\n    </body>"
+                )
+            with measure("send_report_via_mail"):
                 send_report_via_mail(
                     subject,
                     body,
@@ -184,4 +760,145 @@ if __name__ == "__main__":
                     smtp_conf["SMTP_USER"],
                     smtp_conf["SMTP_PASS"],
                 )
-                print(f"メール送信完了: {category_name}")
+            mark_mail_sent(category)
+            print(f"メール送信完了: {category_name}")
+
+
+def save_profile(profiler):
+    """
+    プロファイルの計測結果を実行ディレクトリ（実行を開始していない場合はPROFILE_DIR配下）に出力する。
+
+    Args:
+        profiler: 計測を終えたRunProfiler
+    """
+    run = get_current_run()
+    if run is not None:
+        directory = run.path
+    else:
+        timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        directory = os.path.join(resolve_project_path(PROFILE_DIR), timestamp)
+    paths = profiler.write(directory)
+    peak_mb = profiler.memory_summary()["peak_bytes"] / 1024 / 1024
+    print(f"プロファイルを保存しました: {paths['profile']}（上位: {paths['top']}）")
+    print(f"メモリ使用量のピーク: {peak_mb:.1f}MB（詳細: {paths['memory']}）")
+
+
+def generate_and_send_reports():
+    """レポート生成からメール配信までの一連の処理を実行する"""
+    try:
+        # 対象銘柄リスト（data/stocks.tomlから読み込み）
+        stocks = load_stock_symbols()
+        print(f"分析対象銘柄: {[s['symbol'] for s in stocks]}")
+    except (FileNotFoundError, ValueError, tomllib.TOMLDecodeError) as e:
+        print(f"\n{str(e)}")
+        print("\n処理を終了します。")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n予期しないエラーが発生しました: {e}")
+        print("\n処理を終了します。")
+        sys.exit(1)
+
+    # 銘柄を分類し、--symbols / --categoryで絞り込む
+    categorized, unknown = filter_stocks(
+        categorize_stocks(stocks), TARGET_SYMBOLS, TARGET_CATEGORIES
+    )
+    if unknown:
+        print(f"警告: 銘柄リストに存在しない銘柄を無視します: {unknown}")
+    target_count = sum(len(stock_list) for stock_list in categorized.values())
+    if TARGET_SYMBOLS is not None or TARGET_CATEGORIES is not None:
+        print(f"絞り込み後の対象銘柄: {target_count}銘柄")
+    if not target_count:
+        print("\n対象銘柄がないため処理を終了します。")
+        return
+
+    if NO_LLM:
+        symbols = [s["symbol"] for stock_list in categorized.values() for s in stock_list]
+        quotes = fetch_quotes(symbols)
+        print(f"株価取得完了: {len(quotes)}/{len(symbols)}銘柄")
+        run_fetch_only(categorized, quotes, fetch_news_bulk(symbols))
+        print(f"実行レポート:\n{format_run_report(build_run_report())}")
+        return
+
+    # 実行を開始（--resume指定時は完了済みの銘柄を省略）
+    try:
+        run = start_run(RESUME_RUN_ID)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"\n{str(e)}")
+        print("\n処理を終了します。")
+        sys.exit(1)
+    print(f"実行ID: {run.run_id}（中断した場合は --resume {run.run_id} で再開できます）")
+    completed, categorized = split_completed(categorized)
+    if completed:
+        print(f"完了済みの銘柄を省略: {len(completed)}銘柄")
+
+    # 全銘柄の株価を一括取得（銘柄ごとのAPI呼び出しを削減）
+    symbols = [s["symbol"] for stock_list in categorized.values() for s in stock_list]
+    quotes = fetch_quotes(symbols)
+    print(f"株価取得完了: {len(quotes)}/{len(symbols)}銘柄")
+
+    # 全銘柄のニュースを1回のクエリで一括取得（銘柄ごとのデータセット読み込みを削減）
+    news_map = fetch_news_bulk(symbols)
+
+    # 投資志向性プロンプトを1回だけ生成（全銘柄で共通利用）
+    preference_prompt = generate_preference_prompt()
+
+    try:
+        if USE_BATCH_API:
+            results = run_batch_api(categorized, quotes, preference_prompt, news_map=news_map)
+        elif ANALYSIS_BATCH_SIZE > 1:
+            results = run_batched(
+                categorized, quotes, preference_prompt, ANALYSIS_BATCH_SIZE, news_map
+            )
+        elif USE_ASYNC:
+            results = asyncio.run(run_async(categorized, quotes, preference_prompt, news_map))
+        else:
+            results = run_pipeline(categorized, quotes, preference_prompt, news_map)
+    finally:
+        # 作成したGeminiのプロンプトキャッシュを削除する（分析中に異常終了した場合も保存コストを止める）
+        release_gemini_context_caches()
+
+    # 変化検知モード用に今回の分析状態を保存
+    save_analysis_state()
+
+    # トークン使用量を表示
+    usage_summary = format_usage_summary()
+    if usage_summary:
+        print(f"AI APIトークン使用量:\n{usage_summary}")
+
+    results = completed + results
+
+    # 再開した実行は全銘柄のレポートが揃った場合のみメールを送信する
+    # （分析失敗の銘柄はチェックポイントに保存されないため、次の再開時に再分析される）
+    missing, failed_symbols = find_incomplete_reports(results, target_count)
+    if RESUME_RUN_ID and missing:
+        failed = f"（分析失敗: {', '.join(failed_symbols)}）" if failed_symbols else ""
+        print(
+            f"{missing}銘柄のレポートが未完了のため、メールを送信しません{failed}。"
+            f"--resume {run.run_id} で再度実行してください。"
+        )
+    else:
+        categorized_reports, categorized_stock_info = collect_reports(results)
+        send_category_mails(categorized_reports, categorized_stock_info)
+
+    save_run_report(run)
+
+
+def main():
+    """コマンドライン引数を検証し、レポート生成からメール配信までを実行する"""
+    # 不正な引数・--helpの場合はここで終了する
+    parse_cli_args()
+
+    if not PROFILE_ENABLED:
+        generate_and_send_reports()
+        return
+
+    profiler = RunProfiler(PROFILE_TOP_N, startup_profile=IMPORT_PROFILE)
+    try:
+        with profiler:
+            generate_and_send_reports()
+    finally:
+        save_profile(profiler)
+
+
+if __name__ == "__main__":
+    main()
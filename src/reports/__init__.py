@@ -4,9 +4,15 @@
 分析結果をHTML形式のレポートとして生成する機能を提供します。
 """
 
+from .analysis_parser import ParsedAnalysis, parse_analysis
 from .simplifier import detect_hold_judgment, simplify_hold_report
+from .structured_analysis import read_structured_analysis, render_structured_analysis
 
 __all__ = [
+    "ParsedAnalysis",
     "detect_hold_judgment",
+    "parse_analysis",
+    "read_structured_analysis",
+    "render_structured_analysis",
     "simplify_hold_report",
 ]
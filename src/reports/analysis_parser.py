@@ -0,0 +1,318 @@
+"""
+分析結果解析モジュール
+
+AI分析結果（マークダウン）を1回の走査で解析し、売買判断・ホールド/維持判断・
+ホールドの理由・推奨指値をまとめて取り出します。目次生成・レポート簡略化・レポート生成が
+同じ解析結果を使うため、モジュールごとに売買判断の解釈が食い違うことはありません。
+"""
+
+import re
+
+from .structured_analysis import HOLD_JUDGMENTS, read_structured_analysis
+
+# 走査の起点とするラベル（「売買判断」は「判断」より先に照合する）
+# 大文字・小文字の区別なしの照合は日本語を含む文字列では遅いため、小文字に変換した本文に対して照合する
+_LABEL_RE = re.compile(
+    r"売買判断|判断|推奨|アクション|理由|指値|recommendation|judgment|action|reason"
+)
+
+# ホールド判断のキーワード（小文字に変換した本文に対して照合する）
+_HOLD_KEYWORD_RE = re.compile(r"ホールド|hold|保有継続|様子見|現状維持|維持")
+
+# 売買判断の文脈（「売買判断」「判断」「推奨」「アクション」とその英語表記の後の行）にある
+# ホールド判断のキーワードを、1つの選択パターンで本文を1回走査して探す（小文字に変換した本文に対して照合する）
+_HOLD_CONTEXT_RE = re.compile(
+    r"(?:売買判断|判断|推奨|アクション|judgment|recommendation|action)"
+    r"[：:\s]*+[^\n]*?(?:ホールド|hold|保有継続|様子見|維持)"
+)
+
+# 売買判断を含む行を探すときのキーワード（空売り専用の判断を含む。小文字に変換した行に対して照合する）
+_JUDGMENT_KEYWORD_RE = re.compile(r"買い|buy|売り|sell|ホールド|hold|様子見|買戻し|追加売り|維持")
+
+# ラベルの直後の値（ラベルの終了位置から照合する）
+_MAINTAIN_RE = re.compile(r"[：:\s]*維持")
+_JUDGMENT_VALUE_RE = re.compile(r"[：:\s]+([^\n。、\.,、（(を]+)")
+_JUDGMENT_WORD_RE = re.compile(r"[：:\s]+([^\n\s。、\.,]+)")
+_LABEL_LINE_RE = re.compile(r"[：:\s]+([^\n]+)")
+_BOLD_LABEL_LINE_RE = re.compile(r"\*\*[：:\s]+([^\n]+)")
+_REASON_LINE_RE = re.compile(r"[：:\s]*([^\n]+)")
+_HOLD_REASON_RE = re.compile(
+    r"[：:\s]*(?:ホールド|hold|保有継続|様子見|現状維持|維持)[^\n]*[\n\s]*([^\n]+)",
+    re.IGNORECASE,
+)
+_EN_HOLD_REASON_RE = re.compile(r"[：:\s]*hold[^\n]*[\n\s]*([^\n]+)", re.IGNORECASE)
+_LIMIT_PRICE_RE = re.compile(r"(?:価格)?\**[：:\s]*[¥￥$＄]?\s*(\d[\d,]*(?:\.\d+)?)")
+
+# 売買判断・理由の整形
+_MARKDOWN_SYMBOL_RE = re.compile(r"[*#]")
+_LEADING_SEPARATOR_RE = re.compile(r"^[：:\s]+")
+_LEADING_LABEL_RE = re.compile(r"^(売買判断|判断|推奨|アクション)[：:\s]*")
+_CLAUSE_END_RE = re.compile(r"[。、\.,]")
+_PREDICATE_RE = re.compile(r"[をがはに](推奨|提供|維持|継続)")
+_RECOMMENDATION_RE = re.compile(r"が(良い|おすすめ|望ましい)")
+_PARENTHESIS_RE = re.compile(r"[（(]")
+_LINE_END_RE = re.compile(r"[（(。、]")
+_LINE_SYMBOL_RE = re.compile(r"[*#:\-]")
+_SENTENCE_END_RE = re.compile(r"[。\.]")
+
+# 候補の種類（ラベルごとに最初に見つかった値を記録する）
+_JUDGMENT = "judgment"  # 「売買判断: 買い」
+_JUDGMENT_EN = "judgment_en"  # 「Judgment: hold」
+_RECOMMENDATION = "recommendation"  # 「推奨: 買い」
+_HEADING = "heading"  # 「## 売買判断: 買い」
+_BOLD = "bold"  # 「**売買判断**: 買い」
+_REASON = "reason"  # 「理由: ...」
+_HOLD_REASON = "hold_reason"  # 「売買判断: ホールド」の後の説明
+_REASON_EN = "reason_en"  # 「Reason: ...」
+_HOLD_REASON_EN = "hold_reason_en"  # 「Judgment: hold」の後の説明
+
+# 売買判断の抽出・ホールドの理由の抽出で候補を使う順序
+_JUDGMENT_ORDER = (_RECOMMENDATION, _HEADING, _BOLD)
+_REASON_ORDER = (_REASON, _HOLD_REASON, _REASON_EN, _HOLD_REASON_EN)
+
+
+class ParsedAnalysis:
+    """
+    AI分析結果の解析結果
+
+    構造化出力モードの分析結果は先頭行に埋め込まれた値を使い、それ以外はラベル
+    （売買判断・判断・推奨・アクション・理由・指値とその英語表記）を起点に本文を1回だけ走査する。
+    ホールド判断はhas_hold_judgmentと同じ選択パターンで判定する。
+
+    Attributes:
+        text: 分析結果のテキスト
+        body: 構造化出力モードの先頭行を除いた本文（メール本文に使用する）
+        structured: 構造化出力モードの分析結果の場合True
+        judgment: 売買判断（見つからない場合はNone）
+        is_hold: ホールド判断（様子見・維持を含む）の場合True
+        is_maintain: 空売りポジションの「維持」判断の場合True
+        reason: ホールド判断の理由の1文（見つからない場合はNone）
+        limit_price: 推奨指値（見つからない場合はNone）
+    """
+
+    def __init__(self, analysis_text):
+        self.text = analysis_text or ""
+        self.body = self.text
+        self.structured = False
+        self.judgment = None
+        self.is_hold = False
+        self.is_maintain = False
+        self.reason = None
+        self.limit_price = None
+        self._lines = None
+
+        if not self.text:
+            return
+
+        fields, body = read_structured_analysis(self.text)
+        if fields:
+            self.body = body
+            self.structured = True
+            self.judgment = fields["judgment"]
+            self.is_hold = fields["judgment"] in HOLD_JUDGMENTS
+            self.is_maintain = fields["judgment"] == "維持"
+            self.limit_price = fields.get("limit_price")
+            reason = (fields.get("reason") or "").strip()
+            if reason:
+                self.reason = reason if reason.endswith(("。", ".")) else reason + "。"
+                return
+
+        self._scan()
+
+    def __repr__(self):
+        return (
+            f"ParsedAnalysis(judgment={self.judgment!r}, is_hold={self.is_hold}, "
+            f"is_maintain={self.is_maintain}, limit_price={self.limit_price!r})"
+        )
+
+    def _scan(self):
+        """ラベルを起点に本文を1回走査し、各値の候補から売買判断・理由・指値を決定する"""
+        text = self.text
+        lowered = _lower(text)
+        candidates = {}
+        is_maintain = False
+        limit_price = None
+
+        for label in _LABEL_RE.finditer(lowered):
+            word = label.group()
+            start, end = label.span()
+
+            if word in ("理由", "reason"):
+                kind = _REASON if word == "理由" else _REASON_EN
+                _add_candidate(candidates, kind, _REASON_LINE_RE, text, end)
+                continue
+
+            if word == "指値":
+                if limit_price is None:
+                    match = _LIMIT_PRICE_RE.match(text, end)
+                    if match:
+                        limit_price = float(match.group(1).replace(",", ""))
+                continue
+
+            if word in ("売買判断", "判断"):
+                if not is_maintain and _MAINTAIN_RE.match(lowered, end):
+                    is_maintain = True
+                _add_candidate(candidates, _JUDGMENT, _JUDGMENT_VALUE_RE, text, end)
+                if _is_heading(text, start):
+                    _add_candidate(candidates, _HEADING, _LABEL_LINE_RE, text, end)
+            elif word in ("推奨", "アクション"):
+                _add_candidate(candidates, _RECOMMENDATION, _LABEL_LINE_RE, text, end)
+            elif word in ("judgment", "action"):
+                _add_candidate(candidates, _JUDGMENT_EN, _JUDGMENT_WORD_RE, text, end)
+
+            if (
+                word in ("売買判断", "判断", "推奨", "アクション")
+                and text[start - 2 : start] == "**"
+            ):
+                _add_candidate(candidates, _BOLD, _BOLD_LABEL_LINE_RE, text, end)
+            if word in ("売買判断", "判断", "推奨"):
+                _add_candidate(candidates, _HOLD_REASON, _HOLD_REASON_RE, text, end)
+            elif word in ("judgment", "recommendation"):
+                _add_candidate(candidates, _HOLD_REASON_EN, _EN_HOLD_REASON_RE, text, end)
+
+        if self.limit_price is None:
+            self.limit_price = limit_price
+        if not self.structured:
+            self.is_hold = _HOLD_CONTEXT_RE.search(lowered) is not None
+            self.is_maintain = is_maintain
+            self.judgment = self._resolve_judgment(candidates)
+        if self.reason is None:
+            self.reason = self._resolve_reason(candidates)
+
+    def _text_lines(self):
+        """行単位のフォールバック用に本文を行に分割する（必要になった場合のみ）"""
+        if self._lines is None:
+            self._lines = list(zip(self.text.split("\n"), _lower(self.text).split("\n")))
+        return self._lines
+
+    def _resolve_judgment(self, candidates):
+        """候補から売買判断を決定する（プロンプトで要求した形式を優先する）"""
+        # 基本形式: 「売買判断: 買い」「Judgment: hold」（短い判断のみ受け入れ）
+        for kind in (_JUDGMENT, _JUDGMENT_EN):
+            if kind in candidates:
+                judgment = _MARKDOWN_SYMBOL_RE.sub("", candidates[kind].strip()).strip()
+                if judgment and len(judgment) <= 10:
+                    return judgment
+
+        # フォールバック: AIが指示に従わなかった場合の形式
+        for kind in _JUDGMENT_ORDER:
+            if kind not in candidates:
+                continue
+            judgment = _MARKDOWN_SYMBOL_RE.sub("", candidates[kind].strip()).strip()
+            judgment = _LEADING_SEPARATOR_RE.sub("", judgment)
+            judgment = _LEADING_LABEL_RE.sub("", judgment)
+            judgment = _CLAUSE_END_RE.split(judgment)[0].strip()
+            # 動詞・助詞を除去
+            judgment = _PREDICATE_RE.split(judgment)[0].strip()
+            judgment = _RECOMMENDATION_RE.split(judgment)[0].strip()
+            judgment = _PARENTHESIS_RE.split(judgment)[0].strip()
+            if judgment:
+                return judgment[:30]
+
+        # 最終フォールバック: 売買判断のキーワードを含む短い行
+        for line, line_lower in self._text_lines():
+            if not _JUDGMENT_KEYWORD_RE.search(line_lower):
+                continue
+            clean_line = _LINE_SYMBOL_RE.sub("", line).strip()
+            if 5 < len(clean_line) <= 30:
+                clean_line = _PREDICATE_RE.split(clean_line)[0].strip()
+                clean_line = _RECOMMENDATION_RE.split(clean_line)[0].strip()
+                clean_line = _LINE_END_RE.split(clean_line)[0].strip()
+                if len(clean_line) <= 10:
+                    return clean_line
+
+        return None
+
+    def _resolve_reason(self, candidates):
+        """候補からホールド判断の理由（最初の1文）を決定する"""
+        for kind in _REASON_ORDER:
+            if kind not in candidates:
+                continue
+            sentences = _SENTENCE_END_RE.split(candidates[kind].strip())
+            if sentences and sentences[0] and len(sentences[0]) > 5:
+                return _as_sentence(sentences[0])
+
+        # 理由が見つからない場合、ホールドのキーワードを含む行またはその後の行から抽出する
+        lines = self._text_lines()
+        for i, (_, line_lower) in enumerate(lines):
+            if not _HOLD_KEYWORD_RE.search(line_lower):
+                continue
+            for offset in range(0, min(3, len(lines) - i)):
+                candidate_line = lines[i + offset][0].strip()
+                if (
+                    candidate_line
+                    and not candidate_line.startswith("#")
+                    and len(candidate_line) > 10
+                ):
+                    sentences = _SENTENCE_END_RE.split(candidate_line)
+                    if sentences and sentences[0]:
+                        return _as_sentence(sentences[0])
+
+        return None
+
+
+def _lower(text):
+    """小文字に変換する（位置がずれないよう、変換で文字数が変わる文字はそのまま残す）"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+
+
+def _add_candidate(candidates, kind, pattern, text, pos):
+    """種類ごとに最初に見つかった値だけを候補として記録する"""
+    if kind not in candidates:
+        match = pattern.match(text, pos)
+        if match:
+            candidates[kind] = match.group(1)
+
+
+def _is_heading(text, pos):
+    """ラベルがマークダウンの見出し（「#」の後）にあるか"""
+    pos -= 1
+    while pos >= 0 and text[pos].isspace():
+        pos -= 1
+    return pos >= 0 and text[pos] == "#"
+
+
+def _as_sentence(sentence):
+    """文末に句点を補う"""
+    sentence = sentence.strip()
+    if not sentence.endswith("。") and not sentence.endswith("."):
+        sentence += "。"
+    return sentence
+
+
+def has_hold_judgment(analysis_text):
+    """
+    AI分析結果がホールド判断（様子見・維持を含む）かどうかを、売買判断などを解析せずに判定する。
+
+    ParsedAnalysis.is_hold と同じ結果を返す。
+
+    Args:
+        analysis_text: AI分析結果のテキスト
+
+    Returns:
+        bool: ホールド判断の場合True
+    """
+    if not analysis_text:
+        return False
+    fields, _ = read_structured_analysis(analysis_text)
+    if fields:
+        return fields["judgment"] in HOLD_JUDGMENTS
+    return _HOLD_CONTEXT_RE.search(_lower(analysis_text)) is not None
+
+
+def parse_analysis(analysis):
+    """
+    AI分析結果を解析する（解析済みの場合はそのまま返す）。
+
+    Args:
+        analysis: AI分析結果のテキスト、またはParsedAnalysis
+
+    Returns:
+        ParsedAnalysis: 解析結果
+    """
+    if isinstance(analysis, ParsedAnalysis):
+        return analysis
+    return ParsedAnalysis(analysis)
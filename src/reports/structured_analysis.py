@@ -0,0 +1,197 @@
+"""
+構造化分析結果モジュール
+
+構造化出力モード（STRUCTURED_OUTPUT）でAIが返した値（売買判断・指値・理由・本文）を
+レポート用のマークダウンに変換します。売買判断・指値・理由はマークダウンの先頭行に
+HTMLコメントとして埋め込むため、目次生成やレポート簡略化は本文を正規表現で走査せずに値を直接読み取れます。
+分析結果は従来どおり文字列のまま扱われるため、分析キャッシュ・途中結果の保存・前回分析の再利用は変更なしで動作します。
+"""
+
+import json
+import re
+
+# 構造化した値を埋め込む先頭行の開始・終了
+STRUCTURED_MARKER = "<!-- stock-report:analysis "
+STRUCTURED_MARKER_END = " -->"
+
+# 構造化出力で選択させる売買判断（通常の銘柄 / 空売りポジション）
+JUDGMENTS_REGULAR = ("買い", "買い増し", "売り", "ホールド", "様子見")
+JUDGMENTS_SHORT = ("買戻し", "追加売り", "維持", "様子見")
+
+# レポート簡略化の対象とする売買判断
+HOLD_JUDGMENTS = frozenset({"ホールド", "様子見", "維持"})
+
+# 構造化出力の値の説明（JSON Schemaのdescription）
+_FIELD_DESCRIPTIONS = {
+    "judgment": "売買判断",
+    "limit_price": "推奨する指値価格（指値を推奨しない場合はnull）",
+    "reason": "売買判断の理由（1文）",
+    "markdown_body": "株価とニュースの要約、トレンドと今後の見通し、リスク要因とチャンス要因（マークダウン形式）",
+}
+
+
+def analysis_json_schema(is_short_position=False):
+    """
+    構造化出力のJSON Schema（Claudeのツールのinput_schema）を返す。
+
+    Args:
+        is_short_position: 空売りポジションの場合True（売買判断の選択肢が変わる）
+
+    Returns:
+        dict: JSON Schema
+    """
+    judgments = JUDGMENTS_SHORT if is_short_position else JUDGMENTS_REGULAR
+    return {
+        "type": "object",
+        "properties": {
+            "judgment": {
+                "type": "string",
+                "enum": list(judgments),
+                "description": _FIELD_DESCRIPTIONS["judgment"],
+            },
+            "limit_price": {
+                "type": ["number", "null"],
+                "description": _FIELD_DESCRIPTIONS["limit_price"],
+            },
+            "reason": {"type": "string", "description": _FIELD_DESCRIPTIONS["reason"]},
+            "markdown_body": {
+                "type": "string",
+                "description": _FIELD_DESCRIPTIONS["markdown_body"],
+            },
+        },
+        "required": ["judgment", "limit_price", "reason", "markdown_body"],
+    }
+
+
+def gemini_response_schema(is_short_position=False):
+    """
+    構造化出力のスキーマをGemini APIのresponseSchema（OpenAPIのサブセット）の形式で返す。
+
+    Args:
+        is_short_position: 空売りポジションの場合True（売買判断の選択肢が変わる）
+
+    Returns:
+        dict: responseSchema
+    """
+    judgments = JUDGMENTS_SHORT if is_short_position else JUDGMENTS_REGULAR
+    return {
+        "type": "OBJECT",
+        "properties": {
+            "judgment": {
+                "type": "STRING",
+                "enum": list(judgments),
+                "description": _FIELD_DESCRIPTIONS["judgment"],
+            },
+            "limit_price": {
+                "type": "NUMBER",
+                "nullable": True,
+                "description": _FIELD_DESCRIPTIONS["limit_price"],
+            },
+            "reason": {"type": "STRING", "description": _FIELD_DESCRIPTIONS["reason"]},
+            "markdown_body": {
+                "type": "STRING",
+                "description": _FIELD_DESCRIPTIONS["markdown_body"],
+            },
+        },
+        "required": ["judgment", "limit_price", "reason", "markdown_body"],
+        "propertyOrdering": ["judgment", "limit_price", "reason", "markdown_body"],
+    }
+
+
+def parse_structured_response(response):
+    """
+    構造化出力の応答（JSON文字列またはClaudeのツール入力の辞書）を検証して値の辞書にする。
+
+    Args:
+        response: JSON文字列（コードブロックで囲まれていても可）または辞書
+
+    Returns:
+        dict: {'judgment', 'limit_price', 'reason', 'markdown_body'}（形式が不正な場合はNone）
+    """
+    if isinstance(response, str):
+        text = re.sub(r"^```(?:json)?\s*|\s*```$", "", response.strip())
+        try:
+            response = json.loads(text)
+        except ValueError:
+            return None
+    if not isinstance(response, dict):
+        return None
+
+    judgment = response.get("judgment")
+    if not isinstance(judgment, str) or not judgment.strip():
+        return None
+    limit_price = response.get("limit_price")
+    if isinstance(limit_price, bool) or not isinstance(limit_price, (int, float)):
+        limit_price = None
+    reason = response.get("reason")
+    body = response.get("markdown_body")
+    return {
+        "judgment": judgment.strip(),
+        "limit_price": limit_price,
+        "reason": reason.strip() if isinstance(reason, str) else "",
+        "markdown_body": body.strip() if isinstance(body, str) else "",
+    }
+
+
+def _format_price(price):
+    """指値価格を表示用の文字列にする（整数値は小数点なし）"""
+    if float(price).is_integer():
+        return f"{int(price):,}"
+    return f"{price:,.2f}"
+
+
+def render_structured_analysis(fields):
+    """
+    構造化出力の値をレポート用のマークダウンに変換する。
+
+    先頭行に売買判断・指値・理由をHTMLコメントとして埋め込み、
+    続けて従来の分析結果と同じ「売買判断: ○○」形式の見出しと本文を記載する。
+
+    Args:
+        fields: parse_structured_responseの戻り値
+
+    Returns:
+        str: マークダウン形式の分析結果
+    """
+    header = {
+        "judgment": fields["judgment"],
+        "limit_price": fields.get("limit_price"),
+        "reason": fields.get("reason", ""),
+    }
+    # 値に「--」が含まれてもHTMLコメントが途中で閉じないよう、JSONのエスケープで表記する
+    payload = json.dumps(header, ensure_ascii=False).replace("--", "-\\u002d")
+    lines = [
+        f"{STRUCTURED_MARKER}{payload}{STRUCTURED_MARKER_END}",
+        f"## 売買判断: {fields['judgment']}",
+        "",
+    ]
+    if header["limit_price"] is not None:
+        lines.extend([f"**推奨指値**: {_format_price(header['limit_price'])}", ""])
+    if header["reason"]:
+        lines.extend([f"**理由**: {header['reason']}", ""])
+    lines.append(fields.get("markdown_body", ""))
+    return "\n".join(lines).rstrip() + "\n"
+
+
+def read_structured_analysis(analysis_text):
+    """
+    分析結果の先頭行に埋め込まれた構造化の値を読み取る（本文は走査しない）。
+
+    Args:
+        analysis_text: 分析結果のテキスト（マークダウン形式）
+
+    Returns:
+        (値の辞書, 先頭行を除いた本文) のタプル（構造化出力でない場合は (None, analysis_text)）
+    """
+    if not analysis_text or not analysis_text.startswith(STRUCTURED_MARKER):
+        return None, analysis_text
+    end = analysis_text.find(STRUCTURED_MARKER_END, len(STRUCTURED_MARKER))
+    if end < 0:
+        return None, analysis_text
+    try:
+        fields = json.loads(analysis_text[len(STRUCTURED_MARKER) : end])
+    except ValueError:
+        return None, analysis_text
+    if not isinstance(fields, dict) or not fields.get("judgment"):
+        return None, analysis_text
+    return fields, analysis_text[end + len(STRUCTURED_MARKER_END) :].lstrip("\n")
@@ -0,0 +1,24 @@
+"""
+実行管理モジュール
+
+レポート生成の実行単位での途中結果の保存（チェックポイント）と再開機能、
+ステージごとの所要時間の計測（metrics）を提供します。
+"""
+
+from .checkpoint import (
+    RunCheckpoint,
+    get_current_run,
+    load_completed_stock,
+    mark_mail_sent,
+    record_completed_stock,
+    start_run,
+)
+
+__all__ = [
+    "RunCheckpoint",
+    "get_current_run",
+    "load_completed_stock",
+    "mark_mail_sent",
+    "record_completed_stock",
+    "start_run",
+]
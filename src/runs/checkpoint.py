@@ -0,0 +1,200 @@
+"""
+チェックポイントモジュール
+
+銘柄ごとの取得データ・AI分析結果・レポートHTMLを、完了した時点で実行ディレクトリに保存します。
+ジョブが途中で中断した場合も、--resume <実行ID> で完了済みの銘柄を省略して再開でき、
+再開時のAI API呼び出しは未完了の銘柄の分のみになります。
+"""
+
+import datetime
+import json
+import os
+import re
+import shutil
+from threading import Lock
+
+from analyzers.analysis_cache import FAILURE_PREFIX
+from config import RUNS_DIR, RUNS_KEEP, resolve_project_path
+
+# 実行IDの書式（RunCheckpointが現在時刻から生成する形式）
+RUN_ID_FORMAT = "%Y%m%d-%H%M%S"
+RUN_ID_PATTERN = re.compile(r"\d{8}-\d{6}")
+
+
+def _write_json_atomic(path, payload):
+    """一時ファイルへの書き込み後に置き換え、中断時に壊れたファイルを残さない"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+class RunCheckpoint:
+    """
+    1回の実行の途中結果を保存する実行ディレクトリ。
+
+    Args:
+        runs_dir: 実行ディレクトリの親ディレクトリ
+        run_id: 実行ID（省略時は現在時刻から生成）
+    """
+
+    def __init__(self, runs_dir, run_id=None):
+        self.run_id = run_id or datetime.datetime.now().strftime(RUN_ID_FORMAT)
+        self.path = os.path.join(runs_dir, self.run_id)
+        self._stocks_dir = os.path.join(self.path, "stocks")
+        self._manifest_path = os.path.join(self.path, "run.json")
+        self._lock = Lock()
+        os.makedirs(self._stocks_dir, exist_ok=True)
+        self._manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        try:
+            with open(self._manifest_path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            manifest = {
+                "run_id": self.run_id,
+                "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+                "mails_sent": [],
+            }
+            _write_json_atomic(self._manifest_path, manifest)
+            return manifest
+
+    def _stock_path(self, symbol):
+        safe_name = re.sub(r"[^A-Za-z0-9._-]", "_", str(symbol))
+        return os.path.join(self._stocks_dir, f"{safe_name}.json")
+
+    def record(self, category, stock_info, data, analysis, result):
+        """
+        完了した銘柄の途中結果を保存する（分析失敗の場合は再開時に再分析するため保存しない）。
+
+        Args:
+            category: 銘柄の分類
+            stock_info: 銘柄情報の辞書
+            data: fetch_stock_dataで取得したデータ
+            analysis: AI分析結果（マークダウン形式）
+            result: build_stock_reportの戻り値 (分類, レポートHTML, 目次用の銘柄情報)
+        """
+        if analysis.startswith(FAILURE_PREFIX):
+            return
+        _, report_html, stock_info_data = result
+        payload = {
+            "category": category,
+            "stock_info": stock_info,
+            "data": data,
+            "analysis": analysis,
+            "report_html": report_html,
+            "toc": stock_info_data,
+            "completed_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+        _write_json_atomic(self._stock_path(stock_info["symbol"]), payload)
+
+    def load(self, symbol):
+        """
+        保存済みの銘柄の結果を取得する。
+
+        Returns:
+            (分類, レポートHTML, 目次用の銘柄情報) のタプル（未完了の場合はNone）
+        """
+        try:
+            with open(self._stock_path(symbol), encoding="utf-8") as f:
+                payload = json.load(f)
+            return payload["category"], payload["report_html"], payload["toc"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            print(f"警告: {symbol}のチェックポイントを読み込めませんでした: {e}")
+            return None
+
+    def mail_sent(self, category):
+        """分類のメールが送信済みか"""
+        with self._lock:
+            return category in self._manifest["mails_sent"]
+
+    def mark_mail_sent(self, category):
+        """分類のメールを送信済みとして記録する（再開時の二重送信を防ぐ）"""
+        with self._lock:
+            if category not in self._manifest["mails_sent"]:
+                self._manifest["mails_sent"].append(category)
+            _write_json_atomic(self._manifest_path, self._manifest)
+
+
+def prune_runs(runs_dir, keep):
+    """
+    古い実行ディレクトリを削除し、新しいものからkeep件を残す。
+
+    Args:
+        runs_dir: 実行ディレクトリの親ディレクトリ
+        keep: 残す実行ディレクトリの数
+    """
+    try:
+        run_ids = sorted(
+            name for name in os.listdir(runs_dir) if os.path.isdir(os.path.join(runs_dir, name))
+        )
+    except FileNotFoundError:
+        return
+    for run_id in run_ids[: max(len(run_ids) - keep, 0)]:
+        shutil.rmtree(os.path.join(runs_dir, run_id), ignore_errors=True)
+
+
+_current_run = None
+_current_run_lock = Lock()
+
+
+def start_run(run_id=None):
+    """
+    実行を開始する（run_idを指定した場合はその実行を再開する）。
+
+    新しい実行を開始する場合は、古い実行ディレクトリをRUNS_KEEP件まで削除する。
+
+    Args:
+        run_id: 再開する実行ID（省略時は新しい実行）
+
+    Returns:
+        RunCheckpoint: 現在の実行
+
+    Raises:
+        ValueError: run_idが実行IDの書式ではない場合（実行ディレクトリの外を指すパスなど）
+        FileNotFoundError: run_idの実行が存在しない場合
+    """
+    global _current_run
+    if run_id is not None and not RUN_ID_PATTERN.fullmatch(run_id):
+        raise ValueError(f"実行IDの形式が不正です（例: 20260101-070000）: {run_id}")
+    runs_dir = resolve_project_path(RUNS_DIR)
+    if run_id is not None and not os.path.isdir(os.path.join(runs_dir, run_id)):
+        raise FileNotFoundError(f"再開する実行が見つかりません: {run_id}")
+    with _current_run_lock:
+        if run_id is None:
+            # 作成する実行ディレクトリの分を空けておく
+            prune_runs(runs_dir, max(RUNS_KEEP - 1, 0))
+        _current_run = RunCheckpoint(runs_dir, run_id)
+        return _current_run
+
+
+def get_current_run():
+    """現在の実行を取得する（start_run前はNone）"""
+    return _current_run
+
+
+def record_completed_stock(category, stock_info, data, analysis, result):
+    """実行中の場合に完了した銘柄の途中結果を保存する"""
+    run = get_current_run()
+    if run is None:
+        return
+    try:
+        run.record(category, stock_info, data, analysis, result)
+    except OSError as e:
+        print(f"警告: {stock_info['symbol']}のチェックポイントを保存できませんでした: {e}")
+
+
+def load_completed_stock(symbol):
+    """実行中の場合に保存済みの銘柄の結果を取得する（未完了・実行外の場合はNone）"""
+    run = get_current_run()
+    return run.load(symbol) if run is not None else None
+
+
+def mark_mail_sent(category):
+    """実行中の場合に分類のメールを送信済みとして記録する"""
+    run = get_current_run()
+    if run is not None:
+        run.mark_mail_sent(category)
@@ -0,0 +1,242 @@
+"""
+実行メトリクスモジュール
+
+データ取得・AI分析・レポート生成・メール送信の各ステージの所要時間を銘柄ごとに記録し、
+実行終了時にステージごとの合計・p50/p95/最大、レート制限の待機時間、
+時間のかかった銘柄をまとめた実行レポートを作成します。
+ワーカー数やレート制限の設定を調整する際の根拠として使用します。
+"""
+
+import datetime
+import functools
+import html
+import inspect
+import json
+import os
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+# レート制限の待機時間を記録するステージ名
+RATE_LIMIT_STAGE = "rate_limit_wait"
+
+# 一時的な失敗（429・5xxなど）後のリトライの待機時間を記録するステージ名
+RETRY_STAGE = "retry_wait"
+
+# 他のステージの内側で計測されるステージ（銘柄ごとの合計時間には含めない）
+# fetch_newsはfetch_stock_data、レート制限・リトライの待機はanalyze_with_*の内側で発生する
+NESTED_STAGES = frozenset({"fetch_news", RATE_LIMIT_STAGE, RETRY_STAGE})
+
+_records = []
+_lock = Lock()
+_started = time.perf_counter()
+_started_at = datetime.datetime.now()
+
+
+def record_duration(stage, seconds, symbol=None):
+    """
+    1回分の所要時間を記録する。
+
+    Args:
+        stage: ステージ名
+        seconds: 所要時間（秒）
+        symbol: 銘柄コード（銘柄に紐づかない処理はNone）
+    """
+    with _lock:
+        _records.append((stage, symbol, float(seconds)))
+
+
+@contextmanager
+def measure(stage, symbol=None):
+    """
+    withブロックの所要時間を記録する（例外で終了した場合も記録する）。
+
+    Args:
+        stage: ステージ名
+        symbol: 銘柄コード
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_duration(stage, time.perf_counter() - start, symbol)
+
+
+def _symbol_of(args):
+    """関数の第1引数（銘柄コードまたは銘柄データの辞書）から銘柄コードを取り出す"""
+    if not args:
+        return None
+    first = args[0]
+    if isinstance(first, str):
+        return first
+    if isinstance(first, dict):
+        return first.get("symbol")
+    return None
+
+
+def timed(stage):
+    """
+    関数の所要時間をステージとして記録するデコレーター（async関数にも対応）。
+
+    銘柄コードは第1引数（銘柄コードの文字列、または'symbol'を含むデータの辞書）から取得する。
+
+    Args:
+        stage: ステージ名
+    """
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with measure(stage, _symbol_of(args)):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with measure(stage, _symbol_of(args)):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _percentile(sorted_values, percent):
+    """昇順に並んだ値の百分位数（最近接順位法）"""
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def _summarize(values):
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "total_seconds": round(sum(values), 3),
+        "p50_seconds": round(_percentile(values, 50), 3),
+        "p95_seconds": round(_percentile(values, 95), 3),
+        "max_seconds": round(values[-1], 3),
+    }
+
+
+def build_run_report(slowest=5):
+    """
+    記録した所要時間から実行レポートを作成する。
+
+    p50/p95/最大は、銘柄に紐づくステージでは銘柄ごとの合計時間、
+    銘柄に紐づかないステージでは1回ごとの時間の分布を表す。
+
+    Args:
+        slowest: 時間のかかった銘柄として含める件数
+
+    Returns:
+        dict: {'started_at', 'wall_seconds', 'stages', 'rate_limit_wait', 'slowest_symbols'}
+    """
+    with _lock:
+        records = list(_records)
+
+    per_stage = {}
+    per_symbol = {}
+    for stage, symbol, seconds in records:
+        values = per_stage.setdefault(stage, {})
+        key = symbol if symbol is not None else len(values)
+        values[key] = values.get(key, 0.0) + seconds
+        if symbol is not None:
+            breakdown = per_symbol.setdefault(symbol, {})
+            breakdown[stage] = breakdown.get(stage, 0.0) + seconds
+
+    stages = {stage: _summarize(values.values()) for stage, values in per_stage.items()}
+
+    ranking = sorted(
+        (
+            (
+                sum(s for stage, s in breakdown.items() if stage not in NESTED_STAGES),
+                symbol,
+                breakdown,
+            )
+            for symbol, breakdown in per_symbol.items()
+        ),
+        key=lambda entry: entry[0],
+        reverse=True,
+    )
+    slowest_symbols = [
+        {
+            "symbol": symbol,
+            "total_seconds": round(total, 3),
+            "stages": {stage: round(s, 3) for stage, s in breakdown.items()},
+        }
+        for total, symbol, breakdown in ranking[:slowest]
+    ]
+
+    return {
+        "started_at": _started_at.isoformat(timespec="seconds"),
+        "wall_seconds": round(time.perf_counter() - _started, 3),
+        "stages": stages,
+        "rate_limit_wait": stages.get(RATE_LIMIT_STAGE),
+        "slowest_symbols": slowest_symbols,
+    }
+
+
+def format_run_report(report):
+    """
+    実行レポートを表示用の文字列に整形する。
+
+    Returns:
+        str: ステージごとの集計と時間のかかった銘柄（記録がない場合は所要時間のみ）
+    """
+    lines = [f"所要時間: {report['wall_seconds']:.1f}秒"]
+    for stage, summary in report["stages"].items():
+        lines.append(
+            f"{stage}: {summary['count']}件, 合計 {summary['total_seconds']:.1f}秒, "
+            f"p50 {summary['p50_seconds']:.2f}秒, p95 {summary['p95_seconds']:.2f}秒, "
+            f"最大 {summary['max_seconds']:.2f}秒"
+        )
+    if report["slowest_symbols"]:
+        slowest = ", ".join(
+            f"{entry['symbol']} {entry['total_seconds']:.1f}秒"
+            for entry in report["slowest_symbols"]
+        )
+        lines.append(f"時間のかかった銘柄: {slowest}")
+    return "\n".join(lines)
+
+
+def format_run_report_footer(report):
+    """
+    実行レポートをメール末尾に付けるHTMLに整形する。
+
+    Returns:
+        str: HTML形式のフッター
+    """
+    return (
+        '<hr style="margin-top: 30px;">'
+        '<pre style="color: #888; font-size: 11px; white-space: pre-wrap;">'
+        f"{html.escape(format_run_report(report))}</pre>"
+    )
+
+
+def write_run_report(path, report):
+    """
+    実行レポートをJSONファイルに保存する（一時ファイルへの書き込み後に置き換え）。
+
+    Args:
+        path: 保存先のパス
+        report: build_run_reportの戻り値
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def reset_metrics():
+    """記録をリセットし、計測の開始時刻を現在時刻にする"""
+    global _started, _started_at
+    with _lock:
+        _records.clear()
+        _started = time.perf_counter()
+        _started_at = datetime.datetime.now()
@@ -0,0 +1,141 @@
+"""
+プロファイラーモジュール
+
+--profile（またはSTOCK_REPORT_PROFILE）指定時に実行全体をcProfileで計測し、
+プロファイル（profile.prof）と累積時間の上位N件（profile_top.txt）を出力します。
+計測中に開始したワーカースレッドはスレッドごとに計測し、出力時に合算します。
+計測開始前のモジュールのインポートを別途計測したプロファイルも合算できます。
+あわせてtracemallocでメモリ使用量のピークと確保量の多い箇所を記録します（memory.json）。
+
+マークダウン変換や目次・簡略化の正規表現処理などのプロセス内の処理と、
+ネットワーク待ちのどちらに時間がかかっているかを切り分けるために使用します。
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import tracemalloc
+
+# memory.jsonに記録する確保量の多い箇所の件数
+MEMORY_TOP_N = 10
+
+
+class RunProfiler:
+    """
+    実行全体のCPUプロファイルとメモリ使用量を計測する。
+
+    withブロックで計測し、終了後にwriteで結果を出力する。
+
+    Args:
+        top: profile_top.txtに出力する関数の件数
+        startup_profile: 計測開始前に取得したcProfile.Profile（モジュールのインポートなど、出力時に合算する）
+    """
+
+    def __init__(self, top=40, startup_profile=None):
+        self.top = top
+        self._startup_profile = startup_profile
+        self._profile = cProfile.Profile()
+        self._thread_profiles = []
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._peak_bytes = 0
+        self._current_bytes = 0
+        self._started_tracemalloc = False
+
+    def __enter__(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        tracemalloc.reset_peak()
+        threading.setprofile(self._profile_thread)
+        self._profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._profile.disable()
+        threading.setprofile(None)
+        self._current_bytes, self._peak_bytes = tracemalloc.get_traced_memory()
+        self._snapshot = tracemalloc.take_snapshot()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        return False
+
+    def _profile_thread(self, frame, event, arg):
+        """計測中に開始したスレッドの最初の呼び出しで、そのスレッド用のプロファイラーを開始する"""
+        profile = cProfile.Profile()
+        with self._lock:
+            self._thread_profiles.append(profile)
+        profile.enable()
+
+    def _stats(self, stream=None):
+        """起動時・メインスレッド・ワーカースレッドの計測結果を合算する"""
+        stats = pstats.Stats(self._profile, stream=stream)
+        if self._startup_profile is not None:
+            stats.add(self._startup_profile)
+        with self._lock:
+            thread_profiles = list(self._thread_profiles)
+        for profile in thread_profiles:
+            stats.add(profile)
+        return stats
+
+    def format_top(self):
+        """
+        累積時間の上位の関数を表形式の文字列に整形する。
+
+        Returns:
+            str: pstatsの累積時間順の出力
+        """
+        stream = io.StringIO()
+        stats = self._stats(stream)
+        stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+        return stream.getvalue()
+
+    def memory_summary(self):
+        """
+        tracemallocで記録したメモリ使用量を取得する。
+
+        Returns:
+            dict: {'peak_bytes', 'current_bytes', 'top_allocations': [{'location', 'size_bytes', 'count'}]}
+        """
+        top_allocations = []
+        if self._snapshot is not None:
+            for stat in self._snapshot.statistics("lineno")[:MEMORY_TOP_N]:
+                frame = stat.traceback[0]
+                top_allocations.append(
+                    {
+                        "location": f"{frame.filename}:{frame.lineno}",
+                        "size_bytes": stat.size,
+                        "count": stat.count,
+                    }
+                )
+        return {
+            "peak_bytes": self._peak_bytes,
+            "current_bytes": self._current_bytes,
+            "top_allocations": top_allocations,
+        }
+
+    def write(self, directory):
+        """
+        計測結果をディレクトリに出力する。
+
+        Args:
+            directory: 出力先のディレクトリ
+
+        Returns:
+            dict: 出力したファイルのパス {'profile', 'top', 'memory'}
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths = {
+            "profile": os.path.join(directory, "profile.prof"),
+            "top": os.path.join(directory, "profile_top.txt"),
+            "memory": os.path.join(directory, "memory.json"),
+        }
+        self._stats().dump_stats(paths["profile"])
+        with open(paths["top"], "w", encoding="utf-8") as f:
+            f.write(self.format_top())
+        with open(paths["memory"], "w", encoding="utf-8") as f:
+            json.dump(self.memory_summary(), f, ensure_ascii=False, indent=2)
+        return paths
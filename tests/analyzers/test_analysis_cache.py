@@ -0,0 +1,168 @@
+"""
+analysis_cacheモジュールのテスト
+"""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../..", "src"))
+
+from analyzers.analysis_cache import EVICTION_TARGET_RATIO, AnalysisCache
+from analyzers.retry import RetryPolicy
+
+
+class FakeClock:
+    """テスト用の手動で進める時計"""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestAnalysisCacheKey:
+    """キャッシュキー生成のテスト"""
+
+    def test_same_input_same_key(self):
+        """同一入力では同じキーになる"""
+        request = {"messages": [{"text": "7203.Tの分析"}], "max_tokens": 1500}
+        key1 = AnalysisCache.make_key("claude", "model-a", request)
+        key2 = AnalysisCache.make_key("claude", "model-a", dict(reversed(list(request.items()))))
+        assert key1 == key2
+
+    def test_key_depends_on_provider_model_and_prompt(self):
+        """プロバイダー・モデル・プロンプトのいずれかが異なればキーも異なる"""
+        request = {"prompt": "7203.Tの分析"}
+        base = AnalysisCache.make_key("claude", "model-a", request)
+        assert AnalysisCache.make_key("gemini", "model-a", request) != base
+        assert AnalysisCache.make_key("claude", "model-b", request) != base
+        assert AnalysisCache.make_key("claude", "model-a", {"prompt": "AAPLの分析"}) != base
+
+
+class TestAnalysisCacheStorage:
+    """キャッシュの保存・取得のテスト"""
+
+    def test_set_and_get(self, tmp_path):
+        """保存した分析結果を取得できる"""
+        cache = AnalysisCache(str(tmp_path), ttl_seconds=3600, max_bytes=10**6)
+        cache.set("key1", "売買判断: 買い")
+        assert cache.get("key1") == "売買判断: 買い"
+
+    def test_missing_key(self, tmp_path):
+        """未登録のキーはNoneを返す"""
+        cache = AnalysisCache(str(tmp_path), ttl_seconds=3600, max_bytes=10**6)
+        assert cache.get("unknown") is None
+
+    def test_expired_entry(self, tmp_path):
+        """TTLを過ぎたエントリは取得できず削除される"""
+        clock = FakeClock()
+        cache = AnalysisCache(str(tmp_path), ttl_seconds=3600, max_bytes=10**6, clock=clock)
+        cache.set("key1", "売買判断: 買い")
+        clock.now += 3601
+        assert cache.get("key1") is None
+        assert not os.path.exists(tmp_path / "key1.json")
+
+    def test_size_based_eviction(self, tmp_path):
+        """合計サイズが上限を超えると古いエントリから削除される"""
+        cache = AnalysisCache(str(tmp_path), ttl_seconds=10**9, max_bytes=10**9)
+        cache.set("old", "x" * 1000)
+        os.utime(tmp_path / "old.json", (1, 1))
+        cache.max_bytes = 1500
+        cache.set("new", "y" * 1000)
+
+        assert cache.get("old") is None
+        assert cache.get("new") == "y" * 1000
+
+    def test_no_temporary_files_left(self, tmp_path):
+        """書き込み後に一時ファイルが残らない"""
+        cache = AnalysisCache(str(tmp_path), ttl_seconds=3600, max_bytes=10**6)
+        cache.set("key1", "売買判断: 買い")
+        assert os.listdir(tmp_path) == ["key1.json"]
+
+    def test_concurrent_writes_same_key(self, tmp_path):
+        """複数スレッドから同じキーに保存しても一時ファイルが衝突しない"""
+        cache = AnalysisCache(str(tmp_path), ttl_seconds=3600, max_bytes=10**6)
+
+        def write(i):
+            cache.set("key1", f"売買判断: 買い {i}")
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(write, range(40)))
+
+        assert os.listdir(tmp_path) == ["key1.json"]
+        assert cache.get("key1").startswith("売買判断: 買い")
+
+    def test_directory_scanned_only_when_over_limit(self, tmp_path):
+        """合計サイズが上限以内の間は、保存のたびにディレクトリを走査しない"""
+        cache = AnalysisCache(str(tmp_path), ttl_seconds=10**9, max_bytes=10**6)
+        with patch("analyzers.analysis_cache.os.listdir", wraps=os.listdir) as mock_listdir:
+            for i in range(5):
+                cache.set(f"key{i}", "x" * 100)
+            assert mock_listdir.call_count == 1
+
+            cache.max_bytes = 300
+            cache.set("key5", "x" * 100)
+            assert mock_listdir.call_count == 2
+
+        total = sum(os.path.getsize(tmp_path / name) for name in os.listdir(tmp_path))
+        assert total <= 300 * EVICTION_TARGET_RATIO
+        assert cache.get("key5") == "x" * 100
+
+
+class TestAnalyzerIntegration:
+    """AI分析関数とキャッシュの連携テスト"""
+
+    def test_gemini_cache_hit_skips_network(self, tmp_path):
+        """キャッシュヒット時はGemini APIを呼ばない"""
+        from analyzers.ai_analyzer import analyze_with_gemini
+
+        cache = AnalysisCache(str(tmp_path), ttl_seconds=3600, max_bytes=10**6)
+        data = {"symbol": "AAPL", "price": 150, "news": ["ニュース1"]}
+
+        response = MagicMock()
+        response.status_code = 200
+        response.json.return_value = {
+            "candidates": [{"content": {"parts": [{"text": "分析結果"}]}}]
+        }
+
+        with (
+            patch("analyzers.analysis_cache.get_analysis_cache", return_value=cache),
+            patch("analyzers.ai_analyzer.GEMINI_API_KEY", "test-api-key"),
+            patch("analyzers.ai_analyzer.get_rate_limiter"),
+            patch("analyzers.ai_analyzer.get_session") as mock_get_session,
+        ):
+            mock_get_session.return_value.post.return_value = response
+            first = analyze_with_gemini(data, "テストプロンプト")
+            second = analyze_with_gemini(data, "テストプロンプト")
+
+        assert first == second == "分析結果"
+        assert mock_get_session.return_value.post.call_count == 1
+
+    def test_failure_is_not_cached(self, tmp_path):
+        """分析失敗のレポートはキャッシュされない"""
+        from analyzers.ai_analyzer import analyze_with_gemini
+
+        cache = AnalysisCache(str(tmp_path), ttl_seconds=3600, max_bytes=10**6)
+        data = {"symbol": "AAPL", "price": 150, "news": ["ニュース1"]}
+
+        response = MagicMock()
+        response.status_code = 500
+        response.text = "Internal Server Error"
+
+        with (
+            patch("analyzers.analysis_cache.get_analysis_cache", return_value=cache),
+            patch("analyzers.ai_analyzer.GEMINI_API_KEY", "test-api-key"),
+            patch("analyzers.ai_analyzer.get_rate_limiter"),
+            patch("analyzers.ai_analyzer.get_session") as mock_get_session,
+            patch("analyzers.retry.get_retry_policy", return_value=RetryPolicy(max_attempts=1)),
+        ):
+            mock_get_session.return_value.post.return_value = response
+            analyze_with_gemini(data, "テストプロンプト")
+            analyze_with_gemini(data, "テストプロンプト")
+
+        assert mock_get_session.return_value.post.call_count == 2
+        assert os.listdir(tmp_path) == []
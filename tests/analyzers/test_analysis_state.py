@@ -0,0 +1,112 @@
+"""
+analysis_stateモジュールのテスト
+"""
+
+import os
+import sys
+from unittest.mock import patch
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../..", "src"))
+
+from analyzers.analysis_state import AnalysisStateStore
+
+
+def _make_store(tmp_path):
+    store = AnalysisStateStore(str(tmp_path / "state.json"))
+    store.record(
+        {"symbol": "7203.T", "price": 2500, "news": ["ニュースA", "ニュースB"]},
+        "売買判断: ホールド\n\n前回の分析",
+    )
+    return store
+
+
+class TestFindCarryOver:
+    """AnalysisStateStore.find_carry_overのテスト"""
+
+    def test_unchanged_stock_is_carried_over(self, tmp_path):
+        """株価変動が閾値以下で新しいニュースがない場合は前回の分析を再利用する"""
+        store = _make_store(tmp_path)
+        data = {"symbol": "7203.T", "price": 2550, "news": ["ニュースB", "ニュースA"]}
+        previous = store.find_carry_over(data, threshold_pct=3.0)
+        assert previous is not None
+        assert previous["analysis"].startswith("売買判断: ホールド")
+        assert previous["price"] == 2500
+
+    def test_price_move_triggers_reanalysis(self, tmp_path):
+        """株価変動が閾値を超えた場合は再分析する"""
+        store = _make_store(tmp_path)
+        data = {"symbol": "7203.T", "price": 2400, "news": ["ニュースA"]}
+        assert store.find_carry_over(data, threshold_pct=3.0) is None
+
+    def test_new_headline_triggers_reanalysis(self, tmp_path):
+        """新しいニュースがある場合は再分析する"""
+        store = _make_store(tmp_path)
+        data = {"symbol": "7203.T", "price": 2500, "news": ["ニュースA", "ニュースC"]}
+        assert store.find_carry_over(data, threshold_pct=3.0) is None
+
+    def test_unknown_symbol(self, tmp_path):
+        """前回の記録がない銘柄は再分析する"""
+        store = _make_store(tmp_path)
+        data = {"symbol": "AAPL", "price": 150, "news": []}
+        assert store.find_carry_over(data, threshold_pct=3.0) is None
+
+    def test_missing_price_triggers_reanalysis(self, tmp_path):
+        """株価が取得できなかった場合は再分析する"""
+        store = _make_store(tmp_path)
+        data = {"symbol": "7203.T", "price": None, "news": ["ニュースA"]}
+        assert store.find_carry_over(data, threshold_pct=3.0) is None
+
+
+class TestRecordAndSave:
+    """記録と保存のテスト"""
+
+    def test_failure_is_not_recorded(self, tmp_path):
+        """分析失敗は記録されない"""
+        store = AnalysisStateStore(str(tmp_path / "state.json"))
+        store.record({"symbol": "AAPL", "price": 150, "news": []}, "## 分析失敗\n\nエラー")
+        assert store.get("AAPL") is None
+
+    def test_save_and_reload(self, tmp_path):
+        """保存した状態を再読み込みできる"""
+        store = _make_store(tmp_path)
+        store.save()
+
+        reloaded = AnalysisStateStore(str(tmp_path / "state.json"))
+        record = reloaded.get("7203.T")
+        assert record["price"] == 2500
+        assert record["news"] == ["ニュースA", "ニュースB"]
+        assert "analyzed_at" in record
+
+    def test_corrupted_file_is_ignored(self, tmp_path):
+        """壊れた状態ファイルは空として扱う"""
+        path = tmp_path / "state.json"
+        path.write_text("{broken", encoding="utf-8")
+        store = AnalysisStateStore(str(path))
+        assert store.get("7203.T") is None
+
+
+class TestMainIntegration:
+    """main.pyとの連携テスト"""
+
+    def test_carried_over_stock_skips_llm(self, tmp_path):
+        """前回の分析を再利用する銘柄はAI分析を呼ばず、レポートにその旨が表示される"""
+        import main
+
+        store = _make_store(tmp_path)
+        data = {"symbol": "7203.T", "price": 2510, "news": ["ニュースA"]}
+
+        with (
+            patch("analyzers.analysis_state.get_analysis_state_store", return_value=store),
+            patch("analyzers.ai_analyzer.analyze_with_gemini") as mock_gemini,
+            patch("analyzers.ai_analyzer.analyze_with_claude") as mock_claude,
+        ):
+            analysis, carried_over = main.analyze_stock(data, "テストプロンプト")
+            _, report_html, _ = main.build_stock_report(
+                "holding", {"symbol": "7203.T", "name": "トヨタ"}, data, analysis, carried_over
+            )
+
+        mock_gemini.assert_not_called()
+        mock_claude.assert_not_called()
+        assert carried_over is not None
+        assert "前回" in report_html
@@ -0,0 +1,238 @@
+"""
+batch_analyzerモジュールのテスト
+"""
+
+import json
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../..", "src"))
+
+from analyzers.batch_analyzer import (
+    MAX_BATCH_SIZE,
+    _build_batch_prompt,
+    analyze_batch_with_gemini,
+    clamp_batch_size,
+    parse_batch_response,
+)
+from analyzers.retry import RetryPolicy
+
+DATA_LIST = [
+    {"symbol": "7203.T", "price": 2500, "news": ["トヨタのニュース"], "quantity": 100},
+    {"symbol": "AAPL", "price": 150, "news": ["Appleのニュース"], "quantity": 10},
+]
+
+
+class TestParseBatchResponse:
+    """parse_batch_response関数のテスト"""
+
+    def test_split_by_symbol(self):
+        """JSON配列が銘柄ごとに分割される"""
+        response = json.dumps(
+            [
+                {"symbol": "7203.T", "analysis": "売買判断: ホールド"},
+                {"symbol": "AAPL", "analysis": "売買判断: 買い"},
+            ],
+            ensure_ascii=False,
+        )
+        results = parse_batch_response(response, ["7203.T", "AAPL"])
+        assert results == {"7203.T": "売買判断: ホールド", "AAPL": "売買判断: 買い"}
+
+    def test_code_fence_and_case(self):
+        """コードブロックで囲まれた応答や銘柄コードの大文字小文字の違いを許容する"""
+        response = '```json\n[{"symbol": "7203.T", "analysis": "売買判断: 売り"}]\n```'
+        results = parse_batch_response(response, ["7203.t"])
+        assert results == {"7203.t": "売買判断: 売り"}
+
+    def test_missing_symbol_not_included(self):
+        """応答に含まれない銘柄は結果に含まれない"""
+        response = '[{"symbol": "AAPL", "analysis": "売買判断: 買い"}]'
+        results = parse_batch_response(response, ["7203.T", "AAPL"])
+        assert results == {"AAPL": "売買判断: 買い"}
+
+    def test_invalid_json(self):
+        """JSONとして解釈できない応答は空の結果になる"""
+        assert parse_batch_response("分析できませんでした", ["7203.T"]) == {}
+
+
+class TestBuildBatchPrompt:
+    """_build_batch_prompt関数のテスト"""
+
+    def test_shared_preamble_once(self):
+        """共通部分は1回だけ含まれ、全銘柄の情報が含まれる"""
+        static_prefix, prompt = _build_batch_prompt(DATA_LIST, "投資家の志向性テスト")
+        full_prompt = static_prefix + prompt
+        assert full_prompt.count("投資家の志向性テスト") == 1
+        assert full_prompt.count("以下の観点から分析してください") == 1
+        assert "### 銘柄: 7203.T" in prompt
+        assert "### 銘柄: AAPL" in prompt
+        assert "2500円" in prompt
+
+    def test_static_prefix_has_no_stock_data(self):
+        """共通部分に銘柄ごとの情報が含まれず、銘柄が変わっても同一になる"""
+        static_prefix, _ = _build_batch_prompt(DATA_LIST, "志向性")
+        other_prefix, _ = _build_batch_prompt(DATA_LIST[:1], "志向性")
+        assert static_prefix == other_prefix
+        assert "7203.T" not in static_prefix
+
+    def test_short_viewpoints(self):
+        """空売りポジションの銘柄は空売り用の観点で分析される"""
+        data_list = [{"symbol": "9984.T", "price": 8000, "news": [], "quantity": -100}]
+        static_prefix, _ = _build_batch_prompt(data_list, "")
+        assert "買戻し" in static_prefix
+
+
+class TestAnalyzeBatchWithGemini:
+    """analyze_batch_with_gemini関数のテスト"""
+
+    def test_single_request_for_batch(self):
+        """複数銘柄が1回のリクエストで分析される"""
+        response = MagicMock()
+        response.status_code = 200
+        response.json.return_value = {
+            "candidates": [
+                {
+                    "content": {
+                        "parts": [
+                            {
+                                "text": json.dumps(
+                                    [
+                                        {"symbol": "7203.T", "analysis": "売買判断: ホールド"},
+                                        {"symbol": "AAPL", "analysis": "売買判断: 買い"},
+                                    ],
+                                    ensure_ascii=False,
+                                )
+                            }
+                        ]
+                    }
+                }
+            ]
+        }
+
+        with (
+            patch("analyzers.batch_analyzer.GEMINI_API_KEY", "test-api-key"),
+            patch("analyzers.batch_analyzer.get_rate_limiter"),
+            patch("analyzers.ai_analyzer.get_session") as mock_get_session,
+        ):
+            mock_get_session.return_value.post.return_value = response
+            results = analyze_batch_with_gemini(DATA_LIST, "テストプロンプト")
+
+        assert mock_get_session.return_value.post.call_count == 1
+        payload = mock_get_session.return_value.post.call_args.kwargs["json"]
+        assert payload["generationConfig"]["responseMimeType"] == "application/json"
+        assert results["AAPL"] == "売買判断: 買い"
+        assert results["7203.T"] == "売買判断: ホールド"
+
+    def test_missing_symbol_analyzed_individually(self):
+        """応答に含まれなかった銘柄だけが1銘柄ずつの分析でやり直される"""
+        response = MagicMock()
+        response.status_code = 200
+        response.json.return_value = {
+            "candidates": [
+                {
+                    "content": {
+                        "parts": [{"text": '[{"symbol": "AAPL", "analysis": "売買判断: 買い"}]'}]
+                    }
+                }
+            ]
+        }
+
+        with (
+            patch("analyzers.batch_analyzer.GEMINI_API_KEY", "test-api-key"),
+            patch("analyzers.batch_analyzer.get_rate_limiter"),
+            patch("analyzers.ai_analyzer.get_session") as mock_get_session,
+            patch(
+                "analyzers.batch_analyzer.analyze_with_gemini", return_value="売買判断: 売り"
+            ) as mock_single,
+        ):
+            mock_get_session.return_value.post.return_value = response
+            results = analyze_batch_with_gemini(DATA_LIST, "テストプロンプト")
+
+        mock_single.assert_called_once_with(DATA_LIST[0], "テストプロンプト")
+        assert results == {"7203.T": "売買判断: 売り", "AAPL": "売買判断: 買い"}
+
+    def test_api_error_fails_all(self):
+        """APIエラー時は全銘柄が分析失敗になる"""
+        response = MagicMock()
+        response.status_code = 429
+        response.text = "Too Many Requests"
+
+        with (
+            patch("analyzers.batch_analyzer.GEMINI_API_KEY", "test-api-key"),
+            patch("analyzers.batch_analyzer.get_rate_limiter"),
+            patch("analyzers.ai_analyzer.get_session") as mock_get_session,
+            patch("analyzers.retry.get_retry_policy", return_value=RetryPolicy(max_attempts=1)),
+        ):
+            mock_get_session.return_value.post.return_value = response
+            results = analyze_batch_with_gemini(DATA_LIST, "テストプロンプト")
+
+        assert all(r.startswith("## 分析失敗") for r in results.values())
+
+
+class TestClampBatchSize:
+    """clamp_batch_size関数のテスト"""
+
+    def test_within_limit(self):
+        """上限以内の銘柄数はそのまま使われる"""
+        assert clamp_batch_size(3) == 3
+
+    def test_clamped_to_output_limit(self):
+        """出力トークン数の上限を超える銘柄数は上限までに制限される"""
+        assert MAX_BATCH_SIZE == 5
+        assert clamp_batch_size(20) == MAX_BATCH_SIZE
+
+
+class TestRunBatched:
+    """main.run_batchedのテスト"""
+
+    def test_batches_per_category(self):
+        """同じ分類の銘柄がbatch_size件ずつまとめて分析される"""
+        import main
+
+        categorized = {
+            "holding": [{"symbol": f"H{i}", "name": f"保有{i}", "quantity": 1} for i in range(3)],
+            "considering_buy": [{"symbol": "B0", "name": "検討0"}],
+        }
+
+        def fake_fetch(symbol, stock_info, quotes, news_map=None):
+            return {"symbol": symbol, "price": 100, "news": []}
+
+        def fake_batch(data_list, preference_prompt):
+            return {data["symbol"]: "売買判断: 買い" for data in data_list}
+
+        with (
+            patch("main.fetch_stock_data", side_effect=fake_fetch),
+            patch("main.analyze_batch_with_claude", side_effect=fake_batch) as mock_batch,
+            patch("main.USE_CLAUDE", True),
+        ):
+            results = main.run_batched(categorized, {}, "テストプロンプト", batch_size=2)
+
+        batch_sizes = sorted(len(call.args[0]) for call in mock_batch.call_args_list)
+        assert batch_sizes == [1, 1, 2]
+        categorized_reports, categorized_stock_info = main.collect_reports(results)
+        assert len(categorized_reports["holding"]) == 3
+        assert len(categorized_reports["considering_buy"]) == 1
+
+    def test_batch_size_clamped(self):
+        """出力トークン数の上限を超えるbatch_sizeは上限の件数ずつに分割される"""
+        import main
+
+        categorized = {"holding": [{"symbol": f"H{i}", "name": f"保有{i}"} for i in range(12)]}
+
+        def fake_fetch(symbol, stock_info, quotes, news_map=None):
+            return {"symbol": symbol, "price": 100, "news": []}
+
+        def fake_batch(data_list, preference_prompt):
+            return {data["symbol"]: "売買判断: 買い" for data in data_list}
+
+        with (
+            patch("main.fetch_stock_data", side_effect=fake_fetch),
+            patch("main.analyze_batch_with_claude", side_effect=fake_batch) as mock_batch,
+            patch("main.USE_CLAUDE", True),
+        ):
+            main.run_batched(categorized, {}, "テストプロンプト", batch_size=12)
+
+        batch_sizes = sorted(len(call.args[0]) for call in mock_batch.call_args_list)
+        assert batch_sizes == [2, 5, 5]
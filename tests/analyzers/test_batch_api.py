@@ -0,0 +1,178 @@
+"""
+batch_apiモジュールのテスト（バッチAPIモード）
+"""
+
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../..", "src"))
+
+from analyzers.batch_api import (  # noqa: E402
+    AnthropicBatchBackend,
+    BatchBackend,
+    GeminiBatchBackend,
+    LocalBatchBackend,
+    analyze_with_batch_api,
+)
+
+DATA_LIST = [
+    {"symbol": "7203.T", "price": 2500, "news": ["トヨタのニュース"], "quantity": 100},
+    {"symbol": "AAPL", "price": 150, "news": ["Appleのニュース"]},
+]
+
+
+def _echo_responder(static_prefix, prompt):
+    symbol = prompt.split("の分析をお願いします。", 1)[0]
+    return f"売買判断: 買い\n\n{symbol}"
+
+
+class TestAnalyzeWithBatchApi:
+    """analyze_with_batch_api関数のテスト（ローカル代替を使用）"""
+
+    def test_results_mapped_to_symbols(self):
+        """ジョブの結果が銘柄コードごとに対応付けられる"""
+        backend = LocalBatchBackend(_echo_responder)
+        results = analyze_with_batch_api(DATA_LIST, "志向性", backend=backend, poll_interval=0)
+        assert results == {"7203.T": "売買判断: 買い\n\n7203.T", "AAPL": "売買判断: 買い\n\nAAPL"}
+
+    def test_all_stocks_in_one_job(self):
+        """全銘柄が1つのジョブとして送信される"""
+        backend = LocalBatchBackend(_echo_responder)
+        with patch.object(backend, "submit", wraps=backend.submit) as mock_submit:
+            analyze_with_batch_api(DATA_LIST, "志向性", backend=backend, poll_interval=0)
+        assert mock_submit.call_count == 1
+        requests = mock_submit.call_args.args[0]
+        assert len(requests) == 2
+        # カスタムIDには銘柄コードの「.」を含めない
+        assert all("." not in custom_id for custom_id in requests)
+
+    def test_polls_until_done(self):
+        """完了するまでポーリングを繰り返す"""
+        backend = LocalBatchBackend(_echo_responder, polls_until_done=2)
+        with patch("analyzers.batch_api.time.sleep") as mock_sleep:
+            results = analyze_with_batch_api(DATA_LIST, "志向性", backend=backend, poll_interval=5)
+        assert mock_sleep.call_count == 2
+        assert results["AAPL"].startswith("売買判断: 買い")
+
+    def test_timeout_cancels_job(self):
+        """タイムアウト時はジョブを取り消し、全銘柄が分析失敗になる"""
+        backend = LocalBatchBackend(_echo_responder, polls_until_done=100)
+        with patch.object(backend, "cancel", wraps=backend.cancel) as mock_cancel:
+            results = analyze_with_batch_api(
+                DATA_LIST, "志向性", backend=backend, poll_interval=0, timeout_seconds=0
+            )
+        mock_cancel.assert_called_once()
+        assert all(analysis.startswith("## 分析失敗") for analysis in results.values())
+
+    def test_missing_result_is_failure(self):
+        """結果に含まれない銘柄は分析失敗になる"""
+        backend = LocalBatchBackend(_echo_responder)
+        original = backend.fetch_results
+
+        def drop_first(job_id):
+            results = original(job_id)
+            results.pop("stock-0")
+            return results
+
+        with patch.object(backend, "fetch_results", side_effect=drop_first):
+            results = analyze_with_batch_api(DATA_LIST, "志向性", backend=backend, poll_interval=0)
+        assert results["7203.T"].startswith("## 分析失敗")
+        assert results["AAPL"].startswith("売買判断: 買い")
+
+    def test_backend_init_error(self):
+        """APIキー未設定などで送信先を作成できない場合は全銘柄が分析失敗になる"""
+        with patch("analyzers.batch_api.get_batch_backend", side_effect=ValueError("キー未設定")):
+            results = analyze_with_batch_api(DATA_LIST, "志向性", poll_interval=0)
+        assert set(results) == {"7203.T", "AAPL"}
+        assert "キー未設定" in results["AAPL"]
+
+
+class TestBatchBackend:
+    """BatchBackendクラスのテスト"""
+
+    def test_incomplete_backend_fails_on_creation(self):
+        """必須のメソッドを実装していない送信先は生成時にエラーになる"""
+
+        class SubmitOnlyBackend(BatchBackend):
+            def submit(self, requests):
+                return "job"
+
+        with pytest.raises(TypeError):
+            SubmitOnlyBackend()
+
+
+class TestAnthropicBatchBackend:
+    """AnthropicBatchBackendクラスのテスト"""
+
+    def test_submit_and_results(self):
+        """Message Batches APIへの送信と結果の取得"""
+        client = MagicMock()
+        client.messages.batches.create.return_value.id = "msgbatch_1"
+        client.messages.batches.retrieve.return_value.processing_status = "ended"
+        succeeded = MagicMock(custom_id="stock-0")
+        succeeded.result.type = "succeeded"
+        succeeded.result.message.content = [MagicMock(text="売買判断: 売り")]
+        errored = MagicMock(custom_id="stock-1")
+        errored.result.type = "errored"
+        client.messages.batches.results.return_value = [succeeded, errored]
+
+        with patch("analyzers.batch_api.get_anthropic_client", return_value=client):
+            backend = AnthropicBatchBackend(api_key="test-key")
+        job_id = backend.submit({"stock-0": ("共通", "A"), "stock-1": ("共通", "B")})
+
+        assert job_id == "msgbatch_1"
+        sent = client.messages.batches.create.call_args.kwargs["requests"]
+        assert sent[0]["custom_id"] == "stock-0"
+        assert sent[0]["params"]["system"][-1]["cache_control"] == {"type": "ephemeral"}
+        assert backend.poll(job_id) is True
+        results = backend.fetch_results(job_id)
+        assert results["stock-0"] == "売買判断: 売り"
+        assert results["stock-1"].startswith("## 分析失敗")
+
+
+class TestGeminiBatchBackend:
+    """GeminiBatchBackendクラスのテスト"""
+
+    def test_submit_poll_and_results(self):
+        """batchGenerateContentへの送信と結果の取得"""
+        submit_response = MagicMock()
+        submit_response.json.return_value = {"name": "batches/123"}
+        poll_response = MagicMock()
+        poll_response.json.return_value = {
+            "name": "batches/123",
+            "done": True,
+            "metadata": {"state": "BATCH_STATE_SUCCEEDED"},
+            "response": {
+                "inlinedResponses": {
+                    "inlinedResponses": [
+                        {
+                            "response": {
+                                "candidates": [{"content": {"parts": [{"text": "売買判断: 買い"}]}}]
+                            },
+                            "metadata": {"key": "stock-0"},
+                        },
+                        {"error": {"message": "内部エラー"}, "metadata": {"key": "stock-1"}},
+                    ]
+                }
+            },
+        }
+
+        backend = GeminiBatchBackend(api_key="test-key")
+        with patch("analyzers.batch_api.get_session") as mock_get_session:
+            mock_get_session.return_value.post.return_value = submit_response
+            mock_get_session.return_value.get.return_value = poll_response
+            job_id = backend.submit({"stock-0": ("共通", "A"), "stock-1": ("共通", "B")})
+            done = backend.poll(job_id)
+
+        assert job_id == "batches/123"
+        assert done is True
+        payload = mock_get_session.return_value.post.call_args.kwargs["json"]
+        inline = payload["batch"]["input_config"]["requests"]["requests"]
+        assert [item["metadata"]["key"] for item in inline] == ["stock-0", "stock-1"]
+        results = backend.fetch_results(job_id)
+        assert results["stock-0"] == "売買判断: 買い"
+        assert results["stock-1"].startswith("## 分析失敗")
@@ -2,14 +2,19 @@
 data_fetcherモジュールのテスト
 """
 
+import asyncio
 import os
 import sys
+import threading
+from unittest.mock import MagicMock, patch
 
 import pytest
 
 # srcディレクトリをパスに追加
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../..", "src"))
 
+from analyzers.retry import RetryPolicy
+
 
 class TestFetchStockData:
     """fetch_stock_data関数の基本テスト"""
@@ -34,3 +39,225 @@ class TestFetchStockData:
         for key in expected_keys:
             assert key in mock_data
         assert isinstance(mock_data["news"], list)
+
+
+class TestFetchQuotes:
+    """fetch_quotes関数のテスト（一括株価取得）"""
+
+    def _mock_response(self, symbols):
+        response = MagicMock()
+        response.status_code = 200
+        response.json.return_value = {
+            "quoteResponse": {
+                "result": [
+                    {"symbol": symbol.upper(), "regularMarketPrice": 100.0 + i}
+                    for i, symbol in enumerate(symbols)
+                ]
+            }
+        }
+        return response
+
+    def test_splits_symbols_into_batches(self):
+        """銘柄リストがバッチサイズごとに分割されてリクエストされる"""
+        from analyzers.data_fetcher import YAHOO_QUOTE_BATCH_SIZE, fetch_quotes
+
+        symbols = [f"SYM{i}" for i in range(YAHOO_QUOTE_BATCH_SIZE * 2 + 3)]
+
+        def fake_get(url, headers, params, timeout):
+            return self._mock_response(params["symbols"].split(","))
+
+        with patch("analyzers.data_fetcher.get_session") as mock_get_session:
+            mock_get = mock_get_session.return_value.get
+            mock_get.side_effect = fake_get
+            quotes = fetch_quotes(symbols)
+
+        assert mock_get.call_count == 3
+        assert len(quotes) == len(symbols)
+        first_params = mock_get.call_args_list[0].kwargs["params"]
+        assert len(first_params["symbols"].split(",")) == YAHOO_QUOTE_BATCH_SIZE
+
+    def test_maps_response_to_requested_symbols(self):
+        """レスポンスの銘柄コードが要求時の表記に対応付けられる"""
+        from analyzers.data_fetcher import fetch_quotes
+
+        with patch("analyzers.data_fetcher.get_session") as mock_get_session:
+            mock_get_session.return_value.get.return_value = self._mock_response(["7203.t", "aapl"])
+            quotes = fetch_quotes(["7203.t", "aapl"])
+
+        assert set(quotes) == {"7203.t", "aapl"}
+        assert quotes["7203.t"]["regularMarketPrice"] == 100.0
+
+    def test_failed_batch_is_skipped(self):
+        """失敗したバッチの銘柄は結果に含まれない"""
+        from analyzers.data_fetcher import fetch_quotes
+
+        error_response = MagicMock()
+        error_response.status_code = 429
+
+        with (
+            patch("analyzers.data_fetcher.get_session") as mock_get_session,
+            patch("analyzers.retry.get_retry_policy", return_value=RetryPolicy(max_attempts=1)),
+        ):
+            mock_get_session.return_value.get.return_value = error_response
+            quotes = fetch_quotes(["AAPL", "MSFT"])
+
+        assert quotes == {}
+
+    def test_fetch_stock_data_uses_prefetched_quotes(self):
+        """事前取得したquote情報がある場合はAPIを呼ばない"""
+        from analyzers.data_fetcher import fetch_stock_data
+
+        quotes = {"AAPL": {"symbol": "AAPL", "regularMarketPrice": 150.0}}
+
+        with (
+            patch("analyzers.data_fetcher.get_session") as mock_get_session,
+            patch("analyzers.data_fetcher.fetch_news", return_value=["ニュース"]),
+        ):
+            data = fetch_stock_data("AAPL", {"quantity": 10}, quotes)
+
+        mock_get_session.assert_not_called()
+        assert data["price"] == 150.0
+        assert data["quantity"] == 10
+
+    def test_fetch_stock_data_missing_quote(self):
+        """事前取得結果に銘柄がない場合は株価がNoneになる"""
+        from analyzers.data_fetcher import fetch_stock_data
+
+        with patch("analyzers.data_fetcher.fetch_news", return_value=["ニュース"]):
+            data = fetch_stock_data("MSFT", None, {})
+
+        assert data["price"] is None
+
+
+class TestFetchNewsBulk:
+    """fetch_news_bulk関数のテスト（ニュースの一括取得）"""
+
+    def test_single_query_for_all_symbols(self):
+        """全銘柄のニュースが1回のクエリで取得され、銘柄ごとに上位件数が整形される"""
+        pd = pytest.importorskip("pandas")
+        from analyzers.data_fetcher import fetch_news_bulk
+
+        news_list = pd.DataFrame(
+            {
+                "symbol": ["7203.T"] * 3 + ["AAPL"],
+                "title": ["T1", "T2", "T3", "A1"],
+                "publisher": ["日経", None, "日経", "Reuters"],
+                "report_date": ["2024-01-01", "2024-01-02", "2024-01-03", "2024-01-01"],
+            }
+        )
+
+        with (
+            patch("analyzers.data_fetcher.DEFEATBETA_AVAILABLE", True),
+            patch("analyzers.data_fetcher._query_news", return_value=news_list) as mock_query,
+        ):
+            news_map = fetch_news_bulk(["7203.t", "AAPL", "MSFT"], limit=2)
+
+        mock_query.assert_called_once_with(["7203.t", "AAPL", "MSFT"])
+        assert news_map["7203.t"] == ["[2024-01-01] 日経: T1", "[2024-01-02] 不明: T2"]
+        assert news_map["AAPL"] == ["[2024-01-01] Reuters: A1"]
+        assert news_map["MSFT"] == ["MSFT関連のニュースは現在ありません。"]
+
+    def test_query_failure(self):
+        """クエリに失敗した場合は全銘柄が取得失敗のメッセージになる"""
+        from analyzers.data_fetcher import fetch_news_bulk
+
+        with (
+            patch("analyzers.data_fetcher.DEFEATBETA_AVAILABLE", True),
+            patch("analyzers.data_fetcher._query_news", side_effect=RuntimeError("接続エラー")),
+        ):
+            news_map = fetch_news_bulk(["AAPL", "MSFT"])
+
+        assert news_map == {
+            "AAPL": ["AAPL関連ニュースの取得に失敗しました"],
+            "MSFT": ["MSFT関連ニュースの取得に失敗しました"],
+        }
+
+    def test_defeatbeta_unavailable(self):
+        """defeatbeta-apiが利用できない場合はダミーデータを返す"""
+        from analyzers.data_fetcher import fetch_news_bulk
+
+        with patch("analyzers.data_fetcher.DEFEATBETA_AVAILABLE", False):
+            news_map = fetch_news_bulk(["AAPL"])
+
+        assert "defeatbeta-apiが必要です" in news_map["AAPL"][0]
+
+    def test_since_compares_typed_dates(self):
+        """取得済みの最新日付は表記によらず日付型で比較され、同日のニュースも対象になる"""
+        from analyzers import data_fetcher
+
+        duckdb_client = MagicMock()
+        with (
+            patch.object(data_fetcher, "HuggingFaceClient", create=True),
+            patch.object(data_fetcher, "stock_news", "stock_news", create=True),
+            patch.object(
+                data_fetcher, "get_duckdb_client", return_value=duckdb_client, create=True
+            ),
+        ):
+            data_fetcher._query_news(["AAPL", "MSFT"], since={"AAPL": "2024-01-02 00:00:00"})
+
+        sql = duckdb_client.query.call_args.args[0]
+        assert "(symbol = 'AAPL' AND report_date >= CAST('2024-01-02' AS DATE))" in sql
+        assert "VARCHAR" not in sql
+        assert "symbol IN ('MSFT')" in sql
+
+    def test_since_boundary_date_with_duckdb(self, tmp_path):
+        """DuckDBで実行した場合、最新日付当日のニュースは含まれ、前日のニュースは含まれない"""
+        duckdb = pytest.importorskip("duckdb")
+        pytest.importorskip("pandas")
+        from analyzers import data_fetcher
+
+        news_path = tmp_path / "news.csv"
+        news_path.write_text(
+            "symbol,uuid,title,publisher,report_date\n"
+            "AAPL,u1,前日,Reuters,2024-01-01\n"
+            "AAPL,u2,当日,Reuters,2024-01-02\n"
+            "AAPL,u3,翌日,Reuters,2024-01-03\n",
+            encoding="utf-8",
+        )
+        hugging_face = MagicMock()
+        hugging_face.return_value.get_url_path.return_value = str(news_path)
+        duckdb_client = MagicMock()
+        duckdb_client.query.side_effect = lambda sql: duckdb.sql(sql).df()
+        with (
+            patch.object(data_fetcher, "HuggingFaceClient", hugging_face, create=True),
+            patch.object(data_fetcher, "stock_news", "stock_news", create=True),
+            patch.object(
+                data_fetcher, "get_duckdb_client", return_value=duckdb_client, create=True
+            ),
+        ):
+            news_list = data_fetcher._query_news(["AAPL"], since={"AAPL": "2024-01-02 00:00:00"})
+
+        assert list(news_list["title"]) == ["当日", "翌日"]
+
+    def test_fetch_stock_data_uses_prefetched_news(self):
+        """事前取得したニュースがある場合は銘柄ごとのニュース取得を行わない"""
+        from analyzers.data_fetcher import fetch_stock_data
+
+        with patch("analyzers.data_fetcher.fetch_news") as mock_fetch_news:
+            data = fetch_stock_data("AAPL", None, {}, {"AAPL": ["一括取得ニュース"]})
+
+        mock_fetch_news.assert_not_called()
+        assert data["news"] == ["一括取得ニュース"]
+
+
+class TestFetchAsync:
+    """非同期版のデータ取得のテスト"""
+
+    def test_runs_in_fetch_executor(self):
+        """ニュース取得はデータ取得用のスレッドプールで実行される"""
+        from analyzers.data_fetcher import fetch_news_async
+
+        with patch(
+            "analyzers.data_fetcher.fetch_news",
+            side_effect=lambda symbol: [threading.current_thread().name],
+        ):
+            (thread_name,) = asyncio.run(fetch_news_async("AAPL"))
+
+        assert thread_name.startswith("fetch")
+
+    def test_executor_sized_to_concurrency(self):
+        """スレッドプールのスレッド数はASYNC_FETCH_CONCURRENCYと同じ"""
+        from analyzers.data_fetcher import get_fetch_executor
+        from config import ASYNC_FETCH_CONCURRENCY
+
+        assert get_fetch_executor()._max_workers == ASYNC_FETCH_CONCURRENCY
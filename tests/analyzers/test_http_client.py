@@ -0,0 +1,61 @@
+"""
+http_clientモジュールのテスト
+"""
+
+import os
+import sys
+from unittest.mock import patch
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../..", "src"))
+
+from analyzers import http_client
+
+
+class TestGetSession:
+    """get_session関数のテスト"""
+
+    def setup_method(self):
+        http_client.close_all()
+
+    def teardown_method(self):
+        http_client.close_all()
+
+    def test_same_host_returns_same_session(self):
+        """同一ホストでは同じセッションが再利用される"""
+        session1 = http_client.get_session("https://yfapi.net/v6/finance/quote")
+        session2 = http_client.get_session("https://yfapi.net/other?x=1")
+        assert session1 is session2
+
+    def test_different_hosts_return_different_sessions(self):
+        """ホストが異なる場合は別のセッションになる"""
+        session1 = http_client.get_session("https://yfapi.net/v6/finance/quote")
+        session2 = http_client.get_session("https://generativelanguage.googleapis.com/v1/models")
+        assert session1 is not session2
+
+    def test_pool_size_matches_workers(self):
+        """コネクションプールのサイズが並列ワーカー数と一致する"""
+        from config import MAX_WORKERS
+
+        session = http_client.get_session("https://yfapi.net/v6/finance/quote")
+        adapter = session.get_adapter("https://yfapi.net/")
+        assert adapter._pool_maxsize == MAX_WORKERS
+
+
+class TestGetAnthropicClient:
+    """get_anthropic_client関数のテスト"""
+
+    def setup_method(self):
+        http_client.close_all()
+
+    def teardown_method(self):
+        http_client.close_all()
+
+    def test_client_is_cached(self):
+        """同じAPIキーではクライアントが1度だけ生成される"""
+        with patch("analyzers.http_client.anthropic.Anthropic") as mock_anthropic:
+            client1 = http_client.get_anthropic_client("test-key")
+            client2 = http_client.get_anthropic_client("test-key")
+
+        assert client1 is client2
+        assert mock_anthropic.call_count == 1
@@ -0,0 +1,132 @@
+"""
+news_storeモジュールのテスト
+"""
+
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../..", "src"))
+
+from analyzers.news_store import NewsStore  # noqa: E402
+
+
+def _row(symbol, uuid, report_date, title, publisher="日経"):
+    return (symbol, uuid, report_date, publisher, title)
+
+
+class TestNewsStore:
+    """NewsStoreクラスのテスト"""
+
+    def test_append_ignores_duplicates(self, tmp_path):
+        """保存済みのニュースは重複して保存されない"""
+        store = NewsStore(str(tmp_path / "news.sqlite3"))
+        assert store.append([_row("AAPL", "u1", "2024-01-01", "A1")]) == 1
+        assert (
+            store.append(
+                [_row("AAPL", "u1", "2024-01-01", "A1"), _row("AAPL", "u2", "2024-01-02", "A2")]
+            )
+            == 1
+        )
+
+    def test_latest_dates(self, tmp_path):
+        """銘柄ごとの最新のreport_dateが取得される"""
+        store = NewsStore(str(tmp_path / "news.sqlite3"))
+        store.append(
+            [
+                _row("AAPL", "u1", "2024-01-01", "A1"),
+                _row("AAPL", "u2", "2024-01-03", "A2"),
+                _row("7203.T", "u3", "2024-01-02", "T1"),
+            ]
+        )
+        assert store.latest_dates(["aapl", "7203.T", "MSFT"]) == {
+            "AAPL": "2024-01-03",
+            "7203.T": "2024-01-02",
+        }
+
+    def test_top_news_formatting_and_limit(self, tmp_path):
+        """銘柄ごとに最新のlimit件が古い順に整形される"""
+        store = NewsStore(str(tmp_path / "news.sqlite3"))
+        store.append(
+            [
+                _row("AAPL", "u3", "2024-01-03", "A3"),
+                _row("AAPL", "u1", "2024-01-01", "A1"),
+                _row("AAPL", "u2", "2024-01-02", "A2", publisher=None),
+                _row("MSFT", "u4", "2024-01-01", "M1"),
+            ]
+        )
+        news_map = store.top_news(["AAPL", "MSFT"], limit=2)
+        assert news_map["AAPL"] == ["[2024-01-02] 不明: A2", "[2024-01-03] 日経: A3"]
+        assert news_map["MSFT"] == ["[2024-01-01] 日経: M1"]
+
+    def test_appended_news_reaches_top_news(self, tmp_path):
+        """5件以上保存済みの銘柄でも、新しく追加したニュースが取得結果に含まれる"""
+        store = NewsStore(str(tmp_path / "news.sqlite3"))
+        store.append([_row("AAPL", f"u{day}", f"2024-01-0{day}", f"A{day}") for day in range(1, 7)])
+        before = store.top_news(["AAPL"])["AAPL"]
+        assert before[0] == "[2024-01-02] 日経: A2"
+        assert before[-1] == "[2024-01-06] 日経: A6"
+
+        store.append([_row("AAPL", "u7", "2024-01-07", "A7")])
+        after = store.top_news(["AAPL"])["AAPL"]
+        assert len(after) == 5
+        assert after[-1] == "[2024-01-07] 日経: A7"
+        assert after != before
+
+    def test_persists_across_instances(self, tmp_path):
+        """ファイルに保存され、次回の実行でも利用できる"""
+        path = str(tmp_path / "cache" / "news.sqlite3")
+        NewsStore(path).append([_row("AAPL", "u1", "2024-01-01", "A1")])
+        assert NewsStore(path).top_news(["AAPL"]) == {"AAPL": ["[2024-01-01] 日経: A1"]}
+
+
+class TestFetchNewsBulkWithStore:
+    """ニュースストアを使ったfetch_news_bulkのテスト"""
+
+    def _news_frame(self, rows):
+        pd = pytest.importorskip("pandas")
+        return pd.DataFrame(rows, columns=["symbol", "uuid", "report_date", "publisher", "title"])
+
+    def test_incremental_refresh(self, tmp_path):
+        """保存済みの銘柄は最新日付以降のみ取得し、ストアから整形して返す"""
+        from analyzers.data_fetcher import fetch_news_bulk
+
+        store = NewsStore(str(tmp_path / "news.sqlite3"))
+        store.append([_row("AAPL", "u1", "2024-01-01", "A1")])
+        new_rows = self._news_frame(
+            [
+                ("AAPL", "u2", "2024-01-05", "Reuters", "A2"),
+                ("MSFT", "u3", "2024-01-02", "日経", "M1"),
+            ]
+        )
+
+        with (
+            patch("analyzers.data_fetcher.DEFEATBETA_AVAILABLE", True),
+            patch("analyzers.data_fetcher.get_news_store", return_value=store),
+            patch("analyzers.data_fetcher._query_news", return_value=new_rows) as mock_query,
+        ):
+            news_map = fetch_news_bulk(["AAPL", "MSFT"])
+
+        assert mock_query.call_args.kwargs["since"] == {"AAPL": "2024-01-01"}
+        assert news_map["AAPL"] == ["[2024-01-01] 日経: A1", "[2024-01-05] Reuters: A2"]
+        assert news_map["MSFT"] == ["[2024-01-02] 日経: M1"]
+
+    def test_upstream_failure_serves_store(self, tmp_path):
+        """取得元へのクエリが失敗しても蓄積済みのニュースを返す"""
+        from analyzers.data_fetcher import fetch_news_bulk
+
+        store = NewsStore(str(tmp_path / "news.sqlite3"))
+        store.append([_row("AAPL", "u1", "2024-01-01", "A1")])
+
+        with (
+            patch("analyzers.data_fetcher.DEFEATBETA_AVAILABLE", True),
+            patch("analyzers.data_fetcher.get_news_store", return_value=store),
+            patch("analyzers.data_fetcher._query_news", side_effect=TimeoutError("タイムアウト")),
+        ):
+            news_map = fetch_news_bulk(["AAPL", "MSFT"])
+
+        assert news_map["AAPL"] == ["[2024-01-01] 日経: A1"]
+        assert news_map["MSFT"] == ["MSFT関連のニュースは現在ありません。"]
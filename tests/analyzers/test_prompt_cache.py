@@ -0,0 +1,220 @@
+"""
+prompt_cacheモジュールとトークン使用量集計のテスト
+"""
+
+import os
+import sys
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../..", "src"))
+
+from analyzers import ai_analyzer, usage_tracker  # noqa: E402
+from analyzers.prompt_cache import (  # noqa: E402
+    GEMINI_CONTEXT_CACHE_MIN_TOKENS,
+    GeminiContextCache,
+)
+
+LONG_PREFIX = "共通" * GEMINI_CONTEXT_CACHE_MIN_TOKENS
+
+
+def _created_response(name="cachedContents/abc"):
+    response = MagicMock()
+    response.status_code = 200
+    response.json.return_value = {"name": name}
+    return response
+
+
+class TestGeminiContextCache:
+    """GeminiContextCacheクラスのテスト"""
+
+    def test_short_prefix_is_not_cached(self):
+        """最小トークン数に満たない共通部分はキャッシュを作成しない"""
+        cache = GeminiContextCache("key", 900)
+        with patch("analyzers.prompt_cache.get_session") as mock_get_session:
+            assert cache.get_or_create("gemini-2.5-flash", "system", "短い") is None
+        mock_get_session.assert_not_called()
+
+    def test_cache_created_once(self):
+        """同じ共通部分のキャッシュは1回だけ作成される"""
+        cache = GeminiContextCache("key", 900)
+        with patch("analyzers.prompt_cache.get_session") as mock_get_session:
+            mock_post = mock_get_session.return_value.post
+            mock_post.return_value = _created_response()
+            first = cache.get_or_create("gemini-2.5-flash", "system", LONG_PREFIX)
+            second = cache.get_or_create("gemini-2.5-flash", "system", LONG_PREFIX)
+
+        assert first == second == "cachedContents/abc"
+        assert mock_post.call_count == 1
+        payload = mock_post.call_args.kwargs["json"]
+        assert payload["model"] == "models/gemini-2.5-flash"
+        assert payload["ttl"] == "900s"
+
+    def test_failure_is_not_retried(self):
+        """作成に失敗した場合はNoneを返し、再作成を試みない"""
+        cache = GeminiContextCache("key", 900)
+        error_response = MagicMock()
+        error_response.status_code = 400
+        with patch("analyzers.prompt_cache.get_session") as mock_get_session:
+            mock_post = mock_get_session.return_value.post
+            mock_post.return_value = error_response
+            assert cache.get_or_create("gemini-2.5-flash", "system", LONG_PREFIX) is None
+            assert cache.get_or_create("gemini-2.5-flash", "system", LONG_PREFIX) is None
+        assert mock_post.call_count == 1
+
+    def test_create_does_not_block_other_prefixes(self):
+        """作成中の共通部分があっても、別の共通部分の作成は待たされない"""
+        cache = GeminiContextCache("key", 900)
+        started = threading.Event()
+        release = threading.Event()
+
+        def post(url, json, timeout):
+            if json["contents"][0]["parts"][0]["text"] == LONG_PREFIX:
+                started.set()
+                assert release.wait(5)
+                return _created_response("cachedContents/slow")
+            return _created_response("cachedContents/fast")
+
+        with patch("analyzers.prompt_cache.get_session") as mock_get_session:
+            mock_get_session.return_value.post.side_effect = post
+            results = []
+            slow_callers = [
+                threading.Thread(
+                    target=lambda: results.append(
+                        cache.get_or_create("gemini-2.5-flash", "system", LONG_PREFIX)
+                    )
+                )
+                for _ in range(2)
+            ]
+            for thread in slow_callers:
+                thread.start()
+            assert started.wait(5)
+            fast = cache.get_or_create("gemini-2.5-flash", "system", LONG_PREFIX + "別")
+            release.set()
+            for thread in slow_callers:
+                thread.join(5)
+
+        assert fast == "cachedContents/fast"
+        assert results == ["cachedContents/slow", "cachedContents/slow"]
+        assert mock_get_session.return_value.post.call_count == 2
+
+    def test_release_all(self):
+        """作成したキャッシュが削除される"""
+        cache = GeminiContextCache("key", 900)
+        with patch("analyzers.prompt_cache.get_session") as mock_get_session:
+            mock_get_session.return_value.post.return_value = _created_response()
+            cache.get_or_create("gemini-2.5-flash", "system", LONG_PREFIX)
+            cache.release_all()
+        url = mock_get_session.return_value.delete.call_args.args[0]
+        assert "/v1beta/cachedContents/abc" in url
+
+
+class TestPromptStructure:
+    """共通部分を先頭に置いたプロンプト構成のテスト"""
+
+    DATA = {"symbol": "AAPL", "price": 150, "news": ["ニュース"], "quantity": 10}
+
+    def test_static_prefix_is_shared(self):
+        """共通部分は銘柄によらず同一で、銘柄情報は含まれない"""
+        prefix1, prompt1 = ai_analyzer.build_prompt_parts(self.DATA, "志向性")
+        prefix2, prompt2 = ai_analyzer.build_prompt_parts(
+            {"symbol": "7203.T", "price": 2500, "news": []}, "志向性"
+        )
+        assert prefix1 == prefix2
+        assert "AAPL" not in prefix1
+        assert prompt1.startswith("AAPLの分析をお願いします。")
+
+    def test_claude_request_marks_prefix_cacheable(self):
+        """Claudeのリクエストでは共通部分がcache_control付きのsystemブロックになる"""
+        request = ai_analyzer._build_claude_request(self.DATA, "志向性")
+        system_blocks = request["system"]
+        assert system_blocks[0]["text"] == ai_analyzer.SYSTEM_PROMPT
+        assert system_blocks[-1]["cache_control"] == {"type": "ephemeral"}
+        assert "志向性" in system_blocks[-1]["text"]
+        assert "AAPL" in request["messages"][0]["content"][0]["text"]
+
+    def test_gemini_request_uses_cached_content(self):
+        """キャッシュを作成できた場合は銘柄ごとの部分のみを送信する"""
+        context_cache = MagicMock()
+        context_cache.get_or_create.return_value = "cachedContents/abc"
+        with patch("analyzers.ai_analyzer.get_gemini_context_cache", return_value=context_cache):
+            url, payload = ai_analyzer.build_gemini_request("共通", "銘柄ごと")
+
+        assert "/v1beta/" in url
+        assert payload["cachedContent"] == "cachedContents/abc"
+        assert payload["contents"][0]["parts"][0]["text"] == "銘柄ごと"
+
+    def test_gemini_request_without_cache(self):
+        """キャッシュを利用できない場合は共通部分を先頭にしたプロンプト全体を送信する"""
+        with patch("analyzers.ai_analyzer.get_gemini_context_cache", return_value=None):
+            url, payload = ai_analyzer.build_gemini_request("共通", "銘柄ごと")
+
+        assert "/v1/" in url
+        text = payload["contents"][0]["parts"][0]["text"]
+        assert text.index("共通") < text.index("銘柄ごと")
+
+
+class TestUsageTracker:
+    """usage_trackerモジュールのテスト"""
+
+    def setup_method(self):
+        usage_tracker.reset_usage()
+
+    def teardown_method(self):
+        usage_tracker.reset_usage()
+
+    def test_record_and_summary(self):
+        """プロバイダーごとに使用量が集計される"""
+        usage_tracker.record_usage("claude", input_tokens=100, output_tokens=50, cached_tokens=300)
+        usage_tracker.record_usage("claude", input_tokens=100, output_tokens=50)
+        summary = usage_tracker.get_usage_summary()
+        assert summary["claude"]["requests"] == 2
+        assert summary["claude"]["input_tokens"] == 200
+        assert summary["claude"]["cached_tokens"] == 300
+
+    def test_format_hit_rate(self):
+        """キャッシュヒット率が表示される"""
+        usage_tracker.record_usage("gemini", input_tokens=25, cached_tokens=75)
+        assert "75.0%" in usage_tracker.format_usage_summary()
+
+    def test_gemini_usage_metadata(self):
+        """Geminiの応答のusageMetadataから使用量が記録される"""
+        ai_analyzer.record_gemini_usage(
+            {
+                "usageMetadata": {
+                    "promptTokenCount": 1200,
+                    "cachedContentTokenCount": 1000,
+                    "candidatesTokenCount": 300,
+                }
+            }
+        )
+        totals = usage_tracker.get_usage_summary()["gemini"]
+        assert totals["input_tokens"] == 200
+        assert totals["cached_tokens"] == 1000
+        assert totals["output_tokens"] == 300
+
+
+class TestReleaseOnFailure:
+    """実行中の異常終了時のプロンプトキャッシュ削除のテスト"""
+
+    def test_released_when_analysis_raises(self):
+        """分析中に例外が発生してもGeminiのプロンプトキャッシュが削除される"""
+        import main
+
+        with (
+            patch("main.load_stock_symbols", return_value=[{"symbol": "AAPL", "name": "Apple"}]),
+            patch("main.start_run"),
+            patch("main.split_completed", side_effect=lambda categorized: ([], categorized)),
+            patch("main.fetch_quotes", return_value={}),
+            patch("main.fetch_news_bulk", return_value={}),
+            patch("main.generate_preference_prompt", return_value=""),
+            patch("main.run_pipeline", side_effect=RuntimeError("中断")),
+            patch("main.release_gemini_context_caches") as mock_release,
+        ):
+            with pytest.raises(RuntimeError):
+                main.generate_and_send_reports()
+
+        mock_release.assert_called_once()
@@ -0,0 +1,299 @@
+"""
+providersモジュールのテスト
+"""
+
+import asyncio
+import os
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../..", "src"))
+
+from analyzers.ai_analyzer import _timed_round_trip, _timed_round_trip_async
+from analyzers.providers import (
+    ANALYZE,
+    TRIAGE,
+    ClaudeProvider,
+    GeminiProvider,
+    get_provider,
+    get_provider_chain,
+    run_with_failover,
+    run_with_failover_async,
+)
+
+DATA = {"symbol": "AAPL"}
+STOCK = {"symbol": "AAPL", "price": 150, "news": ["Appleのニュース"]}
+FAILURE = "## 分析失敗\n\n**エラー内容:** Gemini API呼び出し失敗: 503"
+
+
+def sent(result, seconds=0.0):
+    """APIへの送信（往復時間seconds秒）を模した分析関数"""
+
+    def send():
+        time.sleep(seconds)
+        return result
+
+    def analyze(data, preference_prompt=None):
+        return _timed_round_trip(send)()
+
+    return analyze
+
+
+def sent_async(result, seconds=0.0):
+    """sentの非同期版"""
+
+    async def send():
+        await asyncio.sleep(seconds)
+        return result
+
+    async def analyze(data, preference_prompt=None):
+        return await _timed_round_trip_async(send)()
+
+    return analyze
+
+
+def with_samples(provider, seconds, kind=ANALYZE, count=10):
+    """ヘッジの判定に必要なレイテンシのサンプルを記録したプロバイダーを返す"""
+    for _ in range(count):
+        provider.record_latency(kind, seconds)
+    return provider
+
+
+class TestAnalysisProvider:
+    """AnalysisProviderのテスト"""
+
+    def test_call_records_latency_on_success(self):
+        """成功した分析のみAPIの往復時間をサンプルとして記録する"""
+        provider = GeminiProvider()
+        with (
+            patch("analyzers.providers.ANALYSIS_HEDGE_MIN_SAMPLES", 1),
+            patch("analyzers.ai_analyzer.analyze_with_gemini", side_effect=sent("売買判断: 買い")),
+        ):
+            assert provider.call(ANALYZE, DATA) == "売買判断: 買い"
+        with patch("analyzers.ai_analyzer.analyze_with_gemini", side_effect=sent(FAILURE, 0.2)):
+            assert provider.call(ANALYZE, DATA) == FAILURE
+        with patch("analyzers.providers.ANALYSIS_HEDGE_MIN_SAMPLES", 1):
+            assert provider.hedge_delay(ANALYZE) < 0.1
+            assert provider.hedge_delay(TRIAGE) is None
+
+    def test_cache_hit_is_not_sampled(self):
+        """分析キャッシュのヒットはレイテンシのサンプルにしない"""
+        provider = ClaudeProvider()
+        with (
+            patch("analyzers.providers.ANALYSIS_HEDGE_MIN_SAMPLES", 1),
+            patch("analyzers.ai_analyzer.CLAUDE_API_KEY", "test-api-key"),
+            patch("analyzers.ai_analyzer.get_anthropic_client"),
+            patch("analyzers.ai_analyzer.load_cached_analysis", return_value="売買判断: 買い"),
+        ):
+            assert provider.call(ANALYZE, STOCK) == "売買判断: 買い"
+            assert provider.hedge_delay(ANALYZE) is None
+
+    def test_rate_limit_wait_is_not_sampled(self):
+        """レート制限の待機はレイテンシに含めず、APIの往復時間のみを記録する"""
+        provider = ClaudeProvider()
+        block = MagicMock(type="text", text="売買判断: 買い")
+        with (
+            patch("analyzers.providers.ANALYSIS_HEDGE_MIN_SAMPLES", 1),
+            patch("analyzers.ai_analyzer.CLAUDE_API_KEY", "test-api-key"),
+            patch("analyzers.ai_analyzer.load_cached_analysis", return_value=None),
+            patch("analyzers.ai_analyzer.get_rate_limiter") as mock_limiter,
+            patch("analyzers.ai_analyzer.get_anthropic_client") as mock_client,
+        ):
+            mock_limiter.return_value.acquire.side_effect = lambda *args: time.sleep(0.3)
+            mock_client.return_value.messages.create.return_value = MagicMock(content=[block])
+            provider.call(ANALYZE, STOCK)
+            assert provider.hedge_delay(ANALYZE) < 0.2
+
+    def test_hedge_delay_is_p90(self):
+        """サンプルが最小件数に達するとp90レイテンシを返す"""
+        provider = ClaudeProvider()
+        with patch("analyzers.providers.ANALYSIS_HEDGE_MIN_SAMPLES", 10):
+            for seconds in range(1, 10):
+                provider.record_latency(ANALYZE, seconds)
+            assert provider.hedge_delay(ANALYZE) is None
+            provider.record_latency(ANALYZE, 10)
+            assert provider.hedge_delay(ANALYZE) == 9
+
+    def test_triage_uses_triage_function(self):
+        """分析の種類に応じてai_analyzerの関数を呼び出す"""
+        with patch(
+            "analyzers.ai_analyzer.triage_with_claude", return_value="売買判断: ホールド"
+        ) as mock_triage:
+            assert ClaudeProvider().call(TRIAGE, DATA, "志向性") == "売買判断: ホールド"
+        mock_triage.assert_called_once_with(DATA, "志向性")
+
+
+class TestRegistry:
+    """プロバイダーの取得とフェイルオーバーの順序のテスト"""
+
+    def test_get_provider(self):
+        """同じ名前では同じインスタンスを返し、未登録の名前はエラー"""
+        assert get_provider("claude") is get_provider("claude")
+        assert get_provider("gemini").name == "gemini"
+        with pytest.raises(ValueError):
+            get_provider("openai")
+
+    def test_chain_without_failover(self):
+        """フェイルオーバー無効時は選択したプロバイダーのみ"""
+        with patch("analyzers.providers.ANALYSIS_FAILOVER", False):
+            assert [p.name for p in get_provider_chain(False)] == ["gemini"]
+            assert [p.name for p in get_provider_chain(True)] == ["claude"]
+
+    def test_chain_with_failover(self):
+        """APIキーが設定されている他のプロバイダーを後に続ける"""
+        with (
+            patch("analyzers.providers.ANALYSIS_FAILOVER", True),
+            patch("analyzers.providers.CLAUDE_API_KEY", "key"),
+            patch("analyzers.providers.GEMINI_API_KEY", " "),
+        ):
+            assert [p.name for p in get_provider_chain(False)] == ["gemini", "claude"]
+            assert [p.name for p in get_provider_chain(True)] == ["claude"]
+
+
+class TestFailover:
+    """run_with_failoverのテスト"""
+
+    def test_retries_failed_stock_on_next_provider(self):
+        """失敗した銘柄は次のプロバイダーで再分析する"""
+        with (
+            patch("analyzers.ai_analyzer.analyze_with_gemini", return_value=FAILURE),
+            patch("analyzers.ai_analyzer.analyze_with_claude", return_value="売買判断: 売り"),
+        ):
+            providers = [GeminiProvider(), ClaudeProvider()]
+            assert run_with_failover(providers, ANALYZE, DATA) == "売買判断: 売り"
+
+    def test_success_skips_next_provider(self):
+        """成功した場合は次のプロバイダーを呼び出さない"""
+        with (
+            patch("analyzers.ai_analyzer.analyze_with_gemini", return_value="売買判断: 買い"),
+            patch("analyzers.ai_analyzer.analyze_with_claude") as mock_claude,
+        ):
+            providers = [GeminiProvider(), ClaudeProvider()]
+            assert run_with_failover(providers, ANALYZE, DATA) == "売買判断: 買い"
+        mock_claude.assert_not_called()
+
+    def test_all_failed_returns_last_failure(self):
+        """すべて失敗した場合は最後の失敗レポートを返す"""
+        claude_failure = "## 分析失敗\n\n**エラー内容:** Claude API呼び出し失敗"
+        with (
+            patch("analyzers.ai_analyzer.analyze_with_gemini", return_value=FAILURE),
+            patch("analyzers.ai_analyzer.analyze_with_claude", return_value=claude_failure),
+        ):
+            providers = [GeminiProvider(), ClaudeProvider()]
+            assert run_with_failover(providers, ANALYZE, DATA) == claude_failure
+
+    def test_async_failover(self):
+        """非同期版も失敗した銘柄を次のプロバイダーで再分析する"""
+
+        async def fake_gemini(data, preference_prompt=None):
+            return FAILURE
+
+        async def fake_claude(data, preference_prompt=None):
+            return "売買判断: ホールド"
+
+        with (
+            patch("analyzers.ai_analyzer.triage_with_gemini_async", side_effect=fake_gemini),
+            patch("analyzers.ai_analyzer.triage_with_claude_async", side_effect=fake_claude),
+        ):
+            providers = [GeminiProvider(), ClaudeProvider()]
+            result = asyncio.run(run_with_failover_async(providers, TRIAGE, DATA))
+        assert result == "売買判断: ホールド"
+
+
+class TestHedging:
+    """p90レイテンシを超えた場合のヘッジリクエストのテスト"""
+
+    def test_slow_primary_is_hedged(self):
+        """送信開始からp90を超えた場合は次のプロバイダーの結果を先に使う"""
+        with (
+            patch("analyzers.providers.ANALYSIS_HEDGE", True),
+            patch("analyzers.providers.ANALYSIS_HEDGE_MIN_SAMPLES", 10),
+            patch(
+                "analyzers.ai_analyzer.analyze_with_gemini",
+                side_effect=sent("売買判断: 買い（遅い応答）", 0.5),
+            ),
+            patch("analyzers.ai_analyzer.analyze_with_claude", side_effect=sent("売買判断: 売り")),
+        ):
+            providers = [with_samples(GeminiProvider(), 0.01), ClaudeProvider()]
+            start = time.perf_counter()
+            assert run_with_failover(providers, ANALYZE, DATA) == "売買判断: 売り"
+            assert time.perf_counter() - start < 0.4
+
+    def test_wait_before_sending_is_not_hedged(self):
+        """送信前の待機（スレッドプール・レート制限）はヘッジまでの時間に含めない"""
+
+        def queued_gemini(data, preference_prompt=None):
+            time.sleep(0.3)
+            return sent("売買判断: 買い")(data, preference_prompt)
+
+        with (
+            patch("analyzers.providers.ANALYSIS_HEDGE", True),
+            patch("analyzers.providers.ANALYSIS_HEDGE_MIN_SAMPLES", 10),
+            patch("analyzers.ai_analyzer.analyze_with_gemini", side_effect=queued_gemini),
+            patch("analyzers.ai_analyzer.analyze_with_claude") as mock_claude,
+        ):
+            providers = [with_samples(GeminiProvider(), 0.1), ClaudeProvider()]
+            assert run_with_failover(providers, ANALYZE, DATA) == "売買判断: 買い"
+        mock_claude.assert_not_called()
+
+    def test_fast_primary_is_not_hedged(self):
+        """p90以内に応答があればヘッジしない"""
+        with (
+            patch("analyzers.providers.ANALYSIS_HEDGE", True),
+            patch("analyzers.providers.ANALYSIS_HEDGE_MIN_SAMPLES", 10),
+            patch("analyzers.ai_analyzer.analyze_with_gemini", return_value="売買判断: 買い"),
+            patch("analyzers.ai_analyzer.analyze_with_claude") as mock_claude,
+        ):
+            providers = [with_samples(GeminiProvider(), 5.0), ClaudeProvider()]
+            assert run_with_failover(providers, ANALYZE, DATA) == "売買判断: 買い"
+        mock_claude.assert_not_called()
+
+    def test_hedge_failure_waits_for_primary(self):
+        """ヘッジ先が失敗した場合は元のリクエストの結果を待つ"""
+        with (
+            patch("analyzers.providers.ANALYSIS_HEDGE", True),
+            patch("analyzers.providers.ANALYSIS_HEDGE_MIN_SAMPLES", 10),
+            patch(
+                "analyzers.ai_analyzer.analyze_with_gemini", side_effect=sent("売買判断: 買い", 0.1)
+            ),
+            patch("analyzers.ai_analyzer.analyze_with_claude", side_effect=sent(FAILURE)),
+        ):
+            providers = [with_samples(GeminiProvider(), 0.01), ClaudeProvider()]
+            assert run_with_failover(providers, ANALYZE, DATA) == "売買判断: 買い"
+
+    def test_async_hedge_cancels_slow_request(self):
+        """非同期版は先に成功した結果を使い、遅れた方のリクエストをキャンセルする"""
+        cancelled = []
+
+        async def wait_forever():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(DATA["symbol"])
+                raise
+            return "売買判断: 買い"
+
+        async def slow_gemini(data, preference_prompt=None):
+            return await _timed_round_trip_async(wait_forever)()
+
+        fast_claude = sent_async("売買判断: 売り")
+
+        with (
+            patch("analyzers.providers.ANALYSIS_HEDGE", True),
+            patch("analyzers.providers.ANALYSIS_HEDGE_MIN_SAMPLES", 10),
+            patch("analyzers.ai_analyzer.analyze_with_gemini_async", side_effect=slow_gemini),
+            patch("analyzers.ai_analyzer.analyze_with_claude_async", side_effect=fast_claude),
+        ):
+            providers = [with_samples(GeminiProvider(), 0.01), ClaudeProvider()]
+
+            async def run():
+                result = await run_with_failover_async(providers, ANALYZE, DATA)
+                await asyncio.sleep(0)
+                return result
+
+            assert asyncio.run(run()) == "売買判断: 売り"
+        assert cancelled == ["AAPL"]
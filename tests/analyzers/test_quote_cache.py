@@ -0,0 +1,115 @@
+"""
+quote_cache・market_calendarモジュールのテスト
+"""
+
+import datetime
+import os
+import sys
+from unittest.mock import MagicMock, patch
+from zoneinfo import ZoneInfo
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../..", "src"))
+
+from analyzers.market_calendar import is_trading_day, traded_between  # noqa: E402
+from analyzers.quote_cache import QuoteCache  # noqa: E402
+
+TOKYO = ZoneInfo("Asia/Tokyo")
+NEW_YORK = ZoneInfo("America/New_York")
+
+
+def _tokyo(*args):
+    return datetime.datetime(*args, tzinfo=TOKYO)
+
+
+def _new_york(*args):
+    return datetime.datetime(*args, tzinfo=NEW_YORK)
+
+
+class TestMarketCalendar:
+    """market_calendarモジュールのテスト"""
+
+    def test_weekend_and_holidays(self):
+        """土日・祝日は休場日と判定される"""
+        assert is_trading_day("TSE", datetime.date(2026, 10, 16))  # 金曜日
+        assert not is_trading_day("TSE", datetime.date(2026, 10, 17))  # 土曜日
+        assert not is_trading_day("TSE", datetime.date(2026, 10, 12))  # スポーツの日
+        assert not is_trading_day("TSE", datetime.date(2026, 5, 6))  # 振替休日
+        assert not is_trading_day("TSE", datetime.date(2026, 9, 22))  # 国民の休日
+        assert not is_trading_day("US", datetime.date(2026, 11, 26))  # 感謝祭
+        assert not is_trading_day("US", datetime.date(2026, 4, 3))  # 聖金曜日
+        assert not is_trading_day("US", datetime.date(2026, 7, 3))  # 独立記念日（振替）
+        assert is_trading_day("US", datetime.date(2026, 10, 12))  # 東証のみ休場
+
+    def test_no_trading_after_close(self):
+        """大引け後から翌営業日の寄付き前までは取引なしと判定される"""
+        assert not traded_between("TSE", _tokyo(2026, 10, 16, 16, 30), _tokyo(2026, 10, 19, 8, 0))
+        assert traded_between("TSE", _tokyo(2026, 10, 16, 16, 30), _tokyo(2026, 10, 19, 9, 5))
+
+    def test_intraday_fetch_needs_refresh(self):
+        """立会中に取得した株価は大引け後に再取得が必要と判定される"""
+        assert traded_between("TSE", _tokyo(2026, 10, 16, 10, 0), _tokyo(2026, 10, 16, 20, 0))
+
+    def test_us_holiday(self):
+        """米国市場の休場日をまたぐ期間は取引なしと判定される"""
+        assert not traded_between(
+            "US", _new_york(2026, 11, 25, 17, 0), _new_york(2026, 11, 26, 23, 0)
+        )
+
+    def test_unknown_exchange_always_traded(self):
+        """判定できない取引所は常に取引ありと判定される"""
+        assert traded_between(None, _tokyo(2026, 10, 17, 10, 0), _tokyo(2026, 10, 17, 11, 0))
+
+
+class TestQuoteCache:
+    """QuoteCacheクラスのテスト"""
+
+    def test_serves_cached_when_market_closed(self, tmp_path):
+        """市場が開いていない銘柄のみ保存済みの株価を返す"""
+        now = {"value": _tokyo(2026, 10, 16, 16, 30)}
+        cache = QuoteCache(str(tmp_path / "quotes.json"), clock=lambda: now["value"])
+        cache.update({"7203.T": {"regularMarketPrice": 2500}, "AAPL": {"regularMarketPrice": 150}})
+
+        # 東証は大引け後、米国市場はこれから立会（東京時間の22:30以降）
+        now["value"] = _tokyo(2026, 10, 17, 8, 0)
+        assert cache.lookup(["7203.T", "AAPL", "MSFT"]) == {"7203.T": {"regularMarketPrice": 2500}}
+
+    def test_persists_across_instances(self, tmp_path):
+        """保存したキャッシュを次回の実行で利用できる"""
+        path = str(tmp_path / "quotes.json")
+
+        def clock():
+            return _tokyo(2026, 10, 17, 10, 0)  # 土曜日
+
+        cache = QuoteCache(path, clock=clock)
+        cache.update({"7203.T": {"regularMarketPrice": 2500}})
+        cache.save()
+
+        assert QuoteCache(path, clock=clock).lookup(["7203.T"]) == {
+            "7203.T": {"regularMarketPrice": 2500}
+        }
+
+    def test_fetch_quotes_requests_only_traded_symbols(self, tmp_path):
+        """fetch_quotesは取引があった銘柄のみリクエストする"""
+        from analyzers.data_fetcher import fetch_quotes
+
+        cache = QuoteCache(str(tmp_path / "quotes.json"), clock=lambda: _tokyo(2026, 10, 17, 8, 0))
+        cache.update({"7203.T": {"symbol": "7203.T", "regularMarketPrice": 2500}})
+
+        response = MagicMock()
+        response.status_code = 200
+        response.json.return_value = {
+            "quoteResponse": {"result": [{"symbol": "AAPL", "regularMarketPrice": 150}]}
+        }
+        with (
+            patch("analyzers.data_fetcher.get_quote_cache", return_value=cache),
+            patch("analyzers.data_fetcher.get_session") as mock_get_session,
+        ):
+            mock_get = mock_get_session.return_value.get
+            mock_get.return_value = response
+            quotes = fetch_quotes(["7203.T", "AAPL"])
+
+        assert mock_get.call_count == 1
+        assert mock_get.call_args.kwargs["params"] == {"symbols": "AAPL"}
+        assert quotes["7203.T"]["regularMarketPrice"] == 2500
+        assert quotes["AAPL"]["regularMarketPrice"] == 150
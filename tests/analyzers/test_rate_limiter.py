@@ -0,0 +1,144 @@
+"""
+rate_limiterモジュールのテスト
+"""
+
+import asyncio
+import os
+import sys
+import threading
+from unittest.mock import patch
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../..", "src"))
+
+from analyzers.rate_limiter import RateLimiter, estimate_tokens, get_rate_limiter
+
+
+class FakeClock:
+    """テスト用の手動で進める時計"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRateLimiterReserve:
+    """RateLimiter.reserveのテスト"""
+
+    def test_burst_up_to_rpm(self):
+        """RPMの上限までは待機なしで連続実行できる"""
+        limiter = RateLimiter(requests_per_minute=10, clock=FakeClock())
+        waits = [limiter.reserve() for _ in range(10)]
+        assert waits == [0.0] * 10
+
+    def test_wait_after_burst(self):
+        """バースト後は最も古いリクエストが60秒の枠から外れるまで待機する"""
+        limiter = RateLimiter(requests_per_minute=10, clock=FakeClock())
+        for _ in range(10):
+            limiter.reserve()
+        waits = [limiter.reserve() for _ in range(11)]
+        assert waits == [60.0] * 10 + [120.0]
+
+    def test_never_exceeds_rpm_in_any_window(self):
+        """どの60秒間でもRPMの上限を超えない"""
+        clock = FakeClock()
+        limiter = RateLimiter(requests_per_minute=10, clock=clock)
+        starts = []
+        for step in range(200):
+            clock.now = step * 0.7
+            starts.append(clock.now + limiter.reserve())
+        for start in starts:
+            assert sum(start <= other < start + 60 for other in starts) <= 10
+
+    def test_refill_over_time(self):
+        """60秒経過した予約の分だけ再び実行できる"""
+        clock = FakeClock()
+        limiter = RateLimiter(requests_per_minute=10, clock=clock)
+        for step in range(10):
+            clock.now = step * 6.0
+            limiter.reserve()
+        clock.now = 65.0
+        assert limiter.reserve() == 0.0
+        assert limiter.reserve() == 1.0
+        assert limiter.reserve() == 7.0
+
+    def test_tokens_per_minute(self):
+        """TPMの上限を超えると、予約済みのトークンが60秒の枠から外れるまで待つ"""
+        clock = FakeClock()
+        limiter = RateLimiter(tokens_per_minute=600, clock=clock)
+        assert limiter.reserve(tokens=300) == 0.0
+        clock.now = 10.0
+        assert limiter.reserve(tokens=300) == 0.0
+        assert limiter.reserve(tokens=300) == 50.0
+
+    def test_longest_wait_of_both_limits(self):
+        """RPMとTPMのうち長い方の待機時間が採用される"""
+        limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=60, clock=FakeClock())
+        assert limiter.reserve(tokens=60) == 0.0
+        assert limiter.reserve(tokens=30) == 60.0
+
+    def test_oversized_request_is_clamped(self):
+        """容量を超えるトークン数でも永久に待機しない"""
+        limiter = RateLimiter(tokens_per_minute=100, clock=FakeClock())
+        assert limiter.reserve(tokens=1000) == 0.0
+        assert limiter.reserve(tokens=1000) == 60.0
+
+    def test_unlimited(self):
+        """制限が未設定の場合は待機しない"""
+        limiter = RateLimiter(clock=FakeClock())
+        assert all(limiter.reserve(tokens=10**6) == 0.0 for _ in range(100))
+
+
+class TestRateLimiterAcquire:
+    """RateLimiter.acquire/acquire_asyncのテスト"""
+
+    def test_acquire_sleeps_outside_lock(self):
+        """待機中もロックを保持せず、他スレッドが予約できる"""
+        limiter = RateLimiter(requests_per_minute=1, clock=FakeClock())
+        limiter.reserve()
+
+        sleeping = threading.Event()
+        release = threading.Event()
+
+        def fake_sleep(seconds):
+            sleeping.set()
+            release.wait(timeout=5)
+
+        with patch("analyzers.rate_limiter.time.sleep", side_effect=fake_sleep):
+            worker = threading.Thread(target=limiter.acquire)
+            worker.start()
+            assert sleeping.wait(timeout=5)
+            # 待機中のスレッドがあってもreserveはブロックされない
+            assert limiter.reserve() == 120.0
+            release.set()
+            worker.join(timeout=5)
+
+    def test_acquire_async_returns_wait(self):
+        """非同期版は待機秒数を返す"""
+        limiter = RateLimiter(requests_per_minute=1, clock=FakeClock())
+
+        async def fake_sleep(seconds):
+            return None
+
+        with patch("analyzers.rate_limiter.asyncio.sleep", side_effect=fake_sleep) as mock_sleep:
+            assert asyncio.run(limiter.acquire_async()) == 0.0
+            assert asyncio.run(limiter.acquire_async(label="AAPL")) == 60.0
+
+        mock_sleep.assert_called_once_with(60.0)
+
+
+class TestHelpers:
+    """補助関数のテスト"""
+
+    def test_get_rate_limiter_is_shared(self):
+        """同じプロバイダーでは同じリミッターが共有される"""
+        assert get_rate_limiter("gemini") is get_rate_limiter("gemini")
+        assert get_rate_limiter("gemini") is not get_rate_limiter("claude")
+
+    def test_estimate_tokens(self):
+        """トークン数の概算"""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens(None) == 0
+        assert estimate_tokens("株価分析") == 4
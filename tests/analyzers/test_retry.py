@@ -0,0 +1,402 @@
+"""
+retryモジュールのテスト
+"""
+
+import asyncio
+import datetime
+import os
+import random
+import sys
+from unittest.mock import MagicMock, patch
+
+import anthropic
+import pytest
+import requests
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../..", "src"))
+
+from analyzers.retry import (
+    RetryableError,
+    RetryExhaustedError,
+    RetryPolicy,
+    call_anthropic_with_retry,
+    call_anthropic_with_retry_async,
+    parse_retry_after,
+    request_with_retry,
+)
+
+
+class FakeClock:
+    """sleepで進む手動の時計"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_policy(clock, **kwargs):
+    """テスト用のリトライ方針（待機はFakeClockで進める）"""
+    return RetryPolicy(clock=clock, sleep=clock.sleep, rng=random.Random(0), **kwargs)
+
+
+def failing(errors, result="OK"):
+    """errorsを順に送出し、尽きたらresultを返す関数"""
+    errors = list(errors)
+    calls = []
+
+    def func():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return result
+
+    func.calls = calls
+    return func
+
+
+def mock_response(status_code, retry_after=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = {"Retry-After": retry_after} if retry_after else {}
+    return response
+
+
+def anthropic_error(status_code, retry_after=None):
+    headers = {"retry-after": retry_after} if retry_after else {}
+    response = MagicMock(status_code=status_code, headers=headers)
+    error_class = {429: anthropic.RateLimitError, 400: anthropic.BadRequestError}.get(
+        status_code, anthropic.InternalServerError
+    )
+    return error_class("error", response=response, body=None)
+
+
+class TestParseRetryAfter:
+    """parse_retry_afterのテスト"""
+
+    def test_seconds(self):
+        """秒数の値はそのまま待機秒数になる"""
+        assert parse_retry_after("5") == 5.0
+        assert parse_retry_after("1.5") == 1.5
+
+    def test_http_date(self):
+        """HTTP日付の値は現在時刻との差になる"""
+        now = datetime.datetime(2026, 1, 1, 0, 0, 0, tzinfo=datetime.timezone.utc)
+        assert parse_retry_after("Thu, 01 Jan 2026 00:00:30 GMT", now=now) == 30.0
+
+    def test_past_date_is_zero(self):
+        """過去の日付は待機なし"""
+        now = datetime.datetime(2026, 1, 1, 0, 1, 0, tzinfo=datetime.timezone.utc)
+        assert parse_retry_after("Thu, 01 Jan 2026 00:00:30 GMT", now=now) == 0.0
+
+    def test_invalid_values(self):
+        """値がない・解釈できない場合はNone"""
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("") is None
+        assert parse_retry_after("soon") is None
+        assert parse_retry_after(MagicMock()) is None
+
+
+class TestBackoff:
+    """RetryPolicy.backoffのテスト"""
+
+    def test_exponential_ceiling(self):
+        """待機秒数は0〜base_delay * 2^(attempt-1)の範囲に収まる"""
+        policy = RetryPolicy(base_delay=1.0, max_delay=100.0, rng=random.Random(0))
+        for attempt in range(1, 6):
+            for _ in range(50):
+                assert 0 <= policy.backoff(attempt) <= 2 ** (attempt - 1)
+
+    def test_capped_by_max_delay(self):
+        """待機秒数はmax_delayを超えない"""
+        policy = RetryPolicy(base_delay=1.0, max_delay=3.0, rng=random.Random(0))
+        assert all(policy.backoff(10) <= 3.0 for _ in range(50))
+
+    def test_jitter_spreads_delays(self):
+        """同じ試行回数でも待機秒数が分散する"""
+        policy = RetryPolicy(base_delay=1.0, max_delay=30.0, rng=random.Random(0))
+        assert len({policy.backoff(3) for _ in range(20)}) > 1
+
+    def test_retry_after_is_lower_bound(self):
+        """Retry-Afterがある場合はその秒数以上待機する"""
+        policy = RetryPolicy(base_delay=1.0, max_delay=30.0, rng=random.Random(0))
+        assert all(policy.backoff(1, retry_after=10) >= 10 for _ in range(20))
+
+
+class TestRetryPolicyCall:
+    """RetryPolicy.callのテスト"""
+
+    def test_returns_without_retry(self):
+        """成功した場合はリトライしない"""
+        clock = FakeClock()
+        func = failing([])
+        assert make_policy(clock).call(func) == "OK"
+        assert len(func.calls) == 1
+        assert clock.sleeps == []
+
+    def test_retries_until_success(self):
+        """RetryableErrorの間はリトライし、成功した結果を返す"""
+        clock = FakeClock()
+        func = failing([RetryableError("429"), RetryableError("503")])
+        assert make_policy(clock, max_attempts=4).call(func) == "OK"
+        assert len(func.calls) == 3
+        assert len(clock.sleeps) == 2
+
+    def test_honours_retry_after(self):
+        """Retry-Afterの秒数だけ待機してから再送する"""
+        clock = FakeClock()
+        func = failing([RetryableError("429", retry_after=7)])
+        make_policy(clock, base_delay=0.1).call(func)
+        assert clock.sleeps[0] >= 7
+
+    def test_gives_up_after_max_attempts(self):
+        """最大試行回数に達した場合はRetryExhaustedErrorを送出する"""
+        clock = FakeClock()
+        errors = [RetryableError(f"失敗{i}") for i in range(5)]
+        func = failing(errors)
+        with pytest.raises(RetryExhaustedError) as excinfo:
+            make_policy(clock, max_attempts=3).call(func)
+        assert len(func.calls) == 3
+        assert str(excinfo.value.last_error) == "失敗2"
+
+    def test_gives_up_at_deadline(self):
+        """期限を超える待機が必要になった時点で打ち切る（待機はしない）"""
+        clock = FakeClock()
+        func = failing([RetryableError("429", retry_after=5)] * 10)
+        with pytest.raises(RetryExhaustedError, match="期限"):
+            make_policy(clock, max_attempts=10, deadline=12).call(func)
+        # 5秒 + 5秒の待機後、次の5秒待機は期限（12秒）を超える
+        assert clock.sleeps == [5, 5]
+        assert len(func.calls) == 3
+
+    def test_deadline_is_shared_within_scope(self):
+        """deadline_scope内の複数の呼び出しは1つの期限を共有する"""
+        clock = FakeClock()
+        policy = make_policy(clock, max_attempts=10, deadline=12)
+        with policy.deadline_scope():
+            policy.call(failing([RetryableError("429", retry_after=5)] * 2))
+            # 10秒経過しているため、2つ目の呼び出しは5秒待機すると期限を超える
+            func = failing([RetryableError("429", retry_after=5)])
+            with pytest.raises(RetryExhaustedError, match="期限"):
+                policy.call(func)
+        assert clock.sleeps == [5, 5]
+        assert len(func.calls) == 1
+
+    def test_gives_up_when_rate_limit_wait_passes_deadline(self):
+        """レートリミッターの待機で期限を過ぎた場合は再送しない"""
+        clock = FakeClock()
+        func = failing([RetryableError("429", retry_after=1)])
+
+        def slow_acquire(tokens, label):
+            clock.now += 20
+
+        with patch("analyzers.retry.get_rate_limiter") as mock_get_limiter:
+            mock_get_limiter.return_value.acquire.side_effect = slow_acquire
+            with pytest.raises(RetryExhaustedError, match="期限"):
+                make_policy(clock, deadline=12).call(func, provider="gemini")
+        assert len(func.calls) == 1
+
+    def test_other_errors_are_not_retried(self):
+        """RetryableError以外の例外はそのまま送出する"""
+        clock = FakeClock()
+        func = failing([ValueError("bad")])
+        with pytest.raises(ValueError):
+            make_policy(clock).call(func)
+        assert len(func.calls) == 1
+
+    def test_retries_consume_rate_limit(self):
+        """プロバイダー指定時はリトライごとにレートリミッターの枠を消費する"""
+        clock = FakeClock()
+        func = failing([RetryableError("429"), RetryableError("429")])
+        with patch("analyzers.retry.get_rate_limiter") as mock_get_limiter:
+            make_policy(clock).call(func, label="AAPL", provider="gemini", tokens=100)
+        mock_get_limiter.assert_called_with("gemini")
+        assert mock_get_limiter.return_value.acquire.call_count == 2
+        mock_get_limiter.return_value.acquire.assert_called_with(100, "AAPL")
+
+    def test_retry_wait_is_recorded(self):
+        """リトライの待機時間がメトリクスに記録される"""
+        clock = FakeClock()
+        func = failing([RetryableError("429", retry_after=2)])
+        with patch("analyzers.retry.record_duration") as mock_record:
+            make_policy(clock).call(func, label="AAPL")
+        stage, seconds, symbol = mock_record.call_args.args
+        assert stage == "retry_wait"
+        assert seconds >= 2
+        assert symbol == "AAPL"
+
+
+class TestRetryPolicyCallAsync:
+    """RetryPolicy.call_asyncのテスト"""
+
+    def test_retries_until_success(self):
+        """非同期関数もRetryableErrorの間はリトライする"""
+        calls = []
+
+        async def func():
+            calls.append(1)
+            if len(calls) < 3:
+                raise RetryableError("503")
+            return "OK"
+
+        policy = RetryPolicy(base_delay=0.001, max_delay=0.001)
+        with patch("analyzers.retry.get_rate_limiter") as mock_get_limiter:
+            mock_get_limiter.return_value.acquire_async = MagicMock(
+                side_effect=lambda *args: asyncio.sleep(0)
+            )
+            assert asyncio.run(policy.call_async(func, provider="claude")) == "OK"
+        assert len(calls) == 3
+        assert mock_get_limiter.return_value.acquire_async.call_count == 2
+
+
+class TestRequestWithRetry:
+    """request_with_retryのテスト"""
+
+    def setup_method(self):
+        self.clock = FakeClock()
+        self.policy_patch = patch(
+            "analyzers.retry.get_retry_policy", return_value=make_policy(self.clock)
+        )
+        self.policy_patch.start()
+
+    def teardown_method(self):
+        self.policy_patch.stop()
+
+    def test_retryable_status_is_retried(self):
+        """429・503の応答はリトライし、成功した応答を返す"""
+        responses = [mock_response(429, "3"), mock_response(503), mock_response(200)]
+        send = MagicMock(side_effect=responses)
+        assert request_with_retry(send).status_code == 200
+        assert send.call_count == 3
+        assert self.clock.sleeps[0] >= 3
+
+    def test_non_retryable_status_is_returned(self):
+        """リトライ対象外のエラー応答はそのまま返す"""
+        send = MagicMock(return_value=mock_response(400))
+        assert request_with_retry(send).status_code == 400
+        assert send.call_count == 1
+
+    def test_connection_error_is_retried(self):
+        """通信エラーはリトライする"""
+        send = MagicMock(side_effect=[requests.ConnectionError("reset"), mock_response(200)])
+        assert request_with_retry(send).status_code == 200
+
+    def test_exhausted_error_keeps_last_response(self):
+        """打ち切った場合は最後の応答を例外から参照できる"""
+        send = MagicMock(return_value=mock_response(503))
+        with pytest.raises(RetryExhaustedError) as excinfo:
+            request_with_retry(send)
+        assert excinfo.value.last_error.response.status_code == 503
+
+
+class TestCallAnthropicWithRetry:
+    """call_anthropic_with_retryのテスト"""
+
+    def setup_method(self):
+        self.clock = FakeClock()
+        self.patches = [
+            patch("analyzers.retry.get_retry_policy", return_value=make_policy(self.clock)),
+            patch("analyzers.retry.get_rate_limiter"),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def teardown_method(self):
+        for p in self.patches:
+            p.stop()
+
+    def test_rate_limit_error_is_retried(self):
+        """RateLimitErrorはretry-afterに従ってリトライする"""
+        create = failing([anthropic_error(429, "4")], result="message")
+        assert call_anthropic_with_retry(create, "AAPL") == "message"
+        assert self.clock.sleeps[0] >= 4
+
+    def test_overloaded_is_retried(self):
+        """過負荷（529）はリトライする"""
+        create = failing([anthropic_error(529)], result="message")
+        assert call_anthropic_with_retry(create) == "message"
+
+    def test_bad_request_is_not_retried(self):
+        """リトライ対象外のエラーはそのまま送出する"""
+        create = failing([anthropic_error(400)])
+        with pytest.raises(anthropic.BadRequestError):
+            call_anthropic_with_retry(create)
+        assert len(create.calls) == 1
+
+    def test_async(self):
+        """非同期版もリトライする"""
+        calls = []
+
+        async def create():
+            calls.append(1)
+            if len(calls) == 1:
+                raise anthropic_error(429, "0")
+            return "message"
+
+        with patch(
+            "analyzers.retry.get_retry_policy",
+            return_value=RetryPolicy(base_delay=0.001, max_delay=0.001),
+        ):
+            with patch("analyzers.retry.get_rate_limiter") as mock_get_limiter:
+                mock_get_limiter.return_value.acquire_async = MagicMock(
+                    side_effect=lambda *args: asyncio.sleep(0)
+                )
+                assert asyncio.run(call_anthropic_with_retry_async(create)) == "message"
+        assert len(calls) == 2
+
+
+class TestAnalyzerRetry:
+    """AI分析関数からのリトライのテスト"""
+
+    def test_gemini_recovers_from_rate_limit(self):
+        """Geminiの429はリトライされ、分析結果が返る"""
+        from analyzers.ai_analyzer import analyze_with_gemini
+
+        success = mock_response(200)
+        success.json.return_value = {
+            "candidates": [{"content": {"parts": [{"text": "売買判断: 買い"}]}}]
+        }
+        clock = FakeClock()
+        data = {"symbol": "AAPL", "price": 150, "news": ["ニュース1"]}
+
+        with (
+            patch("analyzers.ai_analyzer.GEMINI_API_KEY", "test-api-key"),
+            patch("analyzers.ai_analyzer.get_rate_limiter"),
+            patch("analyzers.ai_analyzer.get_gemini_context_cache", return_value=None),
+            patch("analyzers.ai_analyzer.get_session") as mock_get_session,
+            patch("analyzers.retry.get_retry_policy", return_value=make_policy(clock)),
+            patch("analyzers.retry.get_rate_limiter") as mock_retry_limiter,
+        ):
+            mock_get_session.return_value.post.side_effect = [mock_response(429, "1"), success]
+            analysis = analyze_with_gemini(data, "テストプロンプト")
+
+        assert analysis == "売買判断: 買い"
+        assert mock_retry_limiter.return_value.acquire.call_count == 1
+
+    def test_gemini_failure_report_after_giving_up(self):
+        """リトライを打ち切った場合は最後の応答の分析失敗レポートになる"""
+        from analyzers.ai_analyzer import call_gemini
+
+        failure = mock_response(503)
+        failure.text = "Service Unavailable"
+        clock = FakeClock()
+
+        with (
+            patch("analyzers.ai_analyzer.get_session") as mock_get_session,
+            patch("analyzers.retry.get_retry_policy", return_value=make_policy(clock)),
+            patch("analyzers.retry.get_rate_limiter"),
+        ):
+            mock_get_session.return_value.post.return_value = failure
+            report = call_gemini("https://example.com", {}, "AAPL")
+
+        assert report.startswith("## 分析失敗")
+        assert "503" in report
+        assert "Service Unavailable" in report
+        assert mock_get_session.return_value.post.call_count == 4
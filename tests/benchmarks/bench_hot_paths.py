@@ -0,0 +1,262 @@
+"""
+Pure Pythonの処理のベンチマーク
+
+銘柄リストの読み込み・分類、売買判断の抽出、ホールド判定、分析結果の解析、マークダウン変換、目次生成の
+処理時間を計測し、結果をJSONに保存します。保存済みのベースラインと比較して、
+中央値が許容倍率を超えて遅くなったベンチマークがある場合は終了コード1で終了します。
+
+使い方:
+    python tests/benchmarks/bench_hot_paths.py                    # 計測してベースラインと比較
+    python tests/benchmarks/bench_hot_paths.py --update-baseline  # ベースラインを更新
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+# srcディレクトリとこのディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from corpus import (  # noqa: E402
+    build_analysis_corpus,
+    build_stock_entries,
+    build_stocks_toml,
+    build_toc_rows,
+)
+
+from loaders.stock_loader import categorize_stocks, load_stock_symbols  # noqa: E402
+from mails.formatter import markdown_to_html  # noqa: E402
+from mails.toc import extract_judgment_from_analysis, generate_toc  # noqa: E402
+from reports.analysis_parser import ParsedAnalysis  # noqa: E402
+from reports.simplifier import _extract_hold_reason, detect_hold_judgment  # noqa: E402
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "results.json")
+
+# ベースラインの中央値に対してこの倍率を超えた場合に性能劣化とみなす
+DEFAULT_TOLERANCE = 1.5
+
+
+def _bench_load_stock_symbols(scale, workdir):
+    path = os.path.join(workdir, "stocks.toml")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(build_stocks_toml(int(10000 * scale)))
+    return (lambda: load_stock_symbols(path)), int(10000 * scale)
+
+
+def _bench_categorize_stocks(scale, workdir):
+    stocks = build_stock_entries(int(10000 * scale))
+    return (lambda: categorize_stocks(stocks)), len(stocks)
+
+
+def _bench_extract_judgment(scale, workdir):
+    corpus = build_analysis_corpus(int(2000 * scale))
+    return (lambda: [extract_judgment_from_analysis(text) for text in corpus]), len(corpus)
+
+
+def _legacy_detect_hold_judgment(analysis_text):
+    """
+    比較用: 1つの選択パターンに置き換える前のホールド判定
+
+    キーワードごとに正規表現を組み立てて照合する（1件あたり最大12回のパターンのコンパイル・照合）。
+    """
+    if not analysis_text:
+        return False
+    text_lower = analysis_text.lower()
+    for keyword in ["ホールド", "hold", "保有継続", "様子見", "現状維持", "維持"]:
+        if keyword.lower() in text_lower:
+            patterns = [
+                r"(売買判断|判断|推奨|アクション)[：:\s]*([^\n]*" + re.escape(keyword) + r"[^\n]*)",
+                r"(judgment|recommendation|action)[：:\s]*([^\n]*"
+                + re.escape(keyword)
+                + r"[^\n]*)",
+            ]
+            for pattern in patterns:
+                if re.search(pattern, analysis_text, re.IGNORECASE):
+                    return True
+    return False
+
+
+def _bench_detect_hold_judgment(scale, workdir):
+    corpus = build_analysis_corpus(int(10000 * scale))
+    return (lambda: [detect_hold_judgment(text) for text in corpus]), len(corpus)
+
+
+def _bench_detect_hold_judgment_legacy(scale, workdir):
+    # 同じ1万件のコーパスで置き換え前の実装を計測し、detect_hold_judgmentと比較する
+    corpus = build_analysis_corpus(int(10000 * scale))
+    return (lambda: [_legacy_detect_hold_judgment(text) for text in corpus]), len(corpus)
+
+
+def _bench_extract_hold_reason(scale, workdir):
+    corpus = build_analysis_corpus(int(2000 * scale))
+    return (lambda: [_extract_hold_reason(text) for text in corpus]), len(corpus)
+
+
+def _bench_parse_analysis(scale, workdir):
+    # 1件のレポートに必要な売買判断・ホールド判定・理由を1回の解析で取り出す
+    corpus = build_analysis_corpus(int(2000 * scale))
+    return (lambda: [ParsedAnalysis(text) for text in corpus]), len(corpus)
+
+
+def _bench_markdown_to_html(scale, workdir):
+    corpus = build_analysis_corpus(int(500 * scale))
+    return (lambda: [markdown_to_html(text) for text in corpus]), len(corpus)
+
+
+def _bench_generate_toc(scale, workdir):
+    rows = build_toc_rows(int(5000 * scale))
+    return (lambda: generate_toc(rows)), len(rows)
+
+
+# ベンチマーク名と、(計測する関数, 処理件数) を返す準備関数
+BENCHMARKS = {
+    "load_stock_symbols": _bench_load_stock_symbols,
+    "categorize_stocks": _bench_categorize_stocks,
+    "extract_judgment_from_analysis": _bench_extract_judgment,
+    "detect_hold_judgment": _bench_detect_hold_judgment,
+    "detect_hold_judgment_legacy": _bench_detect_hold_judgment_legacy,
+    "extract_hold_reason": _bench_extract_hold_reason,
+    "parse_analysis": _bench_parse_analysis,
+    "markdown_to_html": _bench_markdown_to_html,
+    "generate_toc": _bench_generate_toc,
+}
+
+
+def run_benchmarks(names=None, scale=1.0, repeat=5):
+    """
+    ベンチマークを実行する。
+
+    Args:
+        names: 実行するベンチマーク名のリスト（Noneで全件）
+        scale: データ件数の倍率（テストでは小さくして動作確認のみ行う）
+        repeat: 計測の繰り返し回数
+
+    Returns:
+        dict: {'metadata': {...}, 'benchmarks': {名前: {'items', 'median_seconds', ...}}}
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in names or BENCHMARKS:
+            func, items = BENCHMARKS[name](scale, workdir)
+            func()  # ウォームアップ（正規表現のコンパイルキャッシュなど）
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - start)
+            median = statistics.median(timings)
+            results[name] = {
+                "items": items,
+                "repeat": repeat,
+                "median_seconds": median,
+                "min_seconds": min(timings),
+                "max_seconds": max(timings),
+                "per_item_microseconds": median / items * 1e6 if items else 0.0,
+            }
+    return {
+        "metadata": {
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": scale,
+        },
+        "benchmarks": results,
+    }
+
+
+def compare_with_baseline(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    計測結果をベースラインと比較する。
+
+    処理件数が異なる場合（scaleの違いなど）は1件あたりの時間で比較する。
+
+    Args:
+        results: run_benchmarksの戻り値
+        baseline: 保存済みのベースライン（run_benchmarksの戻り値と同じ形式）
+        tolerance: 性能劣化とみなす倍率
+
+    Returns:
+        list: [{'name', 'ratio', 'regressed'}]（ベースラインにないベンチマークは含めない）
+    """
+    comparisons = []
+    for name, result in results["benchmarks"].items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if not base:
+            continue
+        if base["items"] == result["items"]:
+            current, previous = result["median_seconds"], base["median_seconds"]
+        else:
+            current, previous = result["per_item_microseconds"], base["per_item_microseconds"]
+        ratio = current / previous if previous else 1.0
+        comparisons.append({"name": name, "ratio": ratio, "regressed": ratio > tolerance})
+    return comparisons
+
+
+def _save_json(path, payload):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def main(argv=None):
+    """コマンドラインから実行する"""
+    parser = argparse.ArgumentParser(description="Pure Pythonの処理のベンチマーク")
+    parser.add_argument(
+        "names", nargs="*", help=f"実行するベンチマーク（省略時は全件: {', '.join(BENCHMARKS)}）"
+    )
+    parser.add_argument("--scale", type=float, default=1.0, help="データ件数の倍率")
+    parser.add_argument("--repeat", type=int, default=5, help="計測の繰り返し回数")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="結果の保存先")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="比較するベースライン")
+    parser.add_argument(
+        "--tolerance", type=float, default=DEFAULT_TOLERANCE, help="性能劣化とみなす倍率"
+    )
+    parser.add_argument(
+        "--update-baseline", action="store_true", help="結果をベースラインとして保存する"
+    )
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"不明なベンチマーク: {', '.join(unknown)}")
+
+    results = run_benchmarks(args.names or None, args.scale, args.repeat)
+    for name, result in results["benchmarks"].items():
+        print(
+            f"{name}: {result['items']}件, 中央値 {result['median_seconds'] * 1000:.1f}ms "
+            f"({result['per_item_microseconds']:.1f}µs/件)"
+        )
+    _save_json(args.output, results)
+    print(f"結果を保存しました: {args.output}")
+
+    if args.update_baseline:
+        _save_json(args.baseline, results)
+        print(f"ベースラインを更新しました: {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"ベースラインがありません: {args.baseline}（--update-baselineで作成できます）")
+        return 0
+
+    regressed = False
+    for comparison in compare_with_baseline(results, baseline, args.tolerance):
+        mark = "劣化" if comparison["regressed"] else "OK"
+        print(f"[{mark}] {comparison['name']}: ベースライン比 {comparison['ratio']:.2f}倍")
+        regressed = regressed or comparison["regressed"]
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
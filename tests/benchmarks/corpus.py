@@ -0,0 +1,193 @@
+"""
+ベンチマーク用のデータ生成
+
+銘柄リストのTOML、分類済みの銘柄、AI分析結果（LLM出力）のコーパス、目次の行を合成します。
+同じ引数からは常に同じデータを生成するため、実行ごとの結果を比較できます。
+"""
+
+import random
+
+# 実際のAI分析結果に近い出力のテンプレート（{symbol}・{name}・{price}を置換する）
+ANALYSIS_TEMPLATES = [
+    # プロンプトの指示どおりの構造化出力
+    """## 売買判断: 買い
+
+**理由**: {name}は直近の決算で売上高が前年同期比12%増となり、通期見通しも上方修正された。
+
+### 株価動向
+現在の株価は{price}で、25日移動平均線を上回って推移している。出来高も増加傾向にある。
+
+### ニュース分析
+- 新製品の受注が好調であるとの報道
+- 為替の円安進行が業績の追い風
+
+### リスク要因
+1. 原材料価格の上昇
+2. 海外景気の減速
+""",
+    # ホールド判断
+    """## 売買判断: ホールド
+
+理由: 業績は堅調だが、株価は既に割安感が薄れているため、現状の保有を継続する。
+
+### 株価動向
+{symbol}の株価は{price}で、直近1か月はレンジ内で推移している。
+
+### 保有状況
+| 項目 | 値 |
+|------|-----|
+| 保有数 | 100株 |
+| 評価損益 | +12,000円 |
+
+### 今後の注目点
+次回決算での利益率の改善状況を確認したい。
+""",
+    # 太字見出しで判断を記載した出力
+    """# {name}（{symbol}）の分析
+
+**売買判断**: 様子見
+
+直近のニュースでは規制強化の可能性が報じられており、不透明感が強い。
+株価{price}は52週安値圏にあるが、反発の材料に乏しい。
+
+**リスク**: 規制動向、競合の値下げ
+""",
+    # 空売りポジションの維持判断
+    """## 売買判断: 維持
+
+空売りポジションは維持を推奨する。
+理由: 業績悪化が続いており、株価{price}からさらなる下落余地がある。
+
+### 買戻しの目安
+- 25日移動平均線を上抜けた場合
+- 好材料の発表があった場合
+""",
+    # 英語で判断を記載した出力
+    """## Judgment: hold
+
+Reason: Revenue growth is slowing but margins remain healthy for {name}.
+
+### Price action
+{symbol} trades at {price}, close to its 200-day moving average.
+""",
+    # 指示に従わず、判断が文章中にある出力
+    """{name}について分析します。
+
+現在の株価は{price}です。直近の決算は市場予想を上回りました。
+中長期的な成長が見込めるため、買い増しを推奨します。
+
+- 配当利回り: 2.8%
+- PER: 15.2倍
+""",
+    # 売り判断（長めの本文）
+    """## 売買判断: 売り
+
+理由: 主力事業の競争激化により、利益率の低下が続いている。
+
+### 株価動向
+株価は{price}で、下落トレンドが継続している。
+"""
+    + "\n".join(
+        f"{i}. 直近の四半期で営業利益率が{i}ポイント低下し、販管費の増加が続いている。"
+        for i in range(1, 16)
+    ),
+    # 判断が見つからない出力
+    """{name}のデータが不足しているため、十分な分析ができませんでした。
+株価: {price}
+""",
+]
+
+_ACCOUNT_TYPES = ["特定", "NISA", "旧NISA"]
+
+
+def _symbol(index):
+    """日本株（4桁の数字）と米国株（英字）を交互に生成する"""
+    if index % 2 == 0:
+        return str(1000 + index // 2 % 9000)
+    letters = ""
+    number = index
+    for _ in range(4):
+        number, remainder = divmod(number, 26)
+        letters += chr(ord("A") + remainder)
+    return letters
+
+
+def build_stock_entries(count, seed=0):
+    """
+    銘柄リストの要素（TOMLの[[stocks]]と同じ形式の辞書）を生成する。
+
+    保有中・空売り中・購入検討中・空売り検討中の銘柄が混在する。
+    """
+    rng = random.Random(seed)
+    entries = []
+    for i in range(count):
+        entry = {"name": f"銘柄{i}", "symbol": _symbol(i)}
+        kind = i % 4
+        if kind in (0, 1):
+            quantity = rng.randint(1, 50) * 100
+            entry["quantity"] = quantity if kind == 0 else -quantity
+            entry["acquisition_price"] = round(rng.uniform(10, 5000), 2)
+            entry["account_type"] = _ACCOUNT_TYPES[i % len(_ACCOUNT_TYPES)]
+        elif kind == 3:
+            entry["considering_action"] = "short_sell"
+        entry["note"] = f"メモ{i}"
+        entries.append(entry)
+    return entries
+
+
+def build_stocks_toml(count, seed=0):
+    """
+    銘柄リストファイル（data/stocks.tomlの形式）の内容を生成する。
+
+    Returns:
+        str: TOML文字列
+    """
+    blocks = []
+    for entry in build_stock_entries(count, seed):
+        lines = ["[[stocks]]"]
+        for key, value in entry.items():
+            if isinstance(value, str) and not (key == "symbol" and value.isdigit()):
+                lines.append(f'{key} = "{value}"')
+            else:
+                lines.append(f"{key} = {value}")
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks) + "\n"
+
+
+def build_analysis_corpus(count, seed=0):
+    """
+    AI分析結果のコーパスを生成する（テンプレートを銘柄・株価を変えて繰り返す）。
+
+    Returns:
+        list: マークダウン形式の分析結果のリスト
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(count):
+        template = ANALYSIS_TEMPLATES[i % len(ANALYSIS_TEMPLATES)]
+        corpus.append(
+            template.format(
+                symbol=_symbol(i),
+                name=f"銘柄{i}",
+                price=f"{rng.uniform(10, 5000):,.2f}",
+            )
+        )
+    return corpus
+
+
+def build_toc_rows(count):
+    """
+    目次の行（generate_tocの引数の形式）を生成する。
+
+    Returns:
+        list: [{'symbol', 'name', 'judgment'}, ...]
+    """
+    judgments = ["買い", "売り", "ホールド", "様子見", "買い増し", "追加売り", "維持", "-"]
+    return [
+        {
+            "symbol": _symbol(i),
+            "name": f"銘柄{i} <ホールディングス & Co.>",
+            "judgment": judgments[i % len(judgments)],
+        }
+        for i in range(count)
+    ]
@@ -0,0 +1,128 @@
+"""
+ベンチマークスイートのテスト
+
+計測値は環境に依存するため、ここではデータ件数を小さくして各ベンチマークが動作することと、
+ベースラインとの比較処理のみを確認します。
+"""
+
+import json
+import os
+import sys
+
+# srcディレクトリとこのディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_hot_paths import (  # noqa: E402
+    BENCHMARKS,
+    DEFAULT_BASELINE,
+    _legacy_detect_hold_judgment,
+    compare_with_baseline,
+    main,
+    run_benchmarks,
+)
+from corpus import build_analysis_corpus, build_stocks_toml  # noqa: E402
+
+from loaders.stock_loader import categorize_stocks, load_stock_symbols  # noqa: E402
+from reports.simplifier import detect_hold_judgment  # noqa: E402
+
+
+def _result(median, items=100):
+    return {"items": items, "median_seconds": median, "per_item_microseconds": median / items * 1e6}
+
+
+class TestCorpus:
+    """ベンチマーク用データのテスト"""
+
+    def test_stocks_toml_is_loadable(self, tmp_path):
+        """生成した銘柄リストは読み込み・分類でき、全分類を含む"""
+        path = tmp_path / "stocks.toml"
+        path.write_text(build_stocks_toml(40), encoding="utf-8")
+
+        stocks = load_stock_symbols(str(path))
+        categorized = categorize_stocks(stocks)
+
+        assert len(stocks) == 40
+        assert all(len(stock_list) == 10 for stock_list in categorized.values())
+
+    def test_analysis_corpus_is_deterministic(self):
+        """同じ引数からは同じコーパスを生成する"""
+        assert build_analysis_corpus(20) == build_analysis_corpus(20)
+
+    def test_legacy_hold_detection_agrees(self):
+        """比較用の置き換え前のホールド判定は現在の実装と同じ結果を返す"""
+        corpus = build_analysis_corpus(40)
+        expected = [_legacy_detect_hold_judgment(text) for text in corpus]
+
+        assert [detect_hold_judgment(text) for text in corpus] == expected
+        assert True in expected and False in expected
+
+
+class TestRunBenchmarks:
+    """run_benchmarksのテスト"""
+
+    def test_all_benchmarks_run(self):
+        """全ベンチマークが小さいデータ件数で実行できる"""
+        results = run_benchmarks(scale=0.01, repeat=1)
+
+        assert set(results["benchmarks"]) == set(BENCHMARKS)
+        for result in results["benchmarks"].values():
+            assert result["items"] > 0
+            assert result["median_seconds"] >= 0
+
+    def test_baseline_covers_all_benchmarks(self):
+        """保存済みのベースラインが全ベンチマークを含む"""
+        with open(DEFAULT_BASELINE, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+        assert set(baseline["benchmarks"]) == set(BENCHMARKS)
+
+
+class TestCompareWithBaseline:
+    """compare_with_baselineのテスト"""
+
+    def test_detects_regression(self):
+        """許容倍率を超えて遅くなったベンチマークを劣化とみなす"""
+        results = {"benchmarks": {"fast": _result(1.0), "slow": _result(2.0)}}
+        baseline = {"benchmarks": {"fast": _result(1.0), "slow": _result(1.0)}}
+
+        comparisons = {c["name"]: c for c in compare_with_baseline(results, baseline, 1.5)}
+
+        assert comparisons["fast"]["regressed"] is False
+        assert comparisons["slow"]["regressed"] is True
+        assert comparisons["slow"]["ratio"] == 2.0
+
+    def test_different_item_counts_compare_per_item(self):
+        """データ件数が異なる場合は1件あたりの時間で比較する"""
+        results = {"benchmarks": {"toc": _result(0.1, items=10)}}
+        baseline = {"benchmarks": {"toc": _result(1.0, items=100)}}
+
+        (comparison,) = compare_with_baseline(results, baseline)
+
+        assert comparison["ratio"] == 1.0
+        assert comparison["regressed"] is False
+
+    def test_benchmarks_missing_from_baseline_are_skipped(self):
+        """ベースラインにないベンチマークは比較しない"""
+        results = {"benchmarks": {"new": _result(1.0)}}
+
+        assert compare_with_baseline(results, {"benchmarks": {}}) == []
+
+
+class TestMain:
+    """コマンドライン実行のテスト"""
+
+    def test_writes_results_and_fails_on_regression(self, tmp_path):
+        """結果をJSONに保存し、劣化があれば終了コード1を返す"""
+        output = tmp_path / "results.json"
+        baseline = tmp_path / "baseline.json"
+        args = ["categorize_stocks", "--scale", "0.01", "--repeat", "1", "--output", str(output)]
+
+        assert main([*args, "--baseline", str(baseline), "--update-baseline"]) == 0
+        assert json.loads(output.read_text(encoding="utf-8"))["benchmarks"]["categorize_stocks"]
+
+        saved = json.loads(baseline.read_text(encoding="utf-8"))
+        saved["benchmarks"]["categorize_stocks"]["median_seconds"] = 1e-12
+        baseline.write_text(json.dumps(saved), encoding="utf-8")
+
+        assert main([*args, "--baseline", str(baseline)]) == 1
@@ -16,6 +16,7 @@ from loaders.stock_loader import (
     categorize_stock,
     categorize_stocks,
     get_currency_for_symbol,
+    get_exchange_for_symbol,
     load_stock_symbols,
     normalize_symbol,
 )
@@ -115,6 +116,26 @@ class TestGetCurrencyForSymbol:
         assert get_currency_for_symbol("12345") == "ドル"
 
 
+class TestGetExchangeForSymbol:
+    """get_exchange_for_symbol関数のテスト"""
+
+    def test_japanese_stock(self):
+        """日本株は東京証券取引所と判定"""
+        assert get_exchange_for_symbol("7203.T") == "TSE"
+        assert get_exchange_for_symbol("6758.JP") == "TSE"
+        assert get_exchange_for_symbol(7203) == "TSE"
+
+    def test_us_stock(self):
+        """サフィックスのない銘柄は米国市場と判定"""
+        assert get_exchange_for_symbol("AAPL") == "US"
+        assert get_exchange_for_symbol("BRK-B") == "US"
+
+    def test_other_market_is_unknown(self):
+        """他市場のサフィックスは判定しない"""
+        assert get_exchange_for_symbol("VOD.L") is None
+        assert get_exchange_for_symbol("0700.HK") is None
+
+
 class TestLoadStockSymbols:
     """load_stock_symbols関数のテスト"""
 
@@ -0,0 +1,3 @@
+"""
+負荷試験
+"""
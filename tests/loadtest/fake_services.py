@@ -0,0 +1,362 @@
+"""
+負荷試験用のローカル代替サービス
+
+Yahoo Financeのquoteエンドポイント、Gemini API、Claude API（Messages API）を1つのHTTPサーバーで、
+メール送信先をSMTPシンクで代替します。AI APIは応答遅延・429の発生率・出力トークンの生成速度を
+設定でき、受け付けたリクエスト数・429の件数・応答時間を記録します。
+defeatbeta-apiのニュースは、同じ形式のデータを返すFakeNewsSourceで代替します。
+"""
+
+import json
+import random
+import re
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# AI APIの応答本文（売買判断・理由を含む、実際の分析結果に近い形式）
+ANALYSIS_RESPONSES = [
+    "## 売買判断: 買い\n\n理由: 業績の上方修正が続いており、株価は割安圏にある。\n\n"
+    "### 株価動向\n25日移動平均線を上回って推移している。",
+    "## 売買判断: ホールド\n\n理由: 業績は堅調だが、株価は既に適正水準にある。\n\n"
+    "### 今後の注目点\n次回決算での利益率の改善を確認したい。",
+    "## 売買判断: 様子見\n\n理由: 規制強化の可能性があり、不透明感が強い。",
+    "## 売買判断: 売り\n\n理由: 主力事業の競争激化により利益率の低下が続いている。",
+]
+
+
+class LatencyModel:
+    """
+    AI APIの応答時間と429の発生を決める設定。
+
+    Args:
+        base_latency: 1リクエストあたりの固定の応答遅延（秒）
+        tokens_per_second: 出力トークンの生成速度（0以下で生成時間なし）
+        output_tokens: 1応答あたりの出力トークン数
+        rate_limit_ratio: 429を返す割合（0〜1）
+        retry_after: 429の応答に付けるRetry-After（秒）
+        seed: 乱数のシード
+    """
+
+    def __init__(
+        self,
+        base_latency=0.5,
+        tokens_per_second=200.0,
+        output_tokens=400,
+        rate_limit_ratio=0.0,
+        retry_after=1,
+        seed=0,
+    ):
+        self.base_latency = base_latency
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+        self.rate_limit_ratio = rate_limit_ratio
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def rate_limited(self):
+        """このリクエストに429を返すか"""
+        with self._lock:
+            return self._random.random() < self.rate_limit_ratio
+
+    def latency(self):
+        """このリクエストの応答時間（秒）"""
+        generation = (
+            self.output_tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        )
+        return self.base_latency + generation
+
+
+class ServiceStats:
+    """代替サービスが受け付けたリクエストの記録"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.rate_limited = {}
+        self.latencies = {}
+
+    def record(self, route, latency=None, rate_limited=False):
+        with self._lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+            if rate_limited:
+                self.rate_limited[route] = self.rate_limited.get(route, 0) + 1
+            if latency is not None:
+                self.latencies.setdefault(route, []).append(latency)
+
+    def snapshot(self):
+        """
+        記録の集計を取得する。
+
+        Returns:
+            dict: {'requests': {経路: 件数}, 'rate_limited': {経路: 件数}, 'latencies': {経路: [秒]}}
+        """
+        with self._lock:
+            return {
+                "requests": dict(self.requests),
+                "rate_limited": dict(self.rate_limited),
+                "latencies": {route: list(values) for route, values in self.latencies.items()},
+            }
+
+
+class _FakeApiHandler(BaseHTTPRequestHandler):
+    """Yahoo Finance・Gemini・Claudeの代替エンドポイント"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        return json.loads(body) if body else {}
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == "/v6/finance/quote":
+            self._quote(parse_qs(parsed.query).get("symbols", [""])[0])
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        parsed = urlparse(self.path)
+        payload = self._read_json()
+        if parsed.path.endswith(":generateContent"):
+            self._llm("gemini", payload)
+        elif parsed.path == "/v1/messages":
+            self._llm("claude", payload)
+        elif parsed.path == "/v1beta/cachedContents":
+            self.server.stats.record("gemini_cache")
+            self._send_json(200, {"name": "cachedContents/loadtest"})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_DELETE(self):
+        self.server.stats.record("gemini_cache")
+        self._send_json(200, {})
+
+    def _quote(self, symbols):
+        time.sleep(self.server.quote_latency)
+        self.server.stats.record("quote", self.server.quote_latency)
+        result = []
+        for symbol in filter(None, symbols.split(",")):
+            price = 100 + sum(ord(c) for c in symbol) % 900
+            result.append({"symbol": symbol.upper(), "regularMarketPrice": float(price)})
+        self._send_json(200, {"quoteResponse": {"result": result}})
+
+    def _llm(self, provider, payload):
+        model = self.server.latency_model
+        if model.rate_limited():
+            self.server.stats.record(provider, rate_limited=True)
+            self._send_json(
+                429,
+                {"error": {"type": "rate_limit_error", "message": "rate limited (loadtest)"}},
+                {"Retry-After": str(model.retry_after)},
+            )
+            return
+
+        latency = model.latency()
+        time.sleep(latency)
+        self.server.stats.record(provider, latency)
+        prompt = json.dumps(payload, ensure_ascii=False)
+        symbol = re.search(r"(\S+?)の分析をお願いします", prompt)
+        text = ANALYSIS_RESPONSES[len(symbol.group(1) if symbol else prompt) % 4]
+        input_tokens = len(prompt)
+        if provider == "gemini":
+            self._send_json(
+                200,
+                {
+                    "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}}],
+                    "usageMetadata": {
+                        "promptTokenCount": input_tokens,
+                        "candidatesTokenCount": model.output_tokens,
+                    },
+                },
+            )
+        else:
+            self._send_json(
+                200,
+                {
+                    "id": "msg_loadtest",
+                    "type": "message",
+                    "role": "assistant",
+                    "model": payload.get("model", "loadtest"),
+                    "content": [{"type": "text", "text": text}],
+                    "stop_reason": "end_turn",
+                    "stop_sequence": None,
+                    "usage": {"input_tokens": input_tokens, "output_tokens": model.output_tokens},
+                },
+            )
+
+
+class FakeApiServer:
+    """
+    Yahoo Finance・Gemini・Claudeの代替HTTPサーバー（バックグラウンドスレッドで動作する）。
+
+    Args:
+        latency_model: AI APIの応答時間と429の設定
+        quote_latency: quoteエンドポイントの応答遅延（秒）
+    """
+
+    def __init__(self, latency_model=None, quote_latency=0.05):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeApiHandler)
+        self._server.daemon_threads = True
+        self._server.latency_model = latency_model or LatencyModel()
+        self._server.quote_latency = quote_latency
+        self._server.stats = ServiceStats()
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stats(self):
+        return self._server.stats
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._server.shutdown()
+        self._server.server_close()
+        return False
+
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    """SMTPの最小限のコマンドに応答し、受信したメールを記録する"""
+
+    def _reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode("ascii"))
+
+    def handle(self):
+        self._reply("220 loadtest SMTP sink")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self._reply("250 loadtest")
+            elif command == "DATA":
+                self._reply("354 end data with <CR><LF>.<CR><LF>")
+                size = 0
+                for data_line in self.rfile:
+                    if data_line in (b".\r\n", b".\n"):
+                        break
+                    size += len(data_line)
+                self.server.sink.record(size)
+                self._reply("250 OK")
+            elif command == "QUIT":
+                self._reply("221 bye")
+                return
+            else:
+                self._reply("250 OK")
+
+
+class SmtpSink:
+    """
+    受信したメールを破棄し、件数とサイズのみを記録するSMTPサーバー。
+
+    STARTTLS・認証には対応しないため、送信側はsmtplib.SMTPのstarttls・loginを無効にして使う。
+    """
+
+    def __init__(self):
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SmtpHandler)
+        self._server.daemon_threads = True
+        self._server.sink = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._lock = threading.Lock()
+        self.messages = 0
+        self.bytes = 0
+
+    @property
+    def address(self):
+        return self._server.server_address[:2]
+
+    def record(self, size):
+        with self._lock:
+            self.messages += 1
+            self.bytes += size
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._server.shutdown()
+        self._server.server_close()
+        return False
+
+
+class FakeNewsSource:
+    """
+    defeatbeta-apiのニュースデータセットの代替。
+
+    data_fetcher._query_newsと同じ引数・列（symbol, uuid, title, publisher, report_date）で、
+    銘柄ごとに決まったニュースを返す。
+
+    Args:
+        latency: 1回のクエリの応答遅延（秒）
+        per_symbol: 1銘柄あたりのニュース件数
+    """
+
+    def __init__(self, latency=0.5, per_symbol=8):
+        self.latency = latency
+        self.per_symbol = per_symbol
+        self.queries = 0
+
+    def rows(self, symbols):
+        """(symbol, uuid, title, publisher, report_date) のリストを返す"""
+        rows = []
+        for symbol in symbols:
+            upper = symbol.upper()
+            for i in range(self.per_symbol):
+                rows.append(
+                    (
+                        upper,
+                        f"{upper}-{i}",
+                        f"{upper}の決算に関するニュース{i}",
+                        "Loadtest News",
+                        f"2026-01-{i + 1:02d}",
+                    )
+                )
+        return rows
+
+    def query(self, symbols, since=None):
+        """_query_newsの代替（pandasのDataFrameを返す）"""
+        import pandas as pd
+
+        time.sleep(self.latency)
+        self.queries += 1
+        return pd.DataFrame(
+            self.rows(symbols), columns=["symbol", "uuid", "title", "publisher", "report_date"]
+        )
+
+    def news_map(self, symbols, limit=5):
+        """fetch_news_bulkの代替（pandasがない環境用。fetch_news_bulkと同じ形式の辞書を返す）"""
+        time.sleep(self.latency)
+        self.queries += 1
+        news_map = {symbol: [] for symbol in symbols}
+        requested = {symbol.upper(): symbol for symbol in symbols}
+        for symbol, _, title, publisher, report_date in self.rows(symbols):
+            news = news_map[requested[symbol]]
+            if len(news) < limit:
+                news.append(f"[{report_date}] {publisher}: {title}")
+        return news_map
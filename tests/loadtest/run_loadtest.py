@@ -0,0 +1,274 @@
+"""
+オフライン負荷試験ハーネス
+
+ローカルの代替サービス（Yahoo Finance・defeatbeta-apiのニュース・Gemini/Claude API・SMTP）を起動し、
+N件の合成銘柄に対して実際のmain.pyの処理（取得・分析・レポート生成・メール送信）を実行します。
+APIの利用枠を消費せずに、並列数・レート制限・キャッシュの変更がスループットに与える影響を確認できます。
+
+結果として、1分あたりの処理銘柄数、レートリミッターの利用率と待機時間、
+AI APIの応答時間の分布（p50/p95/p99）、ステージごとの所要時間を表示し、JSONに保存します。
+
+使い方（このハーネスの引数以外はmain.pyにそのまま渡す）:
+    python tests/loadtest/run_loadtest.py --stocks 200 --llm-latency 1.5 --rpm 120 --workers 16
+    python tests/loadtest/run_loadtest.py --stocks 100 --rate-limit-ratio 0.1 --claude --async
+"""
+
+import argparse
+import json
+import os
+import smtplib
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+# srcディレクトリとこのディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_services import FakeApiServer, FakeNewsSource, LatencyModel, SmtpSink  # noqa: E402
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results.json")
+
+
+class _PlainSMTP(smtplib.SMTP):
+    """SMTPシンク用にSTARTTLS・認証を省略するSMTPクライアント"""
+
+    def starttls(self, *args, **kwargs):
+        return 220, b"skipped (loadtest)"
+
+    def login(self, *args, **kwargs):
+        return 235, b"skipped (loadtest)"
+
+
+def build_stocks(count):
+    """
+    合成銘柄のリスト（load_stock_symbolsの戻り値と同じ形式）を生成する。
+
+    日本株・米国株、保有中・空売り中・購入検討中・空売り検討中の銘柄が混在する。
+    """
+    stocks = []
+    for i in range(count):
+        symbol = f"{1000 + i % 9000}.T" if i % 2 == 0 else f"LT{i:05d}"
+        stock = {"symbol": symbol, "name": f"負荷試験銘柄{i}", "account_type": "特定"}
+        kind = i % 4
+        if kind in (0, 1):
+            stock["quantity"] = 100 if kind == 0 else -100
+            stock["acquisition_price"] = 1000
+        elif kind == 3:
+            stock["considering_action"] = "short_sell"
+        stocks.append(stock)
+    return stocks
+
+
+def _percentile(values, percent):
+    """百分位数（最近接順位法、値がない場合はNone）"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return round(ordered[int(rank) - 1], 3)
+
+
+def build_loadtest_report(
+    stock_count, wall_seconds, provider, rpm, service_stats, run_report, sink
+):
+    """
+    負荷試験の結果をまとめる。
+
+    Args:
+        stock_count: 銘柄数
+        wall_seconds: main()の実行時間（秒）
+        provider: 使用したAIプロバイダー（'gemini' または 'claude'）
+        rpm: プロバイダーのRPM設定
+        service_stats: FakeApiServer.stats.snapshot()の戻り値
+        run_report: runs.metrics.build_run_report()の戻り値
+        sink: SmtpSink
+
+    Returns:
+        dict: 負荷試験の結果
+    """
+    minutes = wall_seconds / 60 if wall_seconds else 0
+    accepted = service_stats["requests"].get(provider, 0) - service_stats["rate_limited"].get(
+        provider, 0
+    )
+    latencies = service_stats["latencies"].get(provider, [])
+    requests_per_minute = accepted / minutes if minutes else 0.0
+    return {
+        "stocks": stock_count,
+        "wall_seconds": round(wall_seconds, 3),
+        "stocks_per_minute": round(stock_count / minutes, 2) if minutes else None,
+        "provider": provider,
+        "llm": {
+            "rpm_limit": rpm,
+            "requests": accepted,
+            "rate_limited": service_stats["rate_limited"].get(provider, 0),
+            "requests_per_minute": round(requests_per_minute, 2),
+            # レートリミッターが実行時間内に許可できる最大件数（容量分のバースト + 補充分）に対する割合
+            "limiter_utilisation": round(accepted / (rpm * (1 + minutes)), 3) if rpm else None,
+            "latency_p50_seconds": _percentile(latencies, 50),
+            "latency_p95_seconds": _percentile(latencies, 95),
+            "latency_p99_seconds": _percentile(latencies, 99),
+        },
+        "limiter_wait": run_report["rate_limit_wait"],
+        "stages": run_report["stages"],
+        "slowest_symbols": run_report["slowest_symbols"],
+        "service_requests": service_stats["requests"],
+        "mails": {"messages": sink.messages, "bytes": sink.bytes},
+    }
+
+
+def format_loadtest_report(report):
+    """負荷試験の結果を表示用の文字列に整形する"""
+    llm = report["llm"]
+    wait = report["limiter_wait"] or {}
+    lines = [
+        f"銘柄数: {report['stocks']}, 所要時間: {report['wall_seconds']:.1f}秒, "
+        f"スループット: {report['stocks_per_minute']}銘柄/分",
+        f"{report['provider']}: {llm['requests']}リクエスト（429: {llm['rate_limited']}件）, "
+        f"{llm['requests_per_minute']}リクエスト/分（RPM上限 {llm['rpm_limit']}、"
+        f"利用率 {llm['limiter_utilisation']}）",
+        f"応答時間: p50 {llm['latency_p50_seconds']}秒, p95 {llm['latency_p95_seconds']}秒, "
+        f"p99 {llm['latency_p99_seconds']}秒",
+        f"レート制限の待機: 合計 {wait.get('total_seconds', 0)}秒, "
+        f"p95 {wait.get('p95_seconds', 0)}秒, 最大 {wait.get('max_seconds', 0)}秒",
+        f"メール: {report['mails']['messages']}通",
+    ]
+    for stage, summary in report["stages"].items():
+        lines.append(
+            f"  {stage}: 合計 {summary['total_seconds']}秒, p50 {summary['p50_seconds']}秒, "
+            f"p95 {summary['p95_seconds']}秒, 最大 {summary['max_seconds']}秒"
+        )
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    """
+    ハーネスの引数を解析する。
+
+    Returns:
+        (ハーネスの引数, main.pyに渡す引数のリスト) のタプル
+    """
+    parser = argparse.ArgumentParser(
+        description="オフライン負荷試験（このハーネスの引数以外はmain.pyに渡す）",
+        allow_abbrev=False,
+    )
+    parser.add_argument("--stocks", type=int, default=100, help="合成銘柄の数")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="AI APIの固定遅延（秒）")
+    parser.add_argument(
+        "--tokens-per-second", type=float, default=200.0, help="AI APIの出力トークン生成速度"
+    )
+    parser.add_argument(
+        "--output-tokens", type=int, default=400, help="1応答あたりの出力トークン数"
+    )
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0, help="AI APIが429を返す割合")
+    parser.add_argument("--retry-after", type=int, default=1, help="429のRetry-After（秒）")
+    parser.add_argument("--quote-latency", type=float, default=0.05, help="株価APIの遅延（秒）")
+    parser.add_argument("--news-latency", type=float, default=0.5, help="ニュース取得の遅延（秒）")
+    parser.add_argument("--seed", type=int, default=0, help="429の発生に使う乱数のシード")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="結果の保存先")
+    return parser.parse_known_args(argv)
+
+
+def _configure_environment(api, sink, workdir):
+    """main.pyの設定を代替サービスに向ける（configの読み込み前に呼ぶ）"""
+    host, port = sink.address
+    os.environ.update(
+        {
+            "YAHOO_QUOTE_URL": f"{api.url}/v6/finance/quote",
+            "GEMINI_API_BASE": api.url,
+            "ANTHROPIC_BASE_URL": api.url,
+            "YAHOO_API_KEY": "loadtest",
+            "GEMINI_API_KEY": "loadtest",
+            "CLAUDE_API_KEY": "loadtest",
+            "MAIL_TO": "loadtest@example.com",
+            "MAIL_FROM": "loadtest@example.com",
+            "SMTP_SERVER": host,
+            "SMTP_PORT": str(port),
+            "SMTP_USER": "loadtest",
+            "SMTP_PASS": "loadtest",
+            "RUNS_DIR": os.path.join(workdir, "runs"),
+            "ANALYSIS_CACHE_ENABLED": "false",
+            "CHANGE_DRIVEN_ANALYSIS": "false",
+            "QUOTE_CACHE_ENABLED": "false",
+            "NEWS_STORE_ENABLED": "false",
+        }
+    )
+
+
+def main(argv=None):
+    """負荷試験を実行する"""
+    args, main_args = parse_args(argv)
+    if "config" in sys.modules:
+        raise RuntimeError("負荷試験は設定モジュールの読み込み前に開始する必要があります")
+
+    latency_model = LatencyModel(
+        base_latency=args.llm_latency,
+        tokens_per_second=args.tokens_per_second,
+        output_tokens=args.output_tokens,
+        rate_limit_ratio=args.rate_limit_ratio,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    news = FakeNewsSource(latency=args.news_latency)
+    stocks = build_stocks(args.stocks)
+
+    with (
+        FakeApiServer(latency_model, args.quote_latency) as api,
+        SmtpSink() as sink,
+        tempfile.TemporaryDirectory() as workdir,
+    ):
+        _configure_environment(api, sink, workdir)
+        sys.argv = ["main.py", *main_args]
+
+        import config
+        import main as report_main
+        from runs.metrics import build_run_report
+
+        try:
+            import pandas  # noqa: F401
+
+            news_patches = [
+                patch("analyzers.data_fetcher.DEFEATBETA_AVAILABLE", True),
+                patch("analyzers.data_fetcher._query_news", news.query),
+            ]
+        except ImportError:
+            # pandasがない環境では整形済みのニュースを返す
+            news_patches = [patch("main.fetch_news_bulk", news.news_map)]
+
+        with (
+            patch("main.load_stock_symbols", return_value=stocks),
+            patch("mails.sender.smtplib.SMTP", _PlainSMTP),
+        ):
+            for news_patch in news_patches:
+                news_patch.start()
+            try:
+                start = time.perf_counter()
+                report_main.main()
+                wall_seconds = time.perf_counter() - start
+            finally:
+                for news_patch in news_patches:
+                    news_patch.stop()
+
+        provider = "claude" if config.USE_CLAUDE else "gemini"
+        rpm = config.CLAUDE_RPM if config.USE_CLAUDE else config.GEMINI_RPM
+        report = build_loadtest_report(
+            len(stocks),
+            wall_seconds,
+            provider,
+            rpm,
+            api.stats.snapshot(),
+            build_run_report(),
+            sink,
+        )
+
+    print(f"\n負荷試験の結果:\n{format_loadtest_report(report)}")
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    print(f"結果を保存しました: {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+負荷試験ハーネスのテスト
+
+ハーネスは設定モジュールの読み込み前に環境変数を設定する必要があるため、別プロセスで実行します。
+"""
+
+import json
+import os
+import subprocess
+import sys
+import urllib.request
+
+# このディレクトリをパスに追加
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_services import FakeApiServer, LatencyModel  # noqa: E402
+
+HARNESS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "run_loadtest.py")
+
+
+def _post(url, payload):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+class TestFakeApiServer:
+    """代替APIサーバーのテスト"""
+
+    def test_quote_and_llm_responses(self):
+        """quote・Gemini・Claudeの形式で応答し、リクエストを記録する"""
+        with FakeApiServer(LatencyModel(base_latency=0, tokens_per_second=0), 0) as api:
+            with urllib.request.urlopen(f"{api.url}/v6/finance/quote?symbols=aapl,7203.T") as r:
+                quotes = json.loads(r.read())["quoteResponse"]["result"]
+            status, gemini = _post(
+                f"{api.url}/v1/models/gemini:generateContent?key=x",
+                {"contents": [{"parts": [{"text": "AAPLの分析をお願いします。"}]}]},
+            )
+            _, claude = _post(f"{api.url}/v1/messages", {"model": "claude", "messages": []})
+            stats = api.stats.snapshot()
+
+        assert [quote["symbol"] for quote in quotes] == ["AAPL", "7203.T"]
+        assert status == 200
+        assert "売買判断" in gemini["candidates"][0]["content"]["parts"][0]["text"]
+        assert claude["content"][0]["type"] == "text"
+        assert stats["requests"] == {"quote": 1, "gemini": 1, "claude": 1}
+
+    def test_rate_limited_responses(self):
+        """設定した割合で429とRetry-Afterを返す"""
+        model = LatencyModel(base_latency=0, tokens_per_second=0, rate_limit_ratio=1.0)
+        with FakeApiServer(model, 0) as api:
+            status, body = _post(f"{api.url}/v1/models/gemini:generateContent", {})
+            stats = api.stats.snapshot()
+
+        assert status == 429
+        assert body["error"]["type"] == "rate_limit_error"
+        assert stats["rate_limited"] == {"gemini": 1}
+
+
+class TestRunLoadtest:
+    """ハーネス全体のテスト"""
+
+    def test_runs_main_pipeline_against_fakes(self, tmp_path):
+        """合成銘柄で実際のmain.pyの処理を実行し、スループット等を出力する"""
+        output = tmp_path / "results.json"
+        completed = subprocess.run(
+            [
+                sys.executable,
+                HARNESS,
+                "--stocks",
+                "8",
+                "--llm-latency",
+                "0",
+                "--tokens-per-second",
+                "0",
+                "--quote-latency",
+                "0",
+                "--news-latency",
+                "0",
+                "--output",
+                str(output),
+                "--rpm",
+                "600",
+                "--workers",
+                "4",
+            ],
+            cwd=tmp_path,
+            capture_output=True,
+            text=True,
+            timeout=120,
+        )
+
+        assert completed.returncode == 0, completed.stdout + completed.stderr
+        report = json.loads(output.read_text(encoding="utf-8"))
+        assert report["stocks"] == 8
+        assert report["stocks_per_minute"] > 0
+        assert report["llm"]["requests"] == 8
+        assert report["llm"]["rpm_limit"] == 600
+        assert report["mails"]["messages"] == 4
+        assert "analyze_with_gemini" in report["stages"]
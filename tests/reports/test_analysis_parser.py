@@ -0,0 +1,136 @@
+"""
+analysis_parserモジュールのテスト
+"""
+
+import os
+import sys
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../..", "src"))
+
+from mails.toc import extract_judgment_from_analysis
+from reports.analysis_parser import ParsedAnalysis, has_hold_judgment, parse_analysis
+from reports.simplifier import _extract_hold_reason, detect_hold_judgment, simplify_hold_report
+from reports.structured_analysis import render_structured_analysis
+
+
+class TestParsedAnalysis:
+    """ParsedAnalysisのテスト"""
+
+    def test_hold_analysis(self):
+        """売買判断・ホールド判断・理由・指値をまとめて取り出す"""
+        parsed = ParsedAnalysis(
+            "## 売買判断: ホールド\n\n"
+            "**推奨指値**: 2,450円\n\n"
+            "理由: 業績は堅調だが割安感が薄れている。株価はレンジ内で推移。\n"
+        )
+        assert parsed.judgment == "ホールド"
+        assert parsed.is_hold is True
+        assert parsed.is_maintain is False
+        assert parsed.reason == "業績は堅調だが割安感が薄れている。"
+        assert parsed.limit_price == 2450
+        assert parsed.structured is False
+
+    def test_buy_analysis(self):
+        """買い判断はホールドではない"""
+        parsed = ParsedAnalysis("売買判断: 買い\n\n推奨する指値価格: $182.5\n")
+        assert parsed.judgment == "買い"
+        assert parsed.is_hold is False
+        assert parsed.limit_price == 182.5
+
+    def test_maintain_analysis(self):
+        """空売りポジションの維持判断"""
+        parsed = ParsedAnalysis("売買判断：維持\n\n理由：下落トレンドが継続している。")
+        assert parsed.judgment == "維持"
+        assert parsed.is_hold is True
+        assert parsed.is_maintain is True
+
+    def test_english_analysis(self):
+        """英語の判断・理由も大文字・小文字を区別せずに取り出す"""
+        parsed = ParsedAnalysis("JUDGMENT: Hold\n\nReason: Margins remain healthy for now.")
+        assert parsed.judgment == "Hold"
+        assert parsed.is_hold is True
+        assert parsed.reason == "Margins remain healthy for now。"
+
+    def test_fallback_formats(self):
+        """プロンプトの形式に従わない出力もフォールバックで取り出す"""
+        assert ParsedAnalysis("**売買判断**: 様子見\n").judgment == "様子見"
+        assert ParsedAnalysis("推奨アクション: 買い増しを推奨します").judgment == "買い増し"
+        assert (
+            ParsedAnalysis("成長が見込めるため、買い増しを推奨します。").judgment
+            == "成長が見込めるため"
+        )
+
+    def test_no_judgment(self):
+        """判断が見つからない場合・空の場合"""
+        for text in ("データが不足しているため分析できませんでした。", "", None):
+            parsed = ParsedAnalysis(text)
+            assert parsed.judgment is None
+            assert parsed.is_hold is False
+            assert parsed.limit_price is None
+
+    def test_structured_analysis(self):
+        """構造化出力モードの分析結果は埋め込まれた値を使い、本文から先頭行を除く"""
+        analysis = render_structured_analysis(
+            {
+                "judgment": "維持",
+                "limit_price": 1200,
+                "reason": "下落余地がある",
+                "markdown_body": "売買判断: 買い（過去の判断）",
+            }
+        )
+        parsed = ParsedAnalysis(analysis)
+        assert parsed.structured is True
+        assert parsed.judgment == "維持"
+        assert parsed.is_hold is True
+        assert parsed.is_maintain is True
+        assert parsed.reason == "下落余地がある。"
+        assert parsed.limit_price == 1200
+        assert parsed.body.startswith("## 売買判断: 維持")
+
+    def test_parse_analysis_reuses_parsed(self):
+        """解析済みの場合は再解析しない"""
+        parsed = ParsedAnalysis("売買判断: 売り")
+        assert parse_analysis(parsed) is parsed
+        assert parse_analysis("売買判断: 売り").judgment == "売り"
+
+
+class TestHasHoldJudgment:
+    """has_hold_judgmentのテスト"""
+
+    def test_keyword_in_judgment_context(self):
+        """判断のラベルの後の行にあるキーワードのみ検出する"""
+        assert has_hold_judgment("売買判断：\n\n  Hold（短期）") is True
+        assert has_hold_judgment("Recommendation: keep HOLDING") is True
+        assert has_hold_judgment("過去にホールドした。\n売買判断: 買い") is False
+        assert has_hold_judgment("売買判断: 買い\n維持費が増加") is False
+        assert has_hold_judgment("") is False
+        assert has_hold_judgment(None) is False
+
+    def test_agrees_with_parsed_analysis(self):
+        """ParsedAnalysis.is_holdと同じ結果を返す"""
+        texts = [
+            "推奨アクション: 保有継続",
+            "## 判断: 様子見",
+            "判断 。現状維持",
+            "アクション:買戻しを推奨します",
+            render_structured_analysis({"judgment": "買い", "markdown_body": "判断: ホールド"}),
+        ]
+        for text in texts:
+            assert has_hold_judgment(text) is ParsedAnalysis(text).is_hold
+
+
+class TestConsumersAgree:
+    """目次生成・レポート簡略化が同じ解析結果を使うことのテスト"""
+
+    def test_consumers_accept_parsed_analysis(self):
+        """各関数はParsedAnalysisを受け取り、テキストの場合と同じ結果を返す"""
+        text = "## 売買判断: 様子見\n\n理由: 決算発表を控えて方向感が出にくい。"
+        parsed = ParsedAnalysis(text)
+
+        assert extract_judgment_from_analysis(parsed) == extract_judgment_from_analysis(text)
+        assert detect_hold_judgment(parsed) is detect_hold_judgment(text) is True
+        assert _extract_hold_reason(parsed) == _extract_hold_reason(text)
+        assert simplify_hold_report("A", "B", parsed, 100, "円") == simplify_hold_report(
+            "A", "B", text, 100, "円"
+        )
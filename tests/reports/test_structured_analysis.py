@@ -0,0 +1,137 @@
+"""
+structured_analysisモジュールのテスト
+"""
+
+import json
+import os
+import sys
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../..", "src"))
+
+from mails.toc import extract_judgment_from_analysis
+from reports.simplifier import _extract_hold_reason, detect_hold_judgment, simplify_hold_report
+from reports.structured_analysis import (
+    STRUCTURED_MARKER,
+    analysis_json_schema,
+    gemini_response_schema,
+    parse_structured_response,
+    read_structured_analysis,
+    render_structured_analysis,
+)
+
+FIELDS = {
+    "judgment": "ホールド",
+    "limit_price": 2500,
+    "reason": "業績は堅調だが株価は適正水準にある",
+    "markdown_body": "### 株価動向\n25日移動平均線付近で推移している。",
+}
+
+
+class TestSchema:
+    """スキーマのテスト"""
+
+    def test_judgment_choices_depend_on_position(self):
+        """空売りポジションでは買戻し・追加売り・維持を選択肢にする"""
+        regular = analysis_json_schema(False)["properties"]["judgment"]["enum"]
+        short = analysis_json_schema(True)["properties"]["judgment"]["enum"]
+        assert "買い増し" in regular and "買戻し" not in regular
+        assert "買戻し" in short and "買い" not in short
+
+    def test_gemini_schema_fields(self):
+        """GeminiのresponseSchemaも同じ項目を必須とする"""
+        schema = gemini_response_schema(True)
+        assert schema["type"] == "OBJECT"
+        assert schema["required"] == analysis_json_schema(True)["required"]
+        assert schema["properties"]["limit_price"]["nullable"] is True
+        assert "維持" in schema["properties"]["judgment"]["enum"]
+
+
+class TestParseStructuredResponse:
+    """parse_structured_responseのテスト"""
+
+    def test_json_string(self):
+        """JSON文字列を値の辞書にする"""
+        assert parse_structured_response(json.dumps(FIELDS, ensure_ascii=False)) == FIELDS
+
+    def test_code_block(self):
+        """コードブロックで囲まれたJSONも解釈する"""
+        text = f"```json\n{json.dumps(FIELDS, ensure_ascii=False)}\n```"
+        assert parse_structured_response(text)["judgment"] == "ホールド"
+
+    def test_dict(self):
+        """Claudeのツール入力（辞書）をそのまま検証する"""
+        fields = parse_structured_response({**FIELDS, "limit_price": None})
+        assert fields["limit_price"] is None
+
+    def test_invalid(self):
+        """JSONでない・売買判断がない場合はNone"""
+        assert parse_structured_response("売買判断: 買い") is None
+        assert parse_structured_response({"reason": "理由"}) is None
+        assert parse_structured_response(["買い"]) is None
+
+    def test_non_numeric_price_is_dropped(self):
+        """指値が数値でない場合はNoneにする"""
+        assert parse_structured_response({**FIELDS, "limit_price": "2500円"})["limit_price"] is None
+
+
+class TestRenderAndRead:
+    """render_structured_analysis / read_structured_analysisのテスト"""
+
+    def test_round_trip(self):
+        """埋め込んだ値を本文を走査せずに読み取れる"""
+        analysis = render_structured_analysis(FIELDS)
+        fields, body = read_structured_analysis(analysis)
+        assert analysis.startswith(STRUCTURED_MARKER)
+        assert fields == {
+            "judgment": "ホールド",
+            "limit_price": 2500,
+            "reason": "業績は堅調だが株価は適正水準にある",
+        }
+        assert body.startswith("## 売買判断: ホールド")
+        assert "**推奨指値**: 2,500" in body
+        assert "**理由**: 業績は堅調だが株価は適正水準にある" in body
+        assert body.rstrip().endswith("25日移動平均線付近で推移している。")
+
+    def test_comment_terminator_in_values(self):
+        """値に「-->」が含まれてもHTMLコメントが途中で閉じない"""
+        analysis = render_structured_analysis({**FIELDS, "reason": "上昇 --> 反落の可能性"})
+        first_line = analysis.split("\n")[0]
+        assert first_line.count("-->") == 1
+        fields, _ = read_structured_analysis(analysis)
+        assert fields["reason"] == "上昇 --> 反落の可能性"
+
+    def test_unstructured_text(self):
+        """構造化出力でない分析結果はそのまま返す"""
+        text = "## 売買判断: 買い\n\n本文"
+        assert read_structured_analysis(text) == (None, text)
+        assert read_structured_analysis("") == (None, "")
+        assert read_structured_analysis(f"{STRUCTURED_MARKER}壊れた値 -->\n本文")[0] is None
+
+
+class TestDownstreamReaders:
+    """目次・レポート簡略化での構造化の値の利用のテスト"""
+
+    def test_toc_reads_judgment(self):
+        """目次の売買判断は埋め込まれた値を使う"""
+        analysis = render_structured_analysis({**FIELDS, "judgment": "買い増し"})
+        assert extract_judgment_from_analysis(analysis) == "買い増し"
+
+    def test_hold_detection_uses_judgment(self):
+        """ホールド判定は本文のキーワードではなく売買判断の値で行う"""
+        buy = render_structured_analysis(
+            {**FIELDS, "judgment": "買い", "markdown_body": "売買判断: ホールドから変更"}
+        )
+        assert detect_hold_judgment(render_structured_analysis(FIELDS)) is True
+        assert detect_hold_judgment(buy) is False
+
+    def test_hold_reason_uses_reason(self):
+        """ホールドの理由は理由の値を使う"""
+        analysis = render_structured_analysis(FIELDS)
+        assert _extract_hold_reason(analysis) == "業績は堅調だが株価は適正水準にある。"
+
+    def test_maintain_label(self):
+        """空売りポジションの維持判断は「維持」として簡略化する"""
+        analysis = render_structured_analysis({**FIELDS, "judgment": "維持"})
+        simplified = simplify_hold_report("AAPL", "Apple", analysis, 150, "ドル")
+        assert simplified.startswith("## 売買判断: 維持")
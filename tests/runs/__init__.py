@@ -0,0 +1,3 @@
+"""
+実行管理モジュールのテスト
+"""
@@ -0,0 +1,156 @@
+"""
+checkpointモジュールのテスト
+"""
+
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../..", "src"))
+
+from runs import checkpoint  # noqa: E402
+from runs.checkpoint import RunCheckpoint, prune_runs  # noqa: E402
+
+STOCK_INFO = {"symbol": "7203.T", "name": "トヨタ"}
+DATA = {"symbol": "7203.T", "price": 2500, "news": ["ニュース"]}
+RESULT = ("holding", "<h1>トヨタ</h1>", {"symbol": "7203.T", "name": "トヨタ", "judgment": "買い"})
+
+
+@pytest.fixture
+def current_run(tmp_path):
+    """テスト用の実行ディレクトリで実行を開始する"""
+    with patch("runs.checkpoint.RUNS_DIR", str(tmp_path)):
+        yield checkpoint.start_run()
+    checkpoint._current_run = None
+
+
+class TestRunCheckpoint:
+    """RunCheckpointクラスのテスト"""
+
+    def test_record_and_load(self, tmp_path):
+        """保存した銘柄の結果を別インスタンス（再開時）から読み込める"""
+        run = RunCheckpoint(str(tmp_path), "run-1")
+        run.record("holding", STOCK_INFO, DATA, "売買判断: 買い", RESULT)
+
+        resumed = RunCheckpoint(str(tmp_path), "run-1")
+        assert resumed.load("7203.T") == RESULT
+        assert resumed.load("AAPL") is None
+
+    def test_failure_is_not_recorded(self, tmp_path):
+        """分析失敗の銘柄は再開時に再分析するため保存されない"""
+        run = RunCheckpoint(str(tmp_path), "run-1")
+        run.record("holding", STOCK_INFO, DATA, "## 分析失敗\n\nエラー", RESULT)
+        assert run.load("7203.T") is None
+
+    def test_no_temporary_files_left(self, tmp_path):
+        """保存後に一時ファイルが残らない"""
+        run = RunCheckpoint(str(tmp_path), "run-1")
+        run.record("holding", STOCK_INFO, DATA, "売買判断: 買い", RESULT)
+        assert os.listdir(os.path.join(run.path, "stocks")) == ["7203.T.json"]
+
+    def test_mail_sent_is_persisted(self, tmp_path):
+        """送信済みのメールが記録され、再開時に参照できる"""
+        RunCheckpoint(str(tmp_path), "run-1").mark_mail_sent("holding")
+        resumed = RunCheckpoint(str(tmp_path), "run-1")
+        assert resumed.mail_sent("holding")
+        assert not resumed.mail_sent("considering_buy")
+
+    def test_prune_runs(self, tmp_path):
+        """古い実行ディレクトリから削除される"""
+        for run_id in ["20260101-000000", "20260102-000000", "20260103-000000"]:
+            RunCheckpoint(str(tmp_path), run_id)
+        prune_runs(str(tmp_path), 2)
+        assert sorted(os.listdir(tmp_path)) == ["20260102-000000", "20260103-000000"]
+
+
+class TestResume:
+    """実行の再開のテスト"""
+
+    def test_resume_unknown_run(self, tmp_path):
+        """存在しない実行IDを指定した場合はエラーになる"""
+        with patch("runs.checkpoint.RUNS_DIR", str(tmp_path)):
+            with pytest.raises(FileNotFoundError):
+                checkpoint.start_run("20260101-070000")
+
+    def test_resume_rejects_malformed_run_id(self, tmp_path):
+        """実行IDの形式ではない値（実行ディレクトリの外を指すパスなど）は使用しない"""
+        (tmp_path / "runs").mkdir()
+        (tmp_path / "x").mkdir()
+        with patch("runs.checkpoint.RUNS_DIR", str(tmp_path / "runs")):
+            for run_id in ("../x", "20260101-070000/..", "/tmp", "missing"):
+                with pytest.raises(ValueError):
+                    checkpoint.start_run(run_id)
+        assert checkpoint.get_current_run() is None
+
+    def test_build_stock_report_records_checkpoint(self, current_run):
+        """レポート生成時に銘柄の途中結果が保存される"""
+        import main
+
+        main.build_stock_report("holding", STOCK_INFO, dict(DATA), "売買判断: 買い\n\n分析")
+        category, report_html, toc = current_run.load("7203.T")
+        assert category == "holding"
+        assert "トヨタ" in report_html
+        assert toc["judgment"] == "買い"
+
+    def test_split_completed_skips_finished_stocks(self, current_run):
+        """完了済みの銘柄は処理対象から除かれ、保存済みのレポートが使われる"""
+        import main
+
+        current_run.record("holding", STOCK_INFO, DATA, "売買判断: 買い", RESULT)
+        categorized = {
+            "holding": [STOCK_INFO],
+            "considering_buy": [{"symbol": "AAPL", "name": "Apple"}],
+        }
+        completed, remaining = main.split_completed(categorized)
+
+        assert completed == [RESULT]
+        assert remaining == {
+            "holding": [],
+            "considering_buy": [{"symbol": "AAPL", "name": "Apple"}],
+        }
+
+    def test_failed_reports_are_incomplete(self, current_run):
+        """分析失敗のレポートは揃ったものとして数えず、再開時に再分析の対象になる"""
+        import main
+
+        failed = main.build_stock_report(
+            "holding", STOCK_INFO, dict(DATA), "## 分析失敗\n\n**エラー内容:** 503"
+        )
+        aapl = {"symbol": "AAPL", "name": "Apple"}
+        ok = main.build_stock_report("holding", aapl, dict(DATA, symbol="AAPL"), "売買判断: 買い")
+
+        assert main.find_incomplete_reports([failed, ok, None], 3) == (2, ["7203.T"])
+        assert main.find_incomplete_reports([ok], 1) == (0, [])
+
+        completed, remaining = main.split_completed({"holding": [STOCK_INFO, aapl]})
+        assert [toc["symbol"] for _, _, toc in completed] == ["AAPL"]
+        assert remaining == {"holding": [STOCK_INFO]}
+
+    def test_sent_mail_is_not_resent(self, current_run):
+        """送信済みの分類のメールは再開時に送信されない"""
+        import main
+
+        current_run.mark_mail_sent("holding")
+        smtp_conf = {
+            "MAIL_FROM": "from@example.com",
+            "SMTP_SERVER": "smtp.example.com",
+            "SMTP_PORT": 587,
+            "SMTP_USER": "user",
+            "SMTP_PASS": "pass",
+        }
+        with (
+            patch("main.MAIL_TO", "to@example.com"),
+            patch("main.get_smtp_config", return_value=smtp_conf),
+            patch("main.send_report_via_mail") as mock_send,
+        ):
+            main.send_category_mails(
+                {"holding": ["<h1>A</h1>"], "considering_buy": ["<h1>B</h1>"]},
+                {"holding": [RESULT[2]], "considering_buy": [RESULT[2]]},
+            )
+
+        assert mock_send.call_count == 1
+        assert "購入検討中の銘柄" in mock_send.call_args.args[0]
+        assert current_run.mail_sent("considering_buy")
@@ -0,0 +1,165 @@
+"""
+metricsモジュールのテスト
+"""
+
+import asyncio
+import json
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../..", "src"))
+
+from runs import metrics  # noqa: E402
+from runs.metrics import (  # noqa: E402
+    build_run_report,
+    format_run_report,
+    format_run_report_footer,
+    measure,
+    record_duration,
+    timed,
+    write_run_report,
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    """テストごとに記録をリセットする"""
+    metrics.reset_metrics()
+    yield
+    metrics.reset_metrics()
+
+
+class TestRecording:
+    """所要時間の記録のテスト"""
+
+    def test_measure_records_even_on_error(self):
+        """例外で終了した場合も所要時間を記録する"""
+        with pytest.raises(ValueError):
+            with measure("fetch_stock_data", "AAPL"):
+                raise ValueError("失敗")
+
+        assert build_run_report()["stages"]["fetch_stock_data"]["count"] == 1
+
+    def test_timed_takes_symbol_from_first_argument(self):
+        """デコレーターは第1引数の銘柄コード・データ辞書から銘柄を取得する"""
+
+        @timed("fetch_stock_data")
+        def fetch(symbol):
+            return symbol
+
+        @timed("analyze_with_gemini")
+        def analyze(data):
+            return data["symbol"]
+
+        assert fetch("7203.T") == "7203.T"
+        assert analyze({"symbol": "AAPL"}) == "AAPL"
+
+        symbols = {entry["symbol"] for entry in build_run_report()["slowest_symbols"]}
+        assert symbols == {"7203.T", "AAPL"}
+
+    def test_timed_supports_async_functions(self):
+        """async関数の所要時間も記録する"""
+
+        @timed("analyze_with_claude")
+        async def analyze(data):
+            await asyncio.sleep(0)
+            return "結果"
+
+        assert asyncio.run(analyze({"symbol": "MSFT"})) == "結果"
+        assert build_run_report()["stages"]["analyze_with_claude"]["count"] == 1
+
+    def test_rate_limiter_records_wait(self):
+        """レートリミッターの待機時間を記録する"""
+        from analyzers.rate_limiter import RateLimiter
+
+        now = [0.0]
+        limiter = RateLimiter(requests_per_minute=1, clock=lambda: now[0])
+        with patch("analyzers.rate_limiter.time.sleep"):
+            limiter.acquire(label="AAPL")
+            limiter.acquire(label="MSFT")
+
+        wait = build_run_report()["rate_limit_wait"]
+        assert wait["count"] == 2
+        assert wait["total_seconds"] == pytest.approx(60.0)
+        assert wait["max_seconds"] == pytest.approx(60.0)
+
+
+class TestBuildRunReport:
+    """build_run_reportのテスト"""
+
+    def test_percentiles_are_per_symbol(self):
+        """p50/p95/最大は銘柄ごとの合計時間の分布になる"""
+        for i in range(1, 21):
+            record_duration("analyze_with_gemini", float(i), f"S{i}")
+        # 同じ銘柄の2回目の記録は合計される
+        record_duration("analyze_with_gemini", 5.0, "S1")
+
+        summary = build_run_report()["stages"]["analyze_with_gemini"]
+        assert summary["count"] == 20
+        assert summary["total_seconds"] == pytest.approx(215.0)
+        assert summary["p50_seconds"] == pytest.approx(10.0)
+        assert summary["p95_seconds"] == pytest.approx(19.0)
+        assert summary["max_seconds"] == pytest.approx(20.0)
+
+    def test_calls_without_symbol_are_counted_individually(self):
+        """銘柄に紐づかない処理は1回ごとに集計する"""
+        record_duration("send_report_via_mail", 1.0)
+        record_duration("send_report_via_mail", 3.0)
+
+        summary = build_run_report()["stages"]["send_report_via_mail"]
+        assert summary["count"] == 2
+        assert summary["max_seconds"] == pytest.approx(3.0)
+        assert build_run_report()["slowest_symbols"] == []
+
+    def test_slowest_symbols_exclude_nested_stages(self):
+        """時間のかかった銘柄の合計には内側のステージ（レート制限の待機など）を含めない"""
+        record_duration("fetch_stock_data", 2.0, "AAPL")
+        record_duration("fetch_news", 1.5, "AAPL")
+        record_duration("analyze_with_gemini", 10.0, "AAPL")
+        record_duration("rate_limit_wait", 8.0, "AAPL")
+        record_duration("fetch_stock_data", 1.0, "MSFT")
+        record_duration("analyze_with_gemini", 3.0, "MSFT")
+        record_duration("fetch_stock_data", 1.0, "NVDA")
+
+        slowest = build_run_report(slowest=2)["slowest_symbols"]
+        assert [entry["symbol"] for entry in slowest] == ["AAPL", "MSFT"]
+        assert slowest[0]["total_seconds"] == pytest.approx(12.0)
+        assert slowest[0]["stages"]["rate_limit_wait"] == pytest.approx(8.0)
+
+    def test_empty_report(self):
+        """記録がない場合も実行レポートを作成できる"""
+        report = build_run_report()
+
+        assert report["stages"] == {}
+        assert report["rate_limit_wait"] is None
+        assert "所要時間" in format_run_report(report)
+
+
+class TestOutput:
+    """実行レポートの出力のテスト"""
+
+    def test_write_run_report(self, tmp_path):
+        """実行レポートをJSONファイルに保存する"""
+        record_duration("fetch_stock_data", 1.0, "AAPL")
+        path = tmp_path / "run" / "run_report.json"
+
+        write_run_report(str(path), build_run_report())
+
+        with open(path, encoding="utf-8") as f:
+            saved = json.load(f)
+        assert saved["stages"]["fetch_stock_data"]["count"] == 1
+        assert saved["slowest_symbols"][0]["symbol"] == "AAPL"
+
+    def test_footer_is_escaped_html(self):
+        """メール末尾のフッターはHTMLエスケープした整形済みテキストになる"""
+        record_duration("<stage>", 1.0, "AAPL")
+
+        footer = format_run_report_footer(build_run_report())
+
+        assert footer.startswith("<hr")
+        assert "&lt;stage&gt;" in footer
+        assert "AAPL 1.0秒" in footer
@@ -0,0 +1,140 @@
+"""
+profilerモジュールのテスト
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import tracemalloc
+from unittest.mock import patch
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../..", "src"))
+
+from runs.profiler import RunProfiler  # noqa: E402
+
+
+def _busy_function():
+    """プロファイルに現れる処理"""
+    return sum(len(str(i)) for i in range(20000))
+
+
+class TestRunProfiler:
+    """RunProfilerのテスト"""
+
+    def test_write_outputs_profile_top_and_memory(self, tmp_path):
+        """プロファイル・累積時間の上位・メモリ使用量を出力する"""
+        with RunProfiler(top=10) as profiler:
+            _busy_function()
+            buffer = bytearray(2 * 1024 * 1024)
+            del buffer
+
+        paths = profiler.write(str(tmp_path / "run"))
+
+        stats = pstats.Stats(paths["profile"])
+        assert any(name == "_busy_function" for _, _, name in stats.stats)
+        with open(paths["top"], encoding="utf-8") as f:
+            assert "_busy_function" in f.read()
+        with open(paths["memory"], encoding="utf-8") as f:
+            memory = json.load(f)
+        assert memory["peak_bytes"] >= 2 * 1024 * 1024
+        assert memory["top_allocations"]
+
+    def test_worker_threads_are_profiled(self, tmp_path):
+        """計測中に開始したワーカースレッドの処理も合算して出力する"""
+        with RunProfiler() as profiler:
+            thread = threading.Thread(target=_busy_function)
+            thread.start()
+            thread.join()
+
+        paths = profiler.write(str(tmp_path))
+
+        stats = pstats.Stats(paths["profile"])
+        assert any(name == "_busy_function" for _, _, name in stats.stats)
+
+    def test_stops_tracemalloc_started_by_profiler(self):
+        """計測のために開始したtracemallocは終了時に停止する"""
+        assert not tracemalloc.is_tracing()
+        with RunProfiler():
+            assert tracemalloc.is_tracing()
+        assert not tracemalloc.is_tracing()
+
+    def test_keeps_existing_tracemalloc(self):
+        """既に開始していたtracemallocは停止しない"""
+        tracemalloc.start()
+        try:
+            with RunProfiler():
+                pass
+            assert tracemalloc.is_tracing()
+        finally:
+            tracemalloc.stop()
+
+
+class TestMainProfile:
+    """main()の--profileのテスト"""
+
+    def test_profile_is_written_even_if_run_exits(self, tmp_path):
+        """実行が途中で終了した場合もプロファイルを出力する"""
+        import main
+
+        def exit_run():
+            _busy_function()
+            sys.exit(1)
+
+        with (
+            patch("main.PROFILE_ENABLED", True),
+            patch("main.PROFILE_DIR", str(tmp_path)),
+            patch("main.parse_cli_args"),
+            patch("main.get_current_run", return_value=None),
+            patch("main.generate_and_send_reports", side_effect=exit_run),
+        ):
+            try:
+                main.main()
+            except SystemExit:
+                pass
+
+        (profile_dir,) = os.listdir(tmp_path)
+        assert sorted(os.listdir(tmp_path / profile_dir)) == [
+            "memory.json",
+            "profile.prof",
+            "profile_top.txt",
+        ]
+
+    def test_import_cost_is_included(self, tmp_path, monkeypatch):
+        """計測開始前に計測したモジュールのインポートもプロファイルに含まれる"""
+        import main
+
+        module_dir = tmp_path / "modules"
+        module_dir.mkdir()
+        (module_dir / "slow_import_module.py").write_text(
+            "def _slow_import_work():\n"
+            "    return sum(len(str(i)) for i in range(20000))\n"
+            "\n"
+            "_slow_import_work()\n",
+            encoding="utf-8",
+        )
+        monkeypatch.syspath_prepend(str(module_dir))
+        monkeypatch.delitem(sys.modules, "slow_import_module", raising=False)
+
+        import_profile = cProfile.Profile()
+        import_profile.enable()
+        import slow_import_module  # noqa: F401
+
+        import_profile.disable()
+
+        with (
+            patch("main.IMPORT_PROFILE", import_profile),
+            patch("main.PROFILE_ENABLED", True),
+            patch("main.PROFILE_DIR", str(tmp_path / "profiles")),
+            patch("main.parse_cli_args"),
+            patch("main.get_current_run", return_value=None),
+            patch("main.generate_and_send_reports"),
+        ):
+            main.main()
+
+        (profile_dir,) = os.listdir(tmp_path / "profiles")
+        stats = pstats.Stats(str(tmp_path / "profiles" / profile_dir / "profile.prof"))
+        assert any(name == "_slow_import_work" for _, _, name in stats.stats)
@@ -0,0 +1,164 @@
+"""
+cliモジュールと銘柄の絞り込み・ドライランのテスト
+"""
+
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from cli import parse_cli_args, rpm_for_provider  # noqa: E402
+
+CATEGORIZED = {
+    "holding": [{"symbol": "7203.T", "name": "トヨタ"}, {"symbol": "AAPL", "name": "Apple"}],
+    "short_selling": [],
+    "considering_buy": [{"symbol": "MSFT", "name": "Microsoft"}],
+    "considering_short_sell": [],
+}
+
+
+class TestParseCliArgs:
+    """parse_cli_argsのテスト"""
+
+    def test_defaults(self):
+        """引数なしの場合は全銘柄・既定値で実行する"""
+        args = parse_cli_args([])
+
+        assert args.claude is False
+        assert args.async_mode is False
+        assert args.batch is False
+        assert args.resume is None
+        assert args.symbols is None
+        assert args.category is None
+        assert args.workers is None
+        assert args.rpm is None
+        assert args.dry_run is False
+        assert args.no_llm is False
+
+    def test_existing_flags(self):
+        """従来のフラグを解析できる"""
+        args = parse_cli_args(["--claude", "--async", "--batch", "--resume", "20250101-000000"])
+
+        assert args.claude is True
+        assert args.async_mode is True
+        assert args.batch is True
+        assert args.resume == "20250101-000000"
+
+    def test_symbols_accept_spaces_and_commas(self):
+        """銘柄コードはスペース区切り・カンマ区切り・複数回指定を受け付ける"""
+        args = parse_cli_args(["--symbols", "7203", "AAPL,MSFT", "--symbols", "NVDA"])
+
+        assert args.symbols == ["7203", "AAPL", "MSFT", "NVDA"]
+
+    def test_category_choices(self):
+        """分類は定義済みのもののみ指定できる"""
+        args = parse_cli_args(["--category", "holding", "considering_buy"])
+        assert args.category == ["holding", "considering_buy"]
+
+        with pytest.raises(SystemExit):
+            parse_cli_args(["--category", "unknown"])
+
+    @pytest.mark.parametrize("value", ["0", "-1", "abc"])
+    def test_workers_must_be_positive(self, value):
+        """ワーカー数は1以上の整数のみ指定できる"""
+        with pytest.raises(SystemExit):
+            parse_cli_args(["--workers", value])
+
+    def test_rpm_applies_to_selected_provider(self):
+        """プロバイダーを省略したRPMは使用するプロバイダーに適用される"""
+        gemini_args = parse_cli_args(["--rpm", "15"])
+        claude_args = parse_cli_args(["--claude", "--rpm", "40"])
+
+        assert rpm_for_provider(gemini_args, "gemini") == 15
+        assert rpm_for_provider(gemini_args, "claude") is None
+        assert rpm_for_provider(claude_args, "claude") == 40
+
+    def test_rpm_per_provider(self):
+        """プロバイダーごとのRPMを指定できる"""
+        args = parse_cli_args(["--rpm", "gemini=15", "--rpm", "claude=40"])
+
+        assert rpm_for_provider(args, "gemini") == 15
+        assert rpm_for_provider(args, "claude") == 40
+
+    def test_rpm_rejects_unknown_provider(self):
+        """未知のプロバイダーのRPMはエラーになる"""
+        with pytest.raises(SystemExit):
+            parse_cli_args(["--rpm", "openai=10"])
+
+    def test_non_strict_ignores_unknown_arguments(self):
+        """strict=Falseの場合は他のプログラムの引数を無視する"""
+        args = parse_cli_args(["-q", "tests/", "--claude", "--help"], strict=False)
+
+        assert args.claude is True
+
+
+class TestFilterStocks:
+    """filter_stocksのテスト"""
+
+    def test_no_filter_keeps_all(self):
+        """絞り込みを指定しない場合は全銘柄を対象とする"""
+        import main
+
+        filtered, unknown = main.filter_stocks(CATEGORIZED)
+
+        assert filtered == CATEGORIZED
+        assert unknown == []
+
+    def test_filter_by_symbols(self):
+        """4桁の数字は日本株として扱い、大文字・小文字は区別しない"""
+        import main
+
+        filtered, unknown = main.filter_stocks(CATEGORIZED, ["7203", "msft", "NVDA"])
+
+        assert filtered["holding"] == [{"symbol": "7203.T", "name": "トヨタ"}]
+        assert filtered["considering_buy"] == [{"symbol": "MSFT", "name": "Microsoft"}]
+        assert unknown == ["NVDA"]
+
+    def test_filter_by_category(self):
+        """指定した分類の銘柄のみを対象とする"""
+        import main
+
+        filtered, _ = main.filter_stocks(CATEGORIZED, categories=["considering_buy"])
+
+        assert filtered["holding"] == []
+        assert filtered["considering_buy"] == CATEGORIZED["considering_buy"]
+        assert set(filtered) == set(CATEGORIZED)
+
+    def test_filter_by_symbols_and_category(self):
+        """銘柄コードと分類の両方に一致する銘柄のみを対象とする"""
+        import main
+
+        filtered, _ = main.filter_stocks(CATEGORIZED, ["AAPL", "MSFT"], ["holding"])
+
+        assert filtered["holding"] == [{"symbol": "AAPL", "name": "Apple"}]
+        assert filtered["considering_buy"] == []
+
+
+class TestDryRun:
+    """--dry-runのテスト"""
+
+    def test_dry_run_does_not_send_mail(self):
+        """ドライランではメール設定がなくても送信内容を表示し、送信しない"""
+        import main
+
+        with (
+            patch("main.DRY_RUN", True),
+            patch("main.MAIL_TO", None),
+            patch("main.get_smtp_config", return_value={"MAIL_FROM": None}),
+            patch("main.send_report_via_mail") as mock_send,
+            patch("main.mark_mail_sent") as mock_mark,
+            patch("builtins.print") as mock_print,
+        ):
+            main.send_category_mails(
+                {"holding": ["<h1>A</h1>"]},
+                {"holding": [{"symbol": "7203.T", "name": "トヨタ", "judgment": "買い"}]},
+            )
+
+        mock_send.assert_not_called()
+        mock_mark.assert_not_called()
+        printed = " ".join(str(call.args[0]) for call in mock_print.call_args_list)
+        assert "ドライラン" in printed
@@ -4,6 +4,7 @@
 main.pyの並列処理実装が正しく動作することを確認します。
 """
 
+import asyncio
 import os
 import sys
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -111,3 +112,370 @@ class TestParallelProcessing:
             future = executor.submit(lambda x: x * 2, 5)
             result = future.result()
             assert result == 10
+
+
+class TestAsyncPipeline:
+    """非同期実行モード（--async）のテスト"""
+
+    def test_run_async_processes_all_stocks(self):
+        """全銘柄が非同期に処理され、分類別に振り分けられることを確認"""
+        import main
+
+        async def fake_fetch(symbol, stock_info, quotes, news_map=None):
+            return {"symbol": symbol, "price": 100, "news": ["ニュース1"]}
+
+        async def fake_analyze(data, preference_prompt):
+            return "売買判断: 買い\n\nテスト分析結果"
+
+        categorized = {
+            "holding": [{"symbol": "TEST1", "name": "テスト1"}],
+            "considering_buy": [
+                {"symbol": "TEST2", "name": "テスト2"},
+                {"symbol": "TEST3", "name": "テスト3"},
+            ],
+        }
+
+        with (
+            patch("main.fetch_stock_data_async", side_effect=fake_fetch),
+            patch("analyzers.ai_analyzer.analyze_with_claude_async", side_effect=fake_analyze),
+            patch("main.USE_CLAUDE", True),
+        ):
+            results = asyncio.run(main.run_async(categorized, {}, "テストプロンプト"))
+
+        categorized_reports, categorized_stock_info = main.collect_reports(results)
+        assert len(categorized_reports["holding"]) == 1
+        assert len(categorized_reports["considering_buy"]) == 2
+        assert categorized_stock_info["holding"][0]["judgment"] == "買い"
+
+    def test_analyze_concurrency_is_bounded_by_semaphore(self):
+        """分析ステージの同時実行数がセマフォの上限を超えないことを確認"""
+        import main
+
+        running = 0
+        max_running = 0
+
+        async def fake_fetch(symbol, stock_info, quotes, news_map=None):
+            return {"symbol": symbol, "price": 100, "news": []}
+
+        async def fake_analyze(data, preference_prompt):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return "売買判断: 買い"
+
+        categorized = {
+            "considering_buy": [{"symbol": f"TEST{i}", "name": f"テスト{i}"} for i in range(10)]
+        }
+
+        with (
+            patch("main.fetch_stock_data_async", side_effect=fake_fetch),
+            patch("analyzers.ai_analyzer.analyze_with_claude_async", side_effect=fake_analyze),
+            patch("main.USE_CLAUDE", True),
+            patch("main.ASYNC_ANALYZE_CONCURRENCY", 3),
+        ):
+            results = asyncio.run(main.run_async(categorized, {}, "テストプロンプト"))
+
+        assert len([r for r in results if r]) == 10
+        assert max_running <= 3
+
+    def test_failed_stock_does_not_stop_others(self):
+        """1銘柄の失敗が他の銘柄の処理を止めないことを確認"""
+        import main
+
+        async def fake_fetch(symbol, stock_info, quotes, news_map=None):
+            if symbol == "FAIL":
+                raise ValueError("テストエラー")
+            return {"symbol": symbol, "price": 100, "news": []}
+
+        async def fake_analyze(data, preference_prompt):
+            return "売買判断: 買い"
+
+        categorized = {
+            "considering_buy": [
+                {"symbol": "FAIL", "name": "失敗"},
+                {"symbol": "OK", "name": "成功"},
+            ]
+        }
+
+        with (
+            patch("main.fetch_stock_data_async", side_effect=fake_fetch),
+            patch("analyzers.ai_analyzer.analyze_with_claude_async", side_effect=fake_analyze),
+            patch("main.USE_CLAUDE", True),
+        ):
+            results = asyncio.run(main.run_async(categorized, {}, "テストプロンプト"))
+
+        assert results[0] is None
+        assert results[1] is not None
+
+
+class TestBatchApiPipeline:
+    """バッチAPIモード（--batch）のテスト"""
+
+    def test_run_batch_api_with_local_backend(self):
+        """ローカル代替のバッチAPIで全銘柄のレポートが生成されることを確認"""
+        import main
+        from analyzers.batch_api import LocalBatchBackend
+
+        def fake_fetch(symbol, stock_info, quotes, news_map=None):
+            return {"symbol": symbol, "price": 100, "news": ["ニュース1"]}
+
+        categorized = {
+            "holding": [{"symbol": "TEST1", "name": "テスト1"}],
+            "considering_buy": [
+                {"symbol": "TEST2", "name": "テスト2"},
+                {"symbol": "TEST3", "name": "テスト3"},
+            ],
+        }
+        backend = LocalBatchBackend(
+            lambda static_prefix, prompt: "売買判断: 買い\n\nテスト分析結果"
+        )
+
+        with (
+            patch("main.fetch_stock_data", side_effect=fake_fetch),
+            patch("analyzers.batch_api.BATCH_POLL_INTERVAL_SECONDS", 0),
+        ):
+            results = main.run_batch_api(categorized, {}, "テストプロンプト", backend=backend)
+
+        categorized_reports, categorized_stock_info = main.collect_reports(results)
+        assert len(categorized_reports["holding"]) == 1
+        assert len(categorized_reports["considering_buy"]) == 2
+        assert categorized_stock_info["considering_buy"][0]["judgment"] == "買い"
+
+
+class TestStagedPipeline:
+    """ステージ分割したパイプライン実行（run_pipeline）のテスト"""
+
+    CATEGORIZED = {
+        "holding": [{"symbol": "TEST1", "name": "テスト1"}],
+        "considering_buy": [{"symbol": f"TEST{i}", "name": f"テスト{i}"} for i in range(2, 7)],
+    }
+
+    def test_run_pipeline_processes_all_stocks(self):
+        """全銘柄が各ステージを通過し、分類別に振り分けられることを確認"""
+        import main
+
+        def fake_fetch(symbol, stock_info, quotes, news_map=None):
+            return {"symbol": symbol, "price": 100, "news": ["ニュース1"]}
+
+        with (
+            patch("main.fetch_stock_data", side_effect=fake_fetch),
+            patch(
+                "analyzers.ai_analyzer.analyze_with_claude",
+                return_value="売買判断: 買い\n\nテスト分析結果",
+            ),
+            patch("main.USE_CLAUDE", True),
+        ):
+            results = main.run_pipeline(self.CATEGORIZED, {}, "テストプロンプト")
+
+        categorized_reports, categorized_stock_info = main.collect_reports(results)
+        assert len(categorized_reports["holding"]) == 1
+        assert len(categorized_reports["considering_buy"]) == 5
+        assert categorized_stock_info["holding"][0]["judgment"] == "買い"
+
+    def test_fetch_finishes_while_analysis_is_blocked(self):
+        """分析ステージが待機している間も全銘柄の取得が完了することを確認"""
+        import threading
+
+        import main
+
+        fetched = []
+        all_fetched = threading.Event()
+
+        def fake_fetch(symbol, stock_info, quotes, news_map=None):
+            fetched.append(symbol)
+            if len(fetched) == 6:
+                all_fetched.set()
+            return {"symbol": symbol, "price": 100, "news": []}
+
+        def fake_analyze(data, preference_prompt):
+            # レート制限の待機を模擬: 全銘柄の取得が終わるまで分析を進めない
+            assert all_fetched.wait(timeout=5)
+            return "売買判断: 買い"
+
+        with (
+            patch("main.fetch_stock_data", side_effect=fake_fetch),
+            patch("analyzers.ai_analyzer.analyze_with_claude", side_effect=fake_analyze),
+            patch("main.USE_CLAUDE", True),
+            patch("main.PIPELINE_FETCH_WORKERS", 2),
+            patch("main.PIPELINE_ANALYZE_WORKERS", 1),
+        ):
+            results = main.run_pipeline(self.CATEGORIZED, {}, "テストプロンプト")
+
+        assert len([r for r in results if r]) == 6
+
+    def test_bounded_queue_and_failures(self):
+        """キューの上限が小さくても、失敗した銘柄があっても処理が完了することを確認"""
+        import main
+
+        def fake_fetch(symbol, stock_info, quotes, news_map=None):
+            if symbol == "TEST3":
+                raise ValueError("テストエラー")
+            return {"symbol": symbol, "price": 100, "news": []}
+
+        with (
+            patch("main.fetch_stock_data", side_effect=fake_fetch),
+            patch("analyzers.ai_analyzer.analyze_with_claude", return_value="売買判断: 買い"),
+            patch("main.USE_CLAUDE", True),
+            patch("main.PIPELINE_QUEUE_SIZE", 1),
+        ):
+            results = main.run_pipeline(self.CATEGORIZED, {}, "テストプロンプト")
+
+        assert len(results) == 6
+        assert len([r for r in results if r]) == 5
+
+
+class TestTriageMode:
+    """トリアージモードのテスト"""
+
+    DATA = {"symbol": "TEST1", "price": 100, "news": ["ニュース1"]}
+    HOLD = "売買判断: ホールド\n理由: 業績は堅調だが株価は適正水準にある。"
+
+    def test_hold_skips_full_analysis(self):
+        """ホールド判断の銘柄は詳細な分析を行わず、トリアージの結果を使う"""
+        import main
+
+        with (
+            patch(
+                "analyzers.ai_analyzer.triage_with_claude", return_value=self.HOLD
+            ) as mock_triage,
+            patch("analyzers.ai_analyzer.analyze_with_claude") as mock_analyze,
+            patch("main.USE_CLAUDE", True),
+            patch("main.TRIAGE_MODE", True),
+            patch("main.SIMPLIFY_HOLD_REPORTS", True),
+        ):
+            analysis, carried_over = main.analyze_stock(dict(self.DATA), "テストプロンプト")
+            _, report_html, info = main.build_stock_report(
+                "holding", {"symbol": "TEST1", "name": "テスト1"}, dict(self.DATA), analysis
+            )
+
+        mock_triage.assert_called_once()
+        mock_analyze.assert_not_called()
+        assert analysis == self.HOLD
+        assert carried_over is None
+        assert info["judgment"] == "ホールド"
+        assert "業績は堅調だが株価は適正水準にある。" in report_html
+
+    def test_actionable_judgment_gets_full_analysis(self):
+        """ホールド以外の判断・トリアージの失敗時は詳細な分析を行う"""
+        import main
+
+        for triage in ("売買判断: 買い\n理由: 増益が続いている。", "## 分析失敗\n\n詳細"):
+            with (
+                patch("analyzers.ai_analyzer.triage_with_gemini", return_value=triage),
+                patch(
+                    "analyzers.ai_analyzer.analyze_with_gemini",
+                    return_value="売買判断: 買い\n\n詳細",
+                ) as full,
+                patch("main.USE_CLAUDE", False),
+                patch("main.TRIAGE_MODE", True),
+                patch("main.SIMPLIFY_HOLD_REPORTS", True),
+            ):
+                analysis, _ = main.analyze_stock(dict(self.DATA), "テストプロンプト")
+
+            full.assert_called_once()
+            assert analysis == "売買判断: 買い\n\n詳細"
+
+    def test_disabled_without_simplified_reports(self):
+        """レポート簡略化が無効の場合はトリアージを行わない"""
+        import main
+
+        with (
+            patch("analyzers.ai_analyzer.triage_with_claude") as mock_triage,
+            patch("analyzers.ai_analyzer.analyze_with_claude", return_value="売買判断: ホールド"),
+            patch("main.USE_CLAUDE", True),
+            patch("main.TRIAGE_MODE", True),
+            patch("main.SIMPLIFY_HOLD_REPORTS", False),
+        ):
+            main.analyze_stock(dict(self.DATA), "テストプロンプト")
+
+        mock_triage.assert_not_called()
+
+    def test_async_triage(self):
+        """非同期実行モードでもホールド判断の銘柄は詳細な分析を省略する"""
+        import main
+
+        async def fake_triage(data, preference_prompt):
+            return self.HOLD if data["symbol"] == "TEST1" else "売買判断: 売り"
+
+        async def fake_analyze(data, preference_prompt):
+            return "売買判断: 売り\n\n詳細"
+
+        with (
+            patch("analyzers.ai_analyzer.triage_with_claude_async", side_effect=fake_triage),
+            patch(
+                "analyzers.ai_analyzer.analyze_with_claude_async", side_effect=fake_analyze
+            ) as full,
+            patch("main.USE_CLAUDE", True),
+            patch("main.TRIAGE_MODE", True),
+            patch("main.SIMPLIFY_HOLD_REPORTS", True),
+        ):
+            hold, _ = asyncio.run(main.analyze_stock_async(dict(self.DATA), "テスト"))
+            sell, _ = asyncio.run(
+                main.analyze_stock_async({**self.DATA, "symbol": "TEST2"}, "テスト")
+            )
+
+        assert hold == self.HOLD
+        assert sell == "売買判断: 売り\n\n詳細"
+        assert full.call_count == 1
+
+
+class TestProviderFailover:
+    """プロバイダーのフェイルオーバーのテスト"""
+
+    DATA = {"symbol": "TEST1", "price": 100, "news": ["ニュース1"]}
+
+    def test_failed_stock_is_retried_on_claude(self):
+        """Geminiで分析に失敗した銘柄はClaudeで再分析する"""
+        import main
+
+        with (
+            patch("analyzers.ai_analyzer.analyze_with_gemini", return_value="## 分析失敗\n\n503"),
+            patch(
+                "analyzers.ai_analyzer.analyze_with_claude", return_value="売買判断: 買い"
+            ) as mock_claude,
+            patch("analyzers.providers.ANALYSIS_FAILOVER", True),
+            patch("analyzers.providers.CLAUDE_API_KEY", "key"),
+            patch("main.USE_CLAUDE", False),
+            patch("main.TRIAGE_MODE", False),
+        ):
+            analysis, _ = main.analyze_stock(dict(self.DATA), "テストプロンプト")
+
+        mock_claude.assert_called_once()
+        assert analysis == "売買判断: 買い"
+
+    def test_failover_shares_symbol_deadline(self):
+        """フェイルオーバー先の呼び出しも銘柄ごとに1つのリトライの期限を共有する"""
+        import main
+        from analyzers import retry
+
+        deadlines = []
+
+        def record_deadline(result):
+            def fake_analyze(data, preference_prompt=None):
+                deadlines.append(retry._deadline_at.get())
+                return result
+
+            return fake_analyze
+
+        with (
+            patch(
+                "analyzers.ai_analyzer.analyze_with_gemini",
+                side_effect=record_deadline("## 分析失敗\n\n503"),
+            ),
+            patch(
+                "analyzers.ai_analyzer.analyze_with_claude",
+                side_effect=record_deadline("売買判断: 買い"),
+            ),
+            patch("analyzers.providers.ANALYSIS_FAILOVER", True),
+            patch("analyzers.providers.CLAUDE_API_KEY", "key"),
+            patch("main.USE_CLAUDE", False),
+            patch("main.TRIAGE_MODE", False),
+        ):
+            main.analyze_stock(dict(self.DATA), "テストプロンプト")
+
+        assert len(deadlines) == 2
+        assert deadlines[0] is not None
+        assert deadlines[0] == deadlines[1]
+        assert retry._deadline_at.get() is None
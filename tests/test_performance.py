@@ -56,10 +56,10 @@ class TestPreferenceLoadingOptimization:
         # ai_analyzerをここでインポート（defeatbeta-apiのモック後、APIキー設定後）
         from analyzers.ai_analyzer import analyze_with_claude
 
-        with patch("analyzers.ai_analyzer.anthropic.Anthropic") as mock_anthropic:
+        with patch("analyzers.ai_analyzer.get_anthropic_client") as mock_get_client:
             # モックの設定
             mock_client = MagicMock()
-            mock_anthropic.return_value = mock_client
+            mock_get_client.return_value = mock_client
             mock_message = MagicMock()
             mock_message.content = [MagicMock(text="テスト分析結果")]
             mock_client.messages.create.return_value = mock_message
@@ -107,8 +107,9 @@ class TestPreferenceLoadingOptimization:
         # ai_analyzerをここでインポート（defeatbeta-apiのモック後）
         from analyzers.ai_analyzer import analyze_with_gemini
 
-        with patch("analyzers.ai_analyzer.requests.post") as mock_post:
+        with patch("analyzers.ai_analyzer.get_session") as mock_get_session:
             # モックの設定
+            mock_post = mock_get_session.return_value.post
             mock_response = MagicMock()
             mock_response.status_code = 200
             mock_response.json.return_value = {
@@ -159,10 +160,10 @@ class TestPreferenceLoadingOptimization:
         # ai_analyzerをここでインポート（defeatbeta-apiのモック後）
         from analyzers.ai_analyzer import analyze_with_claude
 
-        with patch("analyzers.ai_analyzer.anthropic.Anthropic") as mock_anthropic:
+        with patch("analyzers.ai_analyzer.get_anthropic_client") as mock_get_client:
             # モックの設定
             mock_client = MagicMock()
-            mock_anthropic.return_value = mock_client
+            mock_get_client.return_value = mock_client
             mock_message = MagicMock()
             mock_message.content = [MagicMock(text="テスト分析結果")]
             mock_client.messages.create.return_value = mock_message